@@ -0,0 +1,129 @@
+##########alloc_benchmark.py: 帧处理热路径内存分配基准测试 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建逐帧分配与缓冲区复用的分配量对比]########
+# 输入: [分辨率列表，帧数] | 输出: [每帧新分配内存峰值和耗时对比]###############
+
+
+###########################文件下的所有函数###########################
+"""
+main：基准测试入口，解析命令行参数并输出对比结果
+process_frame_allocating：逐帧新建数组的参考实现(缓冲区复用前的做法)
+measure_allocations：用tracemalloc测量每帧的内存分配
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[main] --> B[create_synthetic_frame生成测试帧]
+    A --> C[measure_allocations]
+    C --> D[process_frame_allocating逐帧分配]
+    C --> E[WatermarkRemover.process_frame缓冲区复用]
+    C --> F[tracemalloc统计每帧新增内存峰值]
+    A --> G[打印对比表并写出JSON]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_videos import RESOLUTIONS, create_synthetic_frame
+from watermark_remover import WatermarkRemover
+
+
+def process_frame_allocating(remover: WatermarkRemover, frame: np.ndarray) -> np.ndarray:
+    """
+    process_frame_allocating 功能说明:
+    # 逐帧新建灰度图、二值图、掩码并每帧构建膨胀核的参考实现，作为对比基线
+    # 输入: [remover: WatermarkRemover 提供参数, frame: np.ndarray 输入帧] | 输出: [np.ndarray 处理后的帧]
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, remover.threshold, 255, cv2.THRESH_BINARY)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, remover.kernel, iterations=remover.iterations)
+    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, remover.kernel, iterations=remover.iterations)
+    dilate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (remover.kernel_size + 2, remover.kernel_size + 2))
+    mask = cv2.dilate(binary, dilate_kernel, iterations=2)
+    if np.sum(mask) < 100:
+        return frame
+    return cv2.inpaint(frame, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
+
+
+def measure_allocations(process_func: Callable[[np.ndarray], np.ndarray], frames: List[np.ndarray]) -> dict:
+    """
+    measure_allocations 功能说明:
+    # 先处理一帧预热(创建缓冲区)，再用tracemalloc统计其余各帧处理期间新增内存的峰值(含随后释放的中间数组)和耗时
+    # 输入: [process_func: Callable 帧处理函数, frames: List[np.ndarray] 测试帧] | 输出: [dict 每帧平均统计]
+    """
+    process_func(frames[0])
+
+    peak_bytes = 0
+    elapsed = 0.0
+    tracemalloc.start()
+    try:
+        for frame in frames[1:]:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            result = process_func(frame)
+            elapsed += time.perf_counter() - start
+            peak_bytes += tracemalloc.get_traced_memory()[1] - baseline
+            del result
+    finally:
+        tracemalloc.stop()
+
+    count = len(frames) - 1
+    return {
+        'peak_alloc_mb_per_frame': round(peak_bytes / count / 1024 / 1024, 3),
+        'ms_per_frame': round(elapsed / count * 1000, 3)
+    }
+
+
+def main():
+    """
+    main 功能说明:
+    # 基准测试入口：对每个分辨率比较逐帧分配实现与缓冲区复用实现的每帧分配量
+    # 输入: [命令行参数] | 输出: [无，打印对比表，可选写出JSON]
+    """
+    parser = argparse.ArgumentParser(description='帧处理热路径内存分配基准测试')
+    parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS),
+                        help='测试分辨率 (默认: 全部)')
+    parser.add_argument('--frames', type=int, default=10, help='每个分辨率的测试帧数 (默认: 10)')
+    parser.add_argument('--output', '-o', help='JSON结果文件路径')
+    args = parser.parse_args()
+
+    remover = WatermarkRemover(stage_timing=False)
+    results = []
+
+    print(f"{'分辨率':<8}{'实现':<14}{'新增内存峰值MB/帧':>18}{'耗时ms/帧':>12}")
+    for resolution in args.resolutions:
+        width, height = RESOLUTIONS[resolution]
+        background = np.random.default_rng(0).integers(0, 24, (height, width, 3), dtype=np.uint8)
+        frames = [create_synthetic_frame(background, i) for i in range(max(2, args.frames))]
+
+        for name, func in (('allocating', lambda frame: process_frame_allocating(remover, frame)),
+                           ('buffered', remover.process_frame)):
+            stats = measure_allocations(func, frames)
+            stats.update({'resolution': resolution, 'implementation': name})
+            results.append(stats)
+            print(f"{resolution:<8}{name:<14}{stats['peak_alloc_mb_per_frame']:>18}{stats['ms_per_frame']:>12}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
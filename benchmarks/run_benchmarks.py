@@ -0,0 +1,263 @@
+##########run_benchmarks.py: 去水印性能基准测试脚本 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按分辨率、预设、执行模式组合的基准测试]########
+# 输入: [分辨率列表，预设列表，执行模式列表，帧数] | 输出: [帧率、分阶段耗时、峰值内存的JSON结果文件]###############
+
+
+###########################文件下的所有函数###########################
+"""
+main：基准测试入口，解析命令行参数并运行所有组合
+run_benchmark_case：在独立子进程中运行单个组合并收集结果
+_run_case_in_child：子进程入口，处理合成视频并测量耗时和内存
+_get_peak_rss_mb：读取当前进程及子进程的峰值常驻内存
+_get_git_commit：获取当前代码的git提交号
+collect_environment：收集运行环境信息
+print_results_table：打印结果汇总表
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[main] --> B[ensure_synthetic_video生成合成视频]
+    A --> C[遍历 分辨率 × 预设 × 执行模式]
+    C --> D[run_benchmark_case]
+    D --> E[spawn子进程 _run_case_in_child]
+    E --> F[WatermarkRemover.from_config]
+    F --> G[remove_video_watermark]
+    G --> H[get_stage_stats分阶段耗时]
+    E --> I[_get_peak_rss_mb峰值内存]
+    A --> J[collect_environment]
+    J --> K[_get_git_commit]
+    A --> L[写出JSON结果]
+    A --> M[print_results_table]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_videos import RESOLUTIONS, ensure_synthetic_video, get_logo_area
+from config.config import PRESET_CONFIGS, get_preset_config
+from utils.frame_pipeline import EXECUTION_MODES
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，不统计峰值内存
+    resource = None
+
+
+def _get_peak_rss_mb() -> Dict[str, Optional[float]]:
+    """
+    _get_peak_rss_mb 功能说明:
+    # 读取当前进程和已结束子进程中的峰值常驻内存(MB)，不支持的平台返回None
+    # 输入: [无] | 输出: [Dict self为当前进程峰值, children为最大子进程峰值]
+    """
+    if resource is None:
+        return {'self': None, 'children': None}
+
+    # Linux下ru_maxrss单位为KB，macOS下为字节
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        'children': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1)
+    }
+
+
+def _run_case_in_child(result_queue, video_path: str, config: dict, verbose: bool) -> None:
+    """
+    _run_case_in_child 功能说明:
+    # 子进程入口：按配置处理合成视频，测量总耗时、分阶段耗时和峰值内存，结果放入队列
+    # 输入: [result_queue: Queue 结果队列, video_path: str 合成视频路径, config: dict 处理配置,
+    #        verbose: bool 是否输出处理过程] | 输出: [无，结果放入队列]
+    """
+    sys.path.insert(0, PROJECT_ROOT)
+    from watermark_remover import WatermarkRemover
+
+    try:
+        output_path = video_path.replace(".mp4", f".{os.getpid()}.out.mp4")
+        remover = WatermarkRemover.from_config(config)
+
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                stack.enter_context(contextlib.redirect_stderr(io.StringIO()))
+            start = time.perf_counter()
+            success = remover.remove_video_watermark(video_path, output_path)
+            elapsed = time.perf_counter() - start
+
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        result_queue.put({
+            'success': bool(success),
+            'elapsed_s': round(elapsed, 4),
+            'stage_stats': remover.get_stage_stats(),
+            'peak_rss_mb': _get_peak_rss_mb()
+        })
+
+    except Exception as e:
+        result_queue.put({'success': False, 'error': str(e)})
+
+
+def run_benchmark_case(video_path: str, frame_count: int, config: dict, verbose: bool = False) -> dict:
+    """
+    run_benchmark_case 功能说明:
+    # 在新的spawn子进程中运行单个组合，保证各组合的峰值内存互不影响
+    # 输入: [video_path: str 合成视频路径, frame_count: int 帧数, config: dict 处理配置,
+    #        verbose: bool 是否输出处理过程] | 输出: [dict 单个组合的测试结果]
+    """
+    context = multiprocessing.get_context('spawn')
+    result_queue = context.Queue()
+    process = context.Process(target=_run_case_in_child, args=(result_queue, video_path, config, verbose))
+    process.start()
+    try:
+        while True:
+            try:
+                result = result_queue.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    result = {'success': False, 'error': f"子进程异常退出，退出码: {process.exitcode}"}
+                    break
+    finally:
+        process.join()
+
+    if result.get('success'):
+        result['fps'] = round(frame_count / result['elapsed_s'], 2) if result['elapsed_s'] > 0 else None
+    return result
+
+
+def _get_git_commit() -> Optional[str]:
+    """
+    _get_git_commit 功能说明:
+    # 获取当前代码的git提交号，不在git仓库中时返回None
+    # 输入: [无] | 输出: [Optional[str] 提交号]
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def collect_environment() -> dict:
+    """
+    collect_environment 功能说明:
+    # 收集运行环境信息，便于跨提交、跨机器比较结果
+    # 输入: [无] | 输出: [dict 环境信息]
+    """
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _get_git_commit(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def print_results_table(results: List[dict]) -> None:
+    """
+    print_results_table 功能说明:
+    # 打印各组合的帧率、耗时最长阶段和峰值内存汇总表
+    # 输入: [results: List[dict] 测试结果列表] | 输出: [无，打印表格]
+    """
+    print(f"\n{'分辨率':<8}{'预设':<10}{'执行模式':<10}{'帧率':>10}{'最慢阶段':>14}{'峰值内存(MB)':>14}")
+    for item in results:
+        if not item.get('success'):
+            print(f"{item['resolution']:<8}{item['preset']:<10}{item['execution_mode']:<10}"
+                  f"  ❌ {item.get('error', '处理失败')}")
+            continue
+
+        stages = item['stage_stats']
+        slowest = max(stages, key=lambda name: stages[name]['total_ms']) if stages else '-'
+        rss = item['peak_rss_mb']['self']
+        print(f"{item['resolution']:<8}{item['preset']:<10}{item['execution_mode']:<10}"
+              f"{item['fps']:>10.2f}{slowest:>14}{rss if rss is not None else '-':>14}")
+
+
+def main():
+    """
+    main 功能说明:
+    # 基准测试入口：生成合成视频，逐个运行 分辨率 × 预设 × 执行模式 组合，写出JSON结果
+    # 输入: [命令行参数] | 输出: [JSON结果文件路径]
+    """
+    parser = argparse.ArgumentParser(description='视频去水印性能基准测试')
+    parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS),
+                        help='测试分辨率 (默认: 全部)')
+    parser.add_argument('--presets', nargs='+', choices=list(PRESET_CONFIGS), default=list(PRESET_CONFIGS),
+                        help='测试预设 (默认: 全部)')
+    parser.add_argument('--modes', nargs='+', choices=list(EXECUTION_MODES), default=list(EXECUTION_MODES),
+                        help='测试执行模式 (默认: 全部)')
+    parser.add_argument('--frames', type=int, default=30, help='每个合成视频的帧数 (默认: 30)')
+    parser.add_argument('--workers', type=int, default=0, help='并行工作数 (默认: CPU核心数)')
+    parser.add_argument('--video-dir', default=os.path.join(PROJECT_ROOT, 'temp', 'benchmark_videos'),
+                        help='合成视频缓存目录')
+    parser.add_argument('--output', '-o', help='JSON结果文件路径 (默认: benchmarks/results/下按时间命名)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='输出每个组合的处理过程')
+    args = parser.parse_args()
+
+    environment = collect_environment()
+    results = []
+
+    for resolution in args.resolutions:
+        video_path = ensure_synthetic_video(args.video_dir, resolution, args.frames)
+        width, height = RESOLUTIONS[resolution]
+
+        for preset in args.presets:
+            for mode in args.modes:
+                config = get_preset_config(preset)
+                config['execution_mode'] = mode
+                config['workers'] = args.workers
+
+                print(f"⏱️  {resolution} / {preset} / {mode} ...")
+                result = run_benchmark_case(video_path, args.frames, config, args.verbose)
+                result.update({
+                    'resolution': resolution,
+                    'width': width,
+                    'height': height,
+                    'frames': args.frames,
+                    'logo_area': get_logo_area(width, height),
+                    'preset': preset,
+                    'execution_mode': mode,
+                    'workers': args.workers
+                })
+                results.append(result)
+
+    output_path = args.output
+    if not output_path:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(PROJECT_ROOT, 'benchmarks', 'results',
+                                   f"benchmark_{stamp}_{environment['git_commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment, 'results': results}, f, ensure_ascii=False, indent=2)
+
+    print_results_table(results)
+    print(f"\n📄 结果已保存: {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    main()
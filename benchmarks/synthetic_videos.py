@@ -0,0 +1,115 @@
+##########synthetic_videos.py: 基准测试合成视频生成模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建可复现的带已知水印合成视频生成]########
+# 输入: [分辨率名称，帧数，输出目录] | 输出: [带已知水印的合成视频文件，水印区域]###############
+
+
+###########################文件下的所有函数###########################
+"""
+get_logo_area：计算指定分辨率下合成水印所在区域
+create_synthetic_frame：生成单帧带水印的合成画面
+create_synthetic_video：生成带水印的合成视频
+ensure_synthetic_video：按分辨率和帧数复用或生成合成视频
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[ensure_synthetic_video] --> B{视频文件已存在}
+    B -->|是| C[直接复用]
+    B -->|否| D[create_synthetic_video]
+    D --> E[create_synthetic_frame逐帧生成]
+    E --> F[get_logo_area水印区域]
+    D --> G[写出mp4v视频]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+# 基准测试分辨率 (宽, 高)
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160)
+}
+
+# 合成视频帧率
+SYNTHETIC_FPS = 25
+
+# 背景最大亮度，低于所有预设阈值，保证只有水印被检测
+_BACKGROUND_MAX = 24
+
+
+def get_logo_area(width: int, height: int) -> Tuple[int, int, int, int]:
+    """
+    get_logo_area 功能说明:
+    # 计算合成水印所在区域，位于右上角，尺寸随分辨率等比缩放
+    # 输入: [width: int 画面宽度, height: int 画面高度] | 输出: [Tuple[int, int, int, int] (x1, y1, x2, y2)]
+    """
+    scale = height / 360
+    x1 = width - int(200 * scale)
+    y1 = int(10 * scale)
+    return x1, y1, width - int(10 * scale), y1 + int(60 * scale)
+
+
+def create_synthetic_frame(background: np.ndarray, index: int) -> np.ndarray:
+    """
+    create_synthetic_frame 功能说明:
+    # 将背景纹理按帧序号平移生成运动画面，并在右上角叠加白色"LOGO"水印
+    # 输入: [background: np.ndarray 背景纹理, index: int 帧序号] | 输出: [np.ndarray 合成帧]
+    """
+    height, width = background.shape[:2]
+    frame = np.roll(background, shift=(index * 2, index * 3), axis=(0, 1))
+
+    x1, y1, x2, y2 = get_logo_area(width, height)
+    scale = height / 360
+    cv2.putText(frame, "LOGO", (x1 + int(10 * scale), y2 - int(12 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                1.5 * scale, (255, 255, 255), max(1, int(4 * scale)))
+    return frame
+
+
+def create_synthetic_video(video_path: str, width: int, height: int, frame_count: int, seed: int = 0) -> None:
+    """
+    create_synthetic_video 功能说明:
+    # 生成带已知水印的合成视频，相同参数和随机种子生成的画面完全一致
+    # 输入: [video_path: str 输出路径, width: int 宽度, height: int 高度, frame_count: int 帧数,
+    #        seed: int 随机种子] | 输出: [无，写出视频文件]
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, _BACKGROUND_MAX, (height, width, 3), dtype=np.uint8)
+
+    out = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), SYNTHETIC_FPS, (width, height))
+    if not out.isOpened():
+        raise IOError(f"无法创建合成视频文件: {video_path}")
+
+    try:
+        for i in range(frame_count):
+            out.write(create_synthetic_frame(background, i))
+    finally:
+        out.release()
+
+
+def ensure_synthetic_video(video_dir: str, resolution: str, frame_count: int) -> str:
+    """
+    ensure_synthetic_video 功能说明:
+    # 返回指定分辨率和帧数的合成视频路径，文件不存在时生成
+    # 输入: [video_dir: str 视频目录, resolution: str 分辨率名称(480p/1080p/4k), frame_count: int 帧数] | 输出: [str 视频路径]
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"未知的分辨率: {resolution}")
+
+    width, height = RESOLUTIONS[resolution]
+    os.makedirs(video_dir, exist_ok=True)
+    video_path = os.path.join(video_dir, f"synthetic_{resolution}_{frame_count}f.mp4")
+    if not os.path.exists(video_path):
+        print(f"🎞️  生成合成视频: {video_path}")
+        # 先写入临时文件再改名，避免中断后留下不完整的视频被复用
+        partial_path = video_path.replace(".mp4", ".partial.mp4")
+        create_synthetic_video(partial_path, width, height, frame_count)
+        os.replace(partial_path, video_path)
+
+    return video_path
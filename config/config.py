@@ -1,5 +1,24 @@
 ##########config.py: 配置管理模块 ##################
 # 变更记录: [2025-06-25] @李祥光 [初始创建配置文件]########
+# 变更记录: [2026-10-18] @李祥光 [新增静态水印掩码参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增并行帧流水线执行模式参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增长视频分段并行处理参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增未变化区域缓存参数]########
+# 变更记录: [2026-10-18] @李祥光 [batch_size用于按批堆叠检测]########
+# 变更记录: [2026-10-18] @李祥光 [新增分阶段计时开关]########
+# 变更记录: [2026-10-18] @李祥光 [新增检测缩放比例参数，快速预设使用缩小检测]########
+# 变更记录: [2026-10-18] @李祥光 [新增自适应掩码模式的刷新间隔和镜头切换阈值参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增断点续处理分段帧数参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增批量处理并行文件数参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增结果缓存参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增填充模式参数，各预设分别指定]########
+# 变更记录: [2026-10-18] @李祥光 [新增定位索引开关]########
+# 变更记录: [2026-10-18] @李祥光 [新增监视文件夹模式的轮询、稳定等待和统计日志间隔参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增持久化任务队列路径、最大尝试次数和重试延迟参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增运行指标文件、端点端口和写入间隔参数]########
+# 变更记录: [2026-10-18] @李祥光 [各预设统一使用inpaint填充，时域填充只通过--fill-mode开启]########
+# 变更记录: [2026-10-18] @李祥光 [新增结果缓存大小上限参数]########
+# 变更记录: [2026-10-18] @李祥光 [batch_size不再用于按批堆叠检测(实测无提速)]########
 # 输入: [无] | 输出: [配置参数字典]###############
 
 
@@ -35,6 +54,14 @@ def get_default_config() -> dict:
         'threshold': 60,        # 阈值分割灰度值
         'kernel_size': 5,       # 形态学操作核大小
         'iterations': 2,        # 形态学操作迭代次数
+        'mask_mode': 'dynamic', # 掩码模式: dynamic逐帧检测, static每个视频估计一次, adaptive镜头切换时刷新
+        'mask_samples': 15,     # 静态掩码采样帧数
+        'mask_statistic': 'median',  # 静态掩码统计方式: median中值, intersection交集
+        'mask_refresh_interval': 60,  # 自适应掩码定时刷新间隔帧数，0表示只在镜头切换时刷新
+        'scene_cut_threshold': 30.0,  # 镜头切换阈值(缩小亮度图平均绝对差，灰度级)
+        'detection_scale': 1.0, # 检测缩放比例，小于1时在缩小的画面上检测水印(如0.5、0.25)
+        'fill_mode': 'inpaint', # 填充模式: inpaint逐帧图像修复, temporal相邻帧时域中值填充(固定机位、缓慢平移)
+        'temporal_window': 15,  # 时域填充滑动窗口帧数
         
         # 输出设置
         'output_quality': 'high',  # 输出质量: low, medium, high
@@ -43,6 +70,27 @@ def get_default_config() -> dict:
         
         # 处理设置
         'batch_size': 1,          # 批处理大小
+        'execution_mode': 'serial',  # 执行模式: serial顺序, thread线程池, process进程池
+        'workers': 0,             # 并行工作数，0表示使用全部CPU核心
+        'segments': 0,            # 长视频分段并行处理的分段数，小于2表示不分段
+        'result_cache': True,     # 按输入内容指纹和处理参数缓存结果，命中时硬链接已有输出
+        'result_cache_dir': 'cache',  # 结果缓存目录
+        'result_cache_max_gb': 10.0,  # 结果缓存总大小上限(GB)，超出时淘汰最久未使用的条目，0表示不限制
+        'jobs': 1,                # 批量处理时同时处理的文件数，大于1时多进程并行并按文件大小从大到小调度
+        'checkpoint_frames': 0,   # 断点续处理每段帧数，0表示不启用，中断后从最后完成的分段继续
+        'seek_index': False,      # 首次处理时建立帧时间戳和关键帧索引(保存在temp/seek_index)，采样和分段定位从最近关键帧解码
+        'watch_poll_interval': 2.0,     # 监视文件夹模式轮询间隔(秒)
+        'watch_settle_seconds': 5.0,    # 监视文件夹模式文件大小和修改时间保持不变多少秒后视为写入完成
+        'watch_stats_interval': 60.0,   # 监视文件夹模式记录队列深度和吞吐的间隔(秒)
+        'job_db': 'cache/jobs.db',  # 持久化任务队列(SQLite)路径，批量、监视文件夹和HTTP服务共用
+        'max_attempts': 3,        # 每个任务的最大尝试次数，失败后自动重试
+        'retry_delay': 30.0,      # 首次重试延迟(秒)，之后每次加倍
+        'metrics_file': '',       # 运行指标(Prometheus文本格式)写入的文件路径，为空时不写入
+        'metrics_port': 0,        # 本地运行指标端点(GET /metrics)端口，0表示不启动
+        'metrics_interval': 5.0,  # 运行指标文件写入间隔(秒)
+        'region_cache': False,    # 水印区域与参考帧一致时复用修复结果
+        'region_cache_tolerance': 0.0,  # 区域平均绝对差容差(灰度级)，0表示精确匹配
+        'stage_timing': True,     # 统计解码、检测、形态学、膨胀、修复、写出各阶段耗时
         'use_gpu': False,         # 是否使用GPU加速
         'temp_cleanup': True,     # 自动清理临时文件
         
@@ -93,6 +141,8 @@ PRESET_CONFIGS = {
         'threshold': 80,
         'kernel_size': 3,
         'iterations': 1,
+        'detection_scale': 0.5,
+        'fill_mode': 'inpaint',
         'output_quality': 'medium',
         'use_gpu': False,
         'description': '快速处理模式，适合大批量处理'
@@ -102,6 +152,7 @@ PRESET_CONFIGS = {
         'threshold': 60,
         'kernel_size': 5,
         'iterations': 2,
+        'fill_mode': 'inpaint',
         'output_quality': 'high',
         'use_gpu': False,
         'description': '平衡模式，兼顾速度和质量'
@@ -111,6 +162,7 @@ PRESET_CONFIGS = {
         'threshold': 40,
         'kernel_size': 7,
         'iterations': 3,
+        'fill_mode': 'inpaint',
         'output_quality': 'high',
         'use_gpu': True,
         'description': '精确模式，追求最佳效果'
@@ -1,5 +1,32 @@
 ##########enhanced_watermark_remover.py: 增强版视频去水印工具 ##################
 # 变更记录: [2025-06-25] @李祥光 [创建增强版去水印工具，集成日志和配置]########
+# 变更记录: [2026-10-18] @李祥光 [支持静态水印掩码模式，按完整配置创建去除器]########
+# 变更记录: [2026-10-18] @李祥光 [新增并行帧流水线执行模式命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增长视频分段并行处理命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增未变化区域缓存命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增按批检测命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [处理日志记录分阶段耗时，新增关闭计时参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增检测缩放比例命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增自适应掩码模式命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增断点续处理命令行参数，发现检查点时提示继续处理]########
+# 变更记录: [2026-10-18] @李祥光 [批量处理支持多进程并行，大文件优先调度并汇总各进程吞吐]########
+# 变更记录: [2026-10-18] @李祥光 [按输入内容指纹和处理参数缓存结果，命中时硬链接已有输出]########
+# 变更记录: [2026-10-18] @李祥光 [新增填充模式命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [新增定位索引命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [批量列表探测并缓存视频元数据，确认界面显示总帧数、时长和像素量]########
+# 变更记录: [2026-10-18] @李祥光 [按实测耗时校准的模型预测批量耗时，进度按预测耗时加权并显示剩余时间和整体帧率]########
+# 变更记录: [2026-10-18] @李祥光 [新增监视文件夹常驻模式，写入完成的文件交给预热的进程池处理并记录单任务日志]########
+# 变更记录: [2026-10-18] @李祥光 [批量和监视文件夹模式从SQLite持久化任务队列领取任务，失败自动重试，重启后不再处理已完成的文件]########
+# 变更记录: [2026-10-18] @李祥光 [新增运行指标导出参数，处理期间以Prometheus文本格式写入文件或提供本地端点]########
+# 变更记录: [2026-10-18] @李祥光 [监视模式工作进程日志写入主进程的日志队列，任务日志由主进程监听线程写出]########
+# 变更记录: [2026-10-18] @李祥光 [结果缓存未命中时已存在的输出按overwrite_existing跳过，跳过视为成功不再重试]########
+# 变更记录: [2026-10-18] @李祥光 [新增结果缓存大小上限和清空缓存命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [耗时模型记录和预测使用首帧检测的水印掩码面积]########
+# 变更记录: [2026-10-18] @李祥光 [批量多进程时工作进程按进程写入指标文件，进程退出时写入最终快照]########
+# 变更记录: [2026-10-18] @李祥光 [移除按批检测命令行参数]########
+# 变更记录: [2026-10-18] @李祥光 [持久化任务队列中的任务总是覆盖已有输出，失败重试不会把截断的输出当作已完成]########
+# 变更记录: [2026-10-18] @李祥光 [水印掩码面积缓存在元数据缓存中，批量耗时预测不再解码帧]########
+# 变更记录: [2026-10-18] @李祥光 [批量任务租约过期被其他执行者接管后不记录本次结果，由接管者完成]########
 # 输入: [视频文件路径/文件夹路径，配置参数] | 输出: [处理后的无水印视频文件]###############
 
 
@@ -8,7 +35,14 @@
 main：主程序入口，处理命令行参数和用户交互
 process_video_enhanced：增强版单个视频处理功能
 process_video_folder_enhanced：增强版批量处理功能
+watch_folder_enhanced：监视文件夹常驻处理功能
+init_watch_worker：监视模式工作进程预热，创建常驻去除器，日志写入主进程的日志队列，配置指标文件时按进程导出运行指标
+start_worker_metrics：工作进程按进程写入带worker标签的指标文件，进程退出时写入最终快照
+process_watch_job：监视模式工作进程处理单个文件并写入任务日志
 get_video_files_with_info：获取视频文件及其信息
+get_output_path：获取视频的输出文件路径
+make_job_config：生成持久化任务队列中任务使用的配置
+open_job_store：按配置打开持久化任务队列
 validate_and_prepare：验证输入并准备处理环境
 show_processing_menu：显示处理选项菜单
 get_user_config：获取用户配置参数
@@ -26,11 +60,43 @@ flowchart TD
     E -->|单个文件| F[process_video_enhanced]
     E -->|批量处理| G[process_video_folder_enhanced]
     G --> H[get_video_files_with_info]
-    H --> I[循环调用process_video_enhanced]
-    F --> J[WatermarkRemover处理]
+    H --> R[ProbeCache.probe_many元数据缓存]
+    H --> S[summarize_probes汇总帧数和像素量]
+    H --> JS[JobStore.is_completed跳过已完成的文件]
+    JS --> MJ[make_job_config任务总是覆盖已有输出]
+    JS --> JE[JobStore.enqueue幂等提交]
+    JE --> JC[JobStore.claim领取任务]
+    JC --> I[循环调用process_video_enhanced]
+    I --> JF[JobStore.complete/fail失败自动重试]
+    H -->|jobs大于1| N[run_batch_jobs大文件优先多进程并行]
+    N --> F
+    N --> WM[start_worker_metrics按工作进程写入指标文件]
+    F --> O[ResultCache.lookup查找结果缓存]
+    O -->|命中| P[ResultCache.materialize硬链接输出]
+    O -->|未命中| M[get_checkpoint_info检查断点]
+    J --> Q[ResultCache.store加入缓存]
+    Q --> QP[ResultCache.prune超出大小上限淘汰最久未使用的条目]
+    B --> QR[--purge-result-cache清空结果缓存]
+    M --> J[WatermarkRemover处理]
     I --> J
     J --> K[log_processing_end记录日志]
+    J --> T[CostModel.record记录实测耗时]
+    T --> PM[ProbeCache.set_mask_pixels缓存掩码面积]
+    U --> PG[ProbeCache.get_mask_pixels]
+    G --> U[CostModel.predict预测各文件耗时]
+    U --> V[BatchEstimator剩余时间和整体帧率]
     K --> L[cleanup_temp_files清理]
+    E -->|--watch| W[watch_folder_enhanced]
+    W --> X[WatchFolderDaemon.run轮询等待文件写入完成]
+    X --> Y[init_watch_worker预热工作进程]
+    X --> Z[process_watch_job]
+    X --> JE
+    Z --> F
+    B --> MX[export_metrics处理期间导出运行指标到文件或本地端点]
+    Y --> WM
+    WM --> MW[MetricsExporter按工作进程写入指标文件]
+    Y --> LQ[init_worker_logging日志写入主进程队列]
+    H --> LC[log_context日志附带任务ID和执行者ID]
 """
 #########mermaid格式说明所有函数的调用关系说明结束#########
 
@@ -38,17 +104,26 @@ import os
 import sys
 import time
 import argparse
+import multiprocessing.util
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import cv2
 import numpy as np
 
 # 导入项目模块
-from config.config import get_default_config, get_supported_formats, PRESET_CONFIGS
+from config.config import get_default_config, get_supported_formats, get_preset_config, PRESET_CONFIGS
 from utils.logger import (
     setup_logger, log_info, log_warning, log_error,
-    log_processing_start, log_processing_end, log_batch_summary
+    log_processing_start, log_processing_end, log_batch_summary, job_log,
+    get_log_queue, init_worker_logging, log_context
 )
+from utils.batch_executor import run_batch_jobs, summarize_workers, format_worker_stats
+from utils.result_cache import ResultCache
+from utils.video_probe import ProbeCache, summarize_probes
+from utils.cost_model import CostModel, BatchEstimator, make_cost_profile, job_features
+from utils.watch_folder import WatchFolderDaemon
+from utils.job_store import JobStore, LeaseKeeper, make_worker_id
+from utils.metrics import REGISTRY, MetricsExporter, export_metrics
 
 # 导入水印去除库
 try:
@@ -58,6 +133,9 @@ except ImportError:
     print("📦 请先安装依赖：pip install -r requirements.txt")
     sys.exit(1)
 
+# 监视模式工作进程中常驻的去除器，由init_watch_worker创建
+_watch_remover: Optional[WatermarkRemover] = None
+
 
 def validate_and_prepare() -> bool:
     """
@@ -83,11 +161,12 @@ def validate_and_prepare() -> bool:
         return False
 
 
-def get_video_files_with_info(folder_path: str) -> List[Dict[str, any]]:
+def get_video_files_with_info(folder_path: str, cache_dir: str = "cache") -> List[Dict[str, any]]:
     """
     get_video_files_with_info 功能说明:
-    # 获取文件夹中的视频文件及其详细信息
-    # 输入: [folder_path: str 文件夹路径] | 输出: [List[Dict] 视频文件信息列表]
+    # 获取文件夹中的视频文件及其详细信息：文件大小，以及从容器元数据读取(不解码)的分辨率、帧率、帧数、时长和像素量；
+    # 元数据按路径、修改时间和大小缓存在cache_dir中，重复列出同一批文件时不再打开视频
+    # 输入: [folder_path: str 文件夹路径, cache_dir: str 元数据缓存目录] | 输出: [List[Dict] 视频文件信息列表]
     """
     supported_formats = get_supported_formats()
     video_files = []
@@ -109,7 +188,14 @@ def get_video_files_with_info(folder_path: str) -> List[Dict[str, any]]:
                     }
                     video_files.append(video_info)
         
-        log_info(f"📁 在 {folder_path} 中找到 {len(video_files)} 个视频文件")
+        # 探测元数据，无法打开的文件只保留文件大小
+        probe_cache = ProbeCache(cache_dir)
+        for video_info, probe in zip(video_files, probe_cache.probe_many(info['path'] for info in video_files)):
+            if probe:
+                video_info.update(probe)
+        
+        log_info(f"📁 在 {folder_path} 中找到 {len(video_files)} 个视频文件 "
+                 f"(元数据缓存命中 {probe_cache.hits}, 新探测 {probe_cache.misses})")
         return video_files
         
     except Exception as e:
@@ -117,6 +203,39 @@ def get_video_files_with_info(folder_path: str) -> List[Dict[str, any]]:
         return []
 
 
+def get_output_path(video_path: str) -> str:
+    """
+    get_output_path 功能说明:
+    # 获取视频的输出文件路径: output/<文件名>_no_watermark<扩展名>
+    # 输入: [video_path: str 视频路径] | 输出: [str 输出文件路径]
+    """
+    name, ext = os.path.splitext(os.path.basename(video_path))
+    return os.path.join("output", f"{name}_no_watermark{ext}")
+
+
+def make_job_config(config: Dict[str, any], jobs: int = 1) -> Dict[str, any]:
+    """
+    make_job_config 功能说明:
+    # 生成持久化任务队列中任务使用的配置：任务是否完成以任务队列为准，已有的同名输出可能是上次失败
+    # 或中断留下的截断文件，总是覆盖；多个文件并行且未指定帧级并行数时按文件并行数平分CPU核心，避免超额订阅
+    # 输入: [config: Dict 配置参数, jobs: int 并行处理的文件数] | 输出: [Dict 任务配置]
+    """
+    job_config = dict(config, overwrite_existing=True)
+    if jobs > 1 and not job_config.get('workers'):
+        job_config['workers'] = max(1, (os.cpu_count() or 1) // jobs)
+    return job_config
+
+
+def open_job_store(config: Dict[str, any]) -> JobStore:
+    """
+    open_job_store 功能说明:
+    # 按配置打开持久化任务队列(数据库路径、最大尝试次数、首次重试延迟)
+    # 输入: [config: Dict 配置参数] | 输出: [JobStore 任务队列]
+    """
+    return JobStore(config.get('job_db', os.path.join('cache', 'jobs.db')),
+                    config.get('max_attempts', 3), config.get('retry_delay', 30.0))
+
+
 def get_user_config() -> Dict[str, any]:
     """
     get_user_config 功能说明:
@@ -155,11 +274,15 @@ def get_user_config() -> Dict[str, any]:
         return PRESET_CONFIGS['balanced']
 
 
-def process_video_enhanced(video_path: str, config: Dict[str, any]) -> Tuple[bool, str]:
+def process_video_enhanced(video_path: str, config: Dict[str, any],
+                           remover: Optional[WatermarkRemover] = None) -> Tuple[bool, str]:
     """
     process_video_enhanced 功能说明:
-    # 增强版单个视频处理功能，包含详细日志和错误处理
-    # 输入: [video_path: str 视频路径, config: Dict 配置参数] | 输出: [Tuple[bool, str] 处理结果和输出路径]
+    # 增强版单个视频处理功能，包含详细日志和错误处理；启用结果缓存时按输入内容和处理参数查找已有输出，
+    # 命中则硬链接(或复制)到输出路径，不再处理；未命中时已存在的输出只在是缓存硬链接或要求覆盖时重新处理，
+    # 否则跳过并视为成功；处理成功后将实测耗时记录到耗时模型
+    # 输入: [video_path: str 视频路径, config: Dict 配置参数, remover: WatermarkRemover 复用的去除器(默认按配置创建)] |
+    #       输出: [Tuple[bool, str] 处理结果和输出路径]
     """
     start_time = time.time()
     
@@ -169,30 +292,70 @@ def process_video_enhanced(video_path: str, config: Dict[str, any]) -> Tuple[boo
         
         # 生成输出文件路径
         input_filename = os.path.basename(video_path)
-        name, ext = os.path.splitext(input_filename)
-        output_path = os.path.join("output", f"{name}_no_watermark{ext}")
-        
-        # 检查输出文件是否已存在
-        if os.path.exists(output_path) and not config.get('overwrite_existing', False):
-            log_warning(f"输出文件已存在，跳过处理: {output_path}")
-            return False, output_path
+        output_path = get_output_path(video_path)
         
         # 创建水印去除器实例
-        remover = WatermarkRemover(
-            threshold=config['threshold'],
-            kernel_size=config['kernel_size']
-        )
+        if remover is None:
+            remover = WatermarkRemover.from_config(config)
+        
+        # 结果缓存：相同内容和处理参数直接复用已有输出，文件名、是否已存在同名输出都不影响命中判断
+        result_cache = None
+        cache_key = None
+        settings = remover.get_processing_settings()
+        if config.get('result_cache', True):
+            result_cache = ResultCache(config.get('result_cache_dir', 'cache'),
+                                       int(config.get('result_cache_max_gb', 10.0) * 1024 ** 3))
+            cache_key = result_cache.make_key(video_path, settings)
+            cached_path = result_cache.lookup(cache_key)
+            if cached_path:
+                method = result_cache.materialize(cached_path, output_path)
+                duration = time.time() - start_time
+                log_info(f"♻️  命中结果缓存({method}): {input_filename} -> {output_path}")
+                log_processing_end(video_path, True, duration, output_path)
+                print(f"♻️  命中结果缓存，跳过处理: {os.path.basename(output_path)}")
+                return True, output_path
+        
+        # 未命中时已有的同名输出：缓存条目的硬链接(其他参数或内容的旧结果)删除后重新处理，
+        # 否则只在要求覆盖时删除，不覆盖时跳过并视为成功(单个文件处理)；
+        # 持久化任务队列中的任务由make_job_config总是覆盖，失败重试时不会把上次留下的文件当作已完成
+        if os.path.exists(output_path):
+            if result_cache is not None and result_cache.is_cached_output(output_path):
+                # 先删除再写入，避免改写缓存中的文件
+                os.remove(output_path)
+            elif config.get('overwrite_existing', False):
+                os.remove(output_path)
+            else:
+                log_warning(f"输出文件已存在，跳过处理: {output_path}")
+                log_processing_end(video_path, True, time.time() - start_time, output_path)
+                print(f"⏭️  输出文件已存在，跳过处理: {os.path.basename(output_path)}")
+                return True, output_path
         
         print(f"🎬 正在处理: {input_filename}")
-        print(f"⚙️  参数: 阈值={config['threshold']}, 核大小={config['kernel_size']}")
+        print(f"⚙️  参数: 阈值={config['threshold']}, 核大小={config['kernel_size']}, 掩码模式={remover.mask_mode}, 执行模式={remover.execution_mode}")
+        
+        # 上次处理中断时从最后完成的分段继续
+        checkpoint = remover.get_checkpoint_info(video_path, output_path)
+        if checkpoint:
+            log_info(f"发现检查点，继续处理: {input_filename} "
+                     f"(已完成 {checkpoint['completed_frames']}/{checkpoint['total_frames']} 帧)")
+        
+        # 首帧检测的掩码面积作为耗时模型特征(处理前测量，不计入本次分阶段耗时)，已测量过的直接复用
+        mask_pixels = ProbeCache(config.get('result_cache_dir', 'cache')).get_mask_pixels(video_path, settings)
+        if mask_pixels is None:
+            mask_pixels = remover.measure_mask_pixels(video_path)
         
         # 执行去水印处理
-        remover.remove_video_watermark(video_path, output_path)
+        process_start = time.time()
+        success = remover.remove_video_watermark(video_path, output_path)
+        process_duration = time.time() - process_start
         
         # 验证输出文件
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        if success and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            if result_cache is not None:
+                result_cache.store(cache_key, output_path, video_path)
+            record_processing_cost(video_path, config, process_duration, mask_pixels, settings)
             duration = time.time() - start_time
-            log_processing_end(video_path, True, duration, output_path)
+            log_processing_end(video_path, True, duration, output_path, remover.get_stage_stats())
             print(f"✅ 处理完成: {os.path.basename(output_path)}")
             return True, output_path
         else:
@@ -206,16 +369,40 @@ def process_video_enhanced(video_path: str, config: Dict[str, any]) -> Tuple[boo
         return False, ""
 
 
+def record_processing_cost(video_path: str, config: Dict[str, any], duration: float, mask_pixels: int = 0,
+                           settings: Optional[Dict[str, object]] = None) -> None:
+    """
+    record_processing_cost 功能说明:
+    # 将一次实际处理(不含结果缓存命中)的耗时、视频元数据和水印掩码面积记录到耗时模型，记录失败不影响处理结果；
+    # 提供处理参数时掩码面积同时存入元数据缓存，之后批量预测耗时直接读取
+    # 输入: [video_path: str 视频路径, config: Dict 配置参数, duration: float 处理耗时(秒),
+    #        mask_pixels: int 每帧修复像素数, settings: Dict 处理参数] | 输出: [无]
+    """
+    try:
+        cache_dir = config.get('result_cache_dir', 'cache')
+        probe_cache = ProbeCache(cache_dir)
+        info = probe_cache.get(video_path)
+        if info and settings is not None:
+            probe_cache.set_mask_pixels(video_path, settings, mask_pixels)
+        if info:
+            CostModel(cache_dir).record(make_cost_profile(config), job_features(info, mask_pixels), duration)
+    except Exception as e:
+        log_warning(f"记录处理耗时失败: {str(e)}")
+
+
 def process_video_folder_enhanced(folder_path: str, config: Dict[str, any]) -> None:
     """
     process_video_folder_enhanced 功能说明:
-    # 增强版批量处理功能，包含进度显示和统计信息
+    # 增强版批量处理功能，包含进度显示和统计信息；配置jobs大于1时多个文件由进程池并行处理，
+    # 按文件大小从大到小调度，汇总各工作进程吞吐；按耗时模型预测各文件耗时，进度按预测耗时加权，
+    # 每完成一个文件按本批实测修正剩余时间；文件作为任务提交到持久化任务队列，已完成的不再处理，
+    # 失败的按退避延迟自动重试，中断后重新运行从未完成的任务继续
     # 输入: [folder_path: str 文件夹路径, config: Dict 配置参数] | 输出: [无，批量处理结果]
     """
     start_time = time.time()
     
     # 获取视频文件信息
-    video_files = get_video_files_with_info(folder_path)
+    video_files = get_video_files_with_info(folder_path, config.get('result_cache_dir', 'cache'))
     
     if not video_files:
         log_warning(f"在文件夹 {folder_path} 中未找到支持的视频文件")
@@ -225,10 +412,51 @@ def process_video_folder_enhanced(folder_path: str, config: Dict[str, any]) -> N
     print(f"\n📋 找到 {len(video_files)} 个视频文件:")
     total_size = 0
     for i, video_info in enumerate(video_files, 1):
-        print(f"  {i}. {video_info['name']} ({video_info['size_mb']} MB)")
+        if video_info.get('frame_count'):
+            print(f"  {i}. {video_info['name']} ({video_info['size_mb']} MB, {video_info['width']}x{video_info['height']}, "
+                  f"{video_info['fps']:g}fps, {video_info['frame_count']}帧, {video_info['duration']:.1f}秒)")
+        else:
+            print(f"  {i}. {video_info['name']} ({video_info['size_mb']} MB, 无法读取元数据)")
         total_size += video_info['size_mb']
     
+    summary = summarize_probes(video_files)
     print(f"📊 总大小: {total_size:.2f} MB")
+    print(f"🎞️  总帧数: {summary['total_frames']}, 总时长: {summary['total_duration'] / 60:.1f} 分钟")
+    print(f"🧮 像素量: {summary['total_megapixels']:.1f} 百万像素 (平均每帧 {summary['megapixels_per_frame']:.2f} 百万像素)")
+    if summary['unprobed']:
+        print(f"⚠️  {summary['unprobed']} 个文件无法读取元数据，未计入帧数和像素量")
+    
+    # 持久化任务队列：相同内容、处理参数和输出路径已完成的文件不再处理
+    store = open_job_store(config)
+    settings = WatermarkRemover.from_config(config).get_processing_settings()
+    finished_paths = {info['path'] for info in video_files
+                      if store.is_completed(info['path'], get_output_path(info['path']), settings)}
+    if finished_paths:
+        print(f"♻️  {len(finished_paths)} 个文件此前已处理完成，跳过")
+        video_files = [info for info in video_files if info['path'] not in finished_paths]
+        if not video_files:
+            print("✅ 全部文件均已处理完成")
+            return
+    
+    # 多进程并行时按文件并行数平分CPU核心
+    jobs = config.get('jobs', 1)
+    parallel = jobs > 1 and len(video_files) > 1
+    job_config = make_job_config(config, jobs if parallel else 1)
+    
+    # 按耗时模型预测各文件耗时
+    cost_model = CostModel(config.get('result_cache_dir', 'cache'))
+    profile = make_cost_profile(job_config)
+    # 掩码面积取自此前处理时缓存的实测值，不解码帧；未处理过的文件记为0
+    probe_cache = ProbeCache(config.get('result_cache_dir', 'cache'))
+    predictions = {}
+    for info in video_files:
+        mask_pixels = probe_cache.get_mask_pixels(info['path'], settings) or 0
+        predictions[info['path']] = cost_model.predict(profile, job_features(info, mask_pixels))
+    estimator = BatchEstimator(predictions, {info['path']: info.get('frame_count', 0) for info in video_files},
+                               min(jobs, len(video_files)) if parallel else 1)
+    samples = cost_model.sample_count(profile)
+    calibration = f"按 {samples} 次实测校准" if samples else "尚无实测数据，使用默认估计"
+    print(f"⏳ 预计耗时: {estimator.get_progress()['remaining_s'] / 60:.1f} 分钟 ({calibration})")
     
     # 确认处理
     confirm = input("\n是否继续批量处理？(y/N): ").strip().lower()
@@ -236,29 +464,192 @@ def process_video_folder_enhanced(folder_path: str, config: Dict[str, any]) -> N
         print("❌ 用户取消操作")
         return
     
+    # 提交任务，未完成的任务(含上次中断的)沿用已有记录
+    job_files = {}
+    for video_info in video_files:
+        job = store.enqueue(video_info['path'], get_output_path(video_info['path']), settings, job_config, 'batch')
+        video_info['job_id'] = job['id']
+        job_files[job['id']] = video_info
+    path_jobs = {video_info['path']: job_id for job_id, video_info in job_files.items()}
+    
     # 批量处理
-    success_count = 0
-    failed_count = 0
+    results = []
+    finished = [0]
+    worker_id = make_worker_id()
     
     print(f"\n🚀 开始批量处理...")
+    estimator.start_time = time.perf_counter()
+    if parallel:
+        print(f"🧵 并行处理 {min(jobs, len(video_files))} 个文件，按文件大小从大到小调度")
+        if config.get('metrics_file'):
+            # 帧级指标在工作进程内累计并按进程写入指标文件，主进程的指标文件用worker标签区分
+            REGISTRY.const_labels['worker'] = 'main'
     
-    for i, video_info in enumerate(video_files, 1):
-        print(f"\n[{i}/{len(video_files)}] 处理进度: {(i-1)/len(video_files)*100:.1f}%")
-        
-        success, output_path = process_video_enhanced(video_info['path'], config)
-        
-        if success:
-            success_count += 1
+    def record(result):
+        # 每个文件处理结束时更新任务队列，失败且尝试次数未用完的稍后重试；
+        # 租约过期已被其他执行者接管的不记录(返回None)，等待接管者完成
+        job_id = path_jobs[result['path']]
+        if result['success']:
+            state = 'completed' if store.complete(job_id, worker_id, result['duration']) else None
         else:
-            failed_count += 1
+            state = store.fail(job_id, worker_id, result['error'] or "处理失败", result['duration'])
+        if state is None:
+            log_warning(f"{result['name']} 已被其他执行者接管，本次结果未记录")
+        elif state != 'queued':
+            finished[0] += 1
+            estimator.complete(result['path'], result['duration'])
+        return state
+    
+    def report(result):
+        status = "✅" if result['success'] else "❌"
+        state = record(result)
+        retry = " (稍后重试)" if state == 'queued' else " (已被其他执行者接管)" if state is None else ""
+        print(f"\n[{finished[0]}/{len(video_files)}] {status} {result['name']}{retry} "
+              f"({result['size_mb']} MB, {result['duration']:.2f} 秒, 进程 {result['worker']}) "
+              f"{estimator.format_progress()}")
+    
+    try:
+        with LeaseKeeper(store, worker_id):
+            while True:
+                # 并行时一次领取全部可执行的任务交给进程池调度，顺序处理时逐个领取
+                claimed = store.claim(worker_id, job_files, limit=len(job_files) if parallel else 1)
+                if not claimed:
+                    wait_s = store.next_retry_in(job_files)
+                    if wait_s is None:
+                        break
+                    print(f"⏳ {wait_s:.0f} 秒后重试失败的文件")
+                    time.sleep(max(wait_s, 0.1))
+                    continue
+                
+                claimed_files = [job_files[job['id']] for job in claimed]
+                if parallel:
+                    results.extend(run_batch_jobs(claimed_files, process_video_enhanced, (job_config,), jobs, report,
+                                                  initializer=start_worker_metrics, initargs=(job_config,)))
+                    continue
+                
+                video_info = claimed_files[0]
+                print(f"\n[{finished[0] + 1}/{len(video_files)}] 第 {claimed[0]['attempts']} 次尝试 "
+                      f"{estimator.format_progress()}")
+                file_start = time.time()
+                with log_context(job_id=claimed[0]['id'], worker_id=worker_id):
+                    success, output_path = process_video_enhanced(video_info['path'], job_config)
+                result = {'path': video_info['path'], 'name': video_info['name'], 'size_mb': video_info['size_mb'],
+                          'success': success, 'error': None, 'duration': time.time() - file_start,
+                          'worker': os.getpid()}
+                results.append(result)
+                state = record(result)
+                if state == 'queued':
+                    print(f"🔁 {video_info['name']} 处理失败，稍后重试")
+                elif state is None:
+                    print(f"⚠️  {video_info['name']} 已被其他执行者接管，本次结果未记录")
+    finally:
+        # 中断时交还未完成的任务，重新运行时立即继续
+        store.release(worker_id)
     
     # 记录批处理汇总
+    counts = store.counts(job_files)
+    success_count = counts['completed']
+    failed_count = len(job_files) - success_count
+    worker_stats = summarize_workers(results) if parallel else None
     total_time = time.time() - start_time
-    log_batch_summary(len(video_files), success_count, failed_count, total_time)
+    log_batch_summary(len(video_files), success_count, failed_count, total_time, worker_stats)
     
     print(f"\n🎉 批量处理完成！")
-    print(f"📊 统计: 成功 {success_count}/{len(video_files)}, 失败 {failed_count}")
-    print(f"⏱️  总耗时: {total_time:.2f} 秒")
+    print(f"📊 统计: 成功 {success_count}/{len(video_files)}, 失败 {failed_count} "
+          f"(共尝试 {len(results)} 次)")
+    print(f"⏱️  总耗时: {total_time:.2f} 秒, 整体 {estimator.get_progress()['fps']:.1f} 帧/秒")
+    if worker_stats:
+        print(f"🧵 各进程吞吐:\n{format_worker_stats(worker_stats)}")
+
+
+def init_watch_worker(config: Dict[str, any], log_queue: Optional[object] = None) -> None:
+    """
+    init_watch_worker 功能说明:
+    # 监视模式进程池的工作进程初始化函数：在等待第一个文件之前完成cv2导入和去除器创建，之后每个文件复用；
+    # 配置了指标文件时，帧级运行指标在工作进程内累计，按进程写入<指标文件名>.<进程号>.prom并带worker标签；
+    # 提供日志队列时日志交给主进程的监听线程写出
+    # 输入: [config: Dict 配置参数, log_queue: Queue 主进程的日志队列] | 输出: [无]
+    """
+    global _watch_remover
+    if log_queue is not None:
+        init_worker_logging(log_queue)
+    _watch_remover = WatermarkRemover.from_config(config)
+    start_worker_metrics(config)
+
+
+def start_worker_metrics(config: Dict[str, any]) -> None:
+    """
+    start_worker_metrics 功能说明:
+    # 进程池工作进程的运行指标导出：配置了指标文件时，帧级运行指标在工作进程内累计，
+    # 按进程写入<指标文件名>.<进程号>.prom并带worker标签；工作进程退出时不执行atexit，
+    # 通过multiprocessing的退出清理写入最终快照，处理很快的文件也能计入
+    # 输入: [config: Dict 配置参数] | 输出: [无]
+    """
+    metrics_file = config.get('metrics_file')
+    if not metrics_file:
+        return
+    root, ext = os.path.splitext(metrics_file)
+    REGISTRY.const_labels['worker'] = str(os.getpid())
+    exporter = MetricsExporter(f"{root}.{os.getpid()}{ext or '.prom'}", config.get('metrics_interval', 5.0)).start()
+    multiprocessing.util.Finalize(exporter, exporter.stop, exitpriority=10)
+
+
+def process_watch_job(video_path: str, config: Dict[str, any], job_log_dir: str) -> Tuple[bool, str]:
+    """
+    process_watch_job 功能说明:
+    # 监视模式工作进程处理单个文件，处理期间的日志同时由主进程的监听线程写入job_log_dir下该文件的任务日志
+    # 输入: [video_path: str 视频路径, config: Dict 配置参数, job_log_dir: str 任务日志目录] | 输出: [Tuple[bool, str] 处理结果和输出路径]
+    """
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    log_path = os.path.join(job_log_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.log")
+    with job_log(log_path):
+        return process_video_enhanced(video_path, config, _watch_remover)
+
+
+def watch_folder_enhanced(folder_path: str, config: Dict[str, any]) -> None:
+    """
+    watch_folder_enhanced 功能说明:
+    # 监视文件夹常驻处理：轮询输入文件夹，文件大小和修改时间稳定后交给预热的进程池处理，结果写入output/，
+    # 每个文件的日志写入logs/jobs/，定期记录队列深度和吞吐；不需要确认，按Ctrl+C停止(等待处理中的文件完成)；
+    # 文件作为任务提交到持久化任务队列，重启后已完成的跳过，失败的按退避延迟重试
+    # 输入: [folder_path: str 监视的文件夹路径, config: Dict 配置参数] | 输出: [无]
+    """
+    jobs = max(1, config.get('jobs', 1))
+    job_config = make_job_config(config, jobs)
+    
+    def report(result):
+        status = "✅" if result['success'] else "❌"
+        print(f"{status} {result['name']} ({result['size_mb']} MB, {result['duration']:.2f} 秒, 进程 {result['worker']})")
+    
+    settings = WatermarkRemover.from_config(job_config).get_processing_settings()
+    if config.get('metrics_file'):
+        # 主进程导出队列深度，与各工作进程的指标文件用worker标签区分
+        REGISTRY.const_labels['worker'] = 'main'
+    
+    def job_spec(video_path):
+        return get_output_path(video_path), settings, job_config
+    
+    daemon = WatchFolderDaemon(
+        folder_path, process_watch_job, (job_config, os.path.join('logs', 'jobs')), jobs,
+        extensions=get_supported_formats()['input_formats'],
+        initializer=init_watch_worker, initargs=(job_config, get_log_queue()),
+        poll_interval=config.get('watch_poll_interval', 2.0),
+        settle_seconds=config.get('watch_settle_seconds', 5.0),
+        stats_interval=config.get('watch_stats_interval', 60.0),
+        result_callback=report,
+        job_store=open_job_store(config),
+        job_spec=job_spec
+    )
+    print(f"👀 监视文件夹: {folder_path} (并行 {jobs} 个文件，按 Ctrl+C 停止)")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\n⚠️  停止监视")
+    
+    results = daemon.results
+    success_count = sum(1 for result in results if result['success'])
+    print(f"📊 共处理 {len(results)} 次: 成功 {success_count}, 失败 {len(results) - success_count}, "
+          f"已处理过跳过 {daemon.skipped} 个")
 
 
 def show_processing_menu() -> str:
@@ -314,9 +705,64 @@ def main():
                           default='balanced', help='预设配置模式')
         parser.add_argument('--threshold', '-t', type=int, help='阈值分割灰度值')
         parser.add_argument('--kernel-size', '-k', type=int, help='核大小')
+        parser.add_argument('--detection-scale', type=float,
+                          help='检测缩放比例 (0-1]，如0.5表示在半分辨率画面上检测水印')
+        parser.add_argument('--static-mask', action='store_true',
+                          help='静态水印模式：每个视频采样估计一次掩码并复用于所有帧')
+        parser.add_argument('--adaptive-mask', action='store_true',
+                          help='自适应掩码模式：只在镜头切换或每隔N帧时重新检测掩码，其余帧复用')
+        parser.add_argument('--mask-refresh-interval', type=int,
+                          help='自适应掩码定时刷新间隔帧数，0表示只在镜头切换时刷新')
+        parser.add_argument('--scene-threshold', type=float,
+                          help='镜头切换阈值（缩小亮度图平均绝对差，默认30）')
+        parser.add_argument('--fill-mode', choices=['inpaint', 'temporal'],
+                          help='填充模式：inpaint逐帧图像修复, temporal相邻帧时域中值填充（默认取预设）')
+        parser.add_argument('--temporal-window', type=int,
+                          help='时域填充滑动窗口帧数 (默认15)')
+        parser.add_argument('--execution-mode', '-e', choices=['serial', 'thread', 'process'],
+                          help='帧处理执行模式：serial顺序, thread线程池, process进程池')
+        parser.add_argument('--workers', '-w', type=int, help='并行工作数 (默认: CPU核心数)')
+        parser.add_argument('--segments', '-s', type=int,
+                          help='长视频分段并行处理的分段数，各进程独立解码和编码后拼接')
+        parser.add_argument('--region-cache', action='store_true',
+                          help='水印区域与参考帧一致时复用修复结果（适合幻灯片、暂停画面等静态场景）')
+        parser.add_argument('--cache-tolerance', type=float,
+                          help='区域缓存的平均绝对差容差，默认0表示精确匹配')
+        parser.add_argument('--jobs', '-j', type=int,
+                          help='批量处理时同时处理的文件数，大文件优先调度 (默认1顺序处理)')
+        parser.add_argument('--no-result-cache', action='store_true',
+                          help='关闭结果缓存（默认按输入内容和处理参数复用已有输出）')
+        parser.add_argument('--result-cache-max-gb', type=float,
+                          help='结果缓存总大小上限(GB)，超出时淘汰最久未使用的条目，0表示不限制 (默认10)')
+        parser.add_argument('--purge-result-cache', action='store_true',
+                          help='清空结果缓存后退出（已链接到output/的文件保留）')
+        parser.add_argument('--checkpoint-frames', type=int,
+                          help='断点续处理每段帧数，中断后重新运行从最后完成的分段继续 (默认0不启用)')
+        parser.add_argument('--seek-index', action='store_true',
+                          help='建立并复用帧时间戳和关键帧索引，采样和分段定位从最近关键帧解码（适合长GOP和可变帧率视频）')
+        parser.add_argument('--no-stage-timing', action='store_true',
+                          help='关闭分阶段耗时统计')
+        parser.add_argument('--max-attempts', type=int,
+                          help='每个文件的最大尝试次数，失败后按退避延迟自动重试 (默认3)')
+        parser.add_argument('--watch', action='store_true',
+                          help='监视文件夹常驻运行：新文件写入完成后自动处理，结果写入output/，按Ctrl+C停止')
+        parser.add_argument('--poll-interval', type=float,
+                          help='监视模式轮询间隔秒数 (默认2)')
+        parser.add_argument('--settle-seconds', type=float,
+                          help='监视模式文件大小保持不变多少秒后视为写入完成 (默认5)')
+        parser.add_argument('--metrics-file',
+                          help='处理期间定期把运行指标(Prometheus文本格式)写入该文件，可由node_exporter的textfile采集')
+        parser.add_argument('--metrics-port', type=int,
+                          help='处理期间在本机该端口提供运行指标端点 GET /metrics')
         
         args = parser.parse_args()
         
+        if args.purge_result_cache:
+            cache = ResultCache(get_default_config().get('result_cache_dir', 'cache'))
+            removed, freed = cache.purge()
+            log_info(f"🧹 已清空结果缓存: {removed} 个条目, {freed / 1024 ** 2:.1f} MB")
+            return
+        
         # 获取配置
         if args.input_path:
             # 命令行模式
@@ -327,16 +773,72 @@ def main():
                 if args.kernel_size:
                     config['kernel_size'] = args.kernel_size
             else:
-                config = PRESET_CONFIGS[args.preset]
+                config = get_preset_config(args.preset)
+            
+            if args.detection_scale:
+                config['detection_scale'] = args.detection_scale
+            if args.static_mask:
+                config['mask_mode'] = 'static'
+            if args.adaptive_mask:
+                config['mask_mode'] = 'adaptive'
+            if args.mask_refresh_interval is not None:
+                config['mask_refresh_interval'] = args.mask_refresh_interval
+            if args.scene_threshold is not None:
+                config['scene_cut_threshold'] = args.scene_threshold
+            if args.fill_mode:
+                config['fill_mode'] = args.fill_mode
+            if args.temporal_window:
+                config['temporal_window'] = args.temporal_window
+            if args.execution_mode:
+                config['execution_mode'] = args.execution_mode
+            if args.workers:
+                config['workers'] = args.workers
+            if args.segments:
+                config['segments'] = args.segments
+            if args.region_cache:
+                config['region_cache'] = True
+            if args.cache_tolerance is not None:
+                config['region_cache_tolerance'] = args.cache_tolerance
+            if args.jobs:
+                config['jobs'] = args.jobs
+            if args.no_result_cache:
+                config['result_cache'] = False
+            if args.result_cache_max_gb is not None:
+                config['result_cache_max_gb'] = args.result_cache_max_gb
+            if args.checkpoint_frames is not None:
+                config['checkpoint_frames'] = args.checkpoint_frames
+            if args.seek_index:
+                config['seek_index'] = True
+            if args.no_stage_timing:
+                config['stage_timing'] = False
+            if args.max_attempts:
+                config['max_attempts'] = args.max_attempts
+            if args.poll_interval:
+                config['watch_poll_interval'] = args.poll_interval
+            if args.settle_seconds is not None:
+                config['watch_settle_seconds'] = args.settle_seconds
+            if args.metrics_file:
+                config['metrics_file'] = args.metrics_file
+            if args.metrics_port:
+                config['metrics_port'] = args.metrics_port
             
             if not os.path.exists(args.input_path):
                 log_error(f"路径不存在: {args.input_path}")
                 return
             
-            if os.path.isfile(args.input_path):
-                process_video_enhanced(args.input_path, config)
-            else:
-                process_video_folder_enhanced(args.input_path, config)
+            if args.watch and not os.path.isdir(args.input_path):
+                log_error(f"监视模式需要文件夹路径: {args.input_path}")
+                return
+            
+            # 处理期间导出运行指标(帧数、跳过帧数、修复次数、耗时直方图、队列深度)
+            with export_metrics(config.get('metrics_file') or None, config.get('metrics_port', 0),
+                                config.get('metrics_interval', 5.0)):
+                if args.watch:
+                    watch_folder_enhanced(args.input_path, config)
+                elif os.path.isfile(args.input_path):
+                    process_video_enhanced(args.input_path, config)
+                else:
+                    process_video_folder_enhanced(args.input_path, config)
         
         else:
             # 交互模式
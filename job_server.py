@@ -0,0 +1,723 @@
+##########job_server.py: 本地HTTP任务提交服务 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建本地HTTP任务提交服务，常驻进程内用有界线程池处理并提供任务状态和整体帧率]########
+# 变更记录: [2026-10-18] @李祥光 [任务记录到持久化任务队列，幂等提交、失败自动重试，重启后恢复未完成的任务]########
+# 变更记录: [2026-10-18] @李祥光 [新增GET /metrics/prometheus，以Prometheus文本格式导出帧数、耗时直方图和队列深度]########
+# 变更记录: [2026-10-18] @李祥光 [任务处理期间的日志附带任务ID和执行者ID]########
+# 变更记录: [2026-10-18] @李祥光 [任务租约过期被其他执行者接管后不再记录本次结果，状态以任务队列为准]########
+# 输入: [HTTP请求：输入视频路径，预设或阈值/核大小/水印区域] | 输出: [处理后的无水印视频文件，任务状态和统计JSON]###############
+
+
+###########################文件下的所有函数###########################
+"""
+main：服务入口，解析命令行参数并启动HTTP服务
+build_job_config：由任务请求生成处理配置和水印区域，参数无效时抛出ValueError
+Job：单个任务的状态和进度类
+Job.add_frames：累计已处理帧数(处理线程回调)
+Job.to_dict：转换为状态JSON
+JobManager：有界线程池任务管理类
+JobManager.submit：校验请求并提交任务，等待队列已满时抛出QueueFullError
+JobManager._recover：启动时从持久化任务队列恢复未完成的任务
+JobManager._schedule：延迟后重新提交任务(失败重试)
+JobManager._run：工作线程入口，处理期间的日志附带任务ID和执行者ID
+JobManager._process：处理单个任务
+JobManager._set_running：更新处理中任务数并累计忙碌时间
+JobManager.get：获取单个任务
+JobManager.list_jobs：获取全部任务
+JobManager.cancel：取消排队或处理中的任务
+JobManager.get_metrics：获取队列深度、任务计数和整体帧率，同时更新任务数指标
+JobManager.shutdown：取消等待中的任务并关闭线程池
+JobRequestHandler：HTTP请求处理类，路由/jobs、/jobs/<id>、/metrics、/metrics/prometheus、/health
+JobRequestHandler._send_json：发送JSON响应
+JobRequestHandler._send_text：发送文本响应
+JobRequestHandler._read_json：读取JSON请求体
+create_server：创建绑定任务管理器的HTTP服务
+JobClient：本地服务客户端类
+JobClient._request：发送请求并解析JSON响应
+JobClient.submit：提交任务
+JobClient.status：查询任务状态
+JobClient.cancel：取消任务
+JobClient.metrics：查询整体统计
+JobClient.wait：轮询等待任务结束
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[main] --> B[create_server]
+    B --> C[JobRequestHandler]
+    C -->|POST /jobs| D[JobManager.submit]
+    D --> E[build_job_config]
+    D --> F[ThreadPoolExecutor有界线程池]
+    F --> G[JobManager._run]
+    G --> U[log_context日志附带job_id/worker_id]
+    G --> H[probe_video获取总帧数]
+    G --> I[WatermarkRemover.remove_watermark]
+    I -->|progress_callback| J[Job.add_frames]
+    C -->|GET /jobs/id| K[Job.to_dict]
+    C -->|DELETE /jobs/id| L[JobManager.cancel]
+    L --> M[cancel_event取消]
+    C -->|GET /metrics| N[JobManager.get_metrics]
+    C -->|GET /metrics/prometheus| T[REGISTRY.render]
+    N --> T
+    D --> P[JobStore.enqueue幂等提交]
+    G --> Q[JobStore.claim/complete/fail]
+    Q -->|稍后重试| R[JobManager._schedule]
+    S[JobManager._recover] --> F
+    O[JobClient] --> C
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import get_preset_config, PRESET_CONFIGS
+from utils.job_store import JobStore, LeaseKeeper, make_worker_id
+from utils.logger import setup_logger, log_info, log_warning, log_error, log_context
+from utils.metrics import CONTENT_TYPE, JOB_QUEUE_DEPTH, REGISTRY
+from utils.video_probe import probe_video
+from watermark_remover import WatermarkRemover
+
+# 请求中可直接覆盖的处理参数及其类型
+OVERRIDE_PARAMS = {
+    'threshold': int,
+    'kernel_size': int,
+    'iterations': int,
+    'detection_scale': float,
+    'mask_mode': str,
+    'fill_mode': str
+}
+
+# 任务结束状态
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+class QueueFullError(Exception):
+    """
+    QueueFullError 功能说明:
+    # 等待中的任务数达到上限时提交任务抛出，HTTP接口返回503
+    """
+
+
+def build_job_config(request: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[List[Tuple[int, int, int, int]]]]:
+    """
+    build_job_config 功能说明:
+    # 由任务请求生成处理配置：preset选择预设(默认balanced)，threshold/kernel_size等覆盖预设参数，
+    # regions为[[x, y, 宽, 高], ...]时只处理这些区域；输入文件不存在或参数无效时抛出ValueError
+    # 输入: [request: Dict 任务请求] | 输出: [Tuple[Dict, Optional[List]] 处理配置和水印区域]
+    """
+    input_path = request.get('input_path')
+    if not isinstance(input_path, str) or not os.path.isfile(input_path):
+        raise ValueError(f"输入文件不存在: {input_path}")
+
+    preset = request.get('preset', 'balanced')
+    if preset not in PRESET_CONFIGS:
+        raise ValueError(f"未知的预设配置: {preset}")
+    config = get_preset_config(preset)
+
+    for key, cast in OVERRIDE_PARAMS.items():
+        if request.get(key) is not None:
+            try:
+                config[key] = cast(request[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"参数 {key} 无效: {request[key]}")
+
+    regions = request.get('regions')
+    areas = None
+    if regions:
+        try:
+            areas = [tuple(int(value) for value in region) for region in regions]
+        except (TypeError, ValueError):
+            raise ValueError(f"水印区域无效: {regions}")
+        if any(len(area) != 4 or area[2] <= 0 or area[3] <= 0 or min(area[:2]) < 0 for area in areas):
+            raise ValueError(f"水印区域应为[x, y, 宽, 高]且宽高为正: {regions}")
+    return config, areas
+
+
+class Job:
+    """
+    Job 功能说明:
+    # 单个任务的请求、状态(queued/running/completed/failed/cancelled)、已处理帧数和耗时；
+    # 帧数由处理线程回调累计，状态由HTTP线程读取，均在锁内访问
+    # 输入: [input_path: str 输入路径, output_path: str 输出路径, config: Dict 处理配置, areas: List 水印区域,
+    #        store_id: int 持久化任务队列中的任务ID(有则作为任务ID)] | 输出: [Job实例]
+    """
+
+    def __init__(self, input_path: str, output_path: str, config: Dict[str, Any],
+                 areas: Optional[List[Tuple[int, int, int, int]]] = None, store_id: Optional[int] = None):
+        self.id = str(store_id) if store_id is not None else uuid.uuid4().hex[:12]
+        self.store_id = store_id
+        self.attempts = 0
+        self.input_path = input_path
+        self.output_path = output_path
+        self.config = config
+        self.areas = areas
+        self.status = 'queued'
+        self.error = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+
+    def add_frames(self, count: int) -> None:
+        """
+        add_frames 功能说明:
+        # 累计已处理帧数，作为WatermarkRemover的进度回调
+        # 输入: [count: int 新增帧数] | 输出: [无]
+        """
+        with self.lock:
+            self.frames_done += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        to_dict 功能说明:
+        # 转换为状态JSON：进度为已处理帧数/总帧数，帧率按开始处理以来的耗时计算
+        # 输入: [无] | 输出: [Dict 任务状态]
+        """
+        with self.lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            return {
+                'id': self.id,
+                'status': self.status,
+                'input_path': self.input_path,
+                'output_path': self.output_path,
+                'frames_done': self.frames_done,
+                'total_frames': self.total_frames,
+                'progress': round(min(1.0, self.frames_done / self.total_frames), 4) if self.total_frames else 0.0,
+                'fps': round(self.frames_done / elapsed, 2) if elapsed > 0 else 0.0,
+                'elapsed_s': round(elapsed, 2),
+                'attempts': self.attempts,
+                'submitted_at': self.submitted_at,
+                'error': self.error
+            }
+
+
+class JobManager:
+    """
+    JobManager 功能说明:
+    # 常驻进程内的有界线程池：OpenCV处理时释放GIL，多个任务可在线程中并行，省去每个文件启动解释器和导入cv2的开销；
+    # 等待中的任务超过max_queue时拒绝提交；整体帧率 = 全部已处理帧数 ÷ 至少有一个任务在处理的累计时间；
+    # 提供store时任务记录到持久化任务队列：相同内容和参数已完成的直接返回，失败的按退避延迟重试，重启后恢复未完成的任务
+    # 输入: [jobs: int 同时处理的任务数, max_queue: int 等待任务上限, output_dir: str 默认输出目录,
+    #        store: JobStore 持久化任务队列] | 输出: [JobManager实例]
+    """
+
+    def __init__(self, jobs: int = 1, max_queue: int = 100, output_dir: str = "output",
+                 store: Optional[JobStore] = None):
+        self.jobs = max(1, jobs)
+        self.max_queue = max_queue
+        self.output_dir = output_dir
+        self.executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="job")
+        self.jobs_by_id: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self._running = 0
+        self._busy_since: Optional[float] = None
+        self._busy_s = 0.0
+        self.store = store
+        self.worker_id = make_worker_id()
+        self.lease_keeper = None
+        if store is not None:
+            self.lease_keeper = LeaseKeeper(store, self.worker_id).start()
+            self._recover()
+
+    def submit(self, request: Dict[str, Any]) -> Job:
+        """
+        submit 功能说明:
+        # 校验请求并提交任务；未指定output_path时输出到output_dir/<文件名>_no_watermark<扩展名>
+        # 输入: [request: Dict 任务请求] | 输出: [Job 已提交的任务]
+        """
+        config, areas = build_job_config(request)
+        input_path = request['input_path']
+        output_path = request.get('output_path')
+        if not output_path:
+            name, ext = os.path.splitext(os.path.basename(input_path))
+            output_path = os.path.join(self.output_dir, f"{name}_no_watermark{ext}")
+
+        with self.lock:
+            queued = sum(1 for existing in self.jobs_by_id.values() if existing.status == 'queued')
+        if queued >= self.max_queue:
+            raise QueueFullError(f"等待中的任务已达上限 {self.max_queue}")
+
+        store_id = None
+        if self.store is not None:
+            settings = WatermarkRemover.from_config(config).get_processing_settings(areas)
+            row = self.store.enqueue(input_path, output_path, settings, {**config, 'watermark_areas': areas}, 'api')
+            store_id = row['id']
+            with self.lock:
+                existing = self.jobs_by_id.get(str(store_id))
+            if existing is not None and existing.status not in FINISHED_STATES:
+                return existing
+            if row['state'] == 'completed':
+                # 相同内容和参数已处理完成，不再处理
+                job = Job(input_path, output_path, config, areas, store_id)
+                job.status = 'completed'
+                job.attempts = row['attempts']
+                job.finished_at = time.time()
+                with self.lock:
+                    self.jobs_by_id[job.id] = job
+                log_info(f"♻️  任务 {job.id} 此前已完成: {input_path} -> {output_path}")
+                return job
+
+        job = Job(input_path, output_path, config, areas, store_id)
+        with self.lock:
+            self.jobs_by_id[job.id] = job
+        self.executor.submit(self._run, job)
+        log_info(f"📥 接收任务 {job.id}: {input_path} -> {output_path}")
+        return job
+
+    def _recover(self) -> None:
+        """
+        _recover 功能说明:
+        # 启动时将持久化任务队列中来自HTTP服务且未结束的任务(含上次异常退出时处理中的)重新加入线程池，任务ID不变
+        # 输入: [无] | 输出: [无]
+        """
+        rows = self.store.list_jobs(states=('queued', 'running'), source='api')
+        for row in rows:
+            config = dict(row['config'])
+            areas = config.pop('watermark_areas', None)
+            job = Job(row['input_path'], row['output_path'], config,
+                      [tuple(area) for area in areas] if areas else None, row['id'])
+            job.attempts = row['attempts']
+            with self.lock:
+                self.jobs_by_id[job.id] = job
+            self.executor.submit(self._run, job)
+        if rows:
+            log_info(f"🔄 从任务队列恢复 {len(rows)} 个未完成的任务")
+
+    def _schedule(self, job: Job, delay: float) -> None:
+        """
+        _schedule 功能说明:
+        # delay秒后重新提交任务；服务已关闭时不再提交，任务保留在持久化任务队列中，重启后恢复
+        # 输入: [job: Job 任务, delay: float 延迟(秒)] | 输出: [无]
+        """
+        def resubmit():
+            try:
+                self.executor.submit(self._run, job)
+            except RuntimeError:
+                pass
+
+        timer = threading.Timer(max(0.0, delay), resubmit)
+        timer.daemon = True
+        timer.start()
+
+    def _set_running(self, delta: int) -> None:
+        """
+        _set_running 功能说明:
+        # 更新处理中任务数，从0变为1时开始计时、变回0时累计忙碌时间
+        # 输入: [delta: int 变化量(+1或-1)] | 输出: [无]
+        """
+        with self.lock:
+            now = time.time()
+            if self._running == 0 and delta > 0:
+                self._busy_since = now
+            self._running += delta
+            if self._running == 0 and self._busy_since is not None:
+                self._busy_s += now - self._busy_since
+                self._busy_since = None
+
+    def _run(self, job: Job) -> None:
+        """
+        _run 功能说明:
+        # 工作线程入口：处理期间本线程产生的日志以任务ID和本服务的执行者ID标记
+        # 输入: [job: Job 任务] | 输出: [无]
+        """
+        with log_context(job_id=job.id, worker_id=self.worker_id):
+            self._process(job)
+
+    def _process(self, job: Job) -> None:
+        """
+        _process 功能说明:
+        # 处理单个任务：排队期间已取消的直接结束；读取容器元数据获得总帧数，处理中按帧回调累计进度；
+        # 使用持久化任务队列时先领取任务(未到重试时间或正由其他执行者处理时稍后再试)，结束后记录完成或失败，
+        # 失败且尝试次数未用完时按退避延迟重新提交
+        # 输入: [job: Job 任务] | 输出: [无]
+        """
+        if job.cancel_event.is_set():
+            with job.lock:
+                job.status = 'cancelled'
+                job.finished_at = time.time()
+            return
+
+        if self.store is not None:
+            claimed = self.store.claim(self.worker_id, [job.store_id])
+            if not claimed:
+                row = self.store.get(job.store_id)
+                wait_s = self.store.next_retry_in([job.store_id])
+                if row is None or wait_s is None:
+                    with job.lock:
+                        job.status = row['state'] if row else 'failed'
+                        job.error = row['error'] if row else "任务记录不存在"
+                        job.finished_at = time.time()
+                else:
+                    self._schedule(job, wait_s)
+                return
+            job.attempts = claimed[0]['attempts']
+
+        with job.lock:
+            job.status = 'running'
+            job.started_at = time.time()
+            job.finished_at = None
+            job.frames_done = 0
+            job.error = None
+
+        self._set_running(1)
+        status, error = 'failed', None
+        try:
+            info = probe_video(job.input_path)
+            with job.lock:
+                job.total_frames = info['frame_count'] if info else 0
+            output_dir = os.path.dirname(job.output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            remover = WatermarkRemover.from_config(job.config)
+            success = remover.remove_watermark(job.input_path, job.output_path, job.areas,
+                                               job.add_frames, job.cancel_event)
+            if job.cancel_event.is_set():
+                status = 'cancelled'
+            elif success:
+                status = 'completed'
+            else:
+                error = "处理失败"
+        except Exception as e:
+            error = str(e)
+            log_error(f"任务 {job.id} 处理失败", e)
+        finally:
+            duration = time.time() - job.started_at
+            recorded = True
+            if self.store is not None and status == 'completed':
+                recorded = self.store.complete(job.store_id, self.worker_id, duration)
+            elif self.store is not None and status == 'failed':
+                state = self.store.fail(job.store_id, self.worker_id, error or "处理失败", duration)
+                recorded = state is not None
+                status = state or status
+            if not recorded:
+                # 租约过期已被其他执行者接管，本次结果不写入任务队列，状态以接管者为准
+                row = self.store.get(job.store_id)
+                log_warning(f"任务 {job.id} 已被其他执行者接管，本次结果({status})未记录")
+                status = row['state'] if row else 'failed'
+            with job.lock:
+                job.status = status
+                job.error = error
+                job.finished_at = time.time()
+            self._set_running(-1)
+
+        log_info(f"📤 任务 {job.id} 结束: {status} ({job.frames_done} 帧, {duration:.2f} 秒, "
+                 f"第 {max(job.attempts, 1)} 次尝试)")
+        if status == 'queued':
+            self._schedule(job, self.store.next_retry_in([job.store_id]) or 0.0)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        get 功能说明:
+        # 按任务ID获取任务
+        # 输入: [job_id: str 任务ID] | 输出: [Optional[Job] 任务，不存在时为None]
+        """
+        with self.lock:
+            return self.jobs_by_id.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """
+        list_jobs 功能说明:
+        # 按提交时间获取全部任务
+        # 输入: [无] | 输出: [List[Job] 任务列表]
+        """
+        with self.lock:
+            return sorted(self.jobs_by_id.values(), key=lambda job: job.submitted_at)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        cancel 功能说明:
+        # 设置任务的取消信号：排队中的任务不再开始，处理中的任务停止读取新帧并删除未完成的输出
+        # 输入: [job_id: str 任务ID] | 输出: [Optional[Job] 任务，不存在时为None]
+        """
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED_STATES:
+            job.cancel_event.set()
+            if self.store is not None:
+                self.store.cancel(job.store_id)
+        return job
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        get_metrics 功能说明:
+        # 获取各状态任务数、队列深度、全部已处理帧数和整体帧率；各状态任务数同时写入任务数指标
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        jobs = self.list_jobs()
+        counts = {state: 0 for state in ('queued', 'running') + FINISHED_STATES}
+        frames = 0
+        for job in jobs:
+            with job.lock:
+                counts[job.status] += 1
+                frames += job.frames_done
+        for state in ('queued', 'running'):
+            JOB_QUEUE_DEPTH.set(counts[state], state=state)
+        with self.lock:
+            busy_s = self._busy_s + (time.time() - self._busy_since if self._busy_since is not None else 0.0)
+        return {
+            'jobs': counts,
+            'queue_depth': counts['queued'],
+            'workers': self.jobs,
+            'frames_processed': frames,
+            'busy_s': round(busy_s, 2),
+            'fps': round(frames / busy_s, 2) if busy_s > 0 else 0.0
+        }
+
+    def shutdown(self) -> None:
+        """
+        shutdown 功能说明:
+        # 取消排队中的任务，等待处理中的任务结束后关闭线程池；持久化任务队列中排队的任务保留，重启后恢复
+        # 输入: [无] | 输出: [无]
+        """
+        for job in self.list_jobs():
+            if job.status == 'queued':
+                job.cancel_event.set()
+        self.executor.shutdown(wait=True)
+        if self.lease_keeper is not None:
+            self.lease_keeper.stop()
+            self.store.release(self.worker_id)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    JobRequestHandler 功能说明:
+    # HTTP接口：POST /jobs 提交任务(202)，GET /jobs 列出任务，GET /jobs/<id> 查询状态，DELETE /jobs/<id> 取消，
+    # GET /metrics 整体统计，GET /health 存活检查；请求和响应均为JSON，参数错误400，不存在404，队列满503
+    """
+
+    server_version = "WatermarkJobServer/1.0"
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        """
+        _send_json 功能说明:
+        # 发送JSON响应
+        # 输入: [status: int HTTP状态码, payload: Any 响应内容] | 输出: [无]
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str, content_type: str = 'text/plain; charset=utf-8') -> None:
+        """
+        _send_text 功能说明:
+        # 发送文本响应
+        # 输入: [status: int HTTP状态码, text: str 响应内容, content_type: str 内容类型] | 输出: [无]
+        """
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        """
+        _read_json 功能说明:
+        # 读取JSON请求体，格式无效时抛出ValueError
+        # 输入: [无] | 输出: [Dict 请求内容]
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError("请求体应为JSON对象")
+        return data
+
+    def do_GET(self) -> None:
+        manager: JobManager = self.server.manager
+        path = self.path.rstrip('/')
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/metrics':
+            self._send_json(200, manager.get_metrics())
+        elif path == '/metrics/prometheus':
+            # 先刷新任务数指标，帧数、耗时直方图和流水线队列深度在处理过程中实时更新
+            manager.get_metrics()
+            self._send_text(200, REGISTRY.render(), CONTENT_TYPE)
+        elif path == '/jobs':
+            self._send_json(200, [job.to_dict() for job in manager.list_jobs()])
+        elif path.startswith('/jobs/'):
+            job = manager.get(path[len('/jobs/'):])
+            if job is None:
+                self._send_json(404, {'error': "任务不存在"})
+            else:
+                self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {'error': "路径不存在"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip('/') != '/jobs':
+            self._send_json(404, {'error': "路径不存在"})
+            return
+        try:
+            job = self.server.manager.submit(self._read_json())
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+        except QueueFullError as e:
+            self._send_json(503, {'error': str(e)})
+        else:
+            self._send_json(202, job.to_dict())
+
+    def do_DELETE(self) -> None:
+        path = self.path.rstrip('/')
+        job = self.server.manager.cancel(path[len('/jobs/'):]) if path.startswith('/jobs/') else None
+        if job is None:
+            self._send_json(404, {'error': "任务不存在"})
+        else:
+            self._send_json(200, job.to_dict())
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 访问日志不写入控制台，避免轮询状态时刷屏
+        pass
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, jobs: int = 1, max_queue: int = 100,
+                  output_dir: str = "output", job_db: Optional[str] = None, max_attempts: int = 3,
+                  retry_delay: float = 30.0) -> ThreadingHTTPServer:
+    """
+    create_server 功能说明:
+    # 创建绑定任务管理器(server.manager)的多线程HTTP服务；port为0时由系统分配端口(server.server_address[1])；
+    # 指定job_db时任务记录到该持久化任务队列
+    # 输入: [host: str 监听地址, port: int 端口, jobs: int 同时处理的任务数, max_queue: int 等待任务上限,
+    #        output_dir: str 默认输出目录, job_db: str 任务队列数据库路径, max_attempts: int 最大尝试次数,
+    #        retry_delay: float 首次重试延迟(秒)] | 输出: [ThreadingHTTPServer HTTP服务]
+    """
+    store = JobStore(job_db, max_attempts, retry_delay) if job_db else None
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.manager = JobManager(jobs, max_queue, output_dir, store)
+    return server
+
+
+class JobClient:
+    """
+    JobClient 功能说明:
+    # 本地服务的简单客户端，其他Python服务可直接使用或参照其请求格式；服务返回错误时抛出RuntimeError
+    # 输入: [base_url: str 服务地址, timeout: float 请求超时(秒)] | 输出: [JobClient实例]
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765", timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        _request 功能说明:
+        # 发送请求并解析JSON响应，HTTP错误时以服务返回的错误信息抛出RuntimeError
+        # 输入: [method: str 请求方法, path: str 路径, payload: Dict 请求体] | 输出: [Any 响应内容]
+        """
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise RuntimeError(f"{e.code}: {message}")
+
+    def submit(self, input_path: str, preset: Optional[str] = None, threshold: Optional[int] = None,
+               kernel_size: Optional[int] = None, regions: Optional[List[List[int]]] = None,
+               output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        submit 功能说明:
+        # 提交任务，未指定的参数使用服务端预设
+        # 输入: [input_path: str 输入路径, preset: str 预设, threshold: int 阈值, kernel_size: int 核大小,
+        #        regions: List 水印区域, output_path: str 输出路径] | 输出: [Dict 任务状态]
+        """
+        payload = {'input_path': os.path.abspath(input_path), 'preset': preset, 'threshold': threshold,
+                   'kernel_size': kernel_size, 'regions': regions,
+                   'output_path': os.path.abspath(output_path) if output_path else None}
+        return self._request('POST', '/jobs', {key: value for key, value in payload.items() if value is not None})
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        status 功能说明:
+        # 查询任务状态
+        # 输入: [job_id: str 任务ID] | 输出: [Dict 任务状态]
+        """
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        cancel 功能说明:
+        # 取消任务
+        # 输入: [job_id: str 任务ID] | 输出: [Dict 任务状态]
+        """
+        return self._request('DELETE', f'/jobs/{job_id}')
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        metrics 功能说明:
+        # 查询整体统计
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        return self._request('GET', '/metrics')
+
+    def wait(self, job_id: str, timeout: float = 600.0, interval: float = 0.5) -> Dict[str, Any]:
+        """
+        wait 功能说明:
+        # 轮询直到任务结束，超时抛出TimeoutError
+        # 输入: [job_id: str 任务ID, timeout: float 最长等待(秒), interval: float 轮询间隔(秒)] | 输出: [Dict 最终任务状态]
+        """
+        deadline = time.time() + timeout
+        while True:
+            job = self.status(job_id)
+            if job['status'] in FINISHED_STATES:
+                return job
+            if time.time() >= deadline:
+                raise TimeoutError(f"等待任务 {job_id} 超时")
+            time.sleep(interval)
+
+
+def main():
+    """
+    main 功能说明:
+    # 服务入口：解析命令行参数，启动HTTP服务直到Ctrl+C，停止时取消排队任务并等待处理中的任务结束
+    # 输入: [命令行参数] | 输出: [无]
+    """
+    parser = argparse.ArgumentParser(description='视频去水印本地HTTP任务服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认只监听本机)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认8765)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='同时处理的任务数 (默认1)')
+    parser.add_argument('--max-queue', type=int, default=100, help='等待中的任务上限，超过时拒绝提交 (默认100)')
+    parser.add_argument('--output-dir', default='output', help='默认输出目录')
+    parser.add_argument('--job-db', default=os.path.join('cache', 'jobs.db'),
+                        help='持久化任务队列数据库路径，为空字符串时不持久化')
+    parser.add_argument('--max-attempts', type=int, default=3, help='每个任务的最大尝试次数 (默认3)')
+    args = parser.parse_args()
+
+    setup_logger()
+    server = create_server(args.host, args.port, args.jobs, args.max_queue, args.output_dir,
+                           args.job_db, args.max_attempts)
+    log_info(f"🌐 任务服务已启动: http://{args.host}:{server.server_address[1]} (同时处理 {args.jobs} 个任务)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log_info("⚠️  停止任务服务")
+    finally:
+        server.server_close()
+        server.manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1758 @@
+##########test_watermark_remover.py: 水印去除核心模块测试脚本 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建水印去除核心功能测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加静态水印掩码估计测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加并行帧流水线输出一致性测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加分段并行处理测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加未变化区域缓存测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加按批检测一致性测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加分阶段计时测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加缓冲区复用测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加缩小检测测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加自适应掩码刷新测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加断点续处理测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加批量多进程执行测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加结果缓存测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加时域填充测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加GUI预览帧缓存测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加处理进度回调和取消测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加定位索引测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加视频元数据探测缓存测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加处理耗时模型测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加监视文件夹守护测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加本地HTTP任务服务集成测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加持久化任务队列测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加运行指标导出测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加队列结构化日志测试]########
+# 变更记录: [2026-10-18] @李祥光 [随按批检测移除对应的一致性测试]########
+# 变更记录: [2026-10-18] @李祥光 [增加处理失败后重试的测试]########
+# 变更记录: [2026-10-18] @李祥光 [持久化任务队列测试覆盖租约被接管后原执行者不能记录结果]########
+# 变更记录: [2026-10-18] @李祥光 [区域缓存测试覆盖整帧模式按掩码外接矩形命中]########
+# 变更记录: [2026-10-18] @李祥光 [运行指标测试覆盖帧进程池和分段模式的计数汇总]########
+# 变更记录: [2026-10-18] @李祥光 [测试日志写入临时目录，运行测试不再在仓库logs/下生成日志文件]########
+# 变更记录: [2026-10-18] @李祥光 [增加扩展区域重叠时结果与区域顺序无关的测试]########
+# 输入: [无] | 输出: [测试结果报告]###############
+
+
+###########################文件下的所有函数###########################
+"""
+create_test_frame：生成带有已知水印的测试帧
+create_test_video：生成带有已知水印的测试视频
+test_roi_processing：测试区域限定处理结果与整帧处理一致
+test_roi_outside_untouched：测试区域外像素保持不变
+test_overlapping_areas：测试扩展区域重叠时结果与区域顺序无关
+test_static_mask_estimation：测试静态水印掩码估计
+test_frame_pipeline_matches_serial：测试并行流水线输出与顺序处理一致
+test_segmented_processing：测试分段并行处理的分段规划和输出帧数
+test_region_cache_reuse：测试未变化区域复用修复结果且输出不变
+test_stage_timing：测试分阶段计时统计和关闭计时
+test_buffer_reuse：测试逐帧处理复用缓冲区且结果正确
+test_scaled_detection：测试缩小检测的掩码覆盖整帧检测结果
+test_adaptive_mask_refresh：测试自适应掩码只在镜头切换和定时刷新时重新检测
+test_checkpoint_resume：测试中断后从最后完成的分段继续处理
+_fake_batch_job：批量执行测试用的单文件处理函数
+_metrics_batch_job：批量执行测试用的单文件处理函数，在工作进程内累计已处理帧数
+test_batch_executor：测试批量执行大文件优先调度和各进程吞吐汇总
+test_result_cache：测试结果缓存按内容和处理参数命中
+test_temporal_fill：测试时域填充从平移画面的相邻帧恢复背景
+test_frame_cache：测试预览帧LRU缓存的内存上限淘汰和相邻帧后台预取
+test_progress_and_cancel：测试处理进度回调和取消后删除未完成的输出
+test_seek_index：测试定位索引的保存、失效判断和按索引读取的帧与顺序解码一致
+test_probe_cache：测试视频元数据探测结果和按修改时间失效的持久化缓存
+test_cost_model：测试耗时模型由实测样本校准及批量剩余时间按本批实测修正
+test_watch_folder：测试监视文件夹只处理写入完成的文件且工作进程预热后复用
+test_job_server：测试本地HTTP任务服务提交、查询进度、取消和整体统计
+test_job_store：测试持久化任务队列幂等提交、失败重试、租约过期回收和重启后跳过已完成任务
+test_failed_job_retry：测试处理失败删除未完成的输出，任务重试时覆盖上次留下的输出
+test_metrics：测试运行指标的Prometheus文本格式以及处理过程中的实时计数、耗时直方图和导出
+_logging_batch_job：结构化日志测试用的单文件处理函数，在工作进程中记录一条日志
+test_structured_logging：测试队列日志以JSON行写入并带任务ID和执行者ID，重复初始化不新建日志文件
+run_all_tests：运行所有测试用例
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[测试启动] --> B[run_all_tests]
+    B --> C[test_roi_processing]
+    B --> D[test_roi_outside_untouched]
+    B --> OA[test_overlapping_areas]
+    OA --> E
+    B --> G[test_static_mask_estimation]
+    B --> I[test_frame_pipeline_matches_serial]
+    I --> E
+    B --> J[test_segmented_processing]
+    J --> H
+    J --> F
+    B --> K[test_region_cache_reuse]
+    K --> E
+    K --> F
+    B --> PC[test_probe_cache]
+    PC --> H
+    B --> CM[test_cost_model]
+    B --> WF[test_watch_folder]
+    B --> JS[test_job_server]
+    B --> JQ[test_job_store]
+    B --> FR[test_failed_job_retry]
+    FR --> H
+    B --> MT[test_metrics]
+    B --> SL[test_structured_logging]
+    SL --> SB[_logging_batch_job]
+    JS --> H
+    B --> SK[test_seek_index]
+    SK --> H
+    B --> Y[test_progress_and_cancel]
+    Y --> F
+    B --> X[test_frame_cache]
+    X --> H
+    X --> F
+    B --> W[test_temporal_fill]
+    W --> F
+    B --> V[test_result_cache]
+    V --> H
+    V --> F
+    B --> T[test_batch_executor]
+    T --> U[_fake_batch_job]
+    T --> F
+    B --> S[test_checkpoint_resume]
+    S --> H
+    S --> F
+    B --> R[test_adaptive_mask_refresh]
+    R --> F
+    B --> Q[test_scaled_detection]
+    Q --> E
+    Q --> F
+    B --> P[test_buffer_reuse]
+    P --> E
+    P --> F
+    B --> O[test_stage_timing]
+    O --> H
+    O --> F
+    C --> E[create_test_frame]
+    D --> E
+    G --> H[create_test_video]
+    H --> E
+    C --> F[汇总测试报告]
+    D --> F
+    G --> F
+    I --> F
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import atexit
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from watermark_remover import WatermarkRemover
+    from utils.frame_pipeline import FramePipeline
+    from utils.video_segments import plan_segments, plan_fixed_segments
+    from utils.region_cache import RegionCache
+    from utils.stage_timer import StageTimer
+    from utils.mask_refresh import MaskRefreshCache
+    from utils.batch_executor import schedule_largest_first, run_batch_jobs, summarize_workers
+    from utils.result_cache import ResultCache
+    from utils.frame_cache import ProxyFrameCache, FramePrefetcher, make_proxy
+    from utils.seek_index import SeekIndex, seek_reader, get_index_path
+    from utils.video_probe import ProbeCache, probe_video, summarize_probes
+    from utils.cost_model import CostModel, BatchEstimator, make_cost_profile, job_features
+    from utils.watch_folder import WatchFolderDaemon, FileStabilityTracker
+    from job_server import create_server, JobClient
+    from utils.job_store import JobStore
+    from utils import metrics
+    from utils.logger import setup_logger, shutdown_logging, log_context, job_log, log_info
+    from enhanced_watermark_remover import start_worker_metrics, process_video_enhanced, make_job_config
+    from config.config import get_preset_config, get_default_config
+except ImportError as e:
+    print(f"导入错误: {e}")
+    print("请确保在项目根目录下运行此测试脚本")
+    sys.exit(1)
+
+# 测试期间的日志写入临时目录，不在仓库的logs/下生成文件；退出时先停止日志监听线程(后注册先执行)再删除目录
+TEST_LOG_DIR = tempfile.mkdtemp(prefix="watermark_test_logs_")
+atexit.register(shutil.rmtree, TEST_LOG_DIR, True)
+setup_logger(TEST_LOG_DIR)
+
+# 测试水印所在区域 (x1, y1, x2, y2)
+LOGO_AREA = (440, 10, 630, 70)
+
+
+def create_test_frame(seed: int = 0) -> np.ndarray:
+    """
+    create_test_frame 功能说明:
+    # 生成带有已知白色文字水印的暗色噪声测试帧
+    # 输入: [seed: int 随机种子] | 输出: [np.ndarray 测试帧]
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 50, (360, 640, 3)).astype(np.uint8)
+    cv2.putText(frame, "LOGO", (460, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 4)
+    return frame
+
+
+def create_test_video(video_path: str, frame_count: int = 30) -> None:
+    """
+    create_test_video 功能说明:
+    # 生成逐帧噪声不同、水印固定的测试视频
+    # 输入: [video_path: str 视频路径, frame_count: int 帧数] | 输出: [无，写入视频文件]
+    """
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (640, 360))
+    for i in range(frame_count):
+        writer.write(create_test_frame(i))
+    writer.release()
+
+
+def test_roi_processing():
+    """
+    test_roi_processing 功能说明:
+    # 测试区域限定处理在水印区域内的结果与整帧处理一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试区域限定处理...")
+
+        frame = create_test_frame()
+        remover = WatermarkRemover()
+
+        full_result = remover.process_frame(frame)
+        roi_result = remover.remove_watermark_frame(frame, [LOGO_AREA])
+
+        x1, y1, x2, y2 = LOGO_AREA
+        assert not np.array_equal(roi_result, frame), "区域处理应修改水印像素"
+        assert np.array_equal(full_result[y1:y2, x1:x2], roi_result[y1:y2, x1:x2]), "区域内结果应与整帧处理一致"
+
+        print("✅ 区域限定处理测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 区域限定处理测试失败: {e}")
+        return False
+
+
+def test_roi_outside_untouched():
+    """
+    test_roi_outside_untouched 功能说明:
+    # 测试区域限定处理不会修改选择区域以外的像素
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试区域外像素保持不变...")
+
+        frame = create_test_frame()
+        remover = WatermarkRemover()
+
+        # 只选择水印左半部分
+        x1, y1, x2, y2 = LOGO_AREA
+        half_area = (x1, y1, (x1 + x2) // 2, y2)
+        result = remover.remove_watermark_frame(frame, [half_area])
+
+        outside = np.ones(frame.shape[:2], dtype=bool)
+        outside[half_area[1]:half_area[3], half_area[0]:half_area[2]] = False
+        assert np.array_equal(result[outside], frame[outside]), "区域外像素不应被修改"
+
+        print("✅ 区域外像素测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 区域外像素测试失败: {e}")
+        return False
+
+
+def test_overlapping_areas():
+    """
+    test_overlapping_areas 功能说明:
+    # 测试水印区域的扩展裁剪块互相重叠时，各区域都以原帧为输入，结果与区域顺序无关，且不使用缓存与使用缓存一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试重叠区域处理...")
+
+        frame = create_test_frame()
+        remover = WatermarkRemover()
+
+        # 水印左右两半相邻，扩展裁剪块重叠
+        x1, y1, x2, y2 = LOGO_AREA
+        left, right = (x1, y1, (x1 + x2) // 2, y2), ((x1 + x2) // 2, y1, x2, y2)
+        forward = remover.remove_watermark_frame(frame, [left, right])
+        backward = remover.remove_watermark_frame(frame, [right, left])
+        assert np.array_equal(forward, backward), "重叠区域的处理结果不应取决于区域顺序"
+
+        cache = RegionCache()
+        for _ in range(2):
+            cached = remover.remove_watermark_frame(frame, [left, right], region_cache=cache)
+            assert np.array_equal(cached, forward), "使用缓存的结果应与直接处理一致"
+        assert cache.hits == 2, f"重复帧应命中缓存: {cache.get_stats()}"
+
+        print("✅ 重叠区域处理测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 重叠区域处理测试失败: {e}")
+        return False
+
+
+def test_static_mask_estimation():
+    """
+    test_static_mask_estimation 功能说明:
+    # 测试静态模式采样估计的掩码覆盖水印且不包含水印区域外的像素
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试静态水印掩码估计...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "static_logo.mp4")
+            create_test_video(video_path)
+
+            x1, y1, x2, y2 = LOGO_AREA
+            for statistic in ('median', 'intersection'):
+                remover = WatermarkRemover(mask_mode='static', mask_samples=8, mask_statistic=statistic)
+                mask = remover.estimate_static_mask(video_path)
+                assert mask is not None, f"{statistic} 掩码估计不应失败"
+                assert cv2.countNonZero(mask[y1:y2, x1:x2]) > 0, f"{statistic} 掩码应覆盖水印"
+
+                outside = mask.copy()
+                outside[y1:y2, x1:x2] = 0
+                assert cv2.countNonZero(outside) == 0, f"{statistic} 掩码不应包含水印区域外的像素"
+
+        print("✅ 静态水印掩码估计测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 静态水印掩码估计测试失败: {e}")
+        return False
+
+
+def test_frame_pipeline_matches_serial():
+    """
+    test_frame_pipeline_matches_serial 功能说明:
+    # 测试线程池和进程池流水线的输出帧顺序和内容与顺序处理完全一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试并行帧流水线输出一致性...")
+
+        frames = [create_test_frame(i) for i in range(12)]
+        remover = WatermarkRemover()
+
+        def make_reader():
+            iterator = iter(frames)
+            return lambda: next(((True, frame) for frame in iterator), (False, None))
+
+        results = {}
+        for mode in ('serial', 'thread', 'process'):
+            written = []
+            pipeline = FramePipeline(remover.process_frame, workers=3, execution_mode=mode, max_in_flight=4)
+            count = pipeline.run(make_reader(), written.append)
+            assert count == len(frames), f"{mode} 模式写出帧数不正确"
+            results[mode] = written
+
+        for mode in ('thread', 'process'):
+            for expected, actual in zip(results['serial'], results[mode]):
+                assert np.array_equal(expected, actual), f"{mode} 模式输出与顺序处理不一致"
+
+        print("✅ 并行帧流水线输出一致性测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 并行帧流水线输出一致性测试失败: {e}")
+        return False
+
+
+def test_segmented_processing():
+    """
+    test_segmented_processing 功能说明:
+    # 测试分段规划覆盖全部帧，分段并行处理后输出帧数和帧率与输入一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试分段并行处理...")
+
+        segments = plan_segments(10, 3)
+        assert segments == [(0, 4), (4, 7), (7, 10)], "分段规划应连续且覆盖全部帧"
+        assert plan_segments(2, 5) == [(0, 1), (1, 2)], "分段数不应超过帧数"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            create_test_video(video_path, frame_count=20)
+
+            remover = WatermarkRemover(segments=3, workers=2, temp_dir=os.path.join(temp_dir, "temp"))
+            assert remover.remove_watermark(video_path, output_path), "分段处理应成功"
+
+            cap = cv2.VideoCapture(output_path)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            cap.release()
+            assert frame_count == 20, f"输出帧数应为20，实际为{frame_count}"
+            assert fps == 25, f"输出帧率应为25，实际为{fps}"
+            assert not os.listdir(os.path.join(temp_dir, "temp")), "分段临时文件应被清理"
+
+        print("✅ 分段并行处理测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 分段并行处理测试失败: {e}")
+        return False
+
+
+def test_region_cache_reuse():
+    """
+    test_region_cache_reuse 功能说明:
+    # 测试精确匹配的区域缓存在重复帧上命中，且输出与不使用缓存时完全一致；整帧模式只比较掩码外接矩形
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试未变化区域缓存...")
+
+        frames = [create_test_frame(0)] * 3 + [create_test_frame(1)] * 2
+        remover = WatermarkRemover()
+
+        for areas in ([LOGO_AREA], None):
+            cache = RegionCache()
+            for frame in frames:
+                expected = remover.process_frame(frame, areas)
+                actual = remover.process_frame(frame, areas, region_cache=cache)
+                assert np.array_equal(expected, actual), "使用缓存的输出应与直接处理一致"
+            assert (cache.hits, cache.misses) == (3, 2), f"缓存命中统计不正确: {cache.get_stats()}"
+
+        # 整帧模式只比较掩码外接矩形的扩展裁剪块，水印以外的画面变化仍命中且输出与直接处理一致
+        cache = RegionCache()
+        frame = create_test_frame(0)
+        remover.process_frame(frame, region_cache=cache)
+        changed = frame.copy()
+        changed[300:360, 0:100] = create_test_frame(1)[300:360, 0:100]
+        actual = remover.process_frame(changed, region_cache=cache)
+        assert cache.hits == 1, "水印外接矩形以外的变化应命中缓存"
+        assert np.array_equal(actual, remover.process_frame(changed)), "命中时外接矩形以外应为当前帧像素"
+
+        # 容差模式下轻微变化的区域也应命中
+        cache = RegionCache(tolerance=1.0)
+        frame = create_test_frame(0)
+        remover.process_frame(frame, [LOGO_AREA], region_cache=cache)
+        noisy = frame.copy()
+        noisy[0:40:4, 400:640:4] += 1
+        remover.process_frame(noisy, [LOGO_AREA], region_cache=cache)
+        assert cache.hits == 1, "容差范围内的变化应命中缓存"
+
+        print("✅ 未变化区域缓存测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 未变化区域缓存测试失败: {e}")
+        return False
+
+
+def test_stage_timing():
+    """
+    test_stage_timing 功能说明:
+    # 测试视频处理后各阶段均有计时统计，分段计时可合并，关闭计时时不记录
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试分阶段计时...")
+
+        timer = StageTimer()
+        for seconds in (0.001, 0.002, 0.003, 0.004):
+            timer.record('detect', seconds)
+        other = StageTimer()
+        other.record('detect', 0.010)
+        timer.merge(other)
+        stats = timer.get_stats()['detect']
+        assert stats['count'] == 5, "合并后样本数应为5"
+        assert abs(stats['total_ms'] - 20.0) < 1e-6, "总耗时统计不正确"
+        assert stats['p50_ms'] == 3.0 and stats['max_ms'] == 10.0, "分位数统计不正确"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            create_test_video(video_path, frame_count=10)
+
+            remover = WatermarkRemover()
+            assert remover.remove_watermark(video_path, output_path), "处理应成功"
+            stage_stats = remover.get_stage_stats()
+            for name in ('decode', 'detect', 'morphology', 'dilate', 'inpaint', 'write'):
+                assert name in stage_stats, f"缺少阶段统计: {name}"
+            assert stage_stats['write']['count'] == 10, "写出阶段次数应等于帧数"
+
+            disabled = WatermarkRemover(stage_timing=False)
+            assert disabled.remove_watermark(video_path, output_path), "关闭计时时处理应成功"
+            assert disabled.get_stage_stats() == {}, "关闭计时时不应记录样本"
+
+        print("✅ 分阶段计时测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 分阶段计时测试失败: {e}")
+        return False
+
+
+def test_buffer_reuse():
+    """
+    test_buffer_reuse 功能说明:
+    # 测试逐帧检测复用同一缓冲区、静态掩码不受后续帧覆盖、去除器序列化后缓冲区重建
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试缓冲区复用...")
+
+        remover = WatermarkRemover()
+        first = remover.create_mask(create_test_frame(0))
+        first_copy = first.copy()
+        second = remover.create_mask(create_test_frame(1))
+        assert first is second, "同分辨率的帧应复用同一掩码缓冲区"
+        assert remover._get_buffer('mask', first.shape) is first, "缓冲区应按名称和尺寸复用"
+
+        # 复用缓冲区后结果应与新建去除器一致
+        assert np.array_equal(first_copy, WatermarkRemover().create_mask(create_test_frame(0))), "复用缓冲区不应改变掩码"
+
+        clone = pickle.loads(pickle.dumps(remover))
+        result = clone.process_frame(create_test_frame(2))
+        assert np.array_equal(result, remover.process_frame(create_test_frame(2))), "序列化后的去除器结果应一致"
+
+        remover.release_buffers()
+        assert remover._get_buffer('mask', first.shape) is not first, "释放后应重新创建缓冲区"
+
+        print("✅ 缓冲区复用测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 缓冲区复用测试失败: {e}")
+        return False
+
+
+def test_scaled_detection():
+    """
+    test_scaled_detection 功能说明:
+    # 测试缩小检测输出原分辨率掩码、覆盖整帧检测到的水印像素；fast预设缩小检测仍去除噪点
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试缩小检测...")
+
+        frame = create_test_frame(0)
+        full_mask = WatermarkRemover().create_mask(frame).copy()
+
+        for scale in (0.5, 0.25):
+            remover = WatermarkRemover(detection_scale=scale)
+            mask = remover.create_mask(frame)
+            assert mask.shape == full_mask.shape, "缩小检测应输出原分辨率掩码"
+            missed = np.count_nonzero((full_mask > 0) & (mask == 0))
+            if scale == 0.5:
+                assert missed == 0, f"缩放{scale}的掩码应覆盖整帧检测的水印像素"
+            else:
+                # 核至少3x3，缩放0.25时开运算相当于原分辨率12像素，比4像素宽的笔画更粗，允许笔画末端极少量缺失
+                assert missed <= cv2.countNonZero(full_mask) // 100, f"缩放{scale}的掩码缺失过多: {missed}"
+            assert cv2.countNonZero(mask) < full_mask.size // 10, "掩码不应扩散到水印以外的大片区域"
+
+        # fast预设(核3，缩放0.5)：缩小后的核不能退化为1x1，孤立噪点仍应被开运算去除
+        fast = WatermarkRemover.from_config(get_preset_config('fast'))
+        assert fast.detection_kernel_size >= 3, f"缩小检测的核不应小于3: {fast.detection_kernel_size}"
+        noisy = np.full((360, 640, 3), 20, dtype=np.uint8)
+        noisy[20:60, 440:620] = 255
+        speckles = [(100 + 40 * i, 50 + 60 * i) for i in range(5)]
+        for y, x in speckles:
+            noisy[y:y + 2, x:x + 2] = 255
+        mask = fast.detect_watermark_region(noisy)
+        assert mask[40, 530] > 0, "fast预设应检测到水印"
+        for y, x in speckles:
+            assert not np.any(mask[y - 4:y + 6, x - 4:x + 6]), f"fast预设应去除孤立噪点: ({x}, {y})"
+
+        try:
+            WatermarkRemover(detection_scale=1.5)
+            raise AssertionError("超出范围的缩放比例应报错")
+        except ValueError:
+            pass
+
+        print("✅ 缩小检测测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 缩小检测测试失败: {e}")
+        return False
+
+
+def test_adaptive_mask_refresh():
+    """
+    test_adaptive_mask_refresh 功能说明:
+    # 测试两个镜头(水印位置不同)的帧序列：镜头切换时刷新掩码并修复新位置的水印，定时刷新按间隔计数
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试自适应掩码刷新...")
+
+        rng = np.random.default_rng(0)
+        frames = []
+        for i in range(20):
+            # 前10帧暗场景水印在右上角，后10帧亮场景水印在左下角
+            level, (x, y) = (0, (560, 20)) if i < 10 else (45, (40, 300))
+            frame = rng.integers(level, level + 10, (360, 640, 3), dtype=np.uint8)
+            cv2.rectangle(frame, (x, y), (x + 40, y + 30), (255, 255, 255), -1)
+            frames.append(frame)
+
+        remover = WatermarkRemover(mask_mode='adaptive')
+        mask_cache = MaskRefreshCache(scene_threshold=30.0, refresh_interval=0)
+        results = [remover.process_frame(frame, mask_cache=mask_cache) for frame in frames]
+        stats = mask_cache.get_stats()
+        assert stats['frames'] == 20, "应统计全部帧"
+        assert stats['refreshes'] == 2 and stats['scene_cuts'] == 1, f"应只在首帧和镜头切换时刷新: {stats}"
+
+        # 两个镜头的水印都应被修复
+        assert results[5][20:50, 560:600].max() < 255, "第一个镜头的水印应被修复"
+        assert results[15][300:330, 40:80].max() < 255, "镜头切换后新位置的水印应被修复"
+
+        interval_cache = MaskRefreshCache(scene_threshold=30.0, refresh_interval=4)
+        for frame in frames[:10]:
+            remover.process_frame(frame, mask_cache=interval_cache)
+        interval_stats = interval_cache.get_stats()
+        assert interval_stats['interval_refreshes'] == 2 and interval_stats['refreshes'] == 3, \
+            f"10帧内间隔4帧应定时刷新2次: {interval_stats}"
+
+        print("✅ 自适应掩码刷新测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 自适应掩码刷新测试失败: {e}")
+        return False
+
+
+def test_checkpoint_resume():
+    """
+    test_checkpoint_resume 功能说明:
+    # 测试断点续处理：第一次运行在第二段写完后中断，重新运行只处理剩余分段，输出帧数正确且检查点被删除
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试断点续处理...")
+
+        assert plan_fixed_segments(25, 10) == [(0, 10), (10, 20), (20, 25)], "固定帧数分段应连续且覆盖全部帧"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            checkpoint_temp = os.path.join(temp_dir, "temp")
+            create_test_video(video_path, frame_count=25)
+
+            # 第一次运行：写完两段后模拟进程被中断
+            remover = WatermarkRemover(checkpoint_frames=10, temp_dir=checkpoint_temp)
+            write_part = remover._write_part
+            written = []
+
+            def interrupted_write_part(*args, **kwargs):
+                if len(written) == 2:
+                    raise KeyboardInterrupt("模拟中断")
+                written.append(args[1])
+                return write_part(*args, **kwargs)
+
+            remover._write_part = interrupted_write_part
+            try:
+                remover.remove_watermark(video_path, output_path)
+                raise AssertionError("模拟中断应抛出KeyboardInterrupt")
+            except KeyboardInterrupt:
+                pass
+            assert not os.path.exists(output_path), "中断时不应生成输出视频"
+
+            info = WatermarkRemover(checkpoint_frames=10, temp_dir=checkpoint_temp).get_checkpoint_info(
+                video_path, output_path)
+            assert info and info['completed_frames'] == 20 and info['total_frames'] == 25, f"检查点应记录已完成的20帧: {info}"
+            assert WatermarkRemover(checkpoint_frames=10, threshold=90, temp_dir=checkpoint_temp).get_checkpoint_info(
+                video_path, output_path) is None, "处理参数变化时不应复用检查点"
+
+            # 重新运行：只处理最后一段
+            resumed = WatermarkRemover(checkpoint_frames=10, temp_dir=checkpoint_temp)
+            resumed_write_part = resumed._write_part
+            resumed_parts = []
+            resumed._write_part = lambda *args, **kwargs: resumed_parts.append(args[1]) or resumed_write_part(*args, **kwargs)
+            assert resumed.remove_watermark(video_path, output_path), "断点续处理应成功"
+            assert len(resumed_parts) == 1, f"应只处理未完成的1段，实际处理{len(resumed_parts)}段"
+
+            cap = cv2.VideoCapture(output_path)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            assert frame_count == 25, f"输出帧数应为25，实际为{frame_count}"
+            assert not os.listdir(checkpoint_temp), "完成后检查点目录应被删除"
+
+        print("✅ 断点续处理测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 断点续处理测试失败: {e}")
+        return False
+
+
+def _fake_batch_job(video_path: str, fail_name: str):
+    """
+    _fake_batch_job 功能说明:
+    # 批量执行测试用的单文件处理函数，文件名等于fail_name时返回失败
+    # 输入: [video_path: str 视频路径, fail_name: str 模拟失败的文件名] | 输出: [Tuple[bool, str] 处理结果和输出路径]
+    """
+    return os.path.basename(video_path) != fail_name, video_path
+
+
+def _metrics_batch_job(video_path: str):
+    """
+    _metrics_batch_job 功能说明:
+    # 批量执行测试用的单文件处理函数，在工作进程内累计5帧已处理帧数
+    # 输入: [video_path: str 视频路径] | 输出: [bool 处理结果]
+    """
+    metrics.FRAMES_PROCESSED.inc(5)
+    return True
+
+
+def test_batch_executor():
+    """
+    test_batch_executor 功能说明:
+    # 测试批量执行按文件大小从大到小调度，多进程结果完整合并并按进程汇总吞吐；
+    # 配置指标文件时各工作进程的帧级指标写入按进程的指标文件，处理很快时退出前也写入最终快照
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试批量多进程执行...")
+
+        video_files = [{'path': f"/videos/{name}", 'name': name, 'size_mb': size}
+                       for name, size in (('a.mp4', 5.0), ('b.mp4', 120.0), ('c.mp4', 30.0), ('d.mp4', 0.5))]
+        order = [info['name'] for info in schedule_largest_first(video_files)]
+        assert order == ['b.mp4', 'c.mp4', 'a.mp4', 'd.mp4'], f"应按文件大小从大到小调度: {order}"
+
+        completed = []
+        results = run_batch_jobs(video_files, _fake_batch_job, ('c.mp4',), jobs=2,
+                                 progress_callback=lambda result: completed.append(result['name']))
+        assert sorted(completed) == ['a.mp4', 'b.mp4', 'c.mp4', 'd.mp4'], "每个文件应回调一次进度"
+        assert [r['name'] for r in results if not r['success']] == ['c.mp4'], "失败文件应单独记录"
+
+        worker_stats = summarize_workers(results)
+        assert sum(stats['files'] for stats in worker_stats.values()) == 4, "各进程处理文件数之和应等于总数"
+        assert sum(stats['success'] for stats in worker_stats.values()) == 3, "各进程成功数之和应为3"
+        assert abs(sum(stats['size_mb'] for stats in worker_stats.values()) - 155.5) < 1e-6, "各进程数据量之和应等于总大小"
+        assert all('mb_per_s' in stats for stats in worker_stats.values()), "应计算各进程吞吐"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # fork的工作进程继承主进程已有的计数，按差值统计；写入间隔很长，只有退出时的最终快照能计入
+            baseline = metrics.FRAMES_PROCESSED.value()
+            metrics_config = {'metrics_file': os.path.join(temp_dir, "watermark.prom"), 'metrics_interval': 60.0}
+            results = run_batch_jobs(video_files, _metrics_batch_job, jobs=2,
+                                     initializer=start_worker_metrics, initargs=(metrics_config,))
+            frames = 0
+            for worker in {result['worker'] for result in results}:
+                with open(os.path.join(temp_dir, f"watermark.{worker}.prom"), 'r', encoding='utf-8') as f:
+                    line = next(line for line in f if line.startswith('watermark_frames_processed_total'))
+                assert f'worker="{worker}"' in line, f"指标应带worker标签: {line}"
+                frames += float(line.split()[-1]) - baseline
+            assert frames == 20, f"各工作进程指标文件的已处理帧数之和应为20: {frames}"
+
+        print("✅ 批量多进程执行测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 批量多进程执行测试失败: {e}")
+        return False
+
+
+def test_result_cache():
+    """
+    test_result_cache 功能说明:
+    # 测试结果缓存：相同内容改名后命中，处理参数或内容变化时不命中，命中的输出硬链接到目标路径；
+    # 超出大小上限时淘汰最久未使用的条目，清空只删除缓存条目
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试结果缓存...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            create_test_video(video_path, frame_count=5)
+
+            remover = WatermarkRemover()
+            assert remover.remove_watermark(video_path, output_path), "处理应成功"
+
+            cache = ResultCache(os.path.join(temp_dir, "cache"))
+            key = cache.make_key(video_path, remover.get_processing_settings())
+            assert cache.lookup(key) is None, "首次处理前不应命中"
+            cache.store(key, output_path, video_path)
+
+            # 同一内容以新文件名出现时命中
+            renamed_path = os.path.join(temp_dir, "renamed.mp4")
+            shutil.copy(video_path, renamed_path)
+            cached_path = cache.lookup(cache.make_key(renamed_path, remover.get_processing_settings()))
+            assert cached_path, "相同内容改名后应命中缓存"
+
+            target_path = os.path.join(temp_dir, "out", "renamed_no_watermark.mp4")
+            cache.materialize(cached_path, target_path)
+            assert os.path.samefile(cached_path, target_path) or \
+                os.path.getsize(target_path) == os.path.getsize(output_path), "命中时应硬链接或复制已有输出"
+            assert cache.materialize(cached_path, target_path) == 'existing', "目标已是缓存文件时不应重复处理"
+            assert cache.is_cached_output(target_path) == os.path.samefile(cached_path, target_path), \
+                "硬链接到缓存条目的输出应识别为缓存输出"
+            own_path = os.path.join(temp_dir, "own.mp4")
+            shutil.copy(video_path, own_path)
+            assert not cache.is_cached_output(own_path), "用户自己的文件不应识别为缓存输出"
+
+            # 处理参数或内容变化时不命中
+            assert cache.lookup(cache.make_key(video_path, WatermarkRemover(threshold=90).get_processing_settings())) is None, \
+                "处理参数变化时不应命中"
+            assert cache.lookup(cache.make_key(video_path, remover.get_processing_settings([LOGO_AREA]))) is None, \
+                "水印区域变化时不应命中"
+            with open(renamed_path, 'ab') as f:
+                f.write(b'\0')
+            assert cache.lookup(cache.make_key(renamed_path, remover.get_processing_settings())) is None, \
+                "内容变化时不应命中"
+
+            # 超出大小上限时淘汰最久未使用的条目，命中会更新最近使用时间；清空只删除缓存条目
+            size = os.path.getsize(output_path)
+            limited = ResultCache(os.path.join(temp_dir, "limited"), max_bytes=size * 2)
+            keys = [f"{index:064x}" for index in range(3)]
+            limited.store(keys[0], output_path)
+            limited.store(keys[1], output_path)
+            past = time.time() - 60
+            os.utime(limited._entry_path(keys[1]), (past, past))
+            os.utime(limited._entry_path(keys[0]), (past + 1, past + 1))
+            assert limited.lookup(keys[1]), "上限内的条目应命中"
+            limited.store(keys[2], output_path)
+            assert limited.lookup(keys[0]) is None, "超出上限时应淘汰最久未使用的条目"
+            assert limited.lookup(keys[1]) and limited.lookup(keys[2]), "最近使用的条目应保留"
+            other_path = os.path.join(limited.cache_dir, "cost_samples.jsonl")
+            with open(other_path, 'w', encoding='utf-8') as f:
+                f.write("{}\n")
+            assert limited.purge() == (2, size * 2), "清空应删除全部缓存条目"
+            assert os.listdir(limited.cache_dir) == ["cost_samples.jsonl"], "清空不应删除缓存目录中的其他文件"
+            assert os.path.exists(output_path), "清空不应影响已链接的输出"
+
+        print("✅ 结果缓存测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 结果缓存测试失败: {e}")
+        return False
+
+
+def test_temporal_fill():
+    """
+    test_temporal_fill 功能说明:
+    # 测试时域填充：缓慢平移画面中静止水印下的背景从相邻帧恢复，误差明显小于图像修复；固定机位时回退图像修复；
+    # 整帧输入时窗口样本只保存水印区域
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试时域填充...")
+
+        rng = np.random.default_rng(0)
+        texture = cv2.GaussianBlur(rng.integers(0, 255, (500, 800, 3), dtype=np.uint8), (0, 0), 3)
+        texture = cv2.normalize(texture, None, 0, 50, cv2.NORM_MINMAX)
+        area = (440, 20, 500, 50)
+
+        def pan_frame(t):
+            # 画面每帧向左平移3像素、向上平移1像素，水印固定在画面右上角
+            background = texture[20 + t:380 + t, 10 + 3 * t:650 + 3 * t].copy()
+            frame = background.copy()
+            cv2.rectangle(frame, area[:2], (area[2] - 1, area[3] - 1), (255, 255, 255), -1)
+            return background, frame
+
+        inpaint_remover = WatermarkRemover()
+        temporal_remover = WatermarkRemover(fill_mode='temporal')
+        temporal_fill = temporal_remover._create_temporal_fill()
+        assert inpaint_remover._create_temporal_fill() is None, "图像修复模式不应创建时域填充器"
+
+        x1, y1, x2, y2 = area
+        errors = {'inpaint': [], 'temporal': []}
+        for t in range(30):
+            background, frame = pan_frame(t)
+            truth = background[y1:y2, x1:x2].astype(np.int16)
+            inpainted = inpaint_remover.process_frame(frame, [LOGO_AREA])
+            filled = temporal_remover.process_frame(frame, [LOGO_AREA], temporal_fill=temporal_fill)
+            if t >= 20:
+                errors['inpaint'].append(np.abs(inpainted[y1:y2, x1:x2] - truth).mean())
+                errors['temporal'].append(np.abs(filled[y1:y2, x1:x2] - truth).mean())
+
+        stats = temporal_fill.get_stats()
+        assert stats['filled_pixels'] > 0, f"平移画面应有像素由相邻帧填充: {stats}"
+        assert np.mean(errors['temporal']) < 1.0, f"窗口填满后应恢复真实背景: {np.mean(errors['temporal']):.2f}"
+        assert np.mean(errors['temporal']) < np.mean(errors['inpaint']) / 4, \
+            f"时域填充误差应明显小于图像修复: {errors}"
+
+        # 固定机位时水印下没有干净样本，全部回退图像修复，结果与图像修复一致
+        still_fill = temporal_remover._create_temporal_fill()
+        _, still = pan_frame(0)
+        for _ in range(3):
+            result = temporal_remover.process_frame(still, [LOGO_AREA], temporal_fill=still_fill)
+        assert still_fill.get_stats()['filled_pixels'] == 0, "固定机位时不应有时域填充像素"
+        assert np.array_equal(result, inpaint_remover.process_frame(still, [LOGO_AREA])), "回退时应与图像修复一致"
+
+        # 整帧输入时窗口只保存掩码外接矩形加边距的区域，第一帧没有样本可填充时不复制整帧
+        frame_fill = temporal_remover._create_temporal_fill()
+        large = np.zeros((720, 1280, 3), dtype=np.uint8)
+        large_mask = np.zeros((720, 1280), dtype=np.uint8)
+        large_mask[20:50, 1100:1200] = 255
+        filled, remaining = frame_fill.fill('frame', large, large_mask)
+        assert filled is large and remaining is not None, "没有样本时应返回原图并全部回退图像修复"
+        sample = frame_fill._history['frame']['samples'][0][0]
+        margin = frame_fill.margin
+        assert sample.shape[0] <= 30 + 2 * margin and sample.shape[1] <= 100 + 2 * margin, \
+            f"窗口样本应只保存水印区域: {sample.shape}"
+
+        print("✅ 时域填充测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 时域填充测试失败: {e}")
+        return False
+
+
+def test_frame_cache():
+    """
+    test_frame_cache 功能说明:
+    # 测试预览帧缓存：超出内存上限时淘汰最久未使用的帧，尺寸变化时清空，后台预取当前帧前后的帧，
+    # 快速重新请求时预取的帧号与内容一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试预览帧缓存...")
+
+        proxy_size = (160, 90)
+        frame_bytes = proxy_size[0] * proxy_size[1] * 3
+        cache = ProxyFrameCache(max_bytes=frame_bytes * 3)
+        cache.set_proxy_size(proxy_size)
+        for index in range(3):
+            assert cache.put(index, make_proxy(create_test_frame(index), proxy_size)), "尺寸一致的帧应加入缓存"
+        assert cache.get(0) is not None, "缓存的帧应命中"
+
+        # 帧0刚被使用，加入第4帧时淘汰最久未使用的帧1
+        cache.put(3, make_proxy(create_test_frame(3), proxy_size))
+        assert cache.missing([0, 1, 2, 3]) == [1], f"应淘汰最久未使用的帧: {cache.missing([0, 1, 2, 3])}"
+        stats = cache.get_stats()
+        assert stats['bytes'] <= frame_bytes * 3 and stats['evictions'] == 1, f"内存占用应不超过上限: {stats}"
+
+        # 预取线程在尺寸变化后写入的旧尺寸帧被丢弃
+        assert not cache.put(4, make_proxy(create_test_frame(4), (320, 180))), "尺寸不符的帧不应加入"
+        cache.set_proxy_size((320, 180))
+        assert cache.get_stats()['frames'] == 0, "预览尺寸变化时应清空缓存"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            create_test_video(video_path, frame_count=20)
+
+            cache = ProxyFrameCache()
+            cache.set_proxy_size(proxy_size)
+            prefetcher = FramePrefetcher(video_path, cache, total_frames=20, radius=3)
+            try:
+                prefetcher.request(10)
+                for _ in range(200):
+                    if not cache.missing(list(range(7, 14))):
+                        break
+                    time.sleep(0.01)
+            finally:
+                prefetcher.stop()
+
+            assert not cache.missing(list(range(7, 14))), f"应预取前后3帧: 缺少 {cache.missing(list(range(7, 14)))}"
+            assert prefetcher.decoded_frames == 7, f"应定位一次后顺序解码窗口内的帧: {prefetcher.decoded_frames}"
+
+            # 预取的帧与直接定位解码的帧一致
+            cap = cv2.VideoCapture(video_path)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 12)
+            ret, frame = cap.read()
+            cap.release()
+            assert ret and np.array_equal(cache.get(12), make_proxy(frame, proxy_size)), "预取帧应与定位解码的帧一致"
+
+            # 定位后读出第一帧之前被新请求打断，再预取从原位置开始的窗口时必须重新定位，不能把其他帧存到该帧号
+            cache = ProxyFrameCache()
+            cache.set_proxy_size(proxy_size)
+            prefetcher = FramePrefetcher(video_path, cache, total_frames=20, radius=3)
+            # 停止后台线程，在测试线程中按确定的顺序调用预取
+            prefetcher.stop()
+            prefetcher._stopped = False
+            cap = cv2.VideoCapture(video_path)
+            try:
+                prefetcher._center = 15
+                prefetcher._prefetch(cap, 10)
+                assert not cache.get_stats()['frames'], "被打断时不应写入帧"
+                prefetcher._center = None
+                prefetcher._prefetch(cap, 3)
+            finally:
+                cap.release()
+            cap = cv2.VideoCapture(video_path)
+            for index in range(7):
+                ret, frame = cap.read()
+                assert ret and np.array_equal(cache.get(index), make_proxy(frame, proxy_size)), \
+                    f"快速重新请求后帧{index}应与顺序解码的帧一致"
+            cap.release()
+
+        print("✅ 预览帧缓存测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 预览帧缓存测试失败: {e}")
+        return False
+
+
+def test_progress_and_cancel():
+    """
+    test_progress_and_cancel 功能说明:
+    # 测试进度回调累计帧数等于总帧数；处理中设置取消信号后返回False并删除未完成的输出，断点续处理保留已完成的分段
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试处理进度和取消...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            create_test_video(video_path, frame_count=25)
+
+            progress = []
+            assert WatermarkRemover().remove_watermark(video_path, output_path, [LOGO_AREA], progress.append), "处理应成功"
+            assert sum(progress) == 25, f"进度回调累计帧数应为25: {sum(progress)}"
+            os.remove(output_path)
+
+            # 处理到第10帧时取消
+            cancel_event = threading.Event()
+            progress = []
+
+            def cancel_after_ten(count):
+                progress.append(count)
+                if sum(progress) >= 10:
+                    cancel_event.set()
+
+            assert not WatermarkRemover().remove_watermark(video_path, output_path, [LOGO_AREA],
+                                                           cancel_after_ten, cancel_event), "取消时应返回False"
+            assert sum(progress) == 10, f"取消后不应继续处理: {sum(progress)}"
+            assert not os.path.exists(output_path), "取消时应删除未完成的输出"
+
+            # 断点续处理取消后保留已完成的分段
+            checkpoint_temp = os.path.join(temp_dir, "temp")
+            cancel_event = threading.Event()
+            progress = []
+            remover = WatermarkRemover(checkpoint_frames=10, temp_dir=checkpoint_temp)
+            assert not remover.remove_watermark(video_path, output_path, None, cancel_after_ten, cancel_event), "取消时应返回False"
+            assert not os.path.exists(output_path), "取消时不应生成输出视频"
+            info = remover.get_checkpoint_info(video_path, output_path)
+            assert info and info['completed_frames'] == 10, f"取消前完成的分段应保留: {info}"
+
+        print("✅ 处理进度和取消测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 处理进度和取消测试失败: {e}")
+        return False
+
+
+def test_seek_index():
+    """
+    test_seek_index 功能说明:
+    # 测试定位索引：记录全部帧的递增时间戳，保存后可加载，视频修改时间变化时失效；
+    # 按索引随机读取和从中间帧开始顺序读取的帧与顺序解码一致，启用索引的静态掩码与不启用时一致
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试定位索引...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            cache_dir = os.path.join(temp_dir, "temp")
+            create_test_video(video_path, frame_count=30)
+
+            cap = cv2.VideoCapture(video_path)
+            decoded = []
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                decoded.append(frame)
+            cap.release()
+
+            index = SeekIndex.load_or_build(video_path, cache_dir)
+            assert index is not None and index.frame_count == len(decoded), "索引应记录全部帧"
+            assert np.all(np.diff(index.timestamps) > 0), "时间戳应严格递增"
+            assert index.keyframes is None or index.keyframes[0] == 0, "第一帧应为关键帧"
+            index_path = get_index_path(cache_dir, video_path)
+            assert SeekIndex.load(index_path, video_path) is not None, "未修改的视频应加载已保存的索引"
+
+            # 随机顺序读取(含向前跳转)与顺序解码一致
+            cap = cv2.VideoCapture(video_path)
+            position = 0
+            for target in [17, 3, 4, 29, 12, 13, 0]:
+                ret, frame = index.read(cap, target, position)
+                assert ret and np.array_equal(frame, decoded[target]), f"第{target}帧应与顺序解码一致"
+                position = target + 1
+            assert index.read(cap, len(decoded), position) == (False, None), "超出帧数时应读取失败"
+
+            read_frame = seek_reader(cap, 20, index, None)
+            for target in range(20, 25):
+                ret, frame = read_frame()
+                assert ret and np.array_equal(frame, decoded[target]), f"从第20帧顺序读取的第{target}帧应一致"
+            cap.release()
+
+            # 修改时间变化后索引失效
+            stat = os.stat(video_path)
+            os.utime(video_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert SeekIndex.load(index_path, video_path) is None, "视频修改时间变化时索引应失效"
+
+            plain = WatermarkRemover(mask_mode='static', mask_samples=5)
+            indexed = WatermarkRemover(mask_mode='static', mask_samples=5, seek_index=True, temp_dir=cache_dir)
+            assert np.array_equal(plain.estimate_static_mask(video_path), indexed.estimate_static_mask(video_path)), \
+                "启用定位索引的静态掩码应与按帧号定位一致"
+            assert SeekIndex.load(index_path, video_path) is not None, "失效的索引应重新建立"
+
+        print("✅ 定位索引测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 定位索引测试失败: {e}")
+        return False
+
+
+def test_probe_cache():
+    """
+    test_probe_cache 功能说明:
+    # 测试元数据探测：分辨率、帧率、帧数和像素量正确；新的缓存实例从文件加载后不再探测，修改时间变化时重新探测；
+    # 掩码面积按处理参数缓存，文件变化后失效
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试视频元数据探测缓存...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_paths = [os.path.join(temp_dir, f"input_{i}.mp4") for i in range(2)]
+            create_test_video(video_paths[0], frame_count=20)
+            create_test_video(video_paths[1], frame_count=30)
+            cache_dir = os.path.join(temp_dir, "cache")
+
+            info = probe_video(video_paths[0])
+            assert info and (info['width'], info['height'], info['frame_count']) == (640, 360, 20), f"元数据不正确: {info}"
+            assert abs(info['fps'] - 25) < 0.01 and abs(info['duration'] - 0.8) < 0.01, f"帧率和时长不正确: {info}"
+            assert probe_video(os.path.join(temp_dir, "missing.mp4")) is None, "无法打开的文件应返回None"
+
+            first = ProbeCache(cache_dir)
+            probes = first.probe_many(video_paths)
+            assert first.misses == 2 and first.hits == 0, "首次列出时应探测全部文件"
+
+            cached = ProbeCache(cache_dir)
+            assert cached.probe_many(video_paths) == probes and cached.hits == 2 and cached.misses == 0, \
+                "重复列出时应直接使用缓存"
+
+            cached.set_mask_pixels(video_paths[1], {'threshold': 240}, 1234)
+            reloaded = ProbeCache(cache_dir)
+            assert reloaded.get_mask_pixels(video_paths[1], {'threshold': 240}) == 1234, "应从文件加载缓存的掩码面积"
+            assert reloaded.get_mask_pixels(video_paths[1], {'threshold': 200}) is None, "处理参数不同时不应复用掩码面积"
+            assert reloaded.get_mask_pixels(video_paths[0], {'threshold': 240}) is None, "未测量过的文件应返回None"
+
+            stat = os.stat(video_paths[1])
+            os.utime(video_paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            refreshed = ProbeCache(cache_dir)
+            refreshed.probe_many(video_paths)
+            assert refreshed.hits == 1 and refreshed.misses == 1, "修改时间变化的文件应重新探测"
+            assert refreshed.get_mask_pixels(video_paths[1], {'threshold': 240}) is None, "文件变化后掩码面积应失效"
+
+            summary = summarize_probes(probes + [{'size_mb': 1.0}])
+            assert summary['total_frames'] == 50 and summary['unprobed'] == 1, f"汇总统计不正确: {summary}"
+            assert summary['total_megapixels'] == round(640 * 360 * 50 / 1e6, 1), f"像素量不正确: {summary}"
+
+        print("✅ 视频元数据探测缓存测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 视频元数据探测缓存测试失败: {e}")
+        return False
+
+
+def test_cost_model():
+    """
+    test_cost_model 功能说明:
+    # 测试耗时模型：无样本时使用先验，记录线性耗时样本后预测接近实测且新实例从文件加载相同样本；
+    # 分组键随速度相关参数变化；掩码面积取自指定区域或首帧检测；批量进度按预测耗时加权，剩余时间按本批实测/预测比例修正
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试处理耗时模型...")
+
+        config = {'threshold': 240, 'kernel_size': 5, 'iterations': 2, 'workers': 4}
+        profile = make_cost_profile(config)
+        assert profile == make_cost_profile(dict(config, output_suffix="_x")), "无关参数不应影响分组键"
+        assert profile != make_cost_profile(dict(config, threshold=200)), \
+            "速度相关参数变化时分组键应变化"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model = CostModel(temp_dir)
+            assert model.sample_count(profile) == 0 and model.predict(profile, job_features({})) > 0, \
+                "无样本时应使用先验系数"
+
+            # 实测耗时 = 2秒固定开销 + 每百万像素0.1秒
+            for frames in (100, 300, 600, 1000, 2000, 4000):
+                info = {'width': 640, 'height': 360, 'frame_count': frames}
+                model.record(profile, job_features(info), 2.0 + 0.1 * 640 * 360 * frames / 1e6)
+
+            reloaded = CostModel(temp_dir)
+            assert reloaded.sample_count(profile) == 6, "新实例应从文件加载实测样本"
+            features = job_features({'width': 640, 'height': 360, 'frame_count': 3000})
+            expected = 2.0 + 0.1 * 640 * 360 * 3000 / 1e6
+            predicted = reloaded.predict(profile, features)
+            assert abs(predicted - expected) / expected < 0.15, f"预测耗时偏差过大: {predicted:.2f} vs {expected:.2f}"
+
+            # 掩码面积特征：指定区域取面积之和，自动检测取首帧掩码像素数
+            video_path = os.path.join(temp_dir, "mask.mp4")
+            create_test_video(video_path, frame_count=2)
+            remover = WatermarkRemover()
+            assert remover.measure_mask_pixels(video_path, [(0, 0, 10, 20), (5, 5, 15, 10)]) == 250, \
+                "指定区域时掩码面积应为区域面积之和"
+            mask_pixels = remover.measure_mask_pixels(video_path)
+            assert 0 < mask_pixels < 640 * 360, f"首帧检测掩码面积异常: {mask_pixels}"
+            assert job_features({'width': 640, 'height': 360, 'frame_count': 100}, mask_pixels)[3] > 0, \
+                "传入掩码面积后水印区域特征不应为0"
+
+        estimator = BatchEstimator({'a': 10.0, 'b': 30.0, 'c': 60.0}, {'a': 100, 'b': 300, 'c': 600}, jobs=1)
+        estimator.complete('a', 20.0)
+        progress = estimator.get_progress()
+        assert abs(progress['fraction'] - 0.1) < 1e-6, f"进度应按预测耗时加权: {progress}"
+        assert abs(progress['remaining_s'] - 180.0) < 1e-6, f"剩余时间应按实测/预测比例修正: {progress}"
+        assert progress['frames'] == 100 and "预计剩余" in estimator.format_progress(), "应统计已完成帧数"
+
+        print("✅ 处理耗时模型测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 处理耗时模型测试失败: {e}")
+        return False
+
+
+# 监视文件夹测试工作进程的预热标记，由_fake_watch_init设置
+_watch_worker_state = {}
+
+
+def _fake_watch_init(marker: str) -> None:
+    """
+    _fake_watch_init 功能说明:
+    # 监视文件夹测试用的工作进程初始化函数，记录预热标记
+    # 输入: [marker: str 预热标记] | 输出: [无]
+    """
+    _watch_worker_state['marker'] = marker
+
+
+def _fake_watch_job(video_path: str, output_dir: str):
+    """
+    _fake_watch_job 功能说明:
+    # 监视文件夹测试用的单文件处理函数，工作进程已预热时复制到输出目录
+    # 输入: [video_path: str 视频路径, output_dir: str 输出目录] | 输出: [Tuple[bool, str] 处理结果和输出路径]
+    """
+    output_path = os.path.join(output_dir, os.path.basename(video_path))
+    shutil.copyfile(video_path, output_path)
+    return _watch_worker_state.get('marker') == "warm", output_path
+
+
+def test_watch_folder():
+    """
+    test_watch_folder 功能说明:
+    # 测试监视文件夹：大小变化中的文件和空文件不就绪，稳定后只报告一次；守护进程处理放入的文件，
+    # 工作进程由初始化函数预热，停止后结果完整
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试监视文件夹守护...")
+
+        tracker = FileStabilityTracker(settle_seconds=1.0)
+        assert tracker.update({'a.mp4': (10, 1), 'b.mp4': (0, 1)}, now=0.0) == [], "首次发现的文件不应就绪"
+        assert tracker.update({'a.mp4': (20, 2), 'b.mp4': (0, 1)}, now=1.5) == [], "仍在增长的文件不应就绪"
+        assert tracker.update({'a.mp4': (20, 2), 'b.mp4': (0, 1)}, now=2.0) == [], "稳定时间不足时不应就绪"
+        assert tracker.update({'a.mp4': (20, 2), 'b.mp4': (0, 1)}, now=2.6) == ['a.mp4'], "稳定后应就绪，空文件除外"
+        assert tracker.update({'a.mp4': (20, 2)}, now=5.0) == [], "已就绪的文件不应重复报告"
+        assert tracker.settling == 0, "没有写入中的文件"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_dir = os.path.join(temp_dir, "input")
+            output_dir = os.path.join(temp_dir, "output")
+            os.makedirs(input_dir)
+            os.makedirs(output_dir)
+            for i in range(3):
+                create_test_video(os.path.join(input_dir, f"clip_{i}.mp4"), frame_count=3)
+            with open(os.path.join(input_dir, "notes.txt"), 'w') as f:
+                f.write("不是视频")
+
+            daemon = WatchFolderDaemon(input_dir, _fake_watch_job, (output_dir,), jobs=2, extensions=('.mp4',),
+                                       initializer=_fake_watch_init, initargs=("warm",),
+                                       poll_interval=0.05, settle_seconds=0.1)
+            stop_event = threading.Event()
+            timer = threading.Timer(30.0, stop_event.set)
+            timer.start()
+            try:
+                results = daemon.run(stop_event, max_files=3)
+            finally:
+                timer.cancel()
+
+            assert sorted(result['name'] for result in results) == ['clip_0.mp4', 'clip_1.mp4', 'clip_2.mp4'], \
+                f"应处理全部视频文件且只处理一次: {[result['name'] for result in results]}"
+            assert all(result['success'] for result in results), "工作进程应已预热"
+            assert sorted(os.listdir(output_dir)) == ['clip_0.mp4', 'clip_1.mp4', 'clip_2.mp4'], "输出应写入输出目录"
+            stats = daemon.get_stats()
+            assert stats['completed'] == 3 and stats['pending'] == 0 and stats['running'] == 0, f"队列统计不正确: {stats}"
+
+        print("✅ 监视文件夹守护测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 监视文件夹守护测试失败: {e}")
+        return False
+
+
+def test_job_server():
+    """
+    test_job_server 功能说明:
+    # 测试本地HTTP任务服务：提交的任务完成后帧数等于总帧数且输出存在，排队中取消的任务不处理，
+    # 无效请求返回400、未知任务返回404，整体统计累计帧数和帧率
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试本地HTTP任务服务...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            create_test_video(video_path, frame_count=12)
+
+            server = create_server(port=0, jobs=1, output_dir=temp_dir)
+            server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+            server_thread.start()
+            try:
+                client = JobClient(f"http://127.0.0.1:{server.server_address[1]}")
+                job = client.submit(video_path, preset='fast', regions=[[560, 20, 60, 30]])
+                queued = client.submit(video_path, output_path=os.path.join(temp_dir, "queued.mp4"))
+                assert client.cancel(queued['id'])['id'] == queued['id'], "应能取消排队中的任务"
+
+                finished = client.wait(job['id'], timeout=60, interval=0.1)
+                assert finished['status'] == 'completed', f"任务应完成: {finished}"
+                assert finished['frames_done'] == finished['total_frames'] == 12, f"帧数进度不正确: {finished}"
+                assert os.path.exists(finished['output_path']), "输出文件应存在"
+                assert client.wait(queued['id'], timeout=60, interval=0.1)['status'] == 'cancelled', "取消的任务不应处理"
+                assert not os.path.exists(os.path.join(temp_dir, "queued.mp4")), "取消的任务不应产生输出"
+
+                for submit_args in ({'input_path': os.path.join(temp_dir, "missing.mp4")},
+                                    {'input_path': video_path, 'preset': 'unknown'},
+                                    {'input_path': video_path, 'regions': [[0, 0, -5, 10]]}):
+                    try:
+                        client._request('POST', '/jobs', submit_args)
+                        raise AssertionError(f"无效请求应被拒绝: {submit_args}")
+                    except RuntimeError as e:
+                        assert str(e).startswith("400"), f"无效请求应返回400: {e}"
+                try:
+                    client.status("unknown")
+                    raise AssertionError("未知任务应返回404")
+                except RuntimeError as e:
+                    assert str(e).startswith("404"), f"未知任务应返回404: {e}"
+
+                metrics = client.metrics()
+                assert metrics['jobs']['completed'] == 1 and metrics['jobs']['cancelled'] == 1, f"任务计数不正确: {metrics}"
+                assert metrics['frames_processed'] == 12 and metrics['fps'] > 0, f"整体统计不正确: {metrics}"
+            finally:
+                server.shutdown()
+                server.server_close()
+                server.manager.shutdown()
+
+        print("✅ 本地HTTP任务服务测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 本地HTTP任务服务测试失败: {e}")
+        return False
+
+
+def test_job_store():
+    """
+    test_job_store 功能说明:
+    # 测试持久化任务队列：相同内容、参数和输出路径重复提交只有一个任务，失败后重新排队且尝试次数累加，
+    # 次数用完后为failed；租约过期的任务可被其他执行者领取，交还的任务不计尝试次数；
+    # 重新打开数据库后已完成且输出存在的任务不再排队
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试持久化任务队列...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "jobs.db")
+            input_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            with open(input_path, 'wb') as f:
+                f.write(b"video" * 100)
+            settings = {'threshold': 200, 'fill_mode': 'spatial'}
+
+            store = JobStore(db_path, max_attempts=2, retry_delay=0.0)
+            job = store.enqueue(input_path, output_path, settings, {'threshold': 200}, 'batch')
+            again = store.enqueue(input_path, output_path, settings, {'threshold': 200}, 'batch')
+            assert job['id'] == again['id'] and store.counts()['queued'] == 1, "重复提交不应产生新任务"
+            other = store.enqueue(input_path, output_path, {'threshold': 150}, {}, 'batch')
+            assert other['id'] != job['id'], "处理参数不同应是不同任务"
+            store.cancel(other['id'])
+
+            claimed = store.claim("worker-a", [job['id']])
+            assert len(claimed) == 1 and claimed[0]['attempts'] == 1, "应领取到排队中的任务"
+            assert store.claim("worker-b", [job['id']]) == [], "处理中的任务不应被重复领取"
+            assert store.fail(job['id'], "worker-b", "解码错误") is None, "非持有者不应记录失败"
+            assert store.fail(job['id'], "worker-a", "解码错误") == 'queued', "尝试次数未用完时应重新排队"
+            assert store.claim("worker-a", [job['id']])[0]['attempts'] == 2, "重试应累加尝试次数"
+            assert store.fail(job['id'], "worker-a", "解码错误") == 'failed', "尝试次数用完后应为failed"
+            assert store.get(job['id'])['error'] == "解码错误", "应记录错误信息"
+
+            job = store.enqueue(input_path, output_path, settings, {'threshold': 200}, 'batch')
+            assert job['state'] == 'queued' and job['attempts'] == 0, "失败的任务重新提交应重置尝试次数"
+            store.claim("worker-a", [job['id']])
+            assert store.release("worker-a") == 1, "应交还处理中的任务"
+            assert store.get(job['id'])['attempts'] == 0, "交还的任务不应计入尝试次数"
+
+            short_lease = JobStore(db_path, max_attempts=2, retry_delay=0.0, lease_seconds=0.05)
+            short_lease.claim("crashed-worker", [job['id']])
+            time.sleep(0.1)
+            reclaimed = store.claim("worker-b", [job['id']])
+            assert reclaimed and reclaimed[0]['worker'] == "worker-b", "租约过期的任务应可被其他执行者领取"
+            assert not store.complete(job['id'], "crashed-worker", 9.9), "被接管后原执行者不应标记完成"
+            assert store.fail(job['id'], "crashed-worker", "超时") is None, "被接管后原执行者不应重新排队"
+            stale = store.get(job['id'])
+            assert stale['state'] == 'running' and stale['worker'] == "worker-b", "原执行者不应覆盖接管者的状态"
+
+            with open(output_path, 'wb') as f:
+                f.write(b"done")
+            assert store.complete(job['id'], "worker-b", 1.5), "持有者应能标记完成"
+            assert store.fail(job['id'], "worker-b", "重复") is None, "已完成的任务不应再记录失败"
+
+            reopened = JobStore(db_path)
+            assert reopened.is_completed(input_path, output_path, settings), "重启后应识别已完成的任务"
+            assert reopened.enqueue(input_path, output_path, settings, {}, 'watch')['state'] == 'completed', \
+                "已完成且输出存在的任务不应重新排队"
+            assert reopened.next_retry_in([job['id']]) is None, "已完成的任务不应等待重试"
+            os.remove(output_path)
+            assert not reopened.is_completed(input_path, output_path, settings), "输出丢失后应重新处理"
+            assert reopened.enqueue(input_path, output_path, settings, {}, 'watch')['state'] == 'queued', \
+                "输出丢失的任务应重新排队"
+
+        print("✅ 持久化任务队列测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 持久化任务队列测试失败: {e}")
+        return False
+
+
+def test_failed_job_retry():
+    """
+    test_failed_job_retry 功能说明:
+    # 测试处理失败后重试：处理中途异常时删除写了一半的输出；任务重试时即使有上次留下的同名输出也重新处理，
+    # 得到完整的输出，不会把截断的文件当作已完成；单个文件处理时已有的输出仍跳过
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    cwd = os.getcwd()
+    try:
+        print("\n🧪 测试处理失败后重试...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 输出路径相对于当前目录(output/)
+            os.chdir(temp_dir)
+            os.makedirs("output")
+            video_path = os.path.join(temp_dir, "v.mp4")
+            create_test_video(video_path, frame_count=60)
+            base_config = dict(get_default_config(), result_cache=False, stage_timing=False)
+            config = make_job_config(base_config)
+
+            remover = WatermarkRemover.from_config(config)
+            process_frame = remover.process_frame
+            calls = [0]
+
+            def failing_process_frame(frame, *args, **kwargs):
+                calls[0] += 1
+                if calls[0] == 30:
+                    raise RuntimeError("模拟第30帧处理失败")
+                return process_frame(frame, *args, **kwargs)
+
+            remover.process_frame = failing_process_frame
+            success, _ = process_video_enhanced(video_path, config, remover)
+            output_path = os.path.join("output", "v_no_watermark.mp4")
+            assert not success, "处理中途异常应返回失败"
+            assert not os.path.exists(output_path), "处理失败时应删除写了一半的输出"
+
+            # 上次进程被杀死时留下的截断输出：任务重试应重新处理而不是跳过
+            with open(video_path, 'rb') as src, open(output_path, 'wb') as dst:
+                dst.write(src.read(1024))
+            success, _ = process_video_enhanced(video_path, config)
+            cap = cv2.VideoCapture(output_path)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            assert success and frame_count == 60, f"任务重试应覆盖截断的输出: {success}, {frame_count}帧"
+
+            # 单个文件处理不覆盖已有输出，跳过视为成功
+            mtime = os.path.getmtime(output_path)
+            success, _ = process_video_enhanced(video_path, base_config)
+            assert success and os.path.getmtime(output_path) == mtime, "单个文件处理应跳过已有输出"
+            os.chdir(cwd)
+
+        print("✅ 处理失败后重试测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 处理失败后重试测试失败: {e}")
+        return False
+
+    finally:
+        os.chdir(cwd)
+
+
+def test_metrics():
+    """
+    test_metrics 功能说明:
+    # 测试运行指标：直方图按桶累计、标签值转义、重复注册返回同一指标；处理视频期间已处理帧数实时增加，
+    # 结束后每帧恰好计入一次修复或跳过、一次单帧耗时，流水线队列深度归零；帧进程池和分段模式的修复和跳过同样计入；
+    # 指标文件和本地端点输出Prometheus文本
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试运行指标导出...")
+
+        registry = metrics.MetricsRegistry()
+        latency = registry.histogram('test_latency_seconds', '测试耗时', buckets=(0.01, 0.1, 1.0))
+        latency.observe(0.002)
+        latency.observe(0.2)
+        counter = registry.counter('test_total', '测试计数', ('source',))
+        counter.inc(3, source='a"b')
+        assert registry.counter('test_total', '测试计数', ('source',)) is counter, "重复注册应返回已有指标"
+        try:
+            registry.gauge('test_total', '测试计数')
+            raise AssertionError("同名不同类型的指标应报错")
+        except ValueError:
+            pass
+        text = registry.render()
+        for line in ('# TYPE test_latency_seconds histogram', 'test_latency_seconds_bucket{le="0.01"} 1',
+                     'test_latency_seconds_bucket{le="0.1"} 1', 'test_latency_seconds_bucket{le="1"} 2',
+                     'test_latency_seconds_bucket{le="+Inf"} 2', 'test_latency_seconds_count 2',
+                     'test_total{source="a\\"b"} 3'):
+            assert line in text.splitlines(), f"指标文本缺少: {line}"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = os.path.join(temp_dir, "input.mp4")
+            output_path = os.path.join(temp_dir, "output.mp4")
+            metrics_path = os.path.join(temp_dir, "metrics", "watermark.prom")
+            create_test_video(video_path, frame_count=20)
+
+            before = {name: metric.value() for name, metric in (
+                ('frames', metrics.FRAMES_PROCESSED), ('inpaint', metrics.INPAINT_CALLS),
+                ('skipped', metrics.FRAMES_SKIPPED), ('latency', metrics.FRAME_LATENCY),
+                ('queue', metrics.PIPELINE_QUEUE_DEPTH), ('running', metrics.VIDEOS_IN_PROGRESS))}
+            completed = metrics.VIDEOS_PROCESSED.value(status='completed')
+            live = []
+
+            def check_live(count):
+                live.append(metrics.FRAMES_PROCESSED.value() - before['frames'])
+
+            remover = WatermarkRemover(execution_mode='thread', workers=2)
+            with metrics.MetricsExporter(metrics_path, interval=0.05):
+                assert remover.remove_watermark(video_path, output_path, None, check_live), "处理应成功"
+
+            assert live and live[-1] == 20 and live[0] < 20, f"已处理帧数应在处理过程中实时增加: {live}"
+            handled = (metrics.INPAINT_CALLS.value() - before['inpaint']) + \
+                      (metrics.FRAMES_SKIPPED.value() - before['skipped'])
+            assert handled == 20, f"每帧应恰好修复或跳过一次: {handled}"
+            assert metrics.FRAME_LATENCY.value() - before['latency'] == 20, "每帧应记录一次单帧耗时"
+            assert metrics.STAGE_LATENCY.value(stage='decode') > 0, "应记录分阶段耗时"
+            assert metrics.PIPELINE_QUEUE_DEPTH.value() == before['queue'], "处理结束后流水线队列深度应归零"
+            assert metrics.VIDEOS_IN_PROGRESS.value() == before['running'], "处理结束后不应计入处理中的视频"
+            assert metrics.VIDEOS_PROCESSED.value(status='completed') == completed + 1, "应计入完成的视频"
+
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                exported = f.read()
+            assert f"watermark_frames_processed_total {int(metrics.FRAMES_PROCESSED.value())}" in exported, \
+                "指标文件应包含最终的已处理帧数"
+
+            # 帧进程池和分段工作进程内的跳过帧数和修复次数随结果汇总回主进程
+            for kwargs in ({'execution_mode': 'process', 'workers': 2},
+                           {'segments': 2, 'workers': 2, 'temp_dir': os.path.join(temp_dir, "temp")}):
+                counts = (metrics.INPAINT_CALLS.value(), metrics.FRAMES_SKIPPED.value())
+                assert WatermarkRemover(**kwargs).remove_watermark(video_path, output_path), f"处理应成功: {kwargs}"
+                handled = metrics.INPAINT_CALLS.value() - counts[0] + metrics.FRAMES_SKIPPED.value() - counts[1]
+                assert handled == 20, f"工作进程内的修复和跳过应计入主进程: {kwargs} {handled}"
+
+            server = metrics.serve_metrics(port=0)
+            try:
+                url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+                with urllib.request.urlopen(url, timeout=10) as response:
+                    body = response.read().decode('utf-8')
+                    assert response.headers['Content-Type'].startswith('text/plain'), "端点应返回文本格式"
+                assert '# TYPE watermark_frame_latency_seconds histogram' in body, "端点应输出耗时直方图"
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        print("✅ 运行指标导出测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 运行指标导出测试失败: {e}")
+        return False
+
+
+def _logging_batch_job(video_path: str):
+    """
+    _logging_batch_job 功能说明:
+    # 结构化日志测试用的单文件处理函数，在工作进程中记录一条日志
+    # 输入: [video_path: str 视频路径] | 输出: [bool 处理结果]
+    """
+    log_info(f"worker log {os.path.basename(video_path)}")
+    return True
+
+
+def test_structured_logging():
+    """
+    test_structured_logging 功能说明:
+    # 测试队列日志：同一目录重复初始化沿用同一日志文件；多个线程和工作进程的日志由监听线程以JSON行写入，
+    # 每条记录带各自上下文的job_id和worker_id；任务日志只包含该任务期间的记录；程序退出时写完剩余记录且不报错
+    # 输入: [无] | 输出: [bool 测试是否通过]
+    """
+    try:
+        print("\n🧪 测试队列结构化日志...")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_dir = os.path.join(temp_dir, "logs")
+            job_path = os.path.join(temp_dir, "jobs", "job-x.log")
+            try:
+                logger = setup_logger(log_dir, "INFO")
+                assert setup_logger(log_dir, "INFO") is logger, "重复初始化应返回同一日志器"
+
+                def log_in_thread(index):
+                    with log_context(job_id=f"job-{index}", worker_id=f"worker-{index}"):
+                        for line in range(5):
+                            log_info(f"thread {index} line {line}")
+
+                threads = [threading.Thread(target=log_in_thread, args=(index,)) for index in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                with job_log(job_path, job_id="job-x"):
+                    log_info("job line")
+                log_info("after job")
+
+                video_files = [{'path': os.path.join(temp_dir, f"clip{index}.mp4"), 'name': f"clip{index}.mp4",
+                                'size_mb': index} for index in range(3)]
+                results = run_batch_jobs(video_files, _logging_batch_job, jobs=2)
+                assert all(result['success'] for result in results), "批量任务应全部成功"
+            finally:
+                shutdown_logging()
+                # 其余测试的日志恢复写入临时目录，避免自动初始化到logs/
+                setup_logger(TEST_LOG_DIR)
+
+            log_files = [name for name in os.listdir(log_dir) if name.endswith('.log')]
+            assert len(log_files) == 1, f"重复初始化不应新建日志文件: {log_files}"
+            with open(os.path.join(log_dir, log_files[0]), 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            for key in ('time', 'level', 'message', 'job_id', 'worker_id', 'process'):
+                assert all(key in record for record in records), f"每条记录应包含{key}字段"
+
+            for index in range(4):
+                mine = [record for record in records if record['message'].startswith(f"thread {index} ")]
+                assert len(mine) == 5, f"线程{index}的日志应完整写入"
+                assert all(record['job_id'] == f"job-{index}" and record['worker_id'] == f"worker-{index}"
+                           for record in mine), "线程日志应带各自的任务ID和执行者ID"
+
+            worker_records = [record for record in records if record['message'].startswith("worker log ")]
+            assert len(worker_records) == 3, f"工作进程的日志应写入主进程的日志文件: {len(worker_records)}"
+            for record in worker_records:
+                assert record['job_id'] == record['message'].split()[-1], "工作进程日志应以文件名作为任务ID"
+                assert record['process'] != os.getpid(), "日志应来自工作进程"
+
+            with open(job_path, 'r', encoding='utf-8') as f:
+                job_records = [json.loads(line) for line in f if line.strip()]
+            assert [record['message'] for record in job_records] == ["job line"], "任务日志只应包含任务期间的记录"
+            assert job_records[0]['job_id'] == "job-x", "任务日志应带任务ID"
+
+            # 程序退出时监听线程应在队列关闭前写完剩余记录，不报错
+            exit_dir = os.path.join(temp_dir, "exit_logs")
+            script = ("from utils.logger import setup_logger, log_info; "
+                      f"setup_logger({exit_dir!r}); log_info('last line')")
+            completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60,
+                                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            assert completed.returncode == 0 and "Traceback" not in completed.stderr, \
+                f"程序退出时日志监听线程不应报错: {completed.stderr[-500:]}"
+            with open(os.path.join(exit_dir, os.listdir(exit_dir)[0]), 'r', encoding='utf-8') as f:
+                assert "last line" in f.read(), "退出前的最后一条日志应写入日志文件"
+
+        print("✅ 队列结构化日志测试通过")
+        return True
+
+    except Exception as e:
+        print(f"❌ 队列结构化日志测试失败: {e}")
+        return False
+
+
+def run_all_tests():
+    """
+    run_all_tests 功能说明:
+    # 运行所有测试用例并生成报告
+    # 输入: [无] | 输出: [无，打印测试报告]
+    """
+    print("🚀 开始运行水印去除核心功能测试")
+    print("=" * 50)
+
+    tests = [
+        ("区域限定处理", test_roi_processing),
+        ("区域外像素", test_roi_outside_untouched),
+        ("重叠区域", test_overlapping_areas),
+        ("静态水印掩码估计", test_static_mask_estimation),
+        ("并行帧流水线", test_frame_pipeline_matches_serial),
+        ("分段并行处理", test_segmented_processing),
+        ("未变化区域缓存", test_region_cache_reuse),
+        ("分阶段计时", test_stage_timing),
+        ("缓冲区复用", test_buffer_reuse),
+        ("缩小检测", test_scaled_detection),
+        ("自适应掩码", test_adaptive_mask_refresh),
+        ("断点续处理", test_checkpoint_resume),
+        ("批量多进程执行", test_batch_executor),
+        ("结果缓存", test_result_cache),
+        ("时域填充", test_temporal_fill),
+        ("预览帧缓存", test_frame_cache),
+        ("处理进度和取消", test_progress_and_cancel),
+        ("定位索引", test_seek_index),
+        ("元数据探测缓存", test_probe_cache),
+        ("处理耗时模型", test_cost_model),
+        ("监视文件夹守护", test_watch_folder),
+        ("本地HTTP任务服务", test_job_server),
+        ("持久化任务队列", test_job_store),
+        ("处理失败后重试", test_failed_job_retry),
+        ("运行指标导出", test_metrics),
+        ("队列结构化日志", test_structured_logging)
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+            else:
+                failed += 1
+        except Exception as e:
+            print(f"❌ 测试 {test_name} 发生异常: {e}")
+            failed += 1
+
+    # 生成测试报告
+    print("\n" + "=" * 50)
+    print("📊 测试报告")
+    print(f"总测试数: {len(tests)}")
+    print(f"通过: {passed}")
+    print(f"失败: {failed}")
+    print(f"成功率: {(passed/len(tests)*100):.1f}%")
+
+    if failed == 0:
+        print("\n🎉 所有测试通过！")
+    else:
+        print(f"\n⚠️  有 {failed} 个测试失败，请检查相关功能")
+
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    run_all_tests()
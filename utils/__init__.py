@@ -1,5 +1,22 @@
 ##########__init__.py: 工具模块包初始化文件 ##################
 # 变更记录: [2025-06-25] @李祥光 [创建工具模块包]########
+# 变更记录: [2026-10-18] @李祥光 [导出并行帧处理流水线]########
+# 变更记录: [2026-10-18] @李祥光 [导出视频分段处理工具]########
+# 变更记录: [2026-10-18] @李祥光 [导出未变化区域缓存]########
+# 变更记录: [2026-10-18] @李祥光 [导出分阶段计时器]########
+# 变更记录: [2026-10-18] @李祥光 [导出镜头切换检测和掩码刷新缓存]########
+# 变更记录: [2026-10-18] @李祥光 [导出断点续处理进度清单]########
+# 变更记录: [2026-10-18] @李祥光 [导出批量视频多进程执行器]########
+# 变更记录: [2026-10-18] @李祥光 [导出内容寻址结果缓存]########
+# 变更记录: [2026-10-18] @李祥光 [导出时域中值填充]########
+# 变更记录: [2026-10-18] @李祥光 [导出GUI预览帧缓存和后台预取]########
+# 变更记录: [2026-10-18] @李祥光 [导出视频定位索引]########
+# 变更记录: [2026-10-18] @李祥光 [导出视频元数据探测缓存]########
+# 变更记录: [2026-10-18] @李祥光 [导出处理耗时预测模型]########
+# 变更记录: [2026-10-18] @李祥光 [导出监视文件夹守护和单任务日志]########
+# 变更记录: [2026-10-18] @李祥光 [导出持久化任务队列]########
+# 变更记录: [2026-10-18] @李祥光 [导出运行指标注册表和导出工具]########
+# 变更记录: [2026-10-18] @李祥光 [导出队列日志的上下文字段和工作进程初始化函数]########
 # 输入: [模块导入] | 输出: [导出工具函数]###############
 
 """
@@ -7,7 +24,23 @@
 提供日志记录、文件处理等通用工具函数
 
 主要模块:
-- logger: 日志记录工具
+- logger: 队列日志记录工具，JSON行格式并附带任务ID和执行者ID
+- frame_pipeline: 并行帧处理流水线
+- video_segments: 视频分段规划与拼接
+- region_cache: 未变化区域修复结果缓存
+- stage_timer: 帧处理分阶段计时
+- mask_refresh: 镜头切换感知的掩码刷新
+- checkpoint: 长视频断点续处理进度清单
+- batch_executor: 批量视频多进程并行执行
+- result_cache: 内容寻址的处理结果缓存
+- temporal_fill: 相邻帧时域中值背景填充
+- frame_cache: GUI预览帧LRU缓存与相邻帧预取
+- seek_index: 帧时间戳和关键帧位置的持久化定位索引
+- video_probe: 不解码的视频元数据探测和持久化缓存
+- cost_model: 按实测耗时校准的处理耗时预测和批量剩余时间估计
+- watch_folder: 监视输入文件夹并用常驻进程池处理新文件
+- job_store: SQLite持久化任务队列，失败重试和幂等提交
+- metrics: 运行指标注册表，Prometheus文本格式导出到文件或本地端点
 """
 
 # 导入日志相关函数
@@ -18,9 +51,62 @@ from .logger import (
     log_error,
     log_processing_start,
     log_processing_end,
-    log_batch_summary
+    log_batch_summary,
+    job_log,
+    log_context,
+    get_log_queue,
+    init_worker_logging,
+    shutdown_logging
 )
 
+# 导入并行帧处理流水线
+from .frame_pipeline import FramePipeline, EXECUTION_MODES
+
+# 导入视频分段处理工具
+from .video_segments import plan_segments, plan_fixed_segments, create_segment_dir, concat_video_segments
+
+# 导入未变化区域缓存
+from .region_cache import RegionCache
+
+# 导入分阶段计时器
+from .stage_timer import StageTimer, NullStageTimer
+
+# 导入镜头切换检测和掩码刷新缓存
+from .mask_refresh import SceneChangeDetector, MaskRefreshCache
+
+# 导入断点续处理进度清单
+from .checkpoint import CheckpointManifest, compute_fingerprint
+
+# 导入批量视频多进程执行器
+from .batch_executor import schedule_largest_first, run_batch_jobs, summarize_workers, format_worker_stats
+
+# 导入内容寻址结果缓存
+from .result_cache import ResultCache, compute_content_fingerprint
+
+# 导入时域中值填充
+from .temporal_fill import TemporalFill
+
+# 导入GUI预览帧缓存和后台预取
+from .frame_cache import ProxyFrameCache, FramePrefetcher, make_proxy
+
+# 导入视频定位索引
+from .seek_index import SeekIndex, seek_reader, get_index_path
+
+# 导入视频元数据探测缓存
+from .video_probe import ProbeCache, probe_video, summarize_probes
+
+# 导入处理耗时预测模型
+from .cost_model import CostModel, BatchEstimator, make_cost_profile, job_features
+
+# 导入监视文件夹守护
+from .watch_folder import WatchFolderDaemon, FileStabilityTracker, scan_video_files
+
+# 导入持久化任务队列
+from .job_store import JobStore, LeaseKeeper, make_job_key, make_worker_id
+
+# 导入运行指标注册表和导出工具
+from .metrics import MetricsRegistry, MetricsExporter, REGISTRY, serve_metrics, export_metrics
+
 # 定义包的公开接口
 __all__ = [
     'setup_logger',
@@ -29,7 +115,57 @@ __all__ = [
     'log_error',
     'log_processing_start',
     'log_processing_end',
-    'log_batch_summary'
+    'log_batch_summary',
+    'job_log',
+    'log_context',
+    'get_log_queue',
+    'init_worker_logging',
+    'shutdown_logging',
+    'FramePipeline',
+    'EXECUTION_MODES',
+    'plan_segments',
+    'plan_fixed_segments',
+    'create_segment_dir',
+    'concat_video_segments',
+    'RegionCache',
+    'StageTimer',
+    'NullStageTimer',
+    'SceneChangeDetector',
+    'MaskRefreshCache',
+    'CheckpointManifest',
+    'compute_fingerprint',
+    'schedule_largest_first',
+    'run_batch_jobs',
+    'summarize_workers',
+    'format_worker_stats',
+    'ResultCache',
+    'compute_content_fingerprint',
+    'TemporalFill',
+    'ProxyFrameCache',
+    'FramePrefetcher',
+    'make_proxy',
+    'SeekIndex',
+    'seek_reader',
+    'get_index_path',
+    'ProbeCache',
+    'probe_video',
+    'summarize_probes',
+    'CostModel',
+    'BatchEstimator',
+    'make_cost_profile',
+    'job_features',
+    'WatchFolderDaemon',
+    'FileStabilityTracker',
+    'scan_video_files',
+    'JobStore',
+    'LeaseKeeper',
+    'make_job_key',
+    'make_worker_id',
+    'MetricsRegistry',
+    'MetricsExporter',
+    'REGISTRY',
+    'serve_metrics',
+    'export_metrics'
 ]
 
 # 包信息
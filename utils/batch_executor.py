@@ -0,0 +1,157 @@
+##########batch_executor.py: 批量视频多进程并行执行模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按文件大小从大到小调度的批量处理进程池]########
+# 变更记录: [2026-10-18] @李祥光 [工作进程日志写入主进程的日志队列，处理期间的日志附带任务ID]########
+# 变更记录: [2026-10-18] @李祥光 [支持调用方指定工作进程初始化函数，用于按进程导出运行指标]########
+# 输入: [视频文件信息列表，单文件处理函数，并行文件数] | 输出: [每个文件的处理结果，各工作进程吞吐统计]###############
+
+
+###########################文件下的所有函数###########################
+"""
+schedule_largest_first：按文件大小从大到小排列待处理文件
+run_batch_jobs：用进程池并行处理多个视频文件
+_init_worker：工作进程初始化，日志写入主进程队列并调用调用方的初始化函数
+_run_job：工作进程入口，处理单个文件并记录耗时和进程号，日志附带任务ID
+summarize_workers：按工作进程汇总处理文件数、数据量和吞吐
+format_worker_stats：格式化各工作进程吞吐统计
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[process_video_folder_enhanced] --> B[run_batch_jobs]
+    B --> C[schedule_largest_first大文件优先]
+    C --> D[ProcessPoolExecutor按顺序提交]
+    D --> E[_run_job工作进程处理单个文件]
+    D --> K0[_init_worker工作进程初始化]
+    K0 --> K[init_worker_logging日志写入主进程队列]
+    K0 --> KI[initializer调用方初始化如按进程导出指标]
+    E --> L[log_context附带任务ID]
+    E --> F[process_video_enhanced]
+    D --> G[as_completed收集结果]
+    A --> H[summarize_workers]
+    H --> I[log_batch_summary写入各进程吞吐]
+    H --> J[format_worker_stats打印]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.logger import get_log_queue, init_worker_logging, log_context
+
+
+def schedule_largest_first(video_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    schedule_largest_first 功能说明:
+    # 按size_mb从大到小排列待处理文件；进程池按提交顺序分配任务，空闲进程总是领取剩余最大的文件，
+    # 避免最大的文件最后才开始处理而其他核心空闲等待
+    # 输入: [video_files: List[Dict] 视频文件信息(含size_mb)] | 输出: [List[Dict] 调度顺序]
+    """
+    return sorted(video_files, key=lambda info: info.get('size_mb', 0), reverse=True)
+
+
+def _init_worker(log_queue: Any, initializer: Optional[Callable], initargs: Sequence[Any]) -> None:
+    """
+    _init_worker 功能说明:
+    # 工作进程初始化：日志放入主进程的日志队列，再调用调用方的初始化函数(如按进程导出运行指标)
+    # 输入: [log_queue: Queue 主进程的日志队列, initializer: Callable 调用方初始化函数, initargs: Sequence 其参数] | 输出: [无]
+    """
+    init_worker_logging(log_queue)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_job(job_func: Callable, video_info: Dict[str, Any], job_args: Sequence[Any]) -> Dict[str, Any]:
+    """
+    _run_job 功能说明:
+    # 工作进程入口：调用job_func(视频路径, *job_args)处理单个文件，返回值为bool或(bool, 输出路径)，
+    # 异常视为处理失败，不影响其他文件；处理期间的日志以job_id(持久化任务ID，没有时为文件名)标记
+    # 输入: [job_func: Callable 单文件处理函数, video_info: Dict 视频文件信息, job_args: Sequence 附加参数] | 输出: [Dict 处理结果]
+    """
+    start = time.perf_counter()
+    error = None
+    name = video_info.get('name', os.path.basename(video_info['path']))
+    with log_context(job_id=video_info.get('job_id') or name):
+        try:
+            result = job_func(video_info['path'], *job_args)
+            success = bool(result[0] if isinstance(result, tuple) else result)
+        except Exception as e:
+            success = False
+            error = str(e)
+
+    return {
+        'path': video_info['path'],
+        'name': name,
+        'size_mb': video_info.get('size_mb', 0),
+        'success': success,
+        'error': error,
+        'duration': time.perf_counter() - start,
+        'worker': os.getpid()
+    }
+
+
+def run_batch_jobs(video_files: List[Dict[str, Any]], job_func: Callable, job_args: Sequence[Any] = (),
+                   jobs: int = 0, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                   initializer: Optional[Callable] = None, initargs: Sequence[Any] = ()
+                   ) -> List[Dict[str, Any]]:
+    """
+    run_batch_jobs 功能说明:
+    # 用进程池并行处理多个视频文件，按大文件优先的顺序提交，每完成一个文件调用一次进度回调
+    # job_func和initializer需为模块级函数以便传入工作进程；工作进程的日志放入日志队列，由主进程的监听线程统一写出
+    # 输入: [video_files: List[Dict] 视频文件信息, job_func: Callable 单文件处理函数, job_args: Sequence 附加参数,
+    #        jobs: int 并行文件数(0表示CPU核心数), progress_callback: Callable 进度回调,
+    #        initializer: Callable 工作进程初始化函数, initargs: Sequence 其参数] | 输出: [List[Dict] 按完成顺序的处理结果]
+    """
+    if not video_files:
+        return []
+
+    max_workers = min(len(video_files), jobs if jobs > 0 else (os.cpu_count() or 1))
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(get_log_queue(), initializer, tuple(initargs))) as executor:
+        futures = [executor.submit(_run_job, job_func, video_info, tuple(job_args))
+                   for video_info in schedule_largest_first(video_files)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress_callback:
+                progress_callback(result)
+
+    return results
+
+
+def summarize_workers(results: List[Dict[str, Any]]) -> Dict[int, Dict[str, float]]:
+    """
+    summarize_workers 功能说明:
+    # 按工作进程汇总处理文件数、成功数、数据量、处理耗时和吞吐(MB/秒)
+    # 输入: [results: List[Dict] run_batch_jobs返回的处理结果] | 输出: [Dict[int, Dict] 进程号到统计信息]
+    """
+    workers: Dict[int, Dict[str, float]] = {}
+    for result in results:
+        stats = workers.setdefault(result['worker'], {'files': 0, 'success': 0, 'size_mb': 0.0, 'busy_s': 0.0})
+        stats['files'] += 1
+        stats['success'] += int(result['success'])
+        stats['size_mb'] += result['size_mb']
+        stats['busy_s'] += result['duration']
+
+    for stats in workers.values():
+        stats['size_mb'] = round(stats['size_mb'], 2)
+        stats['busy_s'] = round(stats['busy_s'], 2)
+        stats['mb_per_s'] = round(stats['size_mb'] / stats['busy_s'], 3) if stats['busy_s'] > 0 else 0.0
+    return workers
+
+
+def format_worker_stats(worker_stats: Dict[int, Dict[str, float]]) -> str:
+    """
+    format_worker_stats 功能说明:
+    # 将各工作进程统计格式化为每进程一行的文本
+    # 输入: [worker_stats: Dict summarize_workers的结果] | 输出: [str 格式化文本]
+    """
+    return "\n".join(
+        f"  进程 {worker}: {stats['files']} 个文件 (成功 {stats['success']}), {stats['size_mb']} MB, "
+        f"耗时 {stats['busy_s']:.2f} 秒, 吞吐 {stats['mb_per_s']} MB/秒"
+        for worker, stats in sorted(worker_stats.items())
+    )
@@ -0,0 +1,192 @@
+##########checkpoint.py: 长视频断点续处理模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建分段输出的进度清单，支持中断后从最后完成的分段继续]########
+# 输入: [输入视频，输出路径，处理参数] | 输出: [检查点目录，分段文件路径，进度清单]###############
+
+
+###########################文件下的所有函数###########################
+"""
+CheckpointManifest：断点续处理进度清单类
+CheckpointManifest.open：打开(或新建)输入视频和处理参数对应的检查点
+CheckpointManifest.find：查找已存在的检查点，不存在时返回None
+CheckpointManifest.part_path：获取分段文件路径
+CheckpointManifest.partial_path：获取分段写出过程中的临时文件路径
+CheckpointManifest.is_complete：判断分段是否已完成
+CheckpointManifest.mark_complete：标记分段完成并保存清单
+CheckpointManifest.completed_frames：已完成分段的总帧数
+CheckpointManifest.save：原子写入进度清单
+CheckpointManifest.remove：删除检查点目录
+compute_fingerprint：计算输入视频、输出路径和处理参数的指纹
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[remove_video_watermark] --> B[CheckpointManifest.open]
+    B --> C[compute_fingerprint]
+    C --> D{清单存在且指纹一致}
+    D -->|是| E[加载已完成分段]
+    D -->|否| F[新建清单]
+    E --> G[跳过已完成分段]
+    F --> G
+    G --> H[写出partial_path]
+    H --> I[改名为part_path]
+    I --> J[mark_complete保存清单]
+    J --> K[全部完成后拼接并remove]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+# 进度清单文件名和格式版本
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def compute_fingerprint(input_path: str, output_path: str, settings: Dict[str, Any]) -> str:
+    """
+    compute_fingerprint 功能说明:
+    # 由输入视频路径、大小、修改时间、输出路径和影响输出的处理参数计算指纹，任一变化都不会复用旧检查点
+    # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径, settings: Dict 处理参数] | 输出: [str 指纹]
+    """
+    stat = os.stat(input_path)
+    payload = json.dumps({
+        'input': os.path.abspath(input_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'output': os.path.abspath(output_path),
+        'settings': settings
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CheckpointManifest:
+    """
+    CheckpointManifest 功能说明:
+    # 检查点目录位于temp_dir/checkpoint_<指纹前16位>/，保存固定帧数的分段文件和manifest.json进度清单
+    # 分段先写入临时文件，编码器关闭后改名并更新清单，中断时未完成的分段会被丢弃重做
+    # 输入: [checkpoint_dir: str 检查点目录, data: Dict 清单内容] | 输出: [CheckpointManifest实例]
+    """
+
+    def __init__(self, checkpoint_dir: str, data: Dict[str, Any]):
+        self.checkpoint_dir = checkpoint_dir
+        self.data = data
+
+    @classmethod
+    def open(cls, temp_dir: str, input_path: str, output_path: str, settings: Dict[str, Any],
+             video_info: Dict[str, Any]) -> 'CheckpointManifest':
+        """
+        open 功能说明:
+        # 打开输入视频和处理参数对应的检查点，清单存在且一致时继续使用，否则新建
+        # 输入: [temp_dir: str 临时目录, input_path: str 输入视频路径, output_path: str 输出视频路径,
+        #        settings: Dict 处理参数, video_info: Dict 帧率、尺寸、总帧数、分段帧数] | 输出: [CheckpointManifest实例]
+        """
+        manifest = cls.find(temp_dir, input_path, output_path, settings)
+        if manifest is not None and manifest.data.get('video') == video_info:
+            return manifest
+
+        fingerprint = compute_fingerprint(input_path, output_path, settings)
+        checkpoint_dir = os.path.join(temp_dir, f"checkpoint_{fingerprint[:16]}")
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        manifest = cls(checkpoint_dir, {
+            'version': MANIFEST_VERSION,
+            'fingerprint': fingerprint,
+            'input_path': os.path.abspath(input_path),
+            'output_path': os.path.abspath(output_path),
+            'video': video_info,
+            'completed': {}
+        })
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def find(cls, temp_dir: str, input_path: str, output_path: str,
+             settings: Dict[str, Any]) -> Optional['CheckpointManifest']:
+        """
+        find 功能说明:
+        # 查找输入视频和处理参数对应的已有检查点，清单缺失、损坏或指纹不一致时返回None
+        # 输入: [temp_dir: str 临时目录, input_path: str 输入视频路径, output_path: str 输出视频路径,
+        #        settings: Dict 处理参数] | 输出: [Optional[CheckpointManifest] 检查点]
+        """
+        if not os.path.exists(input_path):
+            return None
+
+        fingerprint = compute_fingerprint(input_path, output_path, settings)
+        checkpoint_dir = os.path.join(temp_dir, f"checkpoint_{fingerprint[:16]}")
+        try:
+            with open(os.path.join(checkpoint_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('version') != MANIFEST_VERSION or data.get('fingerprint') != fingerprint:
+            return None
+        return cls(checkpoint_dir, data)
+
+    def part_path(self, index: int) -> str:
+        """
+        part_path 功能说明:
+        # 获取已完成分段文件的路径
+        # 输入: [index: int 分段序号] | 输出: [str 分段文件路径]
+        """
+        return os.path.join(self.checkpoint_dir, f"part_{index:05d}.mp4")
+
+    def partial_path(self, index: int) -> str:
+        """
+        partial_path 功能说明:
+        # 获取分段写出过程中的临时文件路径，保持.mp4扩展名以便编码器识别格式
+        # 输入: [index: int 分段序号] | 输出: [str 临时文件路径]
+        """
+        return os.path.join(self.checkpoint_dir, f"part_{index:05d}.partial.mp4")
+
+    def is_complete(self, index: int) -> bool:
+        """
+        is_complete 功能说明:
+        # 判断分段是否已完成：清单中有记录且分段文件存在
+        # 输入: [index: int 分段序号] | 输出: [bool 是否已完成]
+        """
+        return str(index) in self.data['completed'] and os.path.exists(self.part_path(index))
+
+    def mark_complete(self, index: int, start_frame: int, frame_count: int) -> None:
+        """
+        mark_complete 功能说明:
+        # 将临时文件改名为分段文件并在清单中记录，随后立即保存清单
+        # 输入: [index: int 分段序号, start_frame: int 起始帧, frame_count: int 分段帧数] | 输出: [无]
+        """
+        os.replace(self.partial_path(index), self.part_path(index))
+        self.data['completed'][str(index)] = {'start_frame': start_frame, 'frames': frame_count}
+        self.save()
+
+    def completed_frames(self) -> int:
+        """
+        completed_frames 功能说明:
+        # 已完成分段的总帧数
+        # 输入: [无] | 输出: [int 帧数]
+        """
+        return sum(item['frames'] for item in self.data['completed'].values())
+
+    def save(self) -> None:
+        """
+        save 功能说明:
+        # 先写入临时文件再替换，保证进度清单在任意时刻中断都是完整的
+        # 输入: [无] | 输出: [无]
+        """
+        manifest_path = os.path.join(self.checkpoint_dir, MANIFEST_NAME)
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+
+    def remove(self) -> None:
+        """
+        remove 功能说明:
+        # 输出视频拼接完成后删除检查点目录
+        # 输入: [无] | 输出: [无]
+        """
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
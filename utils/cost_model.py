@@ -0,0 +1,259 @@
+##########cost_model.py: 处理耗时预测模型模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按实测耗时校准的处理耗时模型和批量剩余时间估计]########
+# 变更记录: [2026-10-18] @李祥光 [调用方传入首帧检测的掩码面积，水印区域特征不再恒为0]########
+# 变更记录: [2026-10-18] @李祥光 [batch_size不再影响处理速度，从分组参数中移除]########
+# 输入: [视频元数据，处理参数，实测处理耗时] | 输出: [单个文件预测耗时，批量剩余时间和整体帧率]###############
+
+
+###########################文件下的所有函数###########################
+"""
+make_cost_profile：由影响处理速度的参数生成耗时模型分组键
+job_features：由视频元数据和水印区域面积计算模型特征
+CostModel：按分组以实测耗时校准的线性耗时模型类
+CostModel._load：加载实测样本文件，超过上限时压缩
+CostModel.record：追加一条实测样本
+CostModel.fit：拟合分组的模型系数
+CostModel.predict：预测单个文件的处理耗时
+CostModel.sample_count：获取分组的实测样本数
+BatchEstimator：批量处理剩余时间和整体帧率估计类
+BatchEstimator.complete：记录一个文件完成
+BatchEstimator.get_progress：获取按预测耗时加权的进度、剩余时间和整体帧率
+BatchEstimator.format_progress：格式化进度文本
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[process_video_folder_enhanced] --> B[CostModel.predict每个文件]
+    B --> C[CostModel.fit岭回归拟合分组系数]
+    C -->|样本不足| D[向先验系数收缩]
+    B --> E[BatchEstimator]
+    E --> F[BatchEstimator.complete]
+    F --> G[按本批实测/预测比例修正剩余时间]
+    E --> H[format_progress显示剩余时间和帧率]
+    I[process_video_enhanced] --> L[measure_mask_pixels首帧掩码面积]
+    L --> J[job_features]
+    A --> L
+    J --> K[CostModel.record追加实测样本]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# 样本文件名、每组保留的样本数和样本文件压缩阈值(行数)
+COST_SAMPLES_NAME = "cost_samples.jsonl"
+MAX_SAMPLES_PER_PROFILE = 200
+COMPACT_THRESHOLD = 5000
+
+# 影响处理速度的配置参数
+COST_PROFILE_KEYS = (
+    'threshold', 'kernel_size', 'iterations', 'mask_mode', 'mask_samples', 'mask_refresh_interval',
+    'detection_scale', 'fill_mode', 'temporal_window', 'execution_mode', 'workers', 'segments',
+    'region_cache', 'checkpoint_frames', 'jobs'
+)
+
+# 特征: [每文件固定开销, 千帧数, 画面百万像素总量, 水印区域百万像素总量]
+# 先验系数(秒/单位)，无实测样本时使用，样本增多后由实测数据决定
+PRIOR_COEFFICIENTS = np.array([0.5, 1.0, 0.05, 0.2])
+
+# 岭回归向先验收缩的强度(相当于先验样本的数量)
+PRIOR_WEIGHT = 1.0
+
+
+def make_cost_profile(config: Dict[str, Any]) -> str:
+    """
+    make_cost_profile 功能说明:
+    # 由预设和执行参数中影响速度的部分生成分组键，同一分组的实测样本共同拟合一组系数
+    # 输入: [config: Dict 配置参数] | 输出: [str 分组键]
+    """
+    payload = json.dumps({key: config.get(key) for key in COST_PROFILE_KEYS}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def job_features(info: Dict[str, Any], mask_pixels: int = 0) -> List[float]:
+    """
+    job_features 功能说明:
+    # 由视频元数据计算模型特征：固定开销项、千帧数、画面百万像素总量、水印区域百万像素总量；
+    # 检测耗时与画面像素成正比，修复耗时与水印区域面积成正比；mask_pixels取自指定区域面积或首帧检测掩码
+    # 输入: [info: Dict 含width/height/frame_count的元数据, mask_pixels: int 每帧水印区域像素数] | 输出: [List[float] 特征]
+    """
+    frames = info.get('frame_count', 0)
+    return [
+        1.0,
+        frames / 1000.0,
+        info.get('width', 0) * info.get('height', 0) * frames / 1e6,
+        mask_pixels * frames / 1e6
+    ]
+
+
+class CostModel:
+    """
+    CostModel 功能说明:
+    # 实测样本按行追加到cache_dir/cost_samples.jsonl(单行追加写入，多个工作进程可同时记录)，
+    # 每组用最近的样本做向先验系数收缩的非负岭回归，样本少时接近先验，样本多时由实测数据决定
+    # 输入: [cache_dir: str 缓存目录] | 输出: [CostModel实例]
+    """
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.cache_dir = cache_dir
+        self.samples_path = os.path.join(cache_dir, COST_SAMPLES_NAME)
+        self._samples = self._load()
+        self._coefficients: Dict[str, np.ndarray] = {}
+
+    def _load(self) -> Dict[str, List[List[float]]]:
+        """
+        _load 功能说明:
+        # 加载实测样本，每组只保留最近MAX_SAMPLES_PER_PROFILE条；文件行数超过阈值时重写为保留的样本
+        # 输入: [无] | 输出: [Dict 分组键到样本列表(特征+耗时)的字典]
+        """
+        samples: Dict[str, List[List[float]]] = {}
+        lines = 0
+        try:
+            with open(self.samples_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        samples.setdefault(entry['profile'], []).append(entry['features'] + [entry['seconds']])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            return {}
+
+        for profile in samples:
+            samples[profile] = samples[profile][-MAX_SAMPLES_PER_PROFILE:]
+
+        if lines > COMPACT_THRESHOLD:
+            temp_path = f"{self.samples_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for profile, rows in samples.items():
+                    for row in rows:
+                        f.write(json.dumps({'profile': profile, 'features': row[:-1], 'seconds': row[-1]}) + "\n")
+            os.replace(temp_path, self.samples_path)
+        return samples
+
+    def record(self, profile: str, features: Sequence[float], seconds: float) -> None:
+        """
+        record 功能说明:
+        # 追加一条实测样本并使该组系数重新拟合
+        # 输入: [profile: str 分组键, features: Sequence[float] 特征, seconds: float 实测耗时(秒)] | 输出: [无]
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        line = json.dumps({'profile': profile, 'features': list(features), 'seconds': round(seconds, 3),
+                           'time': round(time.time(), 1)})
+        with open(self.samples_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+        self._samples.setdefault(profile, []).append(list(features) + [seconds])
+        self._samples[profile] = self._samples[profile][-MAX_SAMPLES_PER_PROFILE:]
+        self._coefficients.pop(profile, None)
+
+    def fit(self, profile: str) -> np.ndarray:
+        """
+        fit 功能说明:
+        # 最小化 ||Xθ - y||² + λ||D(θ - θ0)||²，D按各特征的样本尺度归一，λ相当于PRIOR_WEIGHT个先验样本；
+        # 负系数截断为0(耗时不随工作量减少)；无样本时返回先验系数
+        # 输入: [profile: str 分组键] | 输出: [np.ndarray 模型系数]
+        """
+        if profile in self._coefficients:
+            return self._coefficients[profile]
+
+        rows = self._samples.get(profile)
+        if not rows:
+            return PRIOR_COEFFICIENTS
+
+        data = np.array(rows, dtype=np.float64)
+        x, y = data[:, :-1], data[:, -1]
+        scale = np.maximum(np.mean(x * x, axis=0), 1e-6)
+        regularizer = PRIOR_WEIGHT * np.diag(scale)
+        theta = np.linalg.solve(x.T @ x + regularizer, x.T @ y + regularizer @ PRIOR_COEFFICIENTS)
+        theta = np.maximum(theta, 0.0)
+        self._coefficients[profile] = theta
+        return theta
+
+    def predict(self, profile: str, features: Sequence[float]) -> float:
+        """
+        predict 功能说明:
+        # 预测处理耗时(秒)，不小于0
+        # 输入: [profile: str 分组键, features: Sequence[float] 特征] | 输出: [float 预测耗时]
+        """
+        return max(0.0, float(np.dot(self.fit(profile), features)))
+
+    def sample_count(self, profile: str) -> int:
+        """
+        sample_count 功能说明:
+        # 获取分组的实测样本数，用于提示预测是否已校准
+        # 输入: [profile: str 分组键] | 输出: [int 样本数]
+        """
+        return len(self._samples.get(profile, []))
+
+
+class BatchEstimator:
+    """
+    BatchEstimator 功能说明:
+    # 批量处理进度按预测耗时加权(而不是按文件数)；剩余时间 = 未完成文件的预测耗时 × 本批实测/预测比例 ÷ 有效并行数，
+    # 整体帧率 = 已完成帧数 ÷ 墙钟时间
+    # 输入: [predictions: Dict[str, float] 文件路径到预测耗时, frame_counts: Dict[str, int] 文件路径到帧数,
+    #        jobs: int 并行文件数] | 输出: [BatchEstimator实例]
+    """
+
+    def __init__(self, predictions: Dict[str, float], frame_counts: Dict[str, int], jobs: int = 1):
+        self.predictions = predictions
+        self.frame_counts = frame_counts
+        self.jobs = max(1, jobs)
+        self.start_time = time.perf_counter()
+        self.completed: Dict[str, float] = {}
+
+    def complete(self, path: str, seconds: float) -> None:
+        """
+        complete 功能说明:
+        # 记录一个文件完成及其实测耗时
+        # 输入: [path: str 文件路径, seconds: float 实测耗时] | 输出: [无]
+        """
+        self.completed[path] = seconds
+
+    def get_progress(self) -> Dict[str, float]:
+        """
+        get_progress 功能说明:
+        # 计算按预测耗时加权的完成比例、剩余时间(秒)、本批实测/预测比例和整体帧率
+        # 输入: [无] | 输出: [Dict 进度统计]
+        """
+        total_predicted = sum(self.predictions.values())
+        done_predicted = sum(self.predictions.get(path, 0.0) for path in self.completed)
+        actual = sum(self.completed.values())
+        correction = actual / done_predicted if done_predicted > 0 and actual > 0 else 1.0
+        correction = min(max(correction, 0.2), 5.0)
+
+        pending = [path for path in self.predictions if path not in self.completed]
+        parallel = min(self.jobs, len(pending)) if pending else 1
+        remaining = sum(self.predictions[path] for path in pending) * correction / parallel
+
+        elapsed = time.perf_counter() - self.start_time
+        frames = sum(self.frame_counts.get(path, 0) for path in self.completed)
+        return {
+            'fraction': done_predicted / total_predicted if total_predicted > 0 else len(self.completed) / max(1, len(self.predictions)),
+            'remaining_s': remaining,
+            'correction': correction,
+            'elapsed_s': elapsed,
+            'frames': frames,
+            'fps': frames / elapsed if elapsed > 0 else 0.0
+        }
+
+    def format_progress(self) -> str:
+        """
+        format_progress 功能说明:
+        # 格式化为"进度 x% | 剩余 mm:ss | 整体 y 帧/秒"
+        # 输入: [无] | 输出: [str 进度文本]
+        """
+        progress = self.get_progress()
+        minutes, seconds = divmod(int(progress['remaining_s']), 60)
+        hours, minutes = divmod(minutes, 60)
+        remaining = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+        return (f"进度 {progress['fraction'] * 100:.1f}% | 预计剩余 {remaining} | "
+                f"整体 {progress['fps']:.1f} 帧/秒")
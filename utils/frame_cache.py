@@ -0,0 +1,269 @@
+##########frame_cache.py: GUI预览帧缓存与后台预取模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按帧号索引的画布尺寸预览帧LRU缓存和相邻帧后台预取]########
+# 变更记录: [2026-10-18] @李祥光 [预取支持定位索引，读取器已在窗口起点时不重新定位]########
+# 变更记录: [2026-10-18] @李祥光 [定位后读出第一帧之前被新请求打断时读取器位置记为未知，避免下次误判不需定位]########
+# 输入: [视频路径，帧号，画布显示尺寸] | 输出: [缩放到显示尺寸的RGB预览帧]###############
+
+
+###########################文件下的所有函数###########################
+"""
+make_proxy：将原始帧转换为显示尺寸的RGB预览帧
+ProxyFrameCache：按帧号索引、有内存上限的预览帧LRU缓存类
+ProxyFrameCache.set_proxy_size：设置预览帧尺寸，尺寸变化时清空缓存
+ProxyFrameCache.get：获取预览帧并标记为最近使用
+ProxyFrameCache.put：加入预览帧，超出内存上限时淘汰最久未使用的帧
+ProxyFrameCache.missing：获取帧号列表中尚未缓存的帧号
+ProxyFrameCache.clear：清空缓存
+ProxyFrameCache.get_stats：获取命中、淘汰和内存占用统计
+FramePrefetcher：后台预取当前帧前后相邻帧的线程类
+FramePrefetcher.request：请求预取指定帧附近的帧
+FramePrefetcher._run：预取线程主循环
+FramePrefetcher._prefetch：一次定位后顺序解码窗口内缺失的帧
+FramePrefetcher.stop：停止预取线程并释放视频
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[WatermarkGUI.update_frame] --> B[ProxyFrameCache.set_proxy_size]
+    B --> C[ProxyFrameCache.get]
+    C -->|命中| D[直接显示]
+    C -->|未命中| E[定位解码当前帧]
+    E --> F[make_proxy缩放]
+    F --> G[ProxyFrameCache.put]
+    G -->|超出内存上限| H[淘汰最久未使用的帧]
+    A --> I[FramePrefetcher.request]
+    I --> J[FramePrefetcher._run后台线程]
+    J --> K[FramePrefetcher._prefetch]
+    K --> L[ProxyFrameCache.missing]
+    L --> M[seek_reader定位到第一个缺失帧后顺序解码]
+    M -->|有定位索引| N[SeekIndex.read从最近关键帧解码]
+    M --> F
+    M -->|有新请求| J
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .seek_index import SeekIndex, seek_reader
+
+# 默认缓存内存上限和预取半径(帧)
+DEFAULT_CACHE_MB = 256
+DEFAULT_PREFETCH_RADIUS = 8
+
+
+def make_proxy(frame: np.ndarray, proxy_size: Tuple[int, int]) -> np.ndarray:
+    """
+    make_proxy 功能说明:
+    # 将BGR原始帧缩放到显示尺寸并转换为RGB，先缩小再转换颜色以减少计算量
+    # 输入: [frame: np.ndarray BGR原始帧, proxy_size: Tuple[int, int] 显示尺寸(宽, 高)] | 输出: [np.ndarray RGB预览帧]
+    """
+    if (frame.shape[1], frame.shape[0]) != tuple(proxy_size):
+        frame = cv2.resize(frame, tuple(proxy_size), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+class ProxyFrameCache:
+    """
+    ProxyFrameCache 功能说明:
+    # 按帧号保存已缩放到画布尺寸的RGB预览帧，总字节数超过上限时按最近最少使用顺序淘汰
+    # 界面线程和预取线程共用，所有操作加锁；预览尺寸变化(窗口缩放)时清空，尺寸不符的帧不会被加入
+    # 输入: [max_bytes: int 内存上限(字节)] | 输出: [ProxyFrameCache实例]
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.proxy_size: Optional[Tuple[int, int]] = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_proxy_size(self, proxy_size: Tuple[int, int]) -> None:
+        """
+        set_proxy_size 功能说明:
+        # 设置预览帧尺寸，与当前尺寸不同时清空缓存
+        # 输入: [proxy_size: Tuple[int, int] 显示尺寸(宽, 高)] | 输出: [无]
+        """
+        proxy_size = tuple(proxy_size)
+        with self._lock:
+            if proxy_size != self.proxy_size:
+                self.proxy_size = proxy_size
+                self._frames.clear()
+                self.bytes = 0
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        """
+        get 功能说明:
+        # 获取预览帧并标记为最近使用，未缓存时返回None
+        # 输入: [index: int 帧号] | 输出: [Optional[np.ndarray] 预览帧]
+        """
+        with self._lock:
+            image = self._frames.get(index)
+            if image is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(index)
+            self.hits += 1
+            return image
+
+    def put(self, index: int, image: np.ndarray) -> bool:
+        """
+        put 功能说明:
+        # 加入预览帧，尺寸与当前预览尺寸不符时丢弃；超出内存上限时从最久未使用的帧开始淘汰
+        # 输入: [index: int 帧号, image: np.ndarray 预览帧] | 输出: [bool 是否加入]
+        """
+        with self._lock:
+            if (image.shape[1], image.shape[0]) != self.proxy_size or image.nbytes > self.max_bytes:
+                return False
+            previous = self._frames.pop(index, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._frames[index] = image
+            self.bytes += image.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+            return True
+
+    def missing(self, indices: List[int]) -> List[int]:
+        """
+        missing 功能说明:
+        # 获取帧号列表中尚未缓存的帧号，不改变最近使用顺序
+        # 输入: [indices: List[int] 帧号列表] | 输出: [List[int] 未缓存的帧号]
+        """
+        with self._lock:
+            return [index for index in indices if index not in self._frames]
+
+    def clear(self) -> None:
+        """
+        clear 功能说明:
+        # 清空缓存(加载新视频时调用)
+        # 输入: [无] | 输出: [无]
+        """
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        get_stats 功能说明:
+        # 获取缓存帧数、内存占用、命中次数、未命中次数、淘汰次数和命中率
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'frames': len(self._frames),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class FramePrefetcher:
+    """
+    FramePrefetcher 功能说明:
+    # 后台线程使用独立的VideoCapture(不与界面线程共用解码器)，预取当前帧前后radius帧写入缓存
+    # 每次预取只定位一次到窗口内第一个缺失帧，之后顺序解码，避免长GOP视频逐帧定位都从关键帧重新解码；
+    # 界面发出新请求时放弃当前窗口，转向新位置；seek_index可在定位索引建立完成后设置，之后从最近关键帧定位
+    # 输入: [video_path: str 视频路径, cache: ProxyFrameCache 预览帧缓存, total_frames: int 总帧数,
+    #        radius: int 预取半径(帧)] | 输出: [FramePrefetcher实例]
+    """
+
+    def __init__(self, video_path: str, cache: ProxyFrameCache, total_frames: int,
+                 radius: int = DEFAULT_PREFETCH_RADIUS):
+        self.video_path = video_path
+        self.cache = cache
+        self.total_frames = total_frames
+        self.radius = max(0, radius)
+        self.decoded_frames = 0
+        self.seek_index: Optional[SeekIndex] = None
+        self._position: Optional[int] = 0
+        self._center: Optional[int] = None
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="FramePrefetcher", daemon=True)
+        self._thread.start()
+
+    def request(self, center: int) -> None:
+        """
+        request 功能说明:
+        # 请求预取center前后的帧，唤醒预取线程；连续请求时只保留最新位置
+        # 输入: [center: int 当前帧号] | 输出: [无]
+        """
+        with self._condition:
+            self._center = center
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """
+        _run 功能说明:
+        # 预取线程主循环：等待请求，打开独立的视频读取器并预取窗口内缺失的帧，直到stop
+        # 输入: [无] | 输出: [无]
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            while True:
+                with self._condition:
+                    while self._center is None and not self._stopped:
+                        self._condition.wait()
+                    if self._stopped:
+                        return
+                    center = self._center
+                    self._center = None
+                self._prefetch(cap, center)
+        finally:
+            cap.release()
+
+    def _prefetch(self, cap: cv2.VideoCapture, center: int) -> None:
+        """
+        _prefetch 功能说明:
+        # 定位到窗口内第一个缺失帧后顺序解码到最后一个缺失帧，已缓存的帧只解码不缩放；
+        # 读取器已在第一个缺失帧时不重新定位；有新请求或停止时立即返回，读取器位置只在读出帧后更新
+        # 输入: [cap: cv2.VideoCapture 预取线程的视频读取器, center: int 窗口中心帧号] | 输出: [无]
+        """
+        first = max(0, center - self.radius)
+        last = min(self.total_frames - 1, center + self.radius)
+        missing = self.cache.missing(list(range(first, last + 1)))
+        if not missing or not cap.isOpened():
+            return
+
+        read_frame = seek_reader(cap, missing[0], self.seek_index, self._position)
+        if self._position != missing[0]:
+            # 读取器已定位(或将在第一次读取时定位)，读出第一帧之前被打断时位置未知，下次必须重新定位
+            self._position = None
+        for index in range(missing[0], missing[-1] + 1):
+            if self._stopped or self._center is not None:
+                return
+            ret, frame = read_frame()
+            if not ret:
+                self._position = None
+                return
+            self._position = index + 1
+            self.decoded_frames += 1
+            proxy_size = self.cache.proxy_size
+            if proxy_size and self.cache.missing([index]):
+                self.cache.put(index, make_proxy(frame, proxy_size))
+
+    def stop(self) -> None:
+        """
+        stop 功能说明:
+        # 停止预取线程并等待其释放视频读取器
+        # 输入: [无] | 输出: [无]
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout=2)
@@ -0,0 +1,264 @@
+##########frame_pipeline.py: 并行帧处理流水线模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建解码线程→工作池→有序写出的并行帧流水线]########
+# 变更记录: [2026-10-18] @李祥光 [支持按批提交帧，处理函数一次处理多帧]########
+# 变更记录: [2026-10-18] @李祥光 [记录单帧处理耗时直方图和待写队列深度运行指标]########
+# 变更记录: [2026-10-18] @李祥光 [移除按批提交帧：实测没有提速，每个任务恢复为单帧]########
+# 变更记录: [2026-10-18] @李祥光 [进程池工作进程随结果返回帧级计数器增量，由主线程计入本进程指标]########
+# 输入: [帧读取函数，帧处理函数，帧写出函数] | 输出: [按原顺序写出的处理结果]###############
+
+
+###########################文件下的所有函数###########################
+"""
+FramePipeline：并行帧处理流水线主类
+FramePipeline.run：运行流水线，返回写出的帧数
+FramePipeline._run_serial：单线程顺序处理
+FramePipeline._decode：解码线程，读取帧并提交到工作池
+FramePipeline._create_executor：创建线程池或进程池
+_put_until_stopped：在停止信号之前向有界队列放入元素
+_observe_latency：记录单帧处理耗时
+_observe_future_latency：任务完成时按帧记录从提交到完成的耗时
+_init_process_worker：进程池工作进程初始化
+_run_process_worker：进程池工作进程处理单帧
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[FramePipeline.run] --> B{执行模式}
+    B -->|serial| C[_run_serial顺序处理]
+    B -->|thread/process| D[_create_executor创建工作池]
+    D --> E[_decode解码线程]
+    E --> F[executor.submit提交帧]
+    F --> G[有界待写队列]
+    G --> H[主线程按提交顺序取结果]
+    H --> I[write_func写出帧]
+    D -->|process| J[_init_process_worker]
+    F -->|process| K[_run_process_worker]
+    K --> L[counter_deltas随结果返回]
+    H -->|process| M[merge_counters计入跳过帧数和修复次数]
+    F --> N[_observe_future_latency单帧耗时直方图]
+    G --> O[PIPELINE_QUEUE_DEPTH待写队列深度]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import FRAME_LATENCY, PIPELINE_QUEUE_DEPTH, counter_deltas, merge_counters, snapshot_counters
+
+# 支持的执行模式
+EXECUTION_MODES = ('serial', 'thread', 'process')
+
+# 进程池工作进程中的帧处理函数
+_worker_process_func: Optional[Callable[[Any], Any]] = None
+
+
+def _init_process_worker(process_func: Callable[[Any], Any]) -> None:
+    """
+    _init_process_worker 功能说明:
+    # 进程池工作进程初始化，只传递一次处理函数，避免每帧重复序列化
+    # 输入: [process_func: Callable 帧处理函数] | 输出: [无]
+    """
+    global _worker_process_func
+    _worker_process_func = process_func
+
+
+def _run_process_worker(frame: Any) -> Tuple[Any, Dict[str, float]]:
+    """
+    _run_process_worker 功能说明:
+    # 在进程池工作进程中处理单帧，连同本帧的帧级计数器增量(跳过帧数、修复次数)一起返回，由主线程计入父进程指标
+    # 输入: [frame: Any 输入帧] | 输出: [Tuple[Any, Dict] 处理后的帧, 计数器增量]
+    """
+    before = snapshot_counters()
+    result = _worker_process_func(frame)
+    return result, counter_deltas(before)
+
+
+def _put_until_stopped(target: queue.Queue, item: Any, stop_event: threading.Event) -> bool:
+    """
+    _put_until_stopped 功能说明:
+    # 向有界队列放入元素，队列满时等待，收到停止信号后放弃
+    # 输入: [target: Queue 目标队列, item: Any 元素, stop_event: Event 停止信号] | 输出: [bool 是否放入成功]
+    """
+    while not stop_event.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _observe_latency(seconds: float) -> None:
+    """
+    _observe_latency 功能说明:
+    # 将一帧的处理耗时记入单帧处理耗时直方图
+    # 输入: [seconds: float 处理耗时(秒)] | 输出: [无]
+    """
+    FRAME_LATENCY.observe(seconds)
+
+
+def _observe_future_latency(submitted: float, future: Future) -> None:
+    """
+    _observe_future_latency 功能说明:
+    # 工作池任务完成回调：记录从提交到处理完成的单帧耗时(含在工作池中排队的时间)，被取消或失败的任务不记录
+    # 输入: [submitted: float 提交时刻(perf_counter), future: Future 任务] | 输出: [无]
+    """
+    if not future.cancelled() and future.exception() is None:
+        _observe_latency(time.perf_counter() - submitted)
+
+
+class FramePipeline:
+    """
+    FramePipeline 功能说明:
+    # 并行帧处理流水线：解码线程读取帧并提交到线程池/进程池，主线程按提交顺序取回结果写出
+    # 待写队列有界，处理中的帧数不超过max_in_flight，内存占用可控；输出顺序与顺序处理完全一致
+    # 输入: [process_func: Callable 帧处理函数, workers: int 工作数(0为CPU核数),
+    #        execution_mode: str 执行模式(serial/thread/process), max_in_flight: int 最大在途帧数] | 输出: [FramePipeline实例]
+    """
+
+    def __init__(self, process_func: Callable[[Any], Any], workers: int = 0,
+                 execution_mode: str = 'thread', max_in_flight: int = 0):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"未知的执行模式: {execution_mode}")
+
+        self.process_func = process_func
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.execution_mode = execution_mode
+        self.max_in_flight = max_in_flight if max_in_flight > 0 else self.workers * 4
+
+    def run(self, read_func: Callable[[], Tuple[bool, Any]], write_func: Callable[[Any], None],
+            progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """
+        run 功能说明:
+        # 运行流水线直到read_func返回失败，按读取顺序写出所有处理结果；
+        # 待写队列中的任务数实时计入队列深度指标(多个流水线同时运行时累加)
+        # 输入: [read_func: Callable 帧读取函数(返回(ret, frame)), write_func: Callable 帧写出函数,
+        #        progress_callback: Callable 进度回调(参数为新增帧数)] | 输出: [int 写出的帧数]
+        """
+        if self.execution_mode == 'serial':
+            return self._run_serial(read_func, write_func, progress_callback)
+
+        # 待写队列中按提交顺序保存Future，兼作重排序缓冲区
+        pending: queue.Queue = queue.Queue(maxsize=self.max_in_flight)
+        stop_event = threading.Event()
+        errors: List[BaseException] = []
+
+        executor = self._create_executor()
+        decoder = threading.Thread(
+            target=self._decode,
+            args=(read_func, executor, pending, stop_event, errors),
+            name="frame-decoder",
+            daemon=True
+        )
+        decoder.start()
+
+        frame_count = 0
+        try:
+            while True:
+                future = pending.get()
+                if future is None:
+                    break
+                PIPELINE_QUEUE_DEPTH.dec()
+
+                result = future.result()
+                if self.execution_mode == 'process':
+                    result, deltas = result
+                    merge_counters(deltas)
+                write_func(result)
+                frame_count += 1
+                if progress_callback:
+                    progress_callback(1)
+
+        finally:
+            stop_event.set()
+            decoder.join()
+            # 提前结束时队列中剩余的任务不再写出，从队列深度中扣除
+            while True:
+                try:
+                    if pending.get_nowait() is not None:
+                        PIPELINE_QUEUE_DEPTH.dec()
+                except queue.Empty:
+                    break
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if errors:
+            raise errors[0]
+
+        return frame_count
+
+    def _run_serial(self, read_func: Callable[[], Tuple[bool, Any]], write_func: Callable[[Any], None],
+                    progress_callback: Optional[Callable[[int], None]]) -> int:
+        """
+        _run_serial 功能说明:
+        # 单线程顺序读取、处理、写出，记录每帧处理耗时
+        # 输入: [read_func: Callable 帧读取函数, write_func: Callable 帧写出函数, progress_callback: Callable 进度回调] | 输出: [int 写出的帧数]
+        """
+        frame_count = 0
+        while True:
+            ret, frame = read_func()
+            if not ret:
+                break
+
+            start = time.perf_counter()
+            result = self.process_func(frame)
+            _observe_latency(time.perf_counter() - start)
+            write_func(result)
+            frame_count += 1
+            if progress_callback:
+                progress_callback(1)
+
+        return frame_count
+
+    def _decode(self, read_func: Callable[[], Tuple[bool, Any]], executor: Executor, pending: queue.Queue,
+                stop_event: threading.Event, errors: List[BaseException]) -> None:
+        """
+        _decode 功能说明:
+        # 解码线程：读取帧并提交到工作池，待写队列满时阻塞，结束时放入结束标记；任务完成时记录单帧耗时
+        # 输入: [read_func: Callable 帧读取函数, executor: Executor 工作池, pending: Queue 待写队列,
+        #        stop_event: Event 停止信号, errors: List 异常收集列表] | 输出: [无]
+        """
+        try:
+            while not stop_event.is_set():
+                ret, frame = read_func()
+                if not ret:
+                    break
+
+                submitted = time.perf_counter()
+                if self.execution_mode == 'process':
+                    future = executor.submit(_run_process_worker, frame)
+                else:
+                    future = executor.submit(self.process_func, frame)
+                future.add_done_callback(partial(_observe_future_latency, submitted))
+
+                # 先计入队列深度再放入，避免主线程取出后扣减时出现负值
+                PIPELINE_QUEUE_DEPTH.inc()
+                if not _put_until_stopped(pending, future, stop_event):
+                    PIPELINE_QUEUE_DEPTH.dec()
+                    break
+
+        except BaseException as e:
+            errors.append(e)
+
+        finally:
+            _put_until_stopped(pending, None, stop_event)
+
+    def _create_executor(self) -> Executor:
+        """
+        _create_executor 功能说明:
+        # 根据执行模式创建线程池或进程池
+        # 输入: [无] | 输出: [Executor 工作池]
+        """
+        if self.execution_mode == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(self.process_func,)
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="frame-worker")
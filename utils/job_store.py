@@ -0,0 +1,462 @@
+##########job_store.py: 持久化任务队列模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建SQLite持久化任务表，支持失败自动重试、租约过期回收和按内容幂等提交]########
+# 变更记录: [2026-10-18] @李祥光 [完成和失败只更新本执行者仍持有的处理中任务，租约过期被接管后不覆盖新执行者的状态]########
+# 输入: [输入视频，影响输出的处理参数，输出路径] | 输出: [任务状态、重试次数、耗时等持久化记录]###############
+
+
+###########################文件下的所有函数###########################
+"""
+make_job_key：由输入内容指纹、处理参数和输出路径计算任务幂等键
+make_worker_id：生成本进程的执行者标识
+JobStore：SQLite持久化任务队列类
+JobStore._connect：打开数据库连接
+JobStore._init_db：创建任务表
+JobStore._to_dict：将数据库行转换为任务字典
+JobStore.lookup：按幂等键查找任务
+JobStore.is_completed：判断相同任务是否已完成且输出仍存在
+JobStore.enqueue：幂等提交任务
+JobStore.claim：领取可执行的任务(排队到期或租约过期)
+JobStore.renew：续期执行者持有的任务租约
+JobStore.release：执行者正常退出时交还未完成的任务
+JobStore.complete：标记本执行者持有的任务完成
+JobStore.fail：记录本执行者持有的任务失败，未超过最大次数时延迟重试
+JobStore.cancel：取消未结束的任务
+JobStore.get：获取单个任务
+JobStore.list_jobs：按条件列出任务
+JobStore.counts：统计各状态任务数
+JobStore.next_retry_in：距最近一次重试的等待时间
+LeaseKeeper：后台定期续期租约的线程类
+LeaseKeeper.start：启动续期线程
+LeaseKeeper.stop：停止续期线程
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[批量处理/监视文件夹/HTTP服务] --> B[JobStore.enqueue]
+    B --> C[make_job_key内容指纹+处理参数+输出路径]
+    B -->|已完成且输出存在| D[直接返回，不再处理]
+    B -->|新任务或失败后重新提交| E[queued]
+    A --> F[JobStore.claim]
+    F -->|排队到期或租约过期| G[running]
+    A --> H[LeaseKeeper定期JobStore.renew]
+    G --> I[JobStore.complete]
+    G --> J[JobStore.fail]
+    J -->|次数未用完| K[按指数退避延迟后重新queued]
+    J -->|次数用完| L[failed]
+    I -->|任务已被其他执行者接管| M[不更新，返回未记录]
+    J -->|任务已被其他执行者接管| M
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.result_cache import compute_content_fingerprint
+
+# 任务状态
+JOB_STATES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    config TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    next_attempt_at REAL NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, next_attempt_at);
+"""
+
+
+def make_job_key(fingerprint: str, settings: Dict[str, Any], output_path: str) -> str:
+    """
+    make_job_key 功能说明:
+    # 由输入内容指纹、影响输出的处理参数和输出绝对路径计算幂等键；同一内容以相同参数写到同一输出视为同一任务
+    # 输入: [fingerprint: str 内容指纹, settings: Dict 处理参数, output_path: str 输出路径] | 输出: [str 幂等键]
+    """
+    payload = json.dumps({'content': fingerprint, 'settings': settings, 'output': os.path.abspath(output_path)},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def make_worker_id() -> str:
+    """
+    make_worker_id 功能说明:
+    # 生成执行者标识(主机名:进程号:随机后缀)，领取任务和续期租约时使用
+    # 输入: [无] | 输出: [str 执行者标识]
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobStore:
+    """
+    JobStore 功能说明:
+    # 任务表保存在SQLite数据库(WAL模式)，每次操作单独连接，批量处理、监视文件夹和HTTP服务的多个进程、线程可同时使用；
+    # 领取任务时设置租约，执行者定期续期，进程崩溃后租约过期的任务会被重新领取(计为一次尝试)；
+    # 失败的任务按 retry_delay × 2^(已尝试次数-1) 延迟后重试，达到max_attempts次后标记为failed
+    # 输入: [db_path: str 数据库路径, max_attempts: int 最大尝试次数, retry_delay: float 首次重试延迟(秒),
+    #        lease_seconds: float 租约时长(秒)] | 输出: [JobStore实例]
+    """
+
+    def __init__(self, db_path: str = "cache/jobs.db", max_attempts: int = 3, retry_delay: float = 30.0,
+                 lease_seconds: float = 300.0):
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        _connect 功能说明:
+        # 打开自动提交模式的数据库连接，写事务显式使用BEGIN IMMEDIATE，结果行可按列名访问
+        # 输入: [无] | 输出: [sqlite3.Connection 数据库连接]
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        """
+        _init_db 功能说明:
+        # 创建数据库目录和任务表，启用WAL以便读写并发
+        # 输入: [无] | 输出: [无]
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        """
+        _to_dict 功能说明:
+        # 将数据库行转换为字典，config字段解析为字典
+        # 输入: [row: sqlite3.Row 数据库行] | 输出: [Optional[Dict] 任务记录]
+        """
+        if row is None:
+            return None
+        job = dict(row)
+        job['config'] = json.loads(job['config'])
+        return job
+
+    def lookup(self, job_key: str) -> Optional[Dict[str, Any]]:
+        """
+        lookup 功能说明:
+        # 按幂等键查找任务
+        # 输入: [job_key: str 幂等键] | 输出: [Optional[Dict] 任务记录]
+        """
+        conn = self._connect()
+        try:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,)).fetchone())
+        finally:
+            conn.close()
+
+    def is_completed(self, input_path: str, output_path: str, settings: Dict[str, Any]) -> bool:
+        """
+        is_completed 功能说明:
+        # 判断相同内容、参数和输出路径的任务是否已完成且输出文件仍存在
+        # 输入: [input_path: str 输入路径, output_path: str 输出路径, settings: Dict 处理参数] | 输出: [bool 是否已完成]
+        """
+        job = self.lookup(make_job_key(compute_content_fingerprint(input_path), settings, output_path))
+        return bool(job and job['state'] == 'completed' and os.path.exists(job['output_path']))
+
+    def enqueue(self, input_path: str, output_path: str, settings: Dict[str, Any], config: Dict[str, Any],
+                source: str = "") -> Dict[str, Any]:
+        """
+        enqueue 功能说明:
+        # 幂等提交：已完成且输出仍存在的任务直接返回(不再处理)，排队或处理中的任务直接返回(不重复提交)，
+        # 失败、取消或输出已丢失的任务重置尝试次数后重新排队，新任务插入排队
+        # 输入: [input_path: str 输入路径, output_path: str 输出路径, settings: Dict 影响输出的处理参数,
+        #        config: Dict 处理配置(重启后据此恢复任务), source: str 来源(batch/watch/api)] | 输出: [Dict 任务记录]
+        """
+        fingerprint = compute_content_fingerprint(input_path)
+        job_key = make_job_key(fingerprint, settings, output_path)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO jobs (job_key, fingerprint, input_path, output_path, config, source, state, "
+                    "max_attempts, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_key, fingerprint, input_path, output_path, json.dumps(config, ensure_ascii=False, default=str),
+                     source, self.max_attempts, now, now))
+            elif row['state'] in ('failed', 'cancelled') or (
+                    row['state'] == 'completed' and not os.path.exists(row['output_path'])):
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', attempts = 0, max_attempts = ?, error = NULL, worker = NULL, "
+                    "lease_until = NULL, next_attempt_at = ?, input_path = ?, source = ? WHERE id = ?",
+                    (self.max_attempts, now, input_path, source, row['id']))
+            row = conn.execute("SELECT * FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+            conn.execute("COMMIT")
+            return self._to_dict(row)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker: str, job_ids: Optional[Iterable[int]] = None, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        claim 功能说明:
+        # 在一个写事务内领取最多limit个可执行的任务：排队且已到重试时间的，或处理中但租约已过期的(原执行者已退出)；
+        # 租约过期且尝试次数已用完的任务标记为failed；job_ids限定只领取这些任务
+        # 输入: [worker: str 执行者标识, job_ids: Iterable[int] 限定的任务ID, limit: int 最多领取数] | 输出: [List[Dict] 领取的任务]
+        """
+        now = time.time()
+        scope, params = "", []
+        if job_ids is not None:
+            ids = list(job_ids)
+            if not ids:
+                return []
+            scope = f" AND id IN ({','.join('?' * len(ids))})"
+            params = ids
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', error = '租约过期且尝试次数已用完', finished_at = ? "
+                "WHERE state = 'running' AND lease_until < ? AND attempts >= max_attempts" + scope,
+                [now, now] + params)
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE ((state = 'queued' AND next_attempt_at <= ?) "
+                "OR (state = 'running' AND lease_until < ?))" + scope + " ORDER BY next_attempt_at, id LIMIT ?",
+                [now, now] + params + [max(1, limit)]).fetchall()
+            claimed = [row['id'] for row in rows]
+            for job_id in claimed:
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, "
+                    "started_at = ?, error = NULL WHERE id = ?",
+                    (worker, now + self.lease_seconds, now, job_id))
+            jobs = [self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+                    for job_id in claimed]
+            conn.execute("COMMIT")
+            return jobs
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, worker: str) -> int:
+        """
+        renew 功能说明:
+        # 续期执行者持有的全部处理中任务的租约
+        # 输入: [worker: str 执行者标识] | 输出: [int 续期的任务数]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("UPDATE jobs SET lease_until = ? WHERE state = 'running' AND worker = ?",
+                                (time.time() + self.lease_seconds, worker)).rowcount
+        finally:
+            conn.close()
+
+    def release(self, worker: str) -> int:
+        """
+        release 功能说明:
+        # 执行者被中断(如Ctrl+C)时将其持有的处理中任务恢复为排队，且不计入尝试次数，重新运行时可立即领取
+        # 输入: [worker: str 执行者标识] | 输出: [int 交还的任务数]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("UPDATE jobs SET state = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, "
+                                "lease_until = NULL, next_attempt_at = ? WHERE state = 'running' AND worker = ?",
+                                (time.time(), worker)).rowcount
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, worker: str, duration: float = 0.0) -> bool:
+        """
+        complete 功能说明:
+        # 标记任务完成并记录耗时；仅当任务仍由该执行者处理中时更新，租约过期已被其他执行者接管的不覆盖其状态
+        # 输入: [job_id: int 任务ID, worker: str 执行者标识, duration: float 处理耗时(秒)] | 输出: [bool 是否已记录]
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("UPDATE jobs SET state = 'completed', finished_at = ?, duration = ?, lease_until = NULL, "
+                                "error = NULL WHERE id = ? AND worker = ? AND state = 'running'",
+                                (time.time(), duration, job_id, worker)).rowcount > 0
+        finally:
+            conn.close()
+
+    def fail(self, job_id: int, worker: str, error: str = "", duration: float = 0.0) -> Optional[str]:
+        """
+        fail 功能说明:
+        # 记录一次失败：尝试次数未用完时按指数退避延迟后重新排队，否则标记为failed；
+        # 任务已不由该执行者处理中(被接管、取消或不存在)时不更新
+        # 输入: [job_id: int 任务ID, worker: str 执行者标识, error: str 错误信息, duration: float 本次耗时(秒)] |
+        #       输出: [Optional[str] 新状态(queued或failed)，未记录时为None]
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND state = 'running'",
+                               (job_id, worker)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            if row['attempts'] < row['max_attempts']:
+                state = 'queued'
+                next_attempt = now + self.retry_delay * 2 ** max(0, row['attempts'] - 1)
+            else:
+                state = 'failed'
+                next_attempt = now
+            conn.execute("UPDATE jobs SET state = ?, error = ?, next_attempt_at = ?, finished_at = ?, duration = ?, "
+                         "lease_until = NULL WHERE id = ? AND worker = ? AND state = 'running'",
+                         (state, error, next_attempt, now, duration, job_id, worker))
+            conn.execute("COMMIT")
+            return state
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def cancel(self, job_id: int) -> None:
+        """
+        cancel 功能说明:
+        # 取消排队或处理中的任务
+        # 输入: [job_id: int 任务ID] | 输出: [无]
+        """
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE jobs SET state = 'cancelled', finished_at = ?, lease_until = NULL "
+                         "WHERE id = ? AND state IN ('queued', 'running')", (time.time(), job_id))
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        get 功能说明:
+        # 获取单个任务
+        # 输入: [job_id: int 任务ID] | 输出: [Optional[Dict] 任务记录]
+        """
+        conn = self._connect()
+        try:
+            return self._to_dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def list_jobs(self, states: Optional[Iterable[str]] = None, source: Optional[str] = None,
+                  job_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        list_jobs 功能说明:
+        # 按状态、来源和任务ID列出任务(按ID排序)
+        # 输入: [states: Iterable[str] 状态, source: str 来源, job_ids: Iterable[int] 任务ID] | 输出: [List[Dict] 任务记录]
+        """
+        clauses, params = [], []
+        for column, values in (('state', states), ('id', job_ids)):
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{column} IN ({','.join('?' * len(values)) or 'NULL'})")
+                params.extend(values)
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        try:
+            return [self._to_dict(row) for row in conn.execute(f"SELECT * FROM jobs{where} ORDER BY id", params)]
+        finally:
+            conn.close()
+
+    def counts(self, job_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+        """
+        counts 功能说明:
+        # 统计各状态任务数，job_ids限定范围
+        # 输入: [job_ids: Iterable[int] 任务ID] | 输出: [Dict 状态到任务数]
+        """
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.list_jobs(job_ids=job_ids):
+            counts[job['state']] += 1
+        return counts
+
+    def next_retry_in(self, job_ids: Optional[Iterable[int]] = None) -> Optional[float]:
+        """
+        next_retry_in 功能说明:
+        # 距范围内最近一个排队任务可执行(或处理中任务租约过期)的秒数，没有未结束的任务时为None
+        # 输入: [job_ids: Iterable[int] 任务ID] | 输出: [Optional[float] 等待秒数]
+        """
+        now = time.time()
+        due = [job['next_attempt_at'] if job['state'] == 'queued' else job['lease_until'] or now
+               for job in self.list_jobs(states=('queued', 'running'), job_ids=job_ids)]
+        return max(0.0, min(due) - now) if due else None
+
+
+class LeaseKeeper:
+    """
+    LeaseKeeper 功能说明:
+    # 后台线程每隔 租约时长/3 续期执行者持有的任务租约，处理时间超过租约的长视频不会被其他执行者误领取；
+    # 可用作with语句
+    # 输入: [store: JobStore 任务队列, worker: str 执行者标识] | 输出: [LeaseKeeper实例]
+    """
+
+    def __init__(self, store: JobStore, worker: str):
+        self.store = store
+        self.worker = worker
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'LeaseKeeper':
+        """
+        start 功能说明:
+        # 启动续期线程
+        # 输入: [无] | 输出: [LeaseKeeper 自身]
+        """
+        interval = max(0.01, self.store.lease_seconds / 3)
+
+        def keep_alive():
+            while not self._stop.wait(interval):
+                try:
+                    self.store.renew(self.worker)
+                except sqlite3.Error:
+                    continue
+
+        self._thread = threading.Thread(target=keep_alive, name="lease-keeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        stop 功能说明:
+        # 停止续期线程
+        # 输入: [无] | 输出: [无]
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'LeaseKeeper':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
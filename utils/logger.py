@@ -1,17 +1,31 @@
 ##########logger.py: 日志记录工具模块 ##################
 # 变更记录: [2025-06-25] @李祥光 [创建日志记录工具]########
+# 变更记录: [2026-10-18] @李祥光 [处理结束日志记录分阶段耗时JSON]########
+# 变更记录: [2026-10-18] @李祥光 [批量处理汇总记录各工作进程吞吐]########
+# 变更记录: [2026-10-18] @李祥光 [新增单个任务日志文件]########
+# 变更记录: [2026-10-18] @李祥光 [改为队列日志：各线程和工作进程只入队，单个监听线程以JSON行写入并带任务ID和执行者ID，重复初始化不再新建日志文件]########
+# 变更记录: [2026-10-18] @李祥光 [退出清理在创建日志队列后注册，先停止监听线程再关闭队列]########
 # 输入: [日志信息] | 输出: [格式化的日志记录]###############
 
 
 ###########################文件下的所有函数###########################
 """
-setup_logger：配置和初始化日志记录器
+setup_logger：配置和初始化日志记录器，启动日志监听线程(同一进程同一目录重复调用时沿用)
+init_worker_logging：工作进程初始化，日志记录放入主进程的日志队列
+get_log_queue：获取日志队列，传给工作进程初始化函数
+shutdown_logging：停止日志监听线程，写完队列中剩余的日志
+log_context：with块内的日志记录附带任务ID、执行者ID等字段
 log_info：记录信息级别日志
 log_warning：记录警告级别日志
 log_error：记录错误级别日志
 log_processing_start：记录处理开始日志
 log_processing_end：记录处理结束日志
 log_batch_summary：记录批量处理汇总日志
+job_log：处理单个任务期间将日志同时写入该任务的日志文件
+_JsonFormatter：JSON行格式器
+_ContextFilter：入队前给日志记录附加上下文字段
+_QueueHandler：日志队列处理器，关闭时同时停止监听线程
+_JobLogHandler：监听线程中把带任务日志路径的记录追加到任务日志文件
 """
 ###########################文件下的所有函数###########################
 
@@ -20,37 +34,166 @@ log_batch_summary：记录批量处理汇总日志
 flowchart TD
     A[日志模块] --> B[setup_logger]
     B --> C[配置日志器]
+    B --> M[QueueListener监听线程]
+    C --> N[_QueueHandler入队]
+    N --> O[_ContextFilter附加job_id/worker_id]
+    P[init_worker_logging] --> N
+    Q[get_log_queue] --> P
     A --> D[log_info]
     A --> E[log_warning]
     A --> F[log_error]
     A --> G[log_processing_start]
     A --> H[log_processing_end]
     A --> I[log_batch_summary]
-    D --> J[写入日志文件]
-    E --> J
-    F --> J
-    G --> J
-    H --> J
-    I --> J
+    A --> K[job_log]
+    K --> R[log_context]
+    R --> O
+    D --> N
+    E --> N
+    F --> N
+    G --> N
+    H --> N
+    I --> N
+    N --> M
+    M --> J[_JsonFormatter写入日志文件]
+    M --> S[控制台输出]
+    M --> L[_JobLogHandler写入任务日志文件]
+    T[shutdown_logging] --> M
 """
 #########mermaid格式说明所有函数的调用关系说明结束#########
 
+import atexit
+import json
 import logging
+import multiprocessing
 import os
+import socket
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
 
 # 全局日志器实例
 _logger: Optional[logging.Logger] = None
 
+# 日志队列：fork出的工作进程继承，spawn方式由init_worker_logging传入
+_queue: Optional[Any] = None
+
+# 日志监听线程及其所在进程、日志目录
+_listener: Optional[QueueListener] = None
+_owner_pid: Optional[int] = None
+_log_dir: Optional[str] = None
+
+# 当前线程/协程的日志上下文字段(job_id、worker_id、job_log及其他附加字段)
+_context: ContextVar[Dict[str, Any]] = ContextVar('log_context', default={})
+
+_HOSTNAME = socket.gethostname()
+
+# 控制台仍使用便于阅读的文本格式
+_CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_CONSOLE_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+
+class _JsonFormatter(logging.Formatter):
+    """
+    _JsonFormatter 功能说明:
+    # 将日志记录格式化为一行JSON：时间、级别、日志器、消息、任务ID、执行者ID、进程号、线程名及上下文附加字段
+    # 输入: [record: LogRecord 日志记录] | 输出: [str JSON行]
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'job_id': getattr(record, 'job_id', None),
+            'worker_id': getattr(record, 'worker_id', None),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in getattr(record, 'context', {}).items():
+            entry.setdefault(key, value)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """
+    _ContextFilter 功能说明:
+    # 在产生日志的线程中(入队之前)读取日志上下文，附加job_id、worker_id(默认为主机名:进程号)、
+    # job_log(任务日志路径)和其他字段，监听线程据此格式化和分发
+    # 输入: [record: LogRecord 日志记录] | 输出: [bool 始终为True]
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _context.get()
+        record.job_id = fields.get('job_id')
+        record.worker_id = fields.get('worker_id') or f"{_HOSTNAME}:{os.getpid()}"
+        record.job_log = fields.get('job_log')
+        record.context = {key: value for key, value in fields.items()
+                          if key not in ('job_id', 'worker_id', 'job_log')}
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """
+    _QueueHandler 功能说明:
+    # 日志队列处理器：产生日志的线程只格式化消息并入队，不做磁盘I/O；
+    # 关闭时同时停止本进程启动的监听线程并关闭文件处理器，释放日志文件
+    # 输入: [log_queue: Queue 日志队列] | 输出: [_QueueHandler实例]
+    """
+
+    def __init__(self, log_queue: Any):
+        super().__init__(log_queue)
+        self.addFilter(_ContextFilter())
+
+    def close(self) -> None:
+        shutdown_logging()
+        super().close()
+
+
+class _JobLogHandler(logging.Handler):
+    """
+    _JobLogHandler 功能说明:
+    # 在监听线程中运行：记录带有任务日志路径(job_log)时追加写入该文件，其他记录忽略
+    # 输入: [record: LogRecord 日志记录] | 输出: [无，写入任务日志文件]
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_path = getattr(record, 'job_log', None)
+        if not log_path:
+            return
+        try:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
 
 def setup_logger(log_dir: str = "logs", log_level: str = "INFO") -> logging.Logger:
     """
     setup_logger 功能说明:
-    # 配置和初始化日志记录器
+    # 配置和初始化日志记录器：日志记录放入队列，由单个监听线程以JSON行写入日志文件、以文本输出到控制台；
+    # 同一进程对同一目录重复调用时只更新日志级别，沿用已有的日志文件；在fork出的工作进程中调用时沿用主进程的日志队列
     # 输入: [log_dir: str 日志目录, log_level: str 日志级别] | 输出: [Logger 日志记录器实例]
     """
-    global _logger
+    global _queue, _listener, _owner_pid, _log_dir
+    
+    level = getattr(logging, log_level.upper())
+    
+    # 工作进程不启动自己的监听线程，日志交给主进程写入
+    if _queue is not None and _owner_pid is not None and _owner_pid != os.getpid():
+        logger = init_worker_logging(_queue)
+        logger.setLevel(level)
+        return logger
+    
+    if _listener is not None and _log_dir == os.path.abspath(log_dir):
+        _logger.setLevel(level)
+        _listener.handlers[0].setLevel(level)
+        return _logger
+    
+    shutdown_logging()
     
     # 创建日志目录
     os.makedirs(log_dir, exist_ok=True)
@@ -60,36 +203,35 @@ def setup_logger(log_dir: str = "logs", log_level: str = "INFO") -> logging.Logg
     log_filename = f"watermark_remover_{timestamp}.log"
     log_filepath = os.path.join(log_dir, log_filename)
     
-    # 创建日志器
-    logger = logging.getLogger("watermark_remover")
-    logger.setLevel(getattr(logging, log_level.upper()))
-    
-    # 清除已有的处理器
-    logger.handlers.clear()
-    
-    # 创建文件处理器
+    # 创建文件处理器，每行一条JSON记录
     file_handler = logging.FileHandler(log_filepath, encoding='utf-8')
-    file_handler.setLevel(getattr(logging, log_level.upper()))
+    file_handler.setLevel(level)
+    file_handler.setFormatter(_JsonFormatter())
     
     # 创建控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter(_CONSOLE_FORMAT, datefmt=_CONSOLE_DATEFMT))
     
-    # 创建格式器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # 创建任务日志处理器
+    job_handler = _JobLogHandler()
+    job_handler.setFormatter(_JsonFormatter())
     
-    # 设置格式器
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    # 进程间共享的日志队列，重新初始化时沿用，已启动的工作进程仍能写入
+    if _queue is None:
+        _queue = multiprocessing.Queue()
     
-    # 添加处理器到日志器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    _listener = QueueListener(_queue, file_handler, console_handler, job_handler, respect_handler_level=True)
+    _listener.start()
+    # 退出清理在创建队列之后(重新)注册：atexit后注册的先执行，监听线程先写完队列，
+    # multiprocessing的退出清理再关闭队列管道，否则监听线程读到已关闭的管道报错
+    atexit.unregister(shutdown_logging)
+    atexit.register(shutdown_logging)
+    _owner_pid = os.getpid()
+    _log_dir = os.path.abspath(log_dir)
     
-    _logger = logger
+    logger = init_worker_logging(_queue)
+    logger.setLevel(level)
     
     # 记录日志系统启动信息
     logger.info(f"日志系统初始化完成 - 日志文件: {log_filepath}")
@@ -97,16 +239,78 @@ def setup_logger(log_dir: str = "logs", log_level: str = "INFO") -> logging.Logg
     return logger
 
 
+def init_worker_logging(log_queue: Any) -> logging.Logger:
+    """
+    init_worker_logging 功能说明:
+    # 工作进程初始化：日志器只保留一个写入log_queue的队列处理器，由主进程的监听线程统一写出；
+    # 可直接作为进程池initializer使用(spawn方式启动的进程不会继承主进程的日志配置)
+    # 输入: [log_queue: Queue get_log_queue返回的日志队列] | 输出: [Logger 日志记录器实例]
+    """
+    global _logger, _queue
+    
+    logger = logging.getLogger("watermark_remover")
+    if logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+    
+    # 清除已有的处理器
+    logger.handlers.clear()
+    logger.addHandler(_QueueHandler(log_queue))
+    
+    _queue = log_queue
+    _logger = logger
+    return logger
+
+
+def get_log_queue() -> Any:
+    """
+    get_log_queue 功能说明:
+    # 获取日志队列(未初始化时先以默认参数初始化)，作为initargs传给工作进程的init_worker_logging
+    # 输入: [无] | 输出: [Queue 日志队列]
+    """
+    _get_logger()
+    return _queue
+
+
+def shutdown_logging() -> None:
+    """
+    shutdown_logging 功能说明:
+    # 停止本进程启动的日志监听线程：写完队列中剩余的记录后关闭日志文件；程序退出时自动调用
+    # 输入: [无] | 输出: [无]
+    """
+    global _listener
+    
+    if _listener is None or _owner_pid != os.getpid():
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
 def _get_logger() -> logging.Logger:
     """
-    获取全局日志器实例，如果未初始化则自动初始化
+    获取全局日志器实例，如果未初始化或本进程的监听线程已停止则自动初始化
     """
     global _logger
-    if _logger is None:
+    if _logger is None or (_listener is None and _owner_pid == os.getpid()):
         _logger = setup_logger()
     return _logger
 
 
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    log_context 功能说明:
+    # with块内当前线程产生的日志记录附带给定字段(如job_id、worker_id)，可嵌套，内层同名字段覆盖外层
+    # 输入: [**fields: Any 上下文字段] | 输出: [Iterator[None]]
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
 def log_info(message: str) -> None:
     """
     log_info 功能说明:
@@ -149,24 +353,30 @@ def log_processing_start(filename: str, config: dict) -> None:
     logger.info(f"使用配置: {config}")
 
 
-def log_processing_end(filename: str, success: bool, duration: float, output_path: str = "") -> None:
+def log_processing_end(filename: str, success: bool, duration: float, output_path: str = "",
+                       stage_stats: Optional[dict] = None) -> None:
     """
     log_processing_end 功能说明:
-    # 记录视频处理结束的日志
-    # 输入: [filename: str 文件名, success: bool 是否成功, duration: float 处理时长, output_path: str 输出路径] | 输出: [无，记录到日志文件]
+    # 记录视频处理结束的日志，提供分阶段耗时统计时以JSON格式写入一行
+    # 输入: [filename: str 文件名, success: bool 是否成功, duration: float 处理时长, output_path: str 输出路径,
+    #        stage_stats: dict 分阶段耗时统计] | 输出: [无，记录到日志文件]
     """
     logger = _get_logger()
     status = "成功" if success else "失败"
     logger.info(f"处理完成: {filename} - 状态: {status} - 耗时: {duration:.2f}秒")
     if success and output_path:
         logger.info(f"输出文件: {output_path}")
+    if stage_stats:
+        logger.info(f"分阶段耗时: {json.dumps(stage_stats, ensure_ascii=False)}")
 
 
-def log_batch_summary(total: int, success: int, failed: int, total_time: float) -> None:
+def log_batch_summary(total: int, success: int, failed: int, total_time: float,
+                      worker_stats: Optional[dict] = None) -> None:
     """
     log_batch_summary 功能说明:
-    # 记录批量处理的汇总日志
-    # 输入: [total: int 总数, success: int 成功数, failed: int 失败数, total_time: float 总时间] | 输出: [无，记录到日志文件]
+    # 记录批量处理的汇总日志，多进程并行处理时逐进程记录处理文件数、数据量和吞吐
+    # 输入: [total: int 总数, success: int 成功数, failed: int 失败数, total_time: float 总时间,
+    #        worker_stats: dict 各工作进程统计] | 输出: [无，记录到日志文件]
     """
     logger = _get_logger()
     logger.info("=" * 50)
@@ -177,4 +387,25 @@ def log_batch_summary(total: int, success: int, failed: int, total_time: float)
     logger.info(f"成功率: {(success/total*100):.1f}%")
     logger.info(f"总耗时: {total_time:.2f}秒")
     logger.info(f"平均耗时: {(total_time/total):.2f}秒/文件")
-    logger.info("=" * 50)
\ No newline at end of file
+    if worker_stats:
+        logger.info(f"并行工作进程数: {len(worker_stats)}")
+        for worker, stats in sorted(worker_stats.items()):
+            logger.info(f"工作进程 {worker}: {json.dumps(stats, ensure_ascii=False)}")
+    logger.info("=" * 50)
+
+
+@contextmanager
+def job_log(log_path: str, job_id: Optional[str] = None) -> Iterator[logging.Logger]:
+    """
+    job_log 功能说明:
+    # with块内的日志同时由监听线程追加写入log_path(JSON行)，处理单个任务期间的日志同时写入该任务的日志文件；
+    # 提供job_id时记录附带该任务ID，否则沿用外层上下文的任务ID
+    # 输入: [log_path: str 任务日志文件路径, job_id: str 任务ID] | 输出: [Iterator[Logger] 日志记录器实例]
+    """
+    logger = _get_logger()
+    os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+    fields = {'job_log': os.path.abspath(log_path)}
+    if job_id is not None:
+        fields['job_id'] = job_id
+    with log_context(**fields):
+        yield logger
@@ -0,0 +1,134 @@
+##########mask_refresh.py: 场景切换感知的掩码刷新模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建镜头切换检测和按需刷新的掩码缓存]########
+# 输入: [视频帧序列] | 输出: [是否需要重新检测掩码，缓存的掩码，刷新统计]###############
+
+
+###########################文件下的所有函数###########################
+"""
+SceneChangeDetector：基于缩小亮度图差异的镜头切换检测器
+SceneChangeDetector.update：输入新帧，判断与上一帧之间是否发生镜头切换
+MaskRefreshCache：按镜头切换或固定间隔刷新的掩码缓存
+MaskRefreshCache.should_refresh：判断当前帧是否需要重新检测掩码
+MaskRefreshCache.update：保存新检测的掩码及其外接矩形
+MaskRefreshCache.get_stats：获取刷新次数统计
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[process_frame] --> B[MaskRefreshCache.should_refresh]
+    B --> C[SceneChangeDetector.update缩小亮度图差异]
+    C -->|首帧| D[需要刷新]
+    C -->|镜头切换| D
+    B -->|距上次刷新达到间隔| D
+    D --> E[create_mask重新检测]
+    E --> F[MaskRefreshCache.update]
+    B -->|否| G[复用缓存掩码]
+    A --> H[MaskRefreshCache.get_stats写入日志]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class SceneChangeDetector:
+    """
+    SceneChangeDetector 功能说明:
+    # 将每帧缩小到很小的亮度图(默认64x36)，与上一帧的平均绝对差超过阈值时判定为镜头切换
+    # 缩小后计算量与分辨率无关，静止的水印只占很少像素，不影响判断
+    # 输入: [threshold: float 平均绝对差阈值(灰度级), size: Tuple[int, int] 缩小尺寸(宽, 高)] | 输出: [SceneChangeDetector实例]
+    """
+
+    def __init__(self, threshold: float = 30.0, size: Tuple[int, int] = (64, 36)):
+        self.threshold = threshold
+        self.size = size
+        self._previous: Optional[np.ndarray] = None
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+        update 功能说明:
+        # 计算新帧的缩小亮度图并与上一帧比较，第一帧视为镜头切换
+        # 输入: [frame: np.ndarray 输入帧] | 输出: [bool 是否发生镜头切换]
+        """
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        luma = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        previous = self._previous
+        self._previous = luma
+        if previous is None:
+            return True
+
+        return cv2.norm(luma, previous, cv2.NORM_L1) / luma.size > self.threshold
+
+
+class MaskRefreshCache:
+    """
+    MaskRefreshCache 功能说明:
+    # 每个视频(或分段)一个实例，缓存最近一次检测的掩码，只在镜头切换或距上次刷新达到refresh_interval帧时重新检测
+    # 依赖帧顺序，只能在顺序处理中使用
+    # 输入: [scene_threshold: float 镜头切换阈值, refresh_interval: int 定时刷新间隔帧数(0表示只在镜头切换时刷新)] | 输出: [MaskRefreshCache实例]
+    """
+
+    def __init__(self, scene_threshold: float = 30.0, refresh_interval: int = 60):
+        self.detector = SceneChangeDetector(scene_threshold)
+        self.refresh_interval = max(0, refresh_interval)
+        self.mask: Optional[np.ndarray] = None
+        self.areas: List[Tuple[int, int, int, int]] = []
+        self.frames = 0
+        self.refreshes = 0
+        self.scene_cuts = 0
+        self.interval_refreshes = 0
+        self._since_refresh: Optional[int] = None
+
+    def should_refresh(self, frame: np.ndarray) -> bool:
+        """
+        should_refresh 功能说明:
+        # 判断当前帧是否需要重新检测掩码：首帧、镜头切换或距上次刷新达到间隔时返回True并计数
+        # 输入: [frame: np.ndarray 输入帧] | 输出: [bool 是否需要刷新]
+        """
+        self.frames += 1
+        scene_cut = self.detector.update(frame)
+
+        if self._since_refresh is None:
+            pass
+        elif scene_cut:
+            self.scene_cuts += 1
+        elif self.refresh_interval and self._since_refresh >= self.refresh_interval:
+            self.interval_refreshes += 1
+        else:
+            self._since_refresh += 1
+            return False
+
+        self.refreshes += 1
+        self._since_refresh = 1
+        return True
+
+    def update(self, mask: Optional[np.ndarray]) -> None:
+        """
+        update 功能说明:
+        # 保存新检测的掩码，并计算掩码外接矩形(掩码为空时没有需要修复的区域)
+        # 输入: [mask: np.ndarray 新掩码(由调用方保证不被覆盖)] | 输出: [无]
+        """
+        self.mask = mask
+        self.areas = []
+        if mask is not None and cv2.countNonZero(mask) > 0:
+            x, y, w, h = cv2.boundingRect(mask)
+            self.areas = [(x, y, x + w, y + h)]
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        get_stats 功能说明:
+        # 获取处理帧数、刷新次数(含镜头切换和定时刷新)和刷新率
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        return {
+            'frames': self.frames,
+            'refreshes': self.refreshes,
+            'scene_cuts': self.scene_cuts,
+            'interval_refreshes': self.interval_refreshes,
+            'refresh_rate': self.refreshes / self.frames if self.frames else 0.0
+        }
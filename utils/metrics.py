@@ -0,0 +1,480 @@
+##########metrics.py: 运行指标注册与导出模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建计数器、仪表、直方图指标注册表，导出Prometheus文本格式到文件或本地HTTP端点]########
+# 变更记录: [2026-10-18] @李祥光 [帧流水线不再按批提交，单帧耗时不再均摊]########
+# 变更记录: [2026-10-18] @李祥光 [新增帧级计数器快照和增量合并，帧进程池和分段工作进程的计数汇总回父进程]########
+# 输入: [处理过程中的帧数、跳过帧数、修复次数、耗时、队列深度] | 输出: [Prometheus文本格式指标]###############
+
+
+###########################文件下的所有函数###########################
+"""
+Counter：只增不减的计数器指标类
+Counter.inc：增加计数
+Gauge：可增可减的仪表指标类
+Gauge.set：设置当前值
+Histogram：按桶累计的直方图指标类
+Histogram.observe：记录一次观测值
+MetricsRegistry：指标注册表类
+MetricsRegistry.counter：注册或获取计数器
+MetricsRegistry.gauge：注册或获取仪表
+MetricsRegistry.histogram：注册或获取直方图
+MetricsRegistry.render：渲染为Prometheus文本格式
+MetricsRegistry.write：原子写入指标文件
+snapshot_counters：获取帧级计数器的当前值
+counter_deltas：计算帧级计数器相对快照的增量
+merge_counters：将工作进程返回的计数器增量计入本进程
+MetricsExporter：后台定期写入指标文件的线程类
+serve_metrics：启动只提供GET /metrics的本地HTTP服务
+export_metrics：处理期间导出指标到文件和/或本地端点的上下文
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[FramePipeline] --> B[FRAME_LATENCY.observe单帧耗时]
+    A --> C[PIPELINE_QUEUE_DEPTH.set待写队列深度]
+    D[StageTimer.record] --> E[STAGE_LATENCY.observe分阶段耗时]
+    F[WatermarkRemover] --> G[FRAMES_PROCESSED/FRAMES_SKIPPED/INPAINT_CALLS.inc]
+    O[帧进程池/分段工作进程] --> P[counter_deltas随结果返回]
+    P --> Q[父进程merge_counters]
+    Q --> G
+    H[JobManager/WatchFolderDaemon] --> I[JOB_QUEUE_DEPTH.set]
+    B --> J[REGISTRY]
+    C --> J
+    E --> J
+    G --> J
+    I --> J
+    J --> K[MetricsRegistry.render]
+    K --> L[MetricsExporter定期写入.prom文件]
+    K --> M[serve_metrics GET /metrics]
+    K --> N[job_server GET /metrics/prometheus]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认直方图桶上限(秒)，覆盖单帧亚毫秒到秒级的处理耗时
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_value(value: float) -> str:
+    """
+    _format_value 功能说明:
+    # 格式化样本值，整数不带小数点，无穷大写作+Inf
+    # 输入: [value: float 样本值] | 输出: [str 文本]
+    """
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    """
+    _format_labels 功能说明:
+    # 格式化标签集合为{name="value",...}，值中的反斜杠、双引号和换行按格式转义
+    # 输入: [labels: Sequence[Tuple[str, str]] 标签名和值] | 输出: [str 标签文本，无标签时为空]
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    """
+    _Metric 功能说明:
+    # 指标基类：按标签值元组保存样本，所有更新在锁内进行，可被多个处理线程同时更新
+    # 输入: [name: str 指标名, documentation: str 说明, labelnames: Sequence[str] 标签名] | 输出: [_Metric实例]
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._values[()] = self._initial()
+
+    def _initial(self) -> object:
+        return 0.0
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        """
+        _key 功能说明:
+        # 校验标签名与注册时一致，返回标签值元组
+        # 输入: [labels: Dict 标签名到值] | 输出: [Tuple[str, ...] 标签值]
+        """
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}: {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        """
+        value 功能说明:
+        # 获取当前值(直方图为观测次数)，未出现过的标签组合为0
+        # 输入: [labels: 标签值] | 输出: [float 当前值]
+        """
+        with self._lock:
+            return float(self._values.get(self._key(labels), 0.0))
+
+    def _samples(self) -> List[Tuple[str, List[Tuple[str, str]], float]]:
+        """
+        _samples 功能说明:
+        # 生成渲染用的样本(名称后缀、标签、值)
+        # 输入: [无] | 输出: [List 样本]
+        """
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", list(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Counter(_Metric):
+    """
+    Counter 功能说明:
+    # 只增不减的计数器，如已处理帧数、修复调用次数
+    """
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        inc 功能说明:
+        # 增加计数，amount不能为负
+        # 输入: [amount: float 增量, labels: 标签值] | 输出: [无]
+        """
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Gauge 功能说明:
+    # 可增可减的仪表，如队列深度、处理中的视频数
+    """
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        set 功能说明:
+        # 设置当前值
+        # 输入: [value: float 当前值, labels: 标签值] | 输出: [无]
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        inc 功能说明:
+        # 增加当前值，amount为负时减少
+        # 输入: [amount: float 增量, labels: 标签值] | 输出: [无]
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    Histogram 功能说明:
+    # 按桶累计的直方图：每个标签组合保存各桶计数、观测值总和与次数，渲染时输出累计的_bucket、_sum和_count；
+    # 只保存计数，内存占用与观测次数无关
+    # 输入: [name: str 指标名, documentation: str 说明, labelnames: Sequence[str] 标签名,
+    #        buckets: Sequence[float] 桶上限(升序)] | 输出: [Histogram实例]
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if bound != float('inf')))
+        super().__init__(name, documentation, labelnames)
+
+    def _initial(self) -> List[float]:
+        # 各桶计数(最后一个为+Inf桶)、总和、次数
+        return [0] * (len(self.buckets) + 1) + [0.0, 0]
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        observe 功能说明:
+        # 记录一次观测值，计入第一个上限不小于该值的桶
+        # 输入: [value: float 观测值, labels: 标签值] | 输出: [无]
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._initial()
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return float(state[-1]) if state else 0.0
+
+    def sum(self, **labels) -> float:
+        """
+        sum 功能说明:
+        # 获取观测值总和
+        # 输入: [labels: 标签值] | 输出: [float 总和]
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return float(state[-2]) if state else 0.0
+
+    def _samples(self) -> List[Tuple[str, List[Tuple[str, str]], float]]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        samples = []
+        for key, state in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                samples.append(("_bucket", labels + [("le", _format_value(bound))], cumulative))
+            samples.append(("_sum", labels, state[-2]))
+            samples.append(("_count", labels, state[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry 功能说明:
+    # 指标注册表：同名指标只注册一次(重复注册返回已有指标，类型或标签不一致时报错)；
+    # const_labels附加到渲染出的每个样本，多个进程各自导出时用于区分来源
+    # 输入: [无] | 输出: [MetricsRegistry实例]
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.const_labels: Dict[str, str] = {}
+
+    def _register(self, metric_type: type, name: str, documentation: str, labelnames: Sequence[str],
+                  **kwargs) -> _Metric:
+        """
+        _register 功能说明:
+        # 注册指标，已存在时校验类型和标签后返回已有指标
+        # 输入: [metric_type: type 指标类, name: str 指标名, documentation: str 说明, labelnames: 标签名] | 输出: [_Metric 指标]
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_type(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not metric_type or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已按不同类型或标签注册")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        render 功能说明:
+        # 渲染全部指标为Prometheus文本格式(# HELP、# TYPE和样本行)，按指标名排序
+        # 输入: [无] | 输出: [str 指标文本]
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        const = sorted(self.const_labels.items())
+        lines = []
+        for metric in metrics:
+            documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, labels, value in metric._samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(const + labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        write 功能说明:
+        # 先写本进程的临时文件再替换，采集程序(如node_exporter的textfile采集)不会读到写了一半的文件
+        # 输入: [path: str 指标文件路径] | 输出: [无]
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+# 进程内共享的默认注册表和处理指标
+REGISTRY = MetricsRegistry()
+
+FRAMES_PROCESSED = REGISTRY.counter('watermark_frames_processed_total', '已处理并写出的帧数')
+FRAMES_SKIPPED = REGISTRY.counter('watermark_frames_skipped_total', '掩码面积检查判定无水印、跳过修复的整帧数')
+AREAS_SKIPPED = REGISTRY.counter('watermark_areas_skipped_total', '掩码面积检查判定无水印、跳过修复的指定区域数')
+INPAINT_CALLS = REGISTRY.counter('watermark_inpaint_calls_total', '图像修复调用次数')
+VIDEOS_PROCESSED = REGISTRY.counter('watermark_videos_processed_total', '处理结束的视频数', ('status',))
+VIDEOS_IN_PROGRESS = REGISTRY.gauge('watermark_videos_in_progress', '正在处理的视频数')
+FRAME_LATENCY = REGISTRY.histogram('watermark_frame_latency_seconds', '单帧从提交处理到处理完成的耗时')
+STAGE_LATENCY = REGISTRY.histogram('watermark_stage_latency_seconds', '各处理阶段单次耗时', ('stage',))
+PIPELINE_QUEUE_DEPTH = REGISTRY.gauge('watermark_pipeline_queue_depth', '帧流水线中已提交、等待按顺序写出的任务数')
+JOB_QUEUE_DEPTH = REGISTRY.gauge('watermark_jobs', '任务服务和监视文件夹中各状态的任务数', ('state',))
+
+# 帧处理过程中累加、在工作进程内需要随结果汇总回父进程的计数器
+WORKER_COUNTERS = (FRAMES_SKIPPED, AREAS_SKIPPED, INPAINT_CALLS)
+
+
+def snapshot_counters() -> Dict[str, float]:
+    """
+    snapshot_counters 功能说明:
+    # 获取帧级计数器的当前值，工作进程在处理前记录，处理后据此计算增量
+    # 输入: [无] | 输出: [Dict 指标名到当前值]
+    """
+    return {metric.name: metric.value() for metric in WORKER_COUNTERS}
+
+
+def counter_deltas(before: Dict[str, float]) -> Dict[str, float]:
+    """
+    counter_deltas 功能说明:
+    # 计算帧级计数器相对快照的增量，只包含有变化的指标
+    # 输入: [before: Dict snapshot_counters的快照] | 输出: [Dict 指标名到增量]
+    """
+    return {name: value - before[name] for name, value in snapshot_counters().items() if value != before[name]}
+
+
+def merge_counters(deltas: Dict[str, float]) -> None:
+    """
+    merge_counters 功能说明:
+    # 将工作进程返回的计数器增量计入本进程的计数器，与StageTimer.merge合并分阶段耗时的方式一致
+    # 输入: [deltas: Dict counter_deltas返回的增量] | 输出: [无]
+    """
+    for metric in WORKER_COUNTERS:
+        if deltas.get(metric.name):
+            metric.inc(deltas[metric.name])
+
+
+class MetricsExporter:
+    """
+    MetricsExporter 功能说明:
+    # 后台线程每隔interval秒把注册表写入指标文件，停止时再写一次，文件始终是最新的完整快照
+    # 输入: [path: str 指标文件路径, interval: float 写入间隔(秒), registry: MetricsRegistry 注册表] | 输出: [MetricsExporter实例]
+    """
+
+    def __init__(self, path: str, interval: float = 5.0, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = max(0.1, interval)
+        self.registry = registry
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'MetricsExporter':
+        """
+        start 功能说明:
+        # 启动写入线程(守护线程，不阻止进程退出)
+        # 输入: [无] | 输出: [MetricsExporter 自身]
+        """
+        def export_loop():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.registry.write(self.path)
+                except OSError:
+                    pass
+
+        self.registry.write(self.path)
+        self._thread = threading.Thread(target=export_loop, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        stop 功能说明:
+        # 停止写入线程并写入最终快照
+        # 输入: [无] | 输出: [无]
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.registry.write(self.path)
+
+    def __enter__(self) -> 'MetricsExporter':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def serve_metrics(host: str = "127.0.0.1", port: int = 9464,
+                  registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    serve_metrics 功能说明:
+    # 在后台线程启动只提供GET /metrics的HTTP服务，供Prometheus抓取；port为0时由系统分配端口
+    # 输入: [host: str 监听地址, port: int 端口, registry: MetricsRegistry 注册表] | 输出: [ThreadingHTTPServer 服务(调用shutdown停止)]
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+@contextmanager
+def export_metrics(path: Optional[str] = None, port: int = 0, interval: float = 5.0,
+                   host: str = "127.0.0.1") -> Iterator[None]:
+    """
+    export_metrics 功能说明:
+    # with块期间导出默认注册表：指定path时定期写入指标文件，port大于0时提供本地/metrics端点；都未指定时不做任何事
+    # 输入: [path: str 指标文件路径, port: int 端点端口, interval: float 文件写入间隔(秒), host: str 端点监听地址] | 输出: [上下文管理器]
+    """
+    exporter = MetricsExporter(path, interval).start() if path else None
+    server = serve_metrics(host, port) if port > 0 else None
+    try:
+        yield
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if exporter is not None:
+            exporter.stop()
@@ -0,0 +1,133 @@
+##########region_cache.py: 未变化区域修复结果缓存模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按区域复用修复结果的缓存]########
+# 变更记录: [2026-10-18] @李祥光 [缓存条目可记录参考区域在帧内的坐标，整帧模式按掩码外接矩形查找]########
+# 变更记录: [2026-10-18] @李祥光 [缓存条目保存修复结果对应的掩码，命中时只贴回掩码内的像素]########
+# 输入: [区域键，当前帧区域像素，修复结果] | 输出: [可复用的修复结果，命中统计]###############
+
+
+###########################文件下的所有函数###########################
+"""
+RegionCache：未变化区域修复结果缓存类
+RegionCache.lookup：查找与参考区域一致时可复用的修复结果
+RegionCache.store：保存区域的参考像素和修复结果
+RegionCache.get_box：获取区域键上次保存的参考区域坐标
+RegionCache.get_mask：获取区域键上次保存的修复结果掩码
+RegionCache.get_stats：获取命中和未命中统计
+RegionCache._digest：计算区域像素的哈希摘要
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[remove_watermark_frame] --> B[RegionCache.lookup]
+    B -->|tolerance为0| C[_digest哈希比较]
+    B -->|tolerance大于0| D[平均绝对差比较]
+    C -->|命中| E[返回缓存修复结果]
+    D -->|命中| E
+    C -->|未命中| F[执行检测和修复]
+    D -->|未命中| F
+    F --> G[RegionCache.store]
+    A --> H[RegionCache.get_stats写入日志]
+    I[process_frame整帧模式] --> J[RegionCache.get_box上次掩码外接矩形]
+    J --> B
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class RegionCache:
+    """
+    RegionCache 功能说明:
+    # 每个视频一个实例，按区域键保存上一次实际修复时的扩展区域像素和修复结果
+    # 当前帧区域与参考区域完全一致(tolerance为0，哈希比较)或平均绝对差不超过tolerance时复用修复结果
+    # 与参考区域而不是上一帧比较，避免缓慢变化在多帧间累积
+    # 输入: [tolerance: float 平均绝对差容差(灰度级)，0表示精确匹配] | 输出: [RegionCache实例]
+    """
+
+    def __init__(self, tolerance: float = 0.0):
+        self.tolerance = max(0.0, tolerance)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Any, tuple] = {}
+
+    def lookup(self, key: Any, region: np.ndarray) -> Optional[np.ndarray]:
+        """
+        lookup 功能说明:
+        # 查找区域键对应的缓存，区域像素与参考像素匹配时返回缓存的修复结果
+        # 输入: [key: Any 区域键, region: np.ndarray 当前帧扩展区域像素] | 输出: [Optional[np.ndarray] 可复用的修复结果]
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            reference, patch = entry[:2]
+            if self.tolerance == 0:
+                matched = reference == self._digest(region)
+            else:
+                matched = (reference.shape == region.shape and
+                           cv2.norm(region, reference, cv2.NORM_L1) / region.size <= self.tolerance)
+
+            if matched:
+                self.hits += 1
+                return patch
+
+        self.misses += 1
+        return None
+
+    def store(self, key: Any, region: np.ndarray, patch: np.ndarray, box: Optional[tuple] = None,
+              mask: Optional[np.ndarray] = None) -> None:
+        """
+        store 功能说明:
+        # 保存区域的参考像素(精确模式只保存哈希摘要)、修复结果、参考区域在帧内的坐标和修复结果对应的掩码
+        # 输入: [key: Any 区域键, region: np.ndarray 扩展区域像素, patch: np.ndarray 修复结果,
+        #        box: tuple 参考区域坐标(x1, y1, x2, y2), mask: np.ndarray 修复结果中被修复的像素(非0)] | 输出: [无]
+        """
+        reference = self._digest(region) if self.tolerance == 0 else region.copy()
+        self._entries[key] = (reference, patch.copy(), box, None if mask is None else mask.copy())
+
+    def get_box(self, key: Any) -> Optional[tuple]:
+        """
+        get_box 功能说明:
+        # 获取区域键上次保存的参考区域坐标，调用方按该坐标裁剪当前帧再查找
+        # 输入: [key: Any 区域键] | 输出: [Optional[tuple] 参考区域坐标(x1, y1, x2, y2)]
+        """
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else None
+
+    def get_mask(self, key: Any) -> Optional[np.ndarray]:
+        """
+        get_mask 功能说明:
+        # 获取区域键上次保存的修复结果掩码，命中时调用方只贴回掩码内的像素；未修复(未检测到水印)时为None
+        # 输入: [key: Any 区域键] | 输出: [Optional[np.ndarray] 修复结果掩码]
+        """
+        entry = self._entries.get(key)
+        return entry[3] if entry is not None else None
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        get_stats 功能说明:
+        # 获取命中、未命中次数和命中率
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    @staticmethod
+    def _digest(region: np.ndarray) -> bytes:
+        """
+        _digest 功能说明:
+        # 计算区域像素的哈希摘要，包含形状信息
+        # 输入: [region: np.ndarray 区域像素] | 输出: [bytes 摘要]
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(region.shape).encode())
+        hasher.update(np.ascontiguousarray(region).data)
+        return hasher.digest()
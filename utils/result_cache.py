@@ -0,0 +1,288 @@
+##########result_cache.py: 内容寻址的处理结果缓存模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按输入内容指纹和处理参数索引的结果缓存]########
+# 变更记录: [2026-10-18] @李祥光 [新增判断输出是否为缓存条目硬链接]########
+# 变更记录: [2026-10-18] @李祥光 [缓存总大小上限，超出时按最近使用时间淘汰，新增清空缓存]########
+# 输入: [输入视频，处理参数，输出视频] | 输出: [缓存命中时的已有输出，硬链接或复制到目标路径]###############
+
+
+###########################文件下的所有函数###########################
+"""
+compute_content_fingerprint：按文件大小和抽样数据块计算快速内容指纹
+ResultCache：内容寻址的处理结果缓存类
+ResultCache.make_key：由内容指纹和处理参数计算缓存键
+ResultCache._entry_path：获取缓存条目元数据文件路径
+ResultCache.lookup：查找缓存键对应的输出文件
+ResultCache.store：将处理完成的输出加入缓存
+ResultCache.materialize：将缓存的输出硬链接(或复制)到目标路径
+ResultCache.is_cached_output：判断输出文件是否为缓存条目的硬链接
+ResultCache._entries：列出缓存条目及其大小和最近使用时间
+ResultCache._remove：删除一个缓存条目
+ResultCache.prune：超出大小上限时按最近使用时间淘汰条目
+ResultCache.purge：删除全部缓存条目
+link_or_copy：优先硬链接，跨文件系统等情况下回退到复制
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[process_video_enhanced] --> B[ResultCache.make_key]
+    B --> C[compute_content_fingerprint大小+抽样块哈希]
+    B --> D[处理参数JSON]
+    A --> E[ResultCache.lookup]
+    E -->|命中| F[ResultCache.materialize]
+    F --> G[link_or_copy]
+    E -->|未命中| J[ResultCache.is_cached_output]
+    J -->|缓存硬链接| H[remove_video_watermark]
+    H --> I[ResultCache.store]
+    I --> G
+    I --> K[ResultCache.prune超出上限时淘汰最久未使用的条目]
+    E -->|命中| L[更新最近使用时间]
+    M[--purge-result-cache] --> N[ResultCache.purge]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# 抽样数据块大小和数量，文件不大于 块大小×块数 时读取整个文件
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+FINGERPRINT_BLOCKS = 16
+
+# 缓存条目元数据文件名(缓存目录中还有元数据探测缓存、耗时样本等其他文件)
+_ENTRY_PATTERN = re.compile(r'^[0-9a-f]{64}\.json$')
+
+
+def compute_content_fingerprint(file_path: str, block_size: int = FINGERPRINT_BLOCK_SIZE,
+                                blocks: int = FINGERPRINT_BLOCKS) -> str:
+    """
+    compute_content_fingerprint 功能说明:
+    # 由文件大小和均匀分布(含首尾)的blocks个数据块计算指纹，与文件名、修改时间无关，
+    # 大文件只读取 块大小×块数 字节；未被抽样的区域内的改动不会改变指纹
+    # 输入: [file_path: str 文件路径, block_size: int 数据块大小, blocks: int 数据块数] | 输出: [str 内容指纹]
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode('ascii'))
+
+    with open(file_path, 'rb') as f:
+        if size <= block_size * blocks:
+            digest.update(f.read())
+        else:
+            step = (size - block_size) / (blocks - 1)
+            for i in range(blocks):
+                f.seek(int(i * step))
+                digest.update(f.read(block_size))
+
+    return digest.hexdigest()
+
+
+def link_or_copy(source_path: str, target_path: str) -> str:
+    """
+    link_or_copy 功能说明:
+    # 先删除已存在的目标文件(避免写穿共享的硬链接)，再创建硬链接，不支持时回退到复制
+    # 输入: [source_path: str 源文件路径, target_path: str 目标路径] | 输出: [str link或copy]
+    """
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+    os.makedirs(target_dir, exist_ok=True)
+    if os.path.lexists(target_path):
+        os.remove(target_path)
+
+    try:
+        os.link(source_path, target_path)
+        return 'link'
+    except OSError:
+        shutil.copy2(source_path, target_path)
+        return 'copy'
+
+
+class ResultCache:
+    """
+    ResultCache 功能说明:
+    # 缓存目录下每个条目为 <键>.json 元数据和 <键><扩展名> 输出文件，条目单独写入，多个进程可同时使用；
+    # 键由输入内容指纹和影响输出的处理参数计算，同一内容以不同文件名出现时也能命中；
+    # 设置max_bytes时加入条目后总大小(按文件大小计，硬链接和复制相同)超出上限即淘汰最久未使用的条目
+    # 输入: [cache_dir: str 缓存目录, max_bytes: int 缓存总大小上限(字节，0为不限制)] | 输出: [ResultCache实例]
+    """
+
+    def __init__(self, cache_dir: str = "cache", max_bytes: int = 0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+
+    def make_key(self, input_path: str, settings: Dict[str, Any]) -> str:
+        """
+        make_key 功能说明:
+        # 由输入内容指纹和处理参数计算缓存键
+        # 输入: [input_path: str 输入视频路径, settings: Dict 影响输出的处理参数] | 输出: [str 缓存键]
+        """
+        payload = json.dumps({
+            'content': compute_content_fingerprint(input_path),
+            'settings': settings
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        """
+        _entry_path 功能说明:
+        # 获取缓存条目元数据文件路径
+        # 输入: [key: str 缓存键] | 输出: [str 元数据文件路径]
+        """
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        lookup 功能说明:
+        # 查找缓存键对应的输出文件，元数据缺失、损坏或输出文件大小不一致时视为未命中；命中时更新最近使用时间
+        # 输入: [key: str 缓存键] | 输出: [Optional[str] 缓存的输出文件路径]
+        """
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        cached_path = os.path.join(self.cache_dir, entry.get('file', ''))
+        if not os.path.isfile(cached_path) or os.path.getsize(cached_path) != entry.get('size'):
+            return None
+        try:
+            os.utime(self._entry_path(key))
+        except OSError:
+            pass
+        return cached_path
+
+    def store(self, key: str, output_path: str, input_path: str = "") -> str:
+        """
+        store 功能说明:
+        # 将处理完成的输出硬链接(或复制)到缓存目录，并原子写入元数据；设置了大小上限时随后淘汰超出的条目
+        # 输入: [key: str 缓存键, output_path: str 输出视频路径, input_path: str 输入视频路径(仅记录)] | 输出: [str 缓存的输出文件路径]
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        file_name = key + os.path.splitext(output_path)[1]
+        cached_path = os.path.join(self.cache_dir, file_name)
+        link_or_copy(output_path, cached_path)
+
+        entry = {
+            'file': file_name,
+            'size': os.path.getsize(cached_path),
+            'input_name': os.path.basename(input_path),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        temp_path = self._entry_path(key) + f".{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self._entry_path(key))
+        if self.max_bytes:
+            self.prune()
+        return cached_path
+
+    def materialize(self, cached_path: str, output_path: str) -> str:
+        """
+        materialize 功能说明:
+        # 将缓存的输出放到目标路径，目标已是同一文件时不做处理
+        # 输入: [cached_path: str 缓存的输出文件路径, output_path: str 目标路径] | 输出: [str link、copy或existing]
+        """
+        if os.path.exists(output_path) and os.path.samefile(cached_path, output_path):
+            return 'existing'
+        return link_or_copy(cached_path, output_path)
+
+    def is_cached_output(self, output_path: str) -> bool:
+        """
+        is_cached_output 功能说明:
+        # 判断输出文件是否为某个缓存条目的硬链接(由缓存写入或命中时链接得到)，用户自己的同名文件返回False
+        # 输入: [output_path: str 输出文件路径] | 输出: [bool 是否为缓存条目的硬链接]
+        """
+        try:
+            output_stat = os.stat(output_path)
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return False
+        if output_stat.st_nlink < 2:
+            return False
+
+        for name in names:
+            if name.endswith(('.json', '.tmp')):
+                continue
+            try:
+                cached_stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            if (cached_stat.st_ino, cached_stat.st_dev) == (output_stat.st_ino, output_stat.st_dev):
+                return True
+        return False
+
+    def _entries(self) -> List[Tuple[float, int, str, str]]:
+        """
+        _entries 功能说明:
+        # 列出缓存条目，最近使用时间为元数据文件的修改时间(写入和命中时更新)，损坏的元数据按0字节、最早使用处理
+        # 输入: [无] | 输出: [List[Tuple] (最近使用时间, 大小, 缓存键, 输出文件名)，按最近使用时间从早到晚]
+        """
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+
+        entries = []
+        for name in names:
+            if not _ENTRY_PATTERN.match(name):
+                continue
+            entry_path = os.path.join(self.cache_dir, name)
+            try:
+                last_used = os.path.getmtime(entry_path)
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except OSError:
+                continue
+            except ValueError:
+                last_used, entry = 0.0, {}
+            entries.append((last_used, int(entry.get('size', 0)), name[:-len('.json')], entry.get('file', '')))
+        entries.sort()
+        return entries
+
+    def _remove(self, key: str, file_name: str) -> None:
+        """
+        _remove 功能说明:
+        # 删除一个缓存条目的元数据和输出文件；已链接到输出目录的文件不受影响
+        # 输入: [key: str 缓存键, file_name: str 输出文件名] | 输出: [无]
+        """
+        paths = [self._entry_path(key)]
+        if file_name:
+            paths.append(os.path.join(self.cache_dir, file_name))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prune(self, max_bytes: Optional[int] = None) -> Tuple[int, int]:
+        """
+        prune 功能说明:
+        # 缓存总大小超出上限时按最近使用时间从早到晚删除条目，直到不超过上限
+        # 输入: [max_bytes: int 大小上限(默认使用实例的上限)] | 输出: [Tuple[int, int] 删除的条目数和字节数]
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(size for _, size, _, _ in entries)
+        removed = freed = 0
+        for _, size, key, file_name in entries:
+            if total <= limit:
+                break
+            self._remove(key, file_name)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def purge(self) -> Tuple[int, int]:
+        """
+        purge 功能说明:
+        # 删除全部缓存条目，缓存目录中的其他文件(元数据探测缓存、耗时样本等)保留
+        # 输入: [无] | 输出: [Tuple[int, int] 删除的条目数和字节数]
+        """
+        entries = self._entries()
+        for _, _, key, file_name in entries:
+            self._remove(key, file_name)
+        return len(entries), sum(size for _, size, _, _ in entries)
@@ -0,0 +1,292 @@
+##########seek_index.py: 视频关键帧定位索引模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建按帧号记录时间戳和关键帧位置的持久化定位索引]########
+# 输入: [视频路径，缓存目录，目标帧号] | 输出: [定位索引，定位到目标帧的读取结果]###############
+
+
+###########################文件下的所有函数###########################
+"""
+get_index_path：获取视频对应的索引文件路径
+SeekIndex：视频帧号→时间戳和关键帧位置的定位索引类
+SeekIndex.build：扫描视频建立索引
+SeekIndex._scan_keyframes：以原始数据包模式扫描关键帧位置(不解码)
+SeekIndex.save：保存为压缩二进制索引文件
+SeekIndex.load：加载索引文件，视频大小或修改时间变化时返回None
+SeekIndex.load_or_build：加载缓存的索引，不存在或已失效时重新建立并保存
+SeekIndex.keyframe_before：获取不晚于指定帧的最近关键帧
+SeekIndex.frame_at_time：按解码器报告的时间戳获取帧号
+SeekIndex.read：定位并读取指定帧，只从最近关键帧向后解码需要的帧
+seek_reader：创建从指定帧开始顺序读取的帧读取函数
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[SeekIndex.load_or_build] --> B[get_index_path]
+    B --> C[SeekIndex.load]
+    C -->|大小和修改时间一致| D[返回缓存索引]
+    C -->|不存在或已失效| E[SeekIndex.build]
+    E --> F[逐帧grab记录时间戳]
+    E --> G[_scan_keyframes原始数据包关键帧标记]
+    E --> H[SeekIndex.save]
+    I[seek_reader] --> J[SeekIndex.read]
+    J --> K[keyframe_before]
+    K -->|当前位置在关键帧和目标之间| L[直接向后解码]
+    K -->|否则| M[定位到关键帧]
+    M --> L
+    L --> N[frame_at_time按时间戳校验帧号]
+    N -->|越过目标| O[退到更早的关键帧重试]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import os
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 索引格式版本和索引文件子目录
+INDEX_VERSION = 1
+INDEX_DIR_NAME = "seek_index"
+
+# 关键帧未知时，当前位置之后不超过该帧数的目标直接向后解码，不重新定位
+MAX_FORWARD_DECODE = 30
+
+# 定位后越过目标帧时退回重试的次数
+MAX_SEEK_RETRIES = 3
+
+
+def get_index_path(cache_dir: str, video_path: str) -> str:
+    """
+    get_index_path 功能说明:
+    # 按视频绝对路径的哈希生成索引文件路径：cache_dir/seek_index/<哈希前16位>.npz
+    # 输入: [cache_dir: str 缓存目录, video_path: str 视频路径] | 输出: [str 索引文件路径]
+    """
+    digest = hashlib.sha256(os.path.abspath(video_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, INDEX_DIR_NAME, f"{digest}.npz")
+
+
+class SeekIndex:
+    """
+    SeekIndex 功能说明:
+    # 记录每帧的显示时间戳(毫秒，与VideoCapture的CAP_PROP_POS_MSEC一致)和关键帧帧号
+    # cv2按帧号定位时用平均帧率换算时间戳，可变帧率视频会定位到错误的帧；索引按时间戳校验实际帧号，
+    # 并从不晚于目标的最近关键帧开始解码，当前位置已在关键帧和目标之间时直接向后解码，不重新定位
+    # 后端不支持原始数据包模式时关键帧未知，退化为按帧号定位后用时间戳校正
+    # 输入: [timestamps: np.ndarray 每帧时间戳(毫秒), keyframes: Optional[np.ndarray] 关键帧帧号(升序),
+    #        file_size: int 视频大小, mtime_ns: int 视频修改时间] | 输出: [SeekIndex实例]
+    """
+
+    def __init__(self, timestamps: np.ndarray, keyframes: Optional[np.ndarray], file_size: int, mtime_ns: int):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.keyframes = None if keyframes is None else np.asarray(keyframes, dtype=np.int64)
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.frame_count = len(self.timestamps)
+
+    @classmethod
+    def build(cls, video_path: str) -> Optional['SeekIndex']:
+        """
+        build 功能说明:
+        # 顺序grab全部帧记录时间戳(只解码不转换颜色)，再以原始数据包模式扫描关键帧位置
+        # 输入: [video_path: str 视频路径] | 输出: [Optional[SeekIndex] 定位索引，无法打开或无帧时为None]
+        """
+        stat = os.stat(video_path)
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                return None
+            timestamps = []
+            while cap.grab():
+                timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+        finally:
+            cap.release()
+
+        if not timestamps:
+            return None
+
+        # 时间戳不严格递增(容器不提供有效时间戳)时无法按时间戳校验帧号，不建立索引
+        timestamps = np.array(timestamps, dtype=np.float64)
+        if len(timestamps) > 1 and not np.all(np.diff(timestamps) > 0):
+            return None
+
+        keyframes = cls._scan_keyframes(video_path, len(timestamps))
+        return cls(timestamps, keyframes, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _scan_keyframes(video_path: str, frame_count: int) -> Optional[np.ndarray]:
+        """
+        _scan_keyframes 功能说明:
+        # 以FFmpeg原始数据包模式(CAP_PROP_FORMAT=-1)逐包grab，不解码，按CAP_PROP_LRF_HAS_KEY_FRAME记录关键帧；
+        # 封闭GOP中关键帧之前的数据包数等于之前的显示帧数，数据包序号即关键帧帧号
+        # 后端不支持时返回None
+        # 输入: [video_path: str 视频路径, frame_count: int 总帧数] | 输出: [Optional[np.ndarray] 关键帧帧号]
+        """
+        key_prop = getattr(cv2, 'CAP_PROP_LRF_HAS_KEY_FRAME', None)
+        if key_prop is None:
+            return None
+
+        try:
+            cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        except cv2.error:
+            return None
+        try:
+            if not cap.isOpened() or cap.get(cv2.CAP_PROP_FORMAT) != -1:
+                return None
+            keyframes = []
+            packet = 0
+            while packet < frame_count and cap.grab():
+                if cap.get(key_prop) > 0:
+                    keyframes.append(packet)
+                packet += 1
+        finally:
+            cap.release()
+
+        # 第一帧必须是关键帧，否则标记不可信
+        if not keyframes or keyframes[0] != 0:
+            return None
+        return np.array(keyframes, dtype=np.int64)
+
+    def save(self, index_path: str) -> None:
+        """
+        save 功能说明:
+        # 保存为压缩的.npz二进制文件，先写本进程的临时文件再替换，避免中断或多进程同时建立时留下损坏的索引
+        # 输入: [index_path: str 索引文件路径] | 输出: [无]
+        """
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = f"{index_path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            temp_path,
+            version=np.int64(INDEX_VERSION),
+            file_size=np.int64(self.file_size),
+            mtime_ns=np.int64(self.mtime_ns),
+            timestamps=self.timestamps,
+            keyframes=self.keyframes if self.keyframes is not None else np.array([-1], dtype=np.int64)
+        )
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path: str, video_path: str) -> Optional['SeekIndex']:
+        """
+        load 功能说明:
+        # 加载索引文件，格式版本、视频大小或修改时间不一致时视为失效
+        # 输入: [index_path: str 索引文件路径, video_path: str 视频路径] | 输出: [Optional[SeekIndex] 定位索引]
+        """
+        if not os.path.exists(index_path):
+            return None
+
+        stat = os.stat(video_path)
+        try:
+            with np.load(index_path) as data:
+                if (int(data['version']) != INDEX_VERSION or int(data['file_size']) != stat.st_size
+                        or int(data['mtime_ns']) != stat.st_mtime_ns):
+                    return None
+                keyframes = data['keyframes']
+                return cls(data['timestamps'], None if keyframes[0] < 0 else keyframes,
+                           stat.st_size, stat.st_mtime_ns)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def load_or_build(cls, video_path: str, cache_dir: str = "temp") -> Optional['SeekIndex']:
+        """
+        load_or_build 功能说明:
+        # 加载缓存的索引，不存在或已失效时扫描视频重新建立并保存
+        # 输入: [video_path: str 视频路径, cache_dir: str 缓存目录] | 输出: [Optional[SeekIndex] 定位索引]
+        """
+        index_path = get_index_path(cache_dir, video_path)
+        index = cls.load(index_path, video_path)
+        if index is None:
+            index = cls.build(video_path)
+            if index is not None:
+                index.save(index_path)
+        return index
+
+    def keyframe_before(self, frame: int) -> int:
+        """
+        keyframe_before 功能说明:
+        # 获取不晚于frame的最近关键帧帧号，关键帧未知时返回frame
+        # 输入: [frame: int 帧号] | 输出: [int 关键帧帧号]
+        """
+        if self.keyframes is None:
+            return frame
+        position = int(np.searchsorted(self.keyframes, frame, side='right')) - 1
+        return int(self.keyframes[max(0, position)])
+
+    def frame_at_time(self, msec: float) -> int:
+        """
+        frame_at_time 功能说明:
+        # 按时间戳获取帧号，取时间戳最接近的帧
+        # 输入: [msec: float 时间戳(毫秒)] | 输出: [int 帧号]
+        """
+        position = int(np.searchsorted(self.timestamps, msec))
+        if position >= self.frame_count:
+            return self.frame_count - 1
+        if position > 0 and msec - self.timestamps[position - 1] < self.timestamps[position] - msec:
+            return position - 1
+        return position
+
+    def read(self, cap: cv2.VideoCapture, frame: int,
+             position: Optional[int] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        read 功能说明:
+        # 读取第frame帧：position(下一次grab将得到的帧号)已在最近关键帧和目标之间时直接向后解码，
+        # 否则定位到最近关键帧再向后解码；每次grab后按时间戳校验实际帧号，越过目标时退到更早的关键帧重试
+        # 输入: [cap: cv2.VideoCapture 视频读取器, frame: int 目标帧号, position: int 读取器当前位置(未知为None)] |
+        #       输出: [Tuple[bool, np.ndarray] 是否成功(超出索引帧数时失败), 帧图像]
+        """
+        if not 0 <= frame < self.frame_count:
+            return False, None
+
+        target = frame
+        start = self.keyframe_before(target)
+        if self.keyframes is None:
+            forward = position is not None and 0 <= target - position <= MAX_FORWARD_DECODE
+        else:
+            forward = position is not None and start <= position <= target
+
+        if not forward:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        for _ in range(MAX_SEEK_RETRIES + 1):
+            actual = -1
+            while actual < target:
+                if not cap.grab():
+                    return False, None
+                actual = self.frame_at_time(cap.get(cv2.CAP_PROP_POS_MSEC))
+            if actual == target:
+                return cap.retrieve()
+
+            # 定位落在目标之后(可变帧率下按帧号换算的时间戳偏大)，退到更早的位置重试
+            start = self.keyframe_before(max(0, start - 1 - (actual - target)))
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        return False, None
+
+
+def seek_reader(cap: cv2.VideoCapture, start_frame: int, seek_index: Optional[SeekIndex] = None,
+                position: Optional[int] = 0) -> Callable[[], Tuple[bool, Optional[np.ndarray]]]:
+    """
+    seek_reader 功能说明:
+    # 创建从start_frame开始顺序读取的帧读取函数：读取器已在start_frame时不定位；有索引时在第一次读取时用索引定位
+    # 并读取第一帧，之后顺序读取；无索引时按帧号定位
+    # 输入: [cap: cv2.VideoCapture 视频读取器, start_frame: int 起始帧号, seek_index: SeekIndex 定位索引,
+    #        position: int 读取器当前位置(新打开为0，未知为None)] | 输出: [Callable 帧读取函数(返回(ret, frame))]
+    """
+    if position == start_frame:
+        return cap.read
+    if seek_index is None:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        return cap.read
+
+    seeked = [False]
+
+    def read_after_seek():
+        # 第一次读取时定位，定位耗时计入调用方的解码计时
+        if not seeked[0]:
+            seeked[0] = True
+            return seek_index.read(cap, start_frame, position)
+        return cap.read()
+
+    return read_after_seek
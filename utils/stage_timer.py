@@ -0,0 +1,175 @@
+##########stage_timer.py: 帧处理阶段计时模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建低开销的分阶段耗时统计]########
+# 变更记录: [2026-10-18] @李祥光 [阶段耗时同时计入运行指标的阶段耗时直方图]########
+# 输入: [阶段名称，阶段耗时] | 输出: [各阶段次数、总耗时、p50、p95、最大值统计]###############
+
+
+###########################文件下的所有函数###########################
+"""
+StageTimer：分阶段计时器
+StageTimer.stage：计时上下文，统计with块内的耗时
+StageTimer.wrap：包装函数，统计每次调用的耗时
+StageTimer.record：记录一次阶段耗时
+StageTimer.merge：合并其他计时器(如工作进程)的样本
+StageTimer.reset：清空所有样本
+StageTimer.get_stats：汇总各阶段统计信息
+StageTimer.format_summary：格式化统计信息为文本表格
+NullStageTimer：关闭计时时使用的空计时器
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[WatermarkRemover] --> B{是否开启阶段计时}
+    B -->|是| C[StageTimer]
+    B -->|否| D[NullStageTimer空操作]
+    C --> E[stage计时上下文]
+    C --> F[wrap包装解码和写出]
+    E --> G[record记录样本]
+    F --> G
+    C --> H[get_stats汇总]
+    H --> I[format_summary打印]
+    H --> J[log_processing_end写入JSON]
+    G --> K[STAGE_LATENCY直方图实时导出]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator
+
+import numpy as np
+
+from utils.metrics import STAGE_LATENCY
+
+
+class StageTimer:
+    """
+    StageTimer 功能说明:
+    # 分阶段计时器，每个阶段的耗时样本(秒)保存在紧凑的double数组中，汇总时计算次数、总耗时、p50、p95和最大值
+    # 样本追加依赖GIL保证原子性，可在线程池中共享；不含锁，可随WatermarkRemover序列化到工作进程
+    # 输入: [无] | 输出: [StageTimer实例]
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._samples: Dict[str, array] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        stage 功能说明:
+        # 计时上下文，统计with块内代码的耗时
+        # 输入: [name: str 阶段名称] | 输出: [上下文管理器]
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        wrap 功能说明:
+        # 包装函数，统计每次调用的耗时(用于解码、写出等外部调用)
+        # 输入: [name: str 阶段名称, func: Callable 被包装函数] | 输出: [Callable 包装后的函数]
+        """
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        return timed
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        record 功能说明:
+        # 记录一次阶段耗时，同时计入阶段耗时直方图供运行指标实时导出
+        # 输入: [name: str 阶段名称, seconds: float 耗时(秒)] | 输出: [无]
+        """
+        self._samples.setdefault(name, array('d')).append(seconds)
+        STAGE_LATENCY.observe(seconds, stage=name)
+
+    def merge(self, other: 'StageTimer') -> None:
+        """
+        merge 功能说明:
+        # 合并其他计时器的样本，用于汇总分段工作进程的计时；工作进程内的样本在合并时计入本进程的阶段耗时直方图
+        # 输入: [other: StageTimer 其他计时器] | 输出: [无]
+        """
+        for name, samples in other._samples.items():
+            self._samples.setdefault(name, array('d')).extend(samples)
+            for seconds in samples:
+                STAGE_LATENCY.observe(seconds, stage=name)
+
+    def reset(self) -> None:
+        """
+        reset 功能说明:
+        # 清空所有样本，每个视频开始处理前调用
+        # 输入: [无] | 输出: [无]
+        """
+        self._samples = {}
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        get_stats 功能说明:
+        # 汇总各阶段的次数、总耗时、p50、p95和最大值(毫秒)
+        # 输入: [无] | 输出: [Dict 阶段名称到统计信息的字典]
+        """
+        stats = {}
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+            values = np.frombuffer(samples, dtype=np.float64) * 1000
+            p50, p95 = np.percentile(values, [50, 95])
+            stats[name] = {
+                'count': len(values),
+                'total_ms': round(float(values.sum()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'max_ms': round(float(values.max()), 3)
+            }
+        return stats
+
+    def format_summary(self) -> str:
+        """
+        format_summary 功能说明:
+        # 将各阶段统计格式化为文本表格，按总耗时降序排列
+        # 输入: [无] | 输出: [str 文本表格]
+        """
+        stats = self.get_stats()
+        if not stats:
+            return ""
+
+        lines = [f"{'阶段':<12}{'次数':>8}{'总耗时(ms)':>14}{'p50(ms)':>10}{'p95(ms)':>10}{'最大(ms)':>10}"]
+        for name, item in sorted(stats.items(), key=lambda kv: kv[1]['total_ms'], reverse=True):
+            lines.append(f"{name:<12}{item['count']:>8}{item['total_ms']:>14.1f}"
+                         f"{item['p50_ms']:>10.3f}{item['p95_ms']:>10.3f}{item['max_ms']:>10.3f}")
+        return "\n".join(lines)
+
+
+class NullStageTimer(StageTimer):
+    """
+    NullStageTimer 功能说明:
+    # 关闭阶段计时时使用的空计时器：wrap直接返回原函数，stage返回共享的空上下文，不记录任何样本
+    # 输入: [无] | 输出: [NullStageTimer实例]
+    """
+
+    enabled = False
+    _null_context = nullcontext()
+
+    def stage(self, name: str):
+        return self._null_context
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        return func
+
+    def record(self, name: str, seconds: float) -> None:
+        pass
+
+    def merge(self, other: 'StageTimer') -> None:
+        pass
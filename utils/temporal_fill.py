@@ -0,0 +1,201 @@
+##########temporal_fill.py: 时域中值背景填充模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建基于相邻帧无水印样本中值的背景填充]########
+# 变更记录: [2026-10-18] @李祥光 [窗口样本和平移估计只保留掩码外接矩形加边距的区域，开销随水印区域而非画面大小增长]########
+# 输入: [区域裁剪块，水印掩码] | 输出: [从相邻帧恢复的填充结果，仍需图像修复的剩余掩码]###############
+
+
+###########################文件下的所有函数###########################
+"""
+TemporalFill：滑动窗口时域中值填充类
+TemporalFill.fill：用窗口内对齐后的无水印样本中值填充掩码像素，并将当前帧的填充区域加入窗口
+TemporalFill._region：确定区域键的填充区域(掩码外接矩形加边距)，掩码超出时扩大区域并清空窗口
+TemporalFill._estimate_shift：相位相关估计相邻两帧之间的平移
+TemporalFill._neutralize：将掩码像素替换为背景均值，避免静止水印主导平移估计
+TemporalFill.get_stats：获取时域填充和回退修复的像素统计
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[_inpaint_area / process_frame] --> B[TemporalFill.fill]
+    B --> R[_region掩码外接矩形加边距]
+    R -->|掩码超出区域| E
+    R --> C[_neutralize屏蔽水印像素]
+    C --> D[_estimate_shift相位相关估计平移]
+    D -->|相关性过低| E[清空窗口]
+    D --> F[累加各样本相对当前帧的偏移]
+    F --> G[按偏移取样本中无水印的像素]
+    G --> H[逐像素中值填充]
+    G -->|无干净样本| I[剩余掩码]
+    I --> J[inpaint_frame回退修复]
+    B --> K[当前帧填充区域加入窗口]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 平移估计时排除的水印邻域
+_NEIGHBORHOOD_KERNEL = np.ones((5, 5), dtype=np.uint8)
+
+
+class TemporalFill:
+    """
+    TemporalFill 功能说明:
+    # 每个视频(或分段)一个实例，按区域键保存最近window帧的裁剪块和掩码；
+    # 新帧到来时用相位相关估计与上一帧的平移并累加到各样本，固定机位偏移为0，缓慢平移时把样本对齐到当前帧，
+    # 掩码像素取对齐后所有未被水印覆盖的样本的中值，没有干净样本的像素留给cv2.inpaint
+    # 样本和平移估计只使用掩码外接矩形加margin边距的区域，整帧输入时内存和耗时也只随水印区域增长
+    # 依赖帧顺序，只能在顺序处理中使用
+    # 输入: [window: int 滑动窗口帧数, min_response: float 相位相关最低响应(低于时视为镜头切换并清空窗口),
+    #        margin: int 掩码外接矩形向外扩展的像素数(容纳平移和平移估计所需的背景)] | 输出: [TemporalFill实例]
+    """
+
+    def __init__(self, window: int = 15, min_response: float = 0.05, margin: int = 64):
+        self.window = max(1, window)
+        self.min_response = min_response
+        self.margin = max(0, margin)
+        self.filled_pixels = 0
+        self.fallback_pixels = 0
+        self._history: Dict[Any, Dict[str, Any]] = {}
+
+    def fill(self, key: Any, image: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        fill 功能说明:
+        # 用窗口内对齐后的无水印样本中值填充掩码像素，返回填充结果和仍需修复的剩余掩码(全部填充时为None)，
+        # 随后将当前帧填充区域的原始像素和掩码加入窗口；没有像素被填充时直接返回输入图像，不复制
+        # 输入: [key: Any 区域键, image: np.ndarray 裁剪块(或整帧), mask: np.ndarray 掩码(非0为水印)] | 输出: [Tuple 填充结果, 剩余掩码]
+        """
+        state = self._region(key, mask)
+        if state is None:
+            return image, None
+
+        x1, y1, x2, y2 = state['region']
+        crop = image[y1:y2, x1:x2]
+        crop_mask = mask[y1:y2, x1:x2]
+        gray = self._neutralize(crop, crop_mask)
+        if 'gray' in state:
+            # 相邻帧平移累加到每个样本：样本中与当前帧(x, y)对应的位置为(x + ox, y + oy)
+            shift = self._estimate_shift(state['gray'], gray, cv2.bitwise_or(state['mask'], crop_mask))
+            if shift is None:
+                state['samples'].clear()
+            else:
+                dx, dy = shift
+                for sample in state['samples']:
+                    sample[2] -= dx
+                    sample[3] -= dy
+        state['gray'] = gray
+        state['mask'] = crop_mask.copy()
+
+        ys, xs = np.nonzero(crop_mask)
+        result = image
+        remaining = None
+        samples: Deque[List[Any]] = state['samples']
+
+        if len(ys):
+            height, width = crop_mask.shape
+            values = np.full((len(samples), len(ys)) + image.shape[2:], np.nan, dtype=np.float32)
+            clean = np.zeros((len(samples), len(ys)), dtype=bool)
+            for i, (sample_image, sample_mask, ox, oy) in enumerate(samples):
+                sy = ys + oy
+                sx = xs + ox
+                inside = (sy >= 0) & (sy < height) & (sx >= 0) & (sx < width)
+                valid = inside.copy()
+                valid[inside] = sample_mask[sy[inside], sx[inside]] == 0
+                values[i, valid] = sample_image[sy[valid], sx[valid]]
+                clean[i] = valid
+
+            has_sample = clean.any(axis=0)
+            if has_sample.any():
+                median = np.nanmedian(values[:, has_sample], axis=0)
+                result = image.copy()
+                result[ys[has_sample] + y1, xs[has_sample] + x1] = np.round(median).astype(image.dtype)
+
+            self.filled_pixels += int(has_sample.sum())
+            missing = ~has_sample
+            if missing.any():
+                self.fallback_pixels += int(missing.sum())
+                remaining = np.zeros(mask.shape, dtype=np.uint8)
+                remaining[ys[missing] + y1, xs[missing] + x1] = 255
+
+        samples.append([crop.copy(), state['mask'], 0, 0])
+        return result, remaining
+
+    def _region(self, key: Any, mask: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        _region 功能说明:
+        # 取区域键的窗口状态：填充区域为掩码外接矩形向外扩展margin并限制在图像内；
+        # 输入尺寸变化或掩码超出已有区域时，以新旧区域的并集重建并清空窗口(样本坐标不再对应)
+        # 输入: [key: Any 区域键, mask: np.ndarray 掩码] | 输出: [Optional[Dict] 窗口状态，没有窗口且掩码为空时为None]
+        """
+        state = self._history.get(key)
+        if state is not None and state['shape'] != mask.shape:
+            state = None
+
+        x, y, w, h = cv2.boundingRect(mask)
+        if w == 0 or h == 0:
+            return state
+
+        if state is not None:
+            rx1, ry1, rx2, ry2 = state['region']
+            if rx1 <= x and ry1 <= y and x + w <= rx2 and y + h <= ry2:
+                return state
+            x1, y1, x2, y2 = min(x, rx1), min(y, ry1), max(x + w, rx2), max(y + h, ry2)
+        else:
+            x1, y1, x2, y2 = x, y, x + w, y + h
+
+        height, width = mask.shape[:2]
+        region = (max(0, x1 - self.margin), max(0, y1 - self.margin),
+                  min(width, x2 + self.margin), min(height, y2 + self.margin))
+        state = {'shape': mask.shape, 'region': region, 'samples': deque(maxlen=self.window)}
+        self._history[key] = state
+        return state
+
+    def _estimate_shift(self, previous: np.ndarray, current: np.ndarray,
+                        mask: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        _estimate_shift 功能说明:
+        # 相位相关估计当前帧相对上一帧的整像素平移(current(x) ≈ previous(x - d))，窗口在水印及其邻域内平滑降为0，
+        # 逐帧取整后再累加，避免亚像素误差在窗口内漂移；响应过低时返回None
+        # 输入: [previous: np.ndarray 上一帧灰度图, current: np.ndarray 当前帧灰度图,
+        #        mask: np.ndarray 两帧掩码的并集] | 输出: [Optional[Tuple[int, int]] (dx, dy)]
+        """
+        if previous.shape[0] < 2 or previous.shape[1] < 2:
+            return 0, 0
+        background = (cv2.dilate(mask, _NEIGHBORHOOD_KERNEL) == 0).astype(np.float32)
+        window = cv2.createHanningWindow(previous.shape[::-1], cv2.CV_32F) * cv2.GaussianBlur(background, (0, 0), 3)
+        (dx, dy), response = cv2.phaseCorrelate(previous, current, window)
+        if response < self.min_response:
+            return None
+        return int(round(dx)), int(round(dy))
+
+    @staticmethod
+    def _neutralize(image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        _neutralize 功能说明:
+        # 转为浮点灰度图并将水印像素替换为背景均值，静止的水印不会使平移估计偏向0
+        # 输入: [image: np.ndarray 裁剪块, mask: np.ndarray 掩码] | 输出: [np.ndarray float32灰度图]
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        gray = gray.astype(np.float32)
+        background = mask == 0
+        if background.any() and not background.all():
+            gray[~background] = gray[background].mean()
+        return gray
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        get_stats 功能说明:
+        # 获取时域填充像素数、回退图像修复像素数和时域填充比例
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        total = self.filled_pixels + self.fallback_pixels
+        return {
+            'filled_pixels': self.filled_pixels,
+            'fallback_pixels': self.fallback_pixels,
+            'fill_rate': self.filled_pixels / total if total else 0.0
+        }
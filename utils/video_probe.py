@@ -0,0 +1,218 @@
+##########video_probe.py: 视频元数据探测缓存模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建不解码的视频元数据探测和按路径、修改时间、大小索引的持久化缓存]########
+# 变更记录: [2026-10-18] @李祥光 [缓存条目按处理参数保存实测的水印掩码面积，批量列表不再为耗时预测解码帧]########
+# 输入: [视频文件路径列表，缓存目录] | 输出: [分辨率、帧率、帧数、时长、像素量等元数据]###############
+
+
+###########################文件下的所有函数###########################
+"""
+probe_video：读取容器元数据(不解码帧)获取分辨率、帧率、帧数和时长
+ProbeCache：按路径、修改时间和大小索引的元数据持久化缓存类
+ProbeCache._load：加载缓存文件
+ProbeCache._valid_entry：获取与文件大小和修改时间一致的缓存条目
+ProbeCache.get：获取单个视频的元数据，未缓存或已变化时重新探测
+ProbeCache.get_mask_pixels：获取按处理参数缓存的水印掩码面积
+ProbeCache.set_mask_pixels：按处理参数保存实测的水印掩码面积
+_settings_key：处理参数的短哈希
+ProbeCache.probe_many：批量获取元数据并保存缓存
+ProbeCache.save：原子写入缓存文件
+summarize_probes：汇总总帧数、总时长和像素量
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[get_video_files_with_info] --> B[ProbeCache.probe_many]
+    B --> C[ProbeCache.get]
+    C -->|路径、大小、修改时间一致| D[返回缓存的元数据]
+    C -->|未缓存或已变化| E[probe_video读取容器元数据]
+    E --> F[写入缓存条目]
+    B -->|有新条目| G[ProbeCache.save]
+    M[process_video_enhanced] --> N[ProbeCache.set_mask_pixels首帧掩码面积]
+    N --> G
+    P[process_video_folder_enhanced] --> Q[ProbeCache.get_mask_pixels耗时预测]
+    N --> K[_settings_key]
+    Q --> K
+    A --> H[summarize_probes汇总帧数和像素量]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import cv2
+
+# 缓存文件名和格式版本
+PROBE_CACHE_NAME = "probe_cache.json"
+PROBE_CACHE_VERSION = 1
+
+
+def probe_video(video_path: str) -> Optional[Dict[str, Any]]:
+    """
+    probe_video 功能说明:
+    # 打开视频只读取容器头部的元数据，不解码任何帧；帧数为容器记录值，时长按帧数和帧率计算
+    # 输入: [video_path: str 视频路径] | 输出: [Optional[Dict] 宽、高、帧率、帧数、时长(秒)、像素量，无法打开时为None]
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+        frame_count = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        cap.release()
+
+    return {
+        'width': width,
+        'height': height,
+        'fps': round(fps, 3),
+        'frame_count': frame_count,
+        'duration': round(frame_count / fps, 3) if fps > 0 else 0.0,
+        'pixels': width * height * frame_count
+    }
+
+
+def _settings_key(settings: Dict[str, Any]) -> str:
+    """
+    _settings_key 功能说明:
+    # 处理参数按键排序序列化后的短哈希，掩码面积随检测参数变化，按参数分别缓存
+    # 输入: [settings: Dict 处理参数] | 输出: [str 16位十六进制哈希]
+    """
+    payload = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ProbeCache:
+    """
+    ProbeCache 功能说明:
+    # 缓存目录下的probe_cache.json按视频绝对路径保存元数据，文件大小和修改时间一致时直接复用，不打开视频；
+    # 批量列表重复运行时只探测新增或修改过的文件；条目中同时按处理参数保存处理时实测的水印掩码面积
+    # 输入: [cache_dir: str 缓存目录] | 输出: [ProbeCache实例]
+    """
+
+    def __init__(self, cache_dir: str = "cache"):
+        self.cache_dir = cache_dir
+        self.cache_path = os.path.join(cache_dir, PROBE_CACHE_NAME)
+        self.hits = 0
+        self.misses = 0
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        _load 功能说明:
+        # 加载缓存文件，不存在、损坏或版本不一致时返回空缓存
+        # 输入: [无] | 输出: [Dict 路径到缓存条目的字典]
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != PROBE_CACHE_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def get(self, video_path: str) -> Optional[Dict[str, Any]]:
+        """
+        get 功能说明:
+        # 获取视频元数据：缓存条目的大小和修改时间与文件一致时直接返回，否则重新探测并更新缓存
+        # 输入: [video_path: str 视频路径] | 输出: [Optional[Dict] 元数据，无法打开时为None]
+        """
+        entry = self._valid_entry(video_path)
+        if entry:
+            self.hits += 1
+            return entry['info']
+
+        self.misses += 1
+        stat = os.stat(video_path)
+        info = probe_video(video_path)
+        if info is not None:
+            self._entries[os.path.abspath(video_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                                          'info': info}
+            self._dirty = True
+        return info
+
+    def _valid_entry(self, video_path: str) -> Optional[Dict[str, Any]]:
+        """
+        _valid_entry 功能说明:
+        # 获取大小和修改时间与文件一致的缓存条目，文件已变化或未缓存时为None
+        # 输入: [video_path: str 视频路径] | 输出: [Optional[Dict] 缓存条目]
+        """
+        stat = os.stat(video_path)
+        entry = self._entries.get(os.path.abspath(video_path))
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def get_mask_pixels(self, video_path: str, settings: Dict[str, Any]) -> Optional[int]:
+        """
+        get_mask_pixels 功能说明:
+        # 获取该处理参数下实测的每帧水印掩码面积，不打开视频；未测量过或文件已变化时为None
+        # 输入: [video_path: str 视频路径, settings: Dict 处理参数] | 输出: [Optional[int] 每帧修复像素数]
+        """
+        entry = self._valid_entry(video_path)
+        if not entry:
+            return None
+        return entry.get('mask_pixels', {}).get(_settings_key(settings))
+
+    def set_mask_pixels(self, video_path: str, settings: Dict[str, Any], mask_pixels: int) -> None:
+        """
+        set_mask_pixels 功能说明:
+        # 保存该处理参数下实测的每帧水印掩码面积并写入缓存文件，条目不存在或已变化时先重新探测
+        # 输入: [video_path: str 视频路径, settings: Dict 处理参数, mask_pixels: int 每帧修复像素数] | 输出: [无]
+        """
+        if self.get(video_path) is None:
+            return
+        entry = self._entries[os.path.abspath(video_path)]
+        entry.setdefault('mask_pixels', {})[_settings_key(settings)] = int(mask_pixels)
+        self.save()
+
+    def probe_many(self, video_paths: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        probe_many 功能说明:
+        # 批量获取元数据，有新探测的条目时保存一次缓存文件
+        # 输入: [video_paths: Iterable[str] 视频路径] | 输出: [List[Optional[Dict]] 与输入顺序一致的元数据]
+        """
+        results = [self.get(path) for path in video_paths]
+        if self._dirty:
+            self.save()
+        return results
+
+    def save(self) -> None:
+        """
+        save 功能说明:
+        # 先写本进程的临时文件再替换，避免中断或多个进程同时保存时留下损坏的缓存文件
+        # 输入: [无] | 输出: [无]
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PROBE_CACHE_VERSION, 'entries': self._entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.cache_path)
+        self._dirty = False
+
+
+def summarize_probes(video_files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    summarize_probes 功能说明:
+    # 汇总视频文件信息中的总帧数、总时长和像素量(宽×高×帧数，处理耗时主要与像素量成正比)，
+    # 未能探测的文件单独计数
+    # 输入: [video_files: List[Dict] 含探测元数据的视频文件信息] | 输出: [Dict 汇总统计]
+    """
+    probed = [info for info in video_files if info.get('frame_count')]
+    total_pixels = sum(info['pixels'] for info in probed)
+    total_frames = sum(info['frame_count'] for info in probed)
+    return {
+        'files': len(video_files),
+        'unprobed': len(video_files) - len(probed),
+        'total_frames': total_frames,
+        'total_duration': round(sum(info['duration'] for info in probed), 3),
+        'total_megapixels': round(total_pixels / 1e6, 1),
+        'megapixels_per_frame': round(total_pixels / total_frames / 1e6, 3) if total_frames else 0.0
+    }
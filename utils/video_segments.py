@@ -0,0 +1,145 @@
+##########video_segments.py: 视频分段处理工具模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建视频分段规划和分段文件拼接功能]########
+# 变更记录: [2026-10-18] @李祥光 [新增固定帧数分段规划，用于断点续处理]########
+# 输入: [视频总帧数，分段文件列表] | 输出: [分段帧区间，拼接后的视频文件]###############
+
+
+###########################文件下的所有函数###########################
+"""
+plan_segments：将视频帧范围均分为若干连续分段
+plan_fixed_segments：按固定帧数将视频帧范围划分为连续分段
+create_segment_dir：在临时目录下创建分段文件目录
+concat_video_segments：按顺序拼接分段视频文件
+_concat_with_ffmpeg：使用ffmpeg无损拼接分段文件
+_concat_with_opencv：使用OpenCV逐帧拼接分段文件
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[plan_segments分段规划] --> B[create_segment_dir创建分段目录]
+    R[plan_fixed_segments固定帧数分段] --> C
+    B --> C[各工作进程写出分段文件]
+    C --> D[concat_video_segments拼接]
+    D -->|存在ffmpeg| E[_concat_with_ffmpeg流复制拼接]
+    D -->|无ffmpeg或失败| F[_concat_with_opencv逐帧拼接]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+import cv2
+
+
+def plan_segments(total_frames: int, segment_count: int) -> List[Tuple[int, int]]:
+    """
+    plan_segments 功能说明:
+    # 将[0, total_frames)均分为若干连续的帧区间，前面的分段多分配余数帧
+    # 输入: [total_frames: int 总帧数, segment_count: int 分段数] | 输出: [List[Tuple[int, int]] (起始帧, 结束帧)列表]
+    """
+    segment_count = max(1, min(segment_count, total_frames))
+    base, remainder = divmod(total_frames, segment_count)
+
+    segments = []
+    start = 0
+    for i in range(segment_count):
+        end = start + base + (1 if i < remainder else 0)
+        segments.append((start, end))
+        start = end
+
+    return segments
+
+
+def plan_fixed_segments(total_frames: int, segment_frames: int) -> List[Tuple[int, int]]:
+    """
+    plan_fixed_segments 功能说明:
+    # 按固定帧数将[0, total_frames)划分为连续的帧区间，最后一段可能不足segment_frames帧；
+    # 分段边界只取决于帧数，中断后重新规划得到相同的分段
+    # 输入: [total_frames: int 总帧数, segment_frames: int 每段帧数] | 输出: [List[Tuple[int, int]] (起始帧, 结束帧)列表]
+    """
+    segment_frames = max(1, segment_frames)
+    return [(start, min(start + segment_frames, total_frames))
+            for start in range(0, max(total_frames, 1), segment_frames)]
+
+
+def create_segment_dir(temp_dir: str = "temp", prefix: str = "segments_") -> str:
+    """
+    create_segment_dir 功能说明:
+    # 在临时目录下创建唯一的分段文件目录
+    # 输入: [temp_dir: str 临时目录, prefix: str 目录名前缀] | 输出: [str 分段目录路径]
+    """
+    os.makedirs(temp_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=prefix, dir=temp_dir)
+
+
+def concat_video_segments(part_paths: List[str], output_path: str, fps: float,
+                          frame_size: Tuple[int, int]) -> int:
+    """
+    concat_video_segments 功能说明:
+    # 按顺序拼接分段视频文件；优先使用ffmpeg流复制避免二次编码，否则使用OpenCV逐帧拼接
+    # 输入: [part_paths: List[str] 分段文件列表, output_path: str 输出路径, fps: float 帧率,
+    #        frame_size: Tuple[int, int] (宽, 高)] | 输出: [int 输出视频帧数]
+    """
+    if shutil.which("ffmpeg") and _concat_with_ffmpeg(part_paths, output_path):
+        cap = cv2.VideoCapture(output_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        return frame_count
+
+    return _concat_with_opencv(part_paths, output_path, fps, frame_size)
+
+
+def _concat_with_ffmpeg(part_paths: List[str], output_path: str) -> bool:
+    """
+    _concat_with_ffmpeg 功能说明:
+    # 使用ffmpeg concat分离器流复制拼接，不重新编码，时间戳连续
+    # 输入: [part_paths: List[str] 分段文件列表, output_path: str 输出路径] | 输出: [bool 是否拼接成功]
+    """
+    list_path = os.path.join(os.path.dirname(os.path.abspath(part_paths[0])), "concat_list.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for part_path in part_paths:
+            escaped = os.path.abspath(part_path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    result = subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+         "-i", list_path, "-c", "copy", output_path],
+        capture_output=True
+    )
+    return result.returncode == 0
+
+
+def _concat_with_opencv(part_paths: List[str], output_path: str, fps: float,
+                        frame_size: Tuple[int, int]) -> int:
+    """
+    _concat_with_opencv 功能说明:
+    # 使用OpenCV依次读取分段文件的每一帧写入输出视频
+    # 输入: [part_paths: List[str] 分段文件列表, output_path: str 输出路径, fps: float 帧率,
+    #        frame_size: Tuple[int, int] (宽, 高)] | 输出: [int 输出视频帧数]
+    """
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+    if not out.isOpened():
+        raise IOError(f"无法创建输出视频文件: {output_path}")
+
+    frame_count = 0
+    try:
+        for part_path in part_paths:
+            cap = cv2.VideoCapture(part_path)
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    out.write(frame)
+                    frame_count += 1
+            finally:
+                cap.release()
+    finally:
+        out.release()
+
+    return frame_count
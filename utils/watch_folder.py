@@ -0,0 +1,362 @@
+##########watch_folder.py: 监视文件夹常驻处理模块 ##################
+# 变更记录: [2026-10-18] @李祥光 [创建监视输入文件夹、等待文件写入完成后交给常驻进程池处理的守护模块]########
+# 变更记录: [2026-10-18] @李祥光 [可选从持久化任务队列领取任务，已完成的文件跳过，失败的延迟重试]########
+# 变更记录: [2026-10-18] @李祥光 [每轮循环将各状态文件数写入任务数运行指标]########
+# 变更记录: [2026-10-18] @李祥光 [任务租约过期被其他执行者接管后不记录本次结果，也不再重试]########
+# 输入: [输入文件夹，单文件处理函数，工作进程初始化函数，并行文件数] | 输出: [每个文件的处理结果，定期队列深度和吞吐日志]###############
+
+
+###########################文件下的所有函数###########################
+"""
+scan_video_files：列出文件夹中支持格式的视频文件及其大小和修改时间
+FileStabilityTracker：文件写入完成判断类，大小和修改时间保持不变一段时间后视为就绪
+FileStabilityTracker.update：根据本次扫描结果更新状态并返回新就绪的文件
+WatchFolderDaemon：监视文件夹并用常驻进程池处理新文件的守护类
+WatchFolderDaemon.poll：扫描一次文件夹，将就绪文件加入等待队列
+WatchFolderDaemon._enqueue：将就绪文件提交到持久化任务队列，已完成的跳过
+WatchFolderDaemon._submit_pending：进程池有空闲时提交等待队列中的文件
+WatchFolderDaemon._collect：收集已完成的处理结果
+WatchFolderDaemon.get_stats：获取队列深度和吞吐统计
+WatchFolderDaemon._log_stats：定期记录队列深度和吞吐
+WatchFolderDaemon._publish_metrics：将队列深度写入任务数指标
+WatchFolderDaemon.run：守护主循环，直到停止信号或处理数量达到上限
+"""
+###########################文件下的所有函数###########################
+
+#########mermaid格式说明所有函数的调用关系说明开始#########
+"""
+flowchart TD
+    A[watch_folder_enhanced] --> B[WatchFolderDaemon.run]
+    B --> C[ProcessPoolExecutor启动时initializer预热工作进程]
+    B --> D[WatchFolderDaemon.poll]
+    D --> E[scan_video_files]
+    D --> F[FileStabilityTracker.update]
+    F -->|大小和修改时间稳定| M[_enqueue提交到任务队列]
+    M -->|未完成| G[加入等待队列]
+    B --> H[_submit_pending有空闲进程时JobStore.claim并提交]
+    H --> I[_run_job工作进程处理单个文件]
+    B --> J[_collect收集结果]
+    J --> K[result_callback]
+    J --> N[JobStore.complete/fail]
+    N -->|稍后重试| O[重试等待列表]
+    B --> L[_log_stats定期记录队列深度和吞吐]
+    B --> M[_publish_metrics实时更新JOB_QUEUE_DEPTH]
+"""
+#########mermaid格式说明所有函数的调用关系说明结束#########
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.batch_executor import _run_job
+from utils.job_store import JobStore, LeaseKeeper, make_worker_id
+from utils.logger import log_info, log_error
+from utils.metrics import JOB_QUEUE_DEPTH
+
+
+def scan_video_files(folder_path: str, extensions: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    scan_video_files 功能说明:
+    # 列出文件夹中扩展名受支持的视频文件(不递归)，隐藏文件和扫描期间被移走的文件跳过
+    # 输入: [folder_path: str 文件夹路径, extensions: Iterable[str] 支持的扩展名(含点，小写)] | 输出: [Dict 路径到(大小, 修改时间纳秒)]
+    """
+    extensions = set(extensions)
+    files: Dict[str, Tuple[int, int]] = {}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or os.path.splitext(entry.name.lower())[1] not in extensions:
+                continue
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+    return files
+
+
+class FileStabilityTracker:
+    """
+    FileStabilityTracker 功能说明:
+    # 复制或上传中的文件仍在增长，不能立即处理；文件大小和修改时间连续保持不变settle_seconds后视为写入完成，
+    # 每个(路径, 大小, 修改时间)只报告一次就绪，文件被覆盖更新后重新等待并再次报告
+    # 输入: [settle_seconds: float 稳定等待时间(秒)] | 输出: [FileStabilityTracker实例]
+    """
+
+    def __init__(self, settle_seconds: float = 5.0):
+        self.settle_seconds = settle_seconds
+        self._observed: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._reported: Dict[str, Tuple[int, int]] = {}
+
+    def update(self, files: Dict[str, Tuple[int, int]], now: Optional[float] = None) -> List[str]:
+        """
+        update 功能说明:
+        # 根据本次扫描结果更新各文件的首次观察时间，返回新就绪的文件(按首次观察时间排序)；空文件不视为就绪
+        # 输入: [files: Dict scan_video_files的结果, now: float 当前时间(默认time.monotonic)] | 输出: [List[str] 新就绪的文件路径]
+        """
+        now = time.monotonic() if now is None else now
+        for path in list(self._observed):
+            if path not in files:
+                del self._observed[path]
+                self._reported.pop(path, None)
+
+        ready = []
+        for path, signature in files.items():
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                self._observed[path] = (signature, now)
+                continue
+            if (signature[0] > 0 and self._reported.get(path) != signature
+                    and now - observed[1] >= self.settle_seconds):
+                self._reported[path] = signature
+                ready.append(path)
+        ready.sort(key=lambda path: self._observed[path][1])
+        return ready
+
+    @property
+    def settling(self) -> int:
+        """
+        settling 功能说明:
+        # 已发现但尚未稳定(仍在写入)的文件数
+        # 输入: [无] | 输出: [int 文件数]
+        """
+        return sum(1 for path, (signature, _) in self._observed.items() if self._reported.get(path) != signature)
+
+
+class WatchFolderDaemon:
+    """
+    WatchFolderDaemon 功能说明:
+    # 轮询监视输入文件夹，写入完成的文件按到达顺序进入等待队列，进程池有空闲时才提交，等待队列长度即真实排队深度；
+    # 进程池在启动时由initializer预热(导入cv2、创建去除器)，之后一直复用，不再为每个文件付出启动开销；
+    # 每隔stats_interval秒记录一次队列深度和最近窗口的吞吐；
+    # 提供job_store时就绪文件先幂等提交到持久化任务队列(job_spec返回输出路径、处理参数和配置)，已完成的跳过，
+    # 提交进程池前领取任务，失败的按任务队列的退避延迟重试，守护进程重启后不会重复处理已完成的文件
+    # 输入: [folder_path: str 输入文件夹, job_func: Callable 模块级单文件处理函数, job_args: Sequence 附加参数,
+    #        jobs: int 并行文件数, extensions: Iterable[str] 支持的扩展名, initializer/initargs 工作进程预热函数和参数,
+    #        poll_interval: float 轮询间隔(秒), settle_seconds: float 稳定等待时间(秒), stats_interval: float 统计日志间隔(秒),
+    #        result_callback: Callable 每完成一个文件的回调, job_store: JobStore 持久化任务队列,
+    #        job_spec: Callable 由文件路径得到(输出路径, 处理参数, 配置)] | 输出: [WatchFolderDaemon实例]
+    """
+
+    def __init__(self, folder_path: str, job_func: Callable, job_args: Sequence[Any] = (), jobs: int = 1,
+                 extensions: Iterable[str] = ('.mp4',), initializer: Optional[Callable] = None,
+                 initargs: Sequence[Any] = (), poll_interval: float = 2.0, settle_seconds: float = 5.0,
+                 stats_interval: float = 60.0, result_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 job_store: Optional[JobStore] = None,
+                 job_spec: Optional[Callable[[str], Tuple[str, Dict[str, Any], Dict[str, Any]]]] = None):
+        self.folder_path = folder_path
+        self.job_func = job_func
+        self.job_args = tuple(job_args)
+        self.jobs = max(1, jobs)
+        self.extensions = tuple(extensions)
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.poll_interval = poll_interval
+        self.stats_interval = stats_interval
+        self.result_callback = result_callback
+        self.job_store = job_store
+        self.job_spec = job_spec
+        self.worker_id = make_worker_id()
+        self.retrying: List[Dict[str, Any]] = []
+        self.skipped = 0
+        self.tracker = FileStabilityTracker(settle_seconds)
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.running: Dict[Any, Dict[str, Any]] = {}
+        self.results: List[Dict[str, Any]] = []
+        self._window: List[Dict[str, Any]] = []
+        self._window_start = time.monotonic()
+        self._last_stats = time.monotonic()
+
+    def poll(self) -> int:
+        """
+        poll 功能说明:
+        # 扫描一次文件夹，将新就绪的文件加入等待队列；文件夹暂时不可访问时记录错误并跳过本次扫描
+        # 输入: [无] | 输出: [int 新加入等待队列的文件数]
+        """
+        try:
+            files = scan_video_files(self.folder_path, self.extensions)
+        except OSError as e:
+            log_error(f"扫描监视文件夹失败: {self.folder_path}", e)
+            return 0
+
+        # 等待重试的任务每次轮询重新尝试领取，未到重试时间的领取不到，留在重试列表
+        self.pending.extend(self.retrying)
+        self.retrying = []
+
+        ready = self.tracker.update(files)
+        added = 0
+        for path in ready:
+            size = files[path][0]
+            video_info = {'path': path, 'name': os.path.basename(path), 'size_mb': round(size / (1024 * 1024), 2)}
+            if self.job_store is not None and not self._enqueue(video_info):
+                continue
+            self.pending.append(video_info)
+            added += 1
+            log_info(f"📥 新文件就绪: {video_info['name']} ({size / (1024 * 1024):.2f} MB)")
+        return added
+
+    def _enqueue(self, video_info: Dict[str, Any]) -> bool:
+        """
+        _enqueue 功能说明:
+        # 将就绪文件幂等提交到持久化任务队列并记录任务ID；相同内容、参数和输出已完成的跳过
+        # 输入: [video_info: Dict 视频文件信息] | 输出: [bool 是否需要处理]
+        """
+        try:
+            output_path, settings, config = self.job_spec(video_info['path'])
+            job = self.job_store.enqueue(video_info['path'], output_path, settings, config, 'watch')
+        except OSError as e:
+            log_error(f"提交任务失败: {video_info['name']}", e)
+            return False
+        if job['state'] == 'completed':
+            self.skipped += 1
+            log_info(f"♻️  已处理过，跳过: {video_info['name']}")
+            return False
+        video_info['job_id'] = job['id']
+        return True
+
+    def _submit_pending(self, executor: ProcessPoolExecutor) -> None:
+        """
+        _submit_pending 功能说明:
+        # 处理中的文件数少于并行文件数时从等待队列头部提交
+        # 输入: [executor: ProcessPoolExecutor 常驻进程池] | 输出: [无]
+        """
+        while self.pending and len(self.running) < self.jobs:
+            video_info = self.pending.popleft()
+            if self.job_store is not None and not self.job_store.claim(self.worker_id, [video_info['job_id']]):
+                # 未到重试时间的留待下次轮询，已结束或正由其他执行者处理的丢弃
+                job = self.job_store.get(video_info['job_id'])
+                if job and job['state'] == 'queued':
+                    self.retrying.append(video_info)
+                continue
+            future = executor.submit(_run_job, self.job_func, video_info, self.job_args)
+            self.running[future] = video_info
+
+    def _collect(self, timeout: float) -> None:
+        """
+        _collect 功能说明:
+        # 最多等待timeout秒收集已完成的结果，有文件完成时立即返回以便尽快提交下一个
+        # 输入: [timeout: float 最长等待时间(秒)] | 输出: [无]
+        """
+        if not self.running:
+            time.sleep(timeout)
+            return
+
+        done, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            video_info = self.running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # 工作进程异常退出时进程池不可再用，由run重新抛出
+                log_error(f"工作进程异常退出: {video_info['name']}", e)
+                raise
+            self.results.append(result)
+            self._window.append(result)
+            status = "成功" if result['success'] else "失败"
+            if self.job_store is not None:
+                if result['success']:
+                    state = 'completed' if self.job_store.complete(video_info['job_id'], self.worker_id,
+                                                                   result['duration']) else None
+                else:
+                    state = self.job_store.fail(video_info['job_id'], self.worker_id, result['error'] or "处理失败",
+                                                result['duration'])
+                if state is None:
+                    # 租约过期已被其他执行者接管，结果以接管者为准
+                    status += "，任务已被其他执行者接管，未记录"
+                elif state == 'queued':
+                    status = "失败，稍后重试"
+                    self.retrying.append(video_info)
+            log_info(f"📤 处理{status}: {result['name']} ({result['size_mb']} MB, {result['duration']:.2f} 秒, "
+                     f"进程 {result['worker']})")
+            if self.result_callback:
+                self.result_callback(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        get_stats 功能说明:
+        # 获取队列深度(写入中、等待、等待重试、处理中)和最近统计窗口内的完成数、数据量和吞吐
+        # 输入: [无] | 输出: [Dict 统计信息]
+        """
+        elapsed = max(time.monotonic() - self._window_start, 1e-6)
+        window_mb = sum(result['size_mb'] for result in self._window)
+        return {
+            'settling': self.tracker.settling,
+            'pending': len(self.pending),
+            'retrying': len(self.retrying),
+            'skipped': self.skipped,
+            'running': len(self.running),
+            'completed': len(self.results),
+            'failed': sum(1 for result in self.results if not result['success']),
+            'window_files': len(self._window),
+            'window_mb': round(window_mb, 2),
+            'files_per_min': round(len(self._window) * 60.0 / elapsed, 2),
+            'mb_per_s': round(window_mb / elapsed, 3)
+        }
+
+    def _publish_metrics(self) -> None:
+        """
+        _publish_metrics 功能说明:
+        # 将写入中、等待、等待重试、处理中的文件数写入任务数指标，每轮循环调用，导出的队列深度保持实时
+        # 输入: [无] | 输出: [无]
+        """
+        JOB_QUEUE_DEPTH.set(self.tracker.settling, state='settling')
+        JOB_QUEUE_DEPTH.set(len(self.pending), state='queued')
+        JOB_QUEUE_DEPTH.set(len(self.retrying), state='retrying')
+        JOB_QUEUE_DEPTH.set(len(self.running), state='running')
+
+    def _log_stats(self, force: bool = False) -> None:
+        """
+        _log_stats 功能说明:
+        # 距上次记录超过stats_interval秒(或force)时记录队列深度和吞吐，并开始新的统计窗口
+        # 输入: [force: bool 是否立即记录] | 输出: [无]
+        """
+        now = time.monotonic()
+        if not force and now - self._last_stats < self.stats_interval:
+            return
+        stats = self.get_stats()
+        log_info(f"📊 队列: 写入中 {stats['settling']}, 等待 {stats['pending']}, 等待重试 {stats['retrying']}, "
+                 f"处理中 {stats['running']} | "
+                 f"最近 {now - self._window_start:.0f} 秒完成 {stats['window_files']} 个文件 "
+                 f"({stats['window_mb']} MB, {stats['files_per_min']} 个/分钟, {stats['mb_per_s']} MB/秒) | "
+                 f"累计 {stats['completed']} 个 (失败 {stats['failed']})")
+        self._window = []
+        self._window_start = now
+        self._last_stats = now
+
+    def run(self, stop_event: Optional[threading.Event] = None, max_files: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        run 功能说明:
+        # 守护主循环：轮询、提交、收集、定期统计，直到stop_event被设置或完成max_files个文件；
+        # 停止时不再提交等待队列中的文件，等待处理中的文件完成后关闭进程池；使用任务队列时由后台线程续期租约
+        # 输入: [stop_event: threading.Event 停止信号, max_files: int 处理文件数上限(默认不限)] | 输出: [List[Dict] 全部处理结果]
+        """
+        stop_event = stop_event or threading.Event()
+        log_info(f"👀 开始监视文件夹: {self.folder_path} (并行 {self.jobs}, 轮询 {self.poll_interval} 秒, "
+                 f"稳定等待 {self.tracker.settle_seconds} 秒)")
+        lease_keeper = LeaseKeeper(self.job_store, self.worker_id).start() if self.job_store is not None else None
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=self.initializer,
+                                 initargs=self.initargs) as executor:
+            try:
+                next_poll = 0.0
+                while not stop_event.is_set() and (max_files is None or len(self.results) < max_files):
+                    if time.monotonic() >= next_poll:
+                        self.poll()
+                        next_poll = time.monotonic() + self.poll_interval
+                    self._submit_pending(executor)
+                    self._collect(min(self.poll_interval, max(0.0, next_poll - time.monotonic())))
+                    self._publish_metrics()
+                    self._log_stats()
+            finally:
+                while self.running:
+                    self._collect(self.poll_interval)
+                    self._publish_metrics()
+                self._publish_metrics()
+                self._log_stats(force=True)
+                if lease_keeper is not None:
+                    lease_keeper.stop()
+                    self.job_store.release(self.worker_id)
+        log_info(f"🛑 停止监视文件夹: {self.folder_path}，未处理 {len(self.pending)} 个等待中的文件")
+        return self.results
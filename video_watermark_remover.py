@@ -1,5 +1,6 @@
 ##########video_watermark_remover.py: 视频去水印处理工具 ##################
 # 变更记录: [2025-06-25] @李祥光 [初始创建视频去水印功能]########
+# 变更记录: [2026-10-18] @李祥光 [批量处理支持--jobs多进程并行，大文件优先调度]########
 # 输入: [视频文件路径/文件夹路径] | 输出: [处理后的无水印视频文件]###############
 
 
@@ -26,6 +27,8 @@ flowchart TD
     F -->|文件夹| H[process_video_folder批量处理]
     H --> I[get_video_files获取视频列表]
     I --> J[循环调用process_video]
+    I -->|jobs大于1| N[run_batch_jobs大文件优先多进程并行]
+    N --> G
     G --> K[setup_directories创建输出目录]
     J --> K
     K --> L[WatermarkRemover去水印]
@@ -49,6 +52,8 @@ except ImportError:
     print("安装命令：pip install watermark-remover")
     sys.exit(1)
 
+from utils.batch_executor import run_batch_jobs, summarize_workers, format_worker_stats
+
 
 def setup_directories() -> None:
     """
@@ -136,11 +141,11 @@ def process_video(input_path: str, output_dir: str = "output") -> bool:
         return False
 
 
-def process_video_folder(folder_path: str, output_dir: str = "output") -> None:
+def process_video_folder(folder_path: str, output_dir: str = "output", jobs: int = 1) -> None:
     """
     process_video_folder 功能说明:
-    # 批量处理文件夹中的所有视频文件
-    # 输入: [folder_path: str 文件夹路径, output_dir: str 输出目录] | 输出: [无，批量处理结果]
+    # 批量处理文件夹中的所有视频文件，jobs大于1时多进程并行并按文件大小从大到小调度
+    # 输入: [folder_path: str 文件夹路径, output_dir: str 输出目录, jobs: int 并行文件数] | 输出: [无，批量处理结果]
     """
     video_files = get_video_files(folder_path)
     
@@ -154,15 +159,23 @@ def process_video_folder(folder_path: str, output_dir: str = "output") -> None:
     success_count = 0
     failed_count = 0
     
-    for i, video_file in enumerate(video_files, 1):
-        print(f"[{i}/{len(video_files)}] 处理进度")
-        
-        if process_video(video_file, output_dir):
-            success_count += 1
-        else:
-            failed_count += 1
-        
-        print("-" * 50)
+    if jobs > 1 and len(video_files) > 1:
+        video_infos = [{'path': path, 'size_mb': round(os.path.getsize(path) / (1024 * 1024), 2)}
+                       for path in video_files]
+        results = run_batch_jobs(video_infos, process_video, (output_dir,), jobs)
+        success_count = sum(1 for result in results if result['success'])
+        failed_count = len(results) - success_count
+        print(f"\n🧵 各进程吞吐:\n{format_worker_stats(summarize_workers(results))}")
+    else:
+        for i, video_file in enumerate(video_files, 1):
+            print(f"[{i}/{len(video_files)}] 处理进度")
+            
+            if process_video(video_file, output_dir):
+                success_count += 1
+            else:
+                failed_count += 1
+            
+            print("-" * 50)
     
     # 显示处理结果统计
     print(f"\n📊 批量处理完成！")
@@ -184,6 +197,7 @@ def main():
     parser = argparse.ArgumentParser(description='视频去水印处理工具')
     parser.add_argument('input', nargs='?', help='输入视频文件或文件夹路径')
     parser.add_argument('--output', '-o', default='output', help='输出目录 (默认: output)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='批量处理时同时处理的文件数 (默认: 1)')
     
     args = parser.parse_args()
     
@@ -227,7 +241,7 @@ def main():
         if os.path.isfile(args.input):
             process_video(args.input, args.output)
         elif os.path.isdir(args.input):
-            process_video_folder(args.input, args.output)
+            process_video_folder(args.input, args.output, args.jobs)
     
     print("\n🎉 程序执行完成！")
 
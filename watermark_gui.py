@@ -13,6 +13,9 @@
 # 变更记录: [2025-06-25] @李祥光 [界面优化：进一步减少水印区域列表高度]########
 # 变更记录: [2025-06-25] @李祥光 [优化使用说明：去掉"拖动滑块选择合适的帧"步骤]########
 # 变更记录: [2025-06-25] @李祥光 [修复ttk组件配置错误，使用destroy重建替代configure]########
+# 变更记录: [2026-10-18] @李祥光 [帧导航使用画布尺寸预览帧LRU缓存和相邻帧后台预取]########
+# 变更记录: [2026-10-18] @李祥光 [视频处理移到后台线程，显示进度条、处理速度和剩余时间，支持取消]########
+# 变更记录: [2026-10-18] @李祥光 [加载视频后后台建立定位索引，帧导航和预取从最近关键帧定位]########
 # 输入: [视频文件路径] | 输出: [处理后的无水印视频文件]###############
 
 
@@ -22,6 +25,11 @@ WatermarkGUI.__init__：初始化GUI界面和所有组件
 WatermarkGUI.create_widgets：创建主要的界面组件
 WatermarkGUI.load_video：加载视频文件并初始化播放器
 WatermarkGUI.update_frame：更新当前显示的视频帧
+WatermarkGUI._get_proxy_frame：从预览帧缓存获取当前帧，未命中时解码并加入缓存
+WatermarkGUI._read_frame：读取原始分辨率的指定帧，顺序读取时不重新定位
+WatermarkGUI._build_seek_index：后台加载或建立定位索引
+WatermarkGUI._stop_prefetch：停止后台预取线程
+WatermarkGUI.on_close：关闭窗口时停止预取并释放视频
 WatermarkGUI.on_canvas_click：处理画布点击事件，开始选择水印区域
 WatermarkGUI.on_canvas_drag：处理画布拖拽事件，实时更新选择区域
 WatermarkGUI.on_canvas_release：处理画布释放事件，完成区域选择
@@ -29,11 +37,17 @@ WatermarkGUI.add_watermark_area：添加水印区域到列表
 WatermarkGUI.delete_selected_area：删除选中的水印区域
 WatermarkGUI.clear_all_areas：清空所有水印区域
 WatermarkGUI.preview_effect：预览去水印效果
-WatermarkGUI.process_video：处理视频去水印
+WatermarkGUI.process_video：在后台线程中启动视频去水印处理
+WatermarkGUI._process_worker：后台处理线程，通过队列报告进度和结果
+WatermarkGUI._poll_process_queue：界面线程定时读取处理队列
+WatermarkGUI._update_progress：更新进度条、处理速度和剩余时间
+WatermarkGUI._finish_processing：处理结束后恢复按钮并提示结果
+WatermarkGUI.cancel_processing：取消正在进行的处理
 WatermarkGUI.on_key_press：处理键盘按键事件
 WatermarkGUI.prev_frame：切换到上一帧
 WatermarkGUI.next_frame：切换到下一帧
 WatermarkGUI.on_frame_scale：处理帧滑块变化事件
+WatermarkGUI._apply_frame_scale：显示滑块最后停留的帧
 WatermarkGUI.show_preview_window：显示预览对比窗口
 WatermarkGUI.close_preview：关闭预览窗口
 WatermarkGUI.update_preview：更新预览窗口内容
@@ -56,7 +70,21 @@ flowchart TD
     F -->|滑块操作| L[on_frame_scale]
     F -->|预览效果| M[preview_effect]
     F -->|处理视频| N[process_video]
+    N --> N1[_process_worker后台线程]
+    N1 -->|进度队列| N2[_poll_process_queue]
+    N2 --> N3[_update_progress]
+    N2 -->|处理结束| N4[_finish_processing]
+    F -->|取消| N5[cancel_processing设置取消信号]
+    N5 --> N1
     G --> O[update_frame]
+    O --> V[_get_proxy_frame]
+    V -->|缓存命中| W[ProxyFrameCache]
+    V -->|未命中| X[_read_frame]
+    X -->|索引已建立| AA[SeekIndex.read从最近关键帧定位]
+    E --> AB[_build_seek_index后台线程]
+    AB --> AA
+    O --> Y[FramePrefetcher.request后台预取相邻帧]
+    M --> X
     H --> I
     I --> J
     J --> P[add_watermark_area]
@@ -65,7 +93,8 @@ flowchart TD
     Q -->|右箭头| S[next_frame]
     R --> O
     S --> O
-    L --> O
+    L --> Z[_apply_frame_scale合并滑块事件]
+    Z --> O
     M --> T[show_preview_window]
     T --> U[update_preview]
 """
@@ -76,7 +105,12 @@ from tkinter import ttk, filedialog, messagebox
 import cv2
 from PIL import Image, ImageTk
 import os
+import queue
+import threading
+import time
 from watermark_remover import WatermarkRemover
+from utils.frame_cache import ProxyFrameCache, FramePrefetcher, make_proxy
+from utils.seek_index import SeekIndex
 
 class WatermarkGUI:
     """
@@ -95,6 +129,22 @@ class WatermarkGUI:
         self.current_frame = 0
         self.total_frames = 0
         self.fps = 30
+        self.frame_width = 0
+        self.frame_height = 0
+        self.cap_position = None
+        self.seek_index = None
+        
+        # 预览帧缓存和后台预取
+        self.frame_cache = ProxyFrameCache()
+        self.prefetcher = None
+        self.scale_update_pending = False
+        
+        # 后台处理相关变量
+        self.process_thread = None
+        self.process_queue = queue.Queue()
+        self.cancel_event = None
+        self.process_start_time = 0.0
+        self.processed_frames = 0
         
         # 界面相关变量
         self.canvas = None
@@ -119,6 +169,7 @@ class WatermarkGUI:
         # 绑定键盘事件
         self.root.bind('<Key>', self.on_key_press)
         self.root.focus_set()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     """
     create_widgets 功能说明:
@@ -182,7 +233,16 @@ class WatermarkGUI:
         process_frame = ttk.Frame(control_frame)
         process_frame.pack(fill=tk.X, pady=(10, 0))
         
-        ttk.Button(process_frame, text="开始处理", command=self.process_video).pack(fill=tk.X)
+        self.process_button = ttk.Button(process_frame, text="开始处理", command=self.process_video)
+        self.process_button.pack(fill=tk.X)
+        
+        # 处理进度
+        self.progress_bar = ttk.Progressbar(process_frame, orient=tk.HORIZONTAL, mode='determinate')
+        self.progress_bar.pack(fill=tk.X, pady=(5, 0))
+        self.progress_label = ttk.Label(process_frame, text="")
+        self.progress_label.pack(fill=tk.X)
+        self.cancel_button = ttk.Button(process_frame, text="取消处理", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.pack(fill=tk.X)
         
         # 右侧视频显示区域
         video_frame = ttk.LabelFrame(main_frame, text="视频预览")
@@ -231,12 +291,16 @@ class WatermarkGUI:
         if file_path:
             self.video_path = file_path
             
-            # 释放之前的视频
+            # 释放之前的视频和预览帧缓存
+            self._stop_prefetch()
+            self.frame_cache.clear()
             if self.cap:
                 self.cap.release()
             
             # 打开新视频
             self.cap = cv2.VideoCapture(file_path)
+            self.cap_position = 0
+            self.seek_index = None
             if not self.cap.isOpened():
                 messagebox.showerror("错误", "无法打开视频文件")
                 return
@@ -244,6 +308,15 @@ class WatermarkGUI:
             # 获取视频信息
             self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
             self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            
+            # 后台预取使用独立的视频读取器
+            self.prefetcher = FramePrefetcher(file_path, self.frame_cache, self.total_frames)
+            
+            # 定位索引首次需要扫描整个视频，在后台建立，完成前按帧号定位
+            threading.Thread(target=self._build_seek_index, args=(file_path,),
+                             name="seek-index", daemon=True).start()
             
             # 重置帧位置
             self.current_frame = 0
@@ -264,60 +337,130 @@ class WatermarkGUI:
         if not self.cap:
             return
         
-        # 设置帧位置
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
+        # 获取Canvas尺寸
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
         
-        if ret:
-            # 转换颜色空间
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if canvas_width > 1 and canvas_height > 1 and self.frame_width > 0 and self.frame_height > 0:
+            # 计算缩放比例，保持宽高比
+            scale_w = canvas_width / self.frame_width
+            scale_h = canvas_height / self.frame_height
+            self.scale_factor = min(scale_w, scale_h)
             
-            # 获取Canvas尺寸
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
+            # 计算新尺寸
+            new_width = max(1, int(self.frame_width * self.scale_factor))
+            new_height = max(1, int(self.frame_height * self.scale_factor))
             
-            if canvas_width > 1 and canvas_height > 1:
-                # 计算缩放比例，保持宽高比
-                frame_height, frame_width = frame_rgb.shape[:2]
-                scale_w = canvas_width / frame_width
-                scale_h = canvas_height / frame_height
-                self.scale_factor = min(scale_w, scale_h)
-                
-                # 计算新尺寸
-                new_width = int(frame_width * self.scale_factor)
-                new_height = int(frame_height * self.scale_factor)
-                
-                # 调整图像大小
-                frame_resized = cv2.resize(frame_rgb, (new_width, new_height))
-                
-                # 转换为PIL图像
-                pil_image = Image.fromarray(frame_resized)
-                self.photo = ImageTk.PhotoImage(pil_image)
-                
-                # 清除Canvas并显示图像
-                self.canvas.delete("all")
-                
-                # 计算居中位置
-                x_offset = (canvas_width - new_width) // 2
-                y_offset = (canvas_height - new_height) // 2
-                
-                self.canvas.create_image(x_offset, y_offset, anchor=tk.NW, image=self.photo)
+            # 从缓存获取缩放后的预览帧
+            frame_resized = self._get_proxy_frame((new_width, new_height))
+            if frame_resized is None:
+                return
+            
+            # 转换为PIL图像
+            pil_image = Image.fromarray(frame_resized)
+            self.photo = ImageTk.PhotoImage(pil_image)
+            
+            # 清除Canvas并显示图像
+            self.canvas.delete("all")
+            
+            # 计算居中位置
+            x_offset = (canvas_width - new_width) // 2
+            y_offset = (canvas_height - new_height) // 2
+            
+            self.canvas.create_image(x_offset, y_offset, anchor=tk.NW, image=self.photo)
+            
+            # 重新绘制水印区域
+            for i, area in enumerate(self.watermark_areas):
+                x1, y1, x2, y2 = area
+                # 转换坐标到当前缩放
+                canvas_x1 = x1 * self.scale_factor + x_offset
+                canvas_y1 = y1 * self.scale_factor + y_offset
+                canvas_x2 = x2 * self.scale_factor + x_offset
+                canvas_y2 = y2 * self.scale_factor + y_offset
                 
-                # 重新绘制水印区域
-                for i, area in enumerate(self.watermark_areas):
-                    x1, y1, x2, y2 = area
-                    # 转换坐标到当前缩放
-                    canvas_x1 = x1 * self.scale_factor + x_offset
-                    canvas_y1 = y1 * self.scale_factor + y_offset
-                    canvas_x2 = x2 * self.scale_factor + x_offset
-                    canvas_y2 = y2 * self.scale_factor + y_offset
-                    
-                    self.canvas.create_rectangle(canvas_x1, canvas_y1, canvas_x2, canvas_y2, 
-                                               outline='red', width=2, tags=f"area_{i}")
+                self.canvas.create_rectangle(canvas_x1, canvas_y1, canvas_x2, canvas_y2, 
+                                           outline='red', width=2, tags=f"area_{i}")
             
-            # 更新界面信息
-            self.frame_var.set(self.current_frame)
-            self.frame_info.config(text=f"帧: {self.current_frame+1}/{self.total_frames}")
+            # 后台预取前后相邻帧，上一帧/下一帧直接命中缓存
+            if self.prefetcher:
+                self.prefetcher.request(self.current_frame)
+        
+        # 更新界面信息
+        self.frame_var.set(self.current_frame)
+        self.frame_info.config(text=f"帧: {self.current_frame+1}/{self.total_frames}")
+    
+    """
+    _get_proxy_frame 功能说明:
+    # 从预览帧缓存获取当前帧，未命中时解码原始帧、缩放到画布尺寸并加入缓存；画布尺寸变化时缓存自动清空
+    # 输入: [proxy_size: (宽, 高) 显示尺寸] | 输出: [RGB预览帧，读取失败时为None]# # # # # 
+    """
+    def _get_proxy_frame(self, proxy_size):
+        self.frame_cache.set_proxy_size(proxy_size)
+        proxy = self.frame_cache.get(self.current_frame)
+        if proxy is None:
+            frame = self._read_frame(self.current_frame)
+            if frame is None:
+                return None
+            proxy = make_proxy(frame, proxy_size)
+            self.frame_cache.put(self.current_frame, proxy)
+        return proxy
+    
+    """
+    _read_frame 功能说明:
+    # 读取原始分辨率的指定帧，紧接上次读取位置时顺序读取，不重新定位(定位需从关键帧重新解码)；
+    # 定位索引建立后从最近关键帧解码，目标在当前位置之后的同一GOP内时直接向后解码
+    # 输入: [index: 帧号] | 输出: [BGR原始帧，读取失败时为None]# # # # # 
+    """
+    def _read_frame(self, index):
+        if self.seek_index is not None:
+            ret, frame = self.seek_index.read(self.cap, index, self.cap_position)
+        else:
+            if self.cap_position != index:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = self.cap.read()
+        self.cap_position = index + 1 if ret else None
+        return frame if ret else None
+    
+    """
+    _build_seek_index 功能说明:
+    # 后台线程加载或建立定位索引(保存在temp/seek_index，视频未变化时下次直接加载)，完成时视频未切换才启用
+    # 输入: [video_path: 视频路径] | 输出: [无]# # # # # 
+    """
+    def _build_seek_index(self, video_path):
+        try:
+            seek_index = SeekIndex.load_or_build(video_path)
+        except Exception as e:
+            print(f"定位索引建立失败: {e}")
+            return
+        
+        if seek_index is not None and video_path == self.video_path:
+            self.seek_index = seek_index
+            if self.prefetcher:
+                self.prefetcher.seek_index = seek_index
+    
+    """
+    _stop_prefetch 功能说明:
+    # 停止后台预取线程
+    # 输入: [无] | 输出: [无]# # # # # 
+    """
+    def _stop_prefetch(self):
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
+    
+    """
+    on_close 功能说明:
+    # 关闭窗口时取消正在进行的处理(等待删除未完成的输出)，停止预取线程并释放视频
+    # 输入: [无] | 输出: [无，销毁主窗口]# # # # # 
+    """
+    def on_close(self):
+        if self.process_thread and self.process_thread.is_alive():
+            self.cancel_event.set()
+            self.process_thread.join(timeout=10)
+        self._stop_prefetch()
+        if self.cap:
+            self.cap.release()
+        self.root.destroy()
     
     """
     on_canvas_click 功能说明:
@@ -371,8 +514,8 @@ class WatermarkGUI:
         
         if canvas_width > 1 and canvas_height > 1:
             # 获取视频尺寸
-            frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            frame_width = self.frame_width
+            frame_height = self.frame_height
             
             # 计算偏移量
             new_width = int(frame_width * self.scale_factor)
@@ -457,11 +600,10 @@ class WatermarkGUI:
             messagebox.showwarning("警告", "请先加载视频并选择水印区域")
             return
         
-        # 获取当前帧
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
+        # 获取当前帧(原始分辨率)
+        frame = self._read_frame(self.current_frame)
         
-        if ret:
+        if frame is not None:
             # 创建去水印处理器
             remover = WatermarkRemover()
             
@@ -473,7 +615,7 @@ class WatermarkGUI:
     
     """
     process_video 功能说明:
-    # 处理视频去水印
+    # 在后台线程中处理视频去水印，界面保持响应，进度通过队列定时读取
     # 输入: [无] | 输出: [无，生成处理后的视频文件]# # # # # 
     """
     def process_video(self):
@@ -481,26 +623,136 @@ class WatermarkGUI:
             messagebox.showwarning("警告", "请先加载视频并选择水印区域")
             return
         
+        if self.process_thread and self.process_thread.is_alive():
+            return
+        
         # 自动生成输出文件名
         input_dir = os.path.dirname(self.video_path)
         input_name = os.path.splitext(os.path.basename(self.video_path))[0]
         input_ext = os.path.splitext(self.video_path)[1]
         output_path = os.path.join(input_dir, f"{input_name}-无水印{input_ext}")
         
+        # 每次处理使用新的队列和取消信号，避免上一次处理的残留消息
+        self.process_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.processed_frames = 0
+        self.process_start_time = time.perf_counter()
+        
+        self.progress_bar.config(maximum=max(1, self.total_frames), value=0)
+        self.progress_label.config(text="准备处理...")
+        self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        
+        self.process_thread = threading.Thread(
+            target=self._process_worker,
+            args=(self.video_path, output_path, list(self.watermark_areas), self.process_queue, self.cancel_event),
+            name="watermark-process",
+            daemon=True
+        )
+        self.process_thread.start()
+        self.root.after(100, self._poll_process_queue)
+    
+    """
+    _process_worker 功能说明:
+    # 后台处理线程：调用去水印处理器，进度(新增帧数)和结果通过队列发给界面线程，不直接操作界面组件
+    # 输入: [video_path: 输入视频路径, output_path: 输出视频路径, watermark_areas: 水印区域列表,
+    #        process_queue: 进度队列, cancel_event: 取消信号] | 输出: [无]# # # # # 
+    """
+    def _process_worker(self, video_path, output_path, watermark_areas, process_queue, cancel_event):
         try:
             # 创建去水印处理器
             remover = WatermarkRemover()
             
             # 处理视频
-            success = remover.remove_watermark(self.video_path, output_path, self.watermark_areas)
+            success = remover.remove_watermark(video_path, output_path, watermark_areas,
+                                               lambda count: process_queue.put(('progress', count)), cancel_event)
+            process_queue.put(('done', (success, output_path)))
             
+        except Exception as e:
+            process_queue.put(('error', str(e)))
+    
+    """
+    _poll_process_queue 功能说明:
+    # 界面线程每100毫秒读取处理队列，累计进度并刷新显示，收到结束消息后结束轮询
+    # 输入: [无] | 输出: [无]# # # # # 
+    """
+    def _poll_process_queue(self):
+        finished = None
+        while True:
+            try:
+                kind, value = self.process_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.processed_frames += value
+            else:
+                finished = (kind, value)
+        
+        self._update_progress()
+        
+        if finished is None:
+            self.root.after(100, self._poll_process_queue)
+        else:
+            self._finish_processing(*finished)
+    
+    """
+    _update_progress 功能说明:
+    # 更新进度条，按已处理帧数和耗时计算平均处理速度(帧/秒)和剩余时间
+    # 输入: [无] | 输出: [无]# # # # # 
+    """
+    def _update_progress(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return
+        
+        elapsed = time.perf_counter() - self.process_start_time
+        fps = self.processed_frames / elapsed if elapsed > 0 else 0.0
+        self.progress_bar.config(value=min(self.processed_frames, self.total_frames))
+        
+        if fps > 0 and self.total_frames > 0:
+            remaining = max(0, self.total_frames - self.processed_frames) / fps
+            minutes, seconds = divmod(int(remaining), 60)
+            self.progress_label.config(
+                text=f"{self.processed_frames}/{self.total_frames}帧  {fps:.1f}帧/秒  剩余 {minutes:02d}:{seconds:02d}")
+        elif self.processed_frames > 0:
+            self.progress_label.config(text=f"{self.processed_frames}帧  {fps:.1f}帧/秒")
+    
+    """
+    _finish_processing 功能说明:
+    # 处理结束后恢复按钮状态并提示结果(完成、取消或失败)
+    # 输入: [kind: 消息类型(done/error), value: 处理结果或错误信息] | 输出: [无]# # # # # 
+    """
+    def _finish_processing(self, kind, value):
+        self.process_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        cancelled = self.cancel_event is not None and self.cancel_event.is_set()
+        
+        if kind == 'error':
+            self.progress_label.config(text="处理失败")
+            messagebox.showerror("错误", f"处理过程中出现错误: {value}")
+        elif cancelled:
+            self.progress_bar.config(value=0)
+            self.progress_label.config(text="已取消")
+            messagebox.showinfo("已取消", "视频处理已取消，未完成的输出文件已删除")
+        else:
+            success, output_path = value
             if success:
+                elapsed = time.perf_counter() - self.process_start_time
+                self.progress_label.config(text=f"完成: {self.processed_frames}帧, 用时 {elapsed:.1f}秒")
                 messagebox.showinfo("成功", f"视频处理完成！\n输出文件: {output_path}")
             else:
+                self.progress_label.config(text="处理失败")
                 messagebox.showerror("错误", "视频处理失败")
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"处理过程中出现错误: {str(e)}")
+    
+    """
+    cancel_processing 功能说明:
+    # 设置取消信号，处理线程写完在途帧后停止并删除未完成的输出
+    # 输入: [无] | 输出: [无]# # # # # 
+    """
+    def cancel_processing(self):
+        if self.process_thread and self.process_thread.is_alive() and self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label.config(text="正在取消...")
     
     """
     on_key_press 功能说明:
@@ -535,13 +787,24 @@ class WatermarkGUI:
     
     """
     on_frame_scale 功能说明:
-    # 处理帧滑块变化事件
+    # 处理帧滑块变化事件，拖动时合并连续事件，界面空闲时只显示最后位置
     # 输入: [value: 滑块值] | 输出: [无，更新当前帧]# # # # # 
     """
     def on_frame_scale(self, value):
         if self.cap:
             self.current_frame = int(float(value))
-            self.update_frame()
+            if not self.scale_update_pending:
+                self.scale_update_pending = True
+                self.root.after_idle(self._apply_frame_scale)
+    
+    """
+    _apply_frame_scale 功能说明:
+    # 显示滑块最后停留的帧
+    # 输入: [无] | 输出: [无，更新当前帧]# # # # # 
+    """
+    def _apply_frame_scale(self):
+        self.scale_update_pending = False
+        self.update_frame()
     
     """
     show_preview_window 功能说明:
@@ -1,16 +1,78 @@
 ##########watermark_remover.py: [视频水印去除核心模块] ##################
 # 变更记录: [2025-01-27] @李祥光 [创建水印去除核心功能]########
+# 变更记录: [2026-10-18] @李祥光 [新增区域限定处理：仅在用户选择区域的扩展裁剪块上检测和修复]########
+# 变更记录: [2026-10-18] @李祥光 [新增静态水印模式：每个视频采样估计一次掩码并复用于所有帧]########
+# 变更记录: [2026-10-18] @李祥光 [逐帧处理改为可配置的并行帧流水线：解码线程→工作池→有序写出]########
+# 变更记录: [2026-10-18] @李祥光 [新增长视频分段并行处理，帧率改为浮点数保证输出时长正确]########
+# 变更记录: [2026-10-18] @李祥光 [新增未变化区域缓存：区域与参考帧一致时复用修复结果]########
+# 变更记录: [2026-10-18] @李祥光 [新增按批检测：多帧堆叠后一次完成灰度转换、阈值分割和掩码面积检查]########
+# 变更记录: [2026-10-18] @李祥光 [新增分阶段计时：解码、检测、形态学、膨胀、修复、写出耗时统计]########
+# 变更记录: [2026-10-18] @李祥光 [帧处理热路径复用按分辨率预分配的缓冲区，膨胀核在初始化时构建]########
+# 变更记录: [2026-10-18] @李祥光 [新增金字塔检测：在缩小的灰度图上检测水印，掩码放大回原分辨率]########
+# 变更记录: [2026-10-18] @李祥光 [新增自适应掩码模式：只在镜头切换或间隔N帧时重新检测掩码]########
+# 变更记录: [2026-10-18] @李祥光 [新增断点续处理：固定帧数分段写出并记录进度清单，重启后从最后完成的分段继续]########
+# 变更记录: [2026-10-18] @李祥光 [提取影响输出的处理参数，供结果缓存计算键值]########
+# 变更记录: [2026-10-18] @李祥光 [新增时域中值填充模式：从相邻帧无水印样本恢复背景，无干净样本处回退图像修复]########
+# 变更记录: [2026-10-18] @李祥光 [视频处理支持外部进度回调和取消信号，取消时删除未完成的输出]########
+# 变更记录: [2026-10-18] @李祥光 [新增定位索引：静态掩码采样、分段和断点续处理从最近关键帧定位并按时间戳校验帧号]########
+# 变更记录: [2026-10-18] @李祥光 [处理过程实时更新运行指标：已处理帧数、跳过帧数、修复次数、处理中和已结束的视频数]########
+# 变更记录: [2026-10-18] @李祥光 [新增按水印区域或首帧检测掩码估计每帧修复像素数，供耗时模型使用]########
+# 变更记录: [2026-10-18] @李祥光 [缩小检测的形态学核至少3x3，小核缩小后不再退化为1x1]########
+# 变更记录: [2026-10-18] @李祥光 [移除按批检测：各分辨率、预设和执行模式下实测均无提速]########
+# 变更记录: [2026-10-18] @李祥光 [处理异常时与取消一样删除未完成的输出文件]########
+# 变更记录: [2026-10-18] @李祥光 [整帧模式的区域缓存按掩码外接矩形的扩展裁剪块查找，不再逐帧哈希或比较整帧]########
+# 变更记录: [2026-10-18] @李祥光 [分段工作进程随分段统计返回跳过帧数和修复次数增量，合并到主进程指标]########
+# 变更记录: [2026-10-18] @李祥光 [掩码面积检查改用cv2.sumElems，代替按批检测中唯一有实测收益的部分]########
+# 变更记录: [2026-10-18] @李祥光 [区域裁剪块取自原帧，只贴回掩码内的像素，重叠区域不再用已修复的像素修复]########
 # 输入: [视频文件路径，配置参数] | 输出: [去水印后的视频文件]###############
 
 
 ###########################文件下的所有函数###########################
 """
+ProcessingCancelled：处理被取消时抛出的异常
 WatermarkRemover：水印去除器主类
+_get_buffer：获取当前线程按名称和尺寸复用的缓冲区
+release_buffers：释放当前线程的缓冲区
 remove_video_watermark：视频水印去除主方法
 detect_watermark_region：检测水印区域
+_detect_scaled：在缩小的灰度图上检测水印并放大掩码
 process_frame：处理单帧图像
 create_mask：创建水印掩码
 inpaint_frame：修复帧图像
+_fill_masked：按填充模式填充掩码像素(时域中值或图像修复)
+get_roi_padding：计算区域裁剪块的扩展边距
+get_area_boxes：计算水印区域及其扩展裁剪块坐标
+_process_frame_cached：整帧模式下按掩码外接矩形复用修复结果
+create_area_mask：仅在水印区域裁剪块上创建整帧掩码
+remove_watermark_frame：仅在指定水印区域内去除单帧水印
+_inpaint_area：在扩展裁剪块上修复单个水印区域
+_paste_masked：只将掩码内的修复像素贴回输出帧
+estimate_static_mask：采样多帧估计静态水印掩码
+process_segment：处理视频中指定帧区间并写出分段文件
+remove_video_watermark_segmented：分段并行处理整个视频并拼接
+_limit_reader：限制帧读取函数的最大帧数
+_cancellable_reader：收到取消信号后停止读取帧
+_progress_reporter：合并进度条、外部进度回调和已处理帧数指标
+_wait_segments：等待分段任务完成，收到取消信号时取消未开始的分段
+_load_seek_index：启用定位索引时加载或建立视频的定位索引
+_write_part：处理帧并写出分段文件
+_merge_segment_stats：累加分段统计
+_log_segment_stats：输出分段累计统计
+get_processing_settings：获取影响输出结果的处理参数
+measure_mask_pixels：估计每帧需要修复的像素数
+_checkpoint_settings：获取匹配检查点的处理参数
+get_checkpoint_info：查找未完成的检查点
+remove_video_watermark_checkpointed：分段写出检查点的断点续处理
+_process_checkpoint_serial：顺序处理未完成的检查点分段
+_process_checkpoint_parallel：多进程并行处理未完成的检查点分段
+_log_region_cache_stats：记录区域缓存命中统计
+_create_mask_cache：按掩码模式创建自适应掩码缓存
+_log_mask_refresh_stats：记录掩码刷新统计
+_create_temporal_fill：按填充模式创建时域填充器
+_log_temporal_fill_stats：记录时域填充统计
+get_stage_stats：获取最近一次处理的分阶段耗时统计
+from_config：根据配置字典创建水印去除器
+remove_watermark：按指定水印区域去除视频水印
 """
 ###########################文件下的所有函数###########################
 
@@ -19,51 +81,258 @@ inpaint_frame：修复帧图像
 flowchart TD
     A[WatermarkRemover初始化] --> B[remove_video_watermark]
     B --> C[读取视频]
+    C -->|静态模式| M[estimate_static_mask采样估计掩码]
+    C -->|启用定位索引| SI[_load_seek_index加载或建立定位索引]
+    SI --> M
+    SI --> P
+    F -->|自适应模式| X[MaskRefreshCache镜头切换或定时刷新掩码]
+    X --> G
+    M --> E
     C --> D[detect_watermark_region检测水印]
-    D --> E[逐帧处理]
+    D -->|detection_scale小于1| W[_detect_scaled缩小检测放大掩码]
+    D --> E[FramePipeline逐帧/并行处理]
     E --> F[process_frame处理帧]
     F --> G[create_mask创建掩码]
-    G --> H[inpaint_frame修复]
+    G --> H0[_fill_masked]
+    H0 -->|时域填充模式| TF[TemporalFill相邻帧中值填充]
+    TF -->|无干净样本| H
+    H0 --> H[inpaint_frame修复]
     H --> I[写入输出视频]
+    I --> V[StageTimer汇总分阶段耗时]
+    F -->|指定区域| J[remove_watermark_frame]
+    J -->|区域未变化| R[RegionCache复用修复结果]
+    J --> PM[_paste_masked只贴回掩码内像素]
+    F -->|整帧模式+区域缓存| FC[_process_frame_cached掩码外接矩形未变化时复用]
+    FC --> R
+    J --> K[get_area_boxes扩展裁剪块]
+    K --> G
+    M --> N[create_area_mask]
+    N --> K
+    L[remove_watermark] --> B
+    B -->|cancel_event| CA[_cancellable_reader停止读取]
+    E --> MT[_progress_reporter累计FRAMES_PROCESSED指标]
+    H --> MI[INPAINT_CALLS指标]
+    F -->|掩码面积不足| MS[FRAMES_SKIPPED指标]
+    P -->|计数器增量| MC[_merge_segment_stats合并到主进程指标]
+    MM[measure_mask_pixels首帧掩码面积] --> G
+    CA -->|已取消| CB[ProcessingCancelled删除未完成输出]
+    B -->|分段模式| O[remove_video_watermark_segmented]
+    O --> P[process_segment各进程处理分段]
+    P --> E
+    O --> Q[concat_video_segments拼接分段]
+    B -->|断点续处理| Y[remove_video_watermark_checkpointed]
+    Y --> Z[CheckpointManifest跳过已完成分段]
+    Z --> P
+    Z --> Q
 """
 #########mermaid格式说明所有函数的调用关系说明结束#########
 
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Optional
 import os
+import shutil
+import threading
 from tqdm import tqdm
 
+from utils.frame_pipeline import FramePipeline, EXECUTION_MODES
+from utils.video_segments import plan_segments, plan_fixed_segments, create_segment_dir, concat_video_segments
+from utils.checkpoint import CheckpointManifest
+from utils.region_cache import RegionCache
+from utils.mask_refresh import MaskRefreshCache
+from utils.temporal_fill import TemporalFill
+from utils.seek_index import SeekIndex, seek_reader
+from utils.logger import log_info
+from utils.metrics import (FRAMES_PROCESSED, FRAMES_SKIPPED, AREAS_SKIPPED, INPAINT_CALLS,
+                           VIDEOS_PROCESSED, VIDEOS_IN_PROGRESS, counter_deltas, merge_counters, snapshot_counters)
+from utils.stage_timer import StageTimer, NullStageTimer
+
+# 水印区域类型：(x1, y1, x2, y2)
+WatermarkArea = Tuple[int, int, int, int]
+
+# 支持的掩码模式(逐帧检测/每个视频估计一次/镜头切换时刷新)和静态掩码统计方式
+MASK_MODES = ('dynamic', 'static', 'adaptive')
+MASK_STATISTICS = ('median', 'intersection')
+FILL_MODES = ('inpaint', 'temporal')
+
+
+class ProcessingCancelled(Exception):
+    """
+    ProcessingCancelled 功能说明:
+    # 处理过程中收到取消信号时抛出，由remove_video_watermark捕获后删除未完成的输出并返回False
+    """
+
 
 class WatermarkRemover:
     """
     WatermarkRemover 功能说明:
     # 视频水印去除器，使用OpenCV实现水印检测和去除
-    # 输入: [threshold: int 阈值, kernel_size: int 核大小] | 输出: [WatermarkRemover实例]
+    # 输入: [threshold: int 阈值, kernel_size: int 核大小, iterations: int 形态学迭代次数,
+    #        mask_mode: str 掩码模式(dynamic逐帧检测/static静态估计), mask_samples: int 静态掩码采样帧数,
+    #        mask_statistic: str 静态掩码统计方式(median中值/intersection交集),
+    #        execution_mode: str 执行模式(serial/thread/process), workers: int 并行工作数(0为CPU核数),
+    #        segments: int 分段并行处理的分段数(小于2不分段), temp_dir: str 分段文件临时目录,
+    #        region_cache: bool 是否复用未变化区域的修复结果, region_cache_tolerance: float 区域平均绝对差容差(0为精确匹配),
+    #        stage_timing: bool 是否统计分阶段耗时,
+    #        detection_scale: float 检测缩放比例(小于1时在缩小的灰度图上检测),
+    #        mask_refresh_interval: int 自适应模式定时刷新间隔帧数(0只在镜头切换时刷新),
+    #        scene_cut_threshold: float 镜头切换判定阈值(缩小亮度图平均绝对差),
+    #        checkpoint_frames: int 断点续处理每段帧数(0不启用),
+    #        fill_mode: str 填充模式(inpaint逐帧图像修复/temporal相邻帧时域中值填充),
+    #        temporal_window: int 时域填充滑动窗口帧数,
+    #        seek_index: bool 是否使用持久化定位索引(采样、分段定位从最近关键帧解码并按时间戳校验)] | 输出: [WatermarkRemover实例]
     """
     
-    def __init__(self, threshold: int = 60, kernel_size: int = 5, iterations: int = 3):
+    def __init__(self, threshold: int = 60, kernel_size: int = 5, iterations: int = 3,
+                 mask_mode: str = 'dynamic', mask_samples: int = 15, mask_statistic: str = 'median',
+                 execution_mode: str = 'serial', workers: int = 0, segments: int = 0, temp_dir: str = "temp",
+                 region_cache: bool = False, region_cache_tolerance: float = 0.0,
+                 stage_timing: bool = True, detection_scale: float = 1.0,
+                 mask_refresh_interval: int = 60, scene_cut_threshold: float = 30.0,
+                 checkpoint_frames: int = 0, fill_mode: str = 'inpaint', temporal_window: int = 15,
+                 seek_index: bool = False):
+        if mask_mode not in MASK_MODES:
+            raise ValueError(f"未知的掩码模式: {mask_mode}")
+        if mask_statistic not in MASK_STATISTICS:
+            raise ValueError(f"未知的掩码统计方式: {mask_statistic}")
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"未知的执行模式: {execution_mode}")
+        if fill_mode not in FILL_MODES:
+            raise ValueError(f"未知的填充模式: {fill_mode}")
+        if not 0 < detection_scale <= 1:
+            raise ValueError(f"检测缩放比例应在(0, 1]范围内: {detection_scale}")
+        
         self.threshold = threshold
         self.kernel_size = kernel_size
         self.iterations = iterations
+        self.mask_mode = mask_mode
+        self.mask_samples = max(1, mask_samples)
+        self.mask_statistic = mask_statistic
+        self.mask_refresh_interval = mask_refresh_interval
+        self.scene_cut_threshold = scene_cut_threshold
+        self.fill_mode = fill_mode
+        self.temporal_window = max(1, temporal_window)
+        self.execution_mode = execution_mode
+        self.workers = workers
+        self.segments = segments
+        self.temp_dir = temp_dir
+        self.checkpoint_frames = max(0, checkpoint_frames)
+        self.seek_index = seek_index
+        self.region_cache = region_cache
+        self.region_cache_tolerance = region_cache_tolerance
+        self.stage_timer = StageTimer() if stage_timing else NullStageTimer()
         self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+        self.dilate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size + 2, kernel_size + 2))
+        
+        # 缩小检测时形态学核按比例缩小(保持奇数)，在原分辨率下覆盖的范围基本不变；
+        # 至少3x3，1x1的核做开闭运算不起作用，小核(如fast预设的3)缩小后仍能去除噪点
+        self.detection_scale = detection_scale
+        self.detection_kernel_size = max(3, round(kernel_size * detection_scale)) | 1
+        self.detection_kernel = cv2.getStructuringElement(
+            cv2.MORPH_ELLIPSE, (self.detection_kernel_size, self.detection_kernel_size))
+        
+        # 每个线程独立的缓冲区，按(名称, 尺寸)复用，线程池并行时互不干扰
+        self._buffers = threading.local()
+    
+    def __getstate__(self) -> dict:
+        """
+        __getstate__ 功能说明:
+        # 序列化到工作进程时不携带线程缓冲区
+        # 输入: [无] | 输出: [dict 实例状态]
+        """
+        state = self.__dict__.copy()
+        del state['_buffers']
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        """
+        __setstate__ 功能说明:
+        # 反序列化后重新创建线程缓冲区
+        # 输入: [state: dict 实例状态] | 输出: [无]
+        """
+        self.__dict__.update(state)
+        self._buffers = threading.local()
+    
+    def _get_buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        _get_buffer 功能说明:
+        # 获取当前线程中指定名称和尺寸的uint8缓冲区，首次使用时创建，之后每帧复用
+        # 返回的数组会被下一帧覆盖，需要保留时由调用方复制
+        # 输入: [name: str 缓冲区名称, shape: Tuple 尺寸] | 输出: [np.ndarray 缓冲区]
+        """
+        buffers = self._buffers.__dict__
+        key = (name, shape)
+        buffer = buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.uint8)
+            buffers[key] = buffer
+        return buffer
+    
+    def release_buffers(self) -> None:
+        """
+        release_buffers 功能说明:
+        # 释放当前线程的缓冲区，每个视频处理结束后调用，避免不同分辨率的缓冲区累积
+        # 输入: [无] | 输出: [无]
+        """
+        self._buffers.__dict__.clear()
+    
+    @classmethod
+    def from_config(cls, config: dict) -> 'WatermarkRemover':
+        """
+        from_config 功能说明:
+        # 根据配置字典创建水印去除器，缺省参数使用默认值
+        # 输入: [config: dict 配置参数字典] | 输出: [WatermarkRemover实例]
+        """
+        return cls(
+            threshold=config.get('threshold', 60),
+            kernel_size=config.get('kernel_size', 5),
+            iterations=config.get('iterations', 3),
+            mask_mode=config.get('mask_mode', 'dynamic'),
+            mask_samples=config.get('mask_samples', 15),
+            mask_statistic=config.get('mask_statistic', 'median'),
+            execution_mode=config.get('execution_mode', 'serial'),
+            workers=config.get('workers', 0),
+            segments=config.get('segments', 0),
+            temp_dir=config.get('temp_dir', "temp"),
+            region_cache=config.get('region_cache', False),
+            region_cache_tolerance=config.get('region_cache_tolerance', 0.0),
+            stage_timing=config.get('stage_timing', True),
+            detection_scale=config.get('detection_scale', 1.0),
+            mask_refresh_interval=config.get('mask_refresh_interval', 60),
+            scene_cut_threshold=config.get('scene_cut_threshold', 30.0),
+            checkpoint_frames=config.get('checkpoint_frames', 0),
+            fill_mode=config.get('fill_mode', 'inpaint'),
+            temporal_window=config.get('temporal_window', 15),
+            seek_index=config.get('seek_index', False)
+        )
     
     def detect_watermark_region(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         detect_watermark_region 功能说明:
-        # 检测帧中的水印区域
-        # 输入: [frame: np.ndarray 输入帧] | 输出: [Optional[np.ndarray] 水印掩码]
+        # 检测帧中的水印区域，灰度图和二值图写入按分辨率复用的缓冲区
+        # 输入: [frame: np.ndarray 输入帧] | 输出: [Optional[np.ndarray] 水印掩码(缓冲区，下一帧会被覆盖)]
         """
         try:
-            # 转换为灰度图
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if self.detection_scale < 1:
+                return self._detect_scaled(frame)
+            
+            shape = frame.shape[:2]
+            binary = self._get_buffer('binary', shape)
+            closed = self._get_buffer('closed', shape)
             
-            # 使用阈值分割检测水印
-            _, binary = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY)
+            with self.stage_timer.stage('detect'):
+                # 转换为灰度图
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=binary)
+                
+                # 使用阈值分割检测水印（原地）
+                cv2.threshold(binary, self.threshold, 255, cv2.THRESH_BINARY, dst=binary)
             
-            # 形态学操作去除噪声
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel, iterations=self.iterations)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, self.kernel, iterations=self.iterations)
+            with self.stage_timer.stage('morphology'):
+                # 形态学操作去除噪声
+                cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel, dst=closed, iterations=self.iterations)
+                cv2.morphologyEx(closed, cv2.MORPH_OPEN, self.kernel, dst=binary, iterations=self.iterations)
             
             return binary
             
@@ -71,11 +340,42 @@ class WatermarkRemover:
             print(f"❌ 水印检测失败: {str(e)}")
             return None
     
+    def _detect_scaled(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        _detect_scaled 功能说明:
+        # 金字塔检测：帧按detection_scale缩小后转灰度，做阈值分割和形态学操作(核同比缩小)，
+        # 再将掩码放大回原分辨率，覆盖到的像素全部保留，后续膨胀在原分辨率下进行
+        # 输入: [frame: np.ndarray 输入帧, dst: np.ndarray 输出数组(为空时使用缓冲区)] | 输出: [np.ndarray 原分辨率水印掩码]
+        """
+        height, width = frame.shape[:2]
+        small_size = (max(1, round(width * self.detection_scale)), max(1, round(height * self.detection_scale)))
+        small_frame = self._get_buffer('small_frame', small_size[::-1] + frame.shape[2:])
+        small = self._get_buffer('small', small_size[::-1])
+        small_closed = self._get_buffer('small_closed', small_size[::-1])
+        binary = dst if dst is not None else self._get_buffer('binary', (height, width))
+        
+        with self.stage_timer.stage('detect'):
+            # 先缩小再转灰度(少一次整帧写入)，然后阈值分割
+            cv2.resize(frame, small_size, dst=small_frame, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY, dst=small)
+            cv2.threshold(small, self.threshold, 255, cv2.THRESH_BINARY, dst=small)
+        
+        with self.stage_timer.stage('morphology'):
+            # 在缩小的掩码上做形态学操作，再放大回原分辨率
+            cv2.morphologyEx(small, cv2.MORPH_CLOSE, self.detection_kernel, dst=small_closed,
+                             iterations=self.iterations)
+            cv2.morphologyEx(small_closed, cv2.MORPH_OPEN, self.detection_kernel, dst=small,
+                             iterations=self.iterations)
+            cv2.resize(small, (width, height), dst=binary, interpolation=cv2.INTER_LINEAR)
+            cv2.threshold(binary, 0, 255, cv2.THRESH_BINARY, dst=binary)
+        
+        return binary
+    
     def create_mask(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         create_mask 功能说明:
         # 创建水印掩码用于修复
-        # 输入: [frame: np.ndarray 输入帧] | 输出: [Optional[np.ndarray] 修复掩码]
+        # 输入: [frame: np.ndarray 输入帧] | 输出: [Optional[np.ndarray] 修复掩码(缓冲区，下一帧会被覆盖)]
         """
         try:
             watermark_mask = self.detect_watermark_region(frame)
@@ -83,8 +383,9 @@ class WatermarkRemover:
                 return None
             
             # 扩展掩码区域以确保完全覆盖水印
-            dilate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (self.kernel_size + 2, self.kernel_size + 2))
-            mask = cv2.dilate(watermark_mask, dilate_kernel, iterations=2)
+            with self.stage_timer.stage('dilate'):
+                mask = self._get_buffer('mask', watermark_mask.shape)
+                cv2.dilate(watermark_mask, self.dilate_kernel, dst=mask, iterations=2)
             
             return mask
             
@@ -92,51 +393,788 @@ class WatermarkRemover:
             print(f"❌ 掩码创建失败: {str(e)}")
             return None
     
-    def inpaint_frame(self, frame: np.ndarray, mask: np.ndarray) -> Optional[np.ndarray]:
+    def inpaint_frame(self, frame: np.ndarray, mask: np.ndarray,
+                      dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
         """
         inpaint_frame 功能说明:
-        # 使用图像修复技术去除水印
-        # 输入: [frame: np.ndarray 输入帧, mask: np.ndarray 掩码] | 输出: [Optional[np.ndarray] 修复后的帧]
+        # 使用图像修复技术去除水印；提供dst时结果写入该数组，否则新建输出帧
+        # 输入: [frame: np.ndarray 输入帧, mask: np.ndarray 掩码, dst: np.ndarray 输出缓冲区] | 输出: [Optional[np.ndarray] 修复后的帧]
         """
         try:
             # 使用快速行进修复算法
-            inpainted = cv2.inpaint(frame, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
+            INPAINT_CALLS.inc()
+            with self.stage_timer.stage('inpaint'):
+                inpainted = cv2.inpaint(frame, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA, dst=dst)
             return inpainted
             
         except Exception as e:
             print(f"❌ 图像修复失败: {str(e)}")
             return frame  # 返回原始帧
     
-    def process_frame(self, frame: np.ndarray) -> np.ndarray:
+    def _fill_masked(self, key: object, image: np.ndarray, mask: np.ndarray,
+                     temporal_fill: Optional[TemporalFill] = None,
+                     dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        _fill_masked 功能说明:
+        # 填充掩码像素：提供时域填充器时先取相邻帧无水印样本的中值，只对没有干净样本的像素执行图像修复
+        # 输入: [key: object 区域键, image: np.ndarray 输入帧或裁剪块, mask: np.ndarray 掩码,
+        #        temporal_fill: TemporalFill 时域填充器, dst: np.ndarray 输出缓冲区] | 输出: [Optional[np.ndarray] 填充后的图像]
+        """
+        if temporal_fill is None:
+            return self.inpaint_frame(image, mask, dst=dst)
+        
+        with self.stage_timer.stage('temporal_fill'):
+            filled, remaining = temporal_fill.fill(key, image, mask)
+        if remaining is None:
+            return filled
+        return self.inpaint_frame(filled, remaining, dst=dst)
+    
+    def process_frame(self, frame: np.ndarray, watermark_areas: Optional[List[WatermarkArea]] = None,
+                      mask: Optional[np.ndarray] = None, region_cache: Optional[RegionCache] = None,
+                      mask_cache: Optional[MaskRefreshCache] = None,
+                      temporal_fill: Optional[TemporalFill] = None) -> np.ndarray:
         """
         process_frame 功能说明:
-        # 处理单帧图像，去除水印
-        # 输入: [frame: np.ndarray 输入帧] | 输出: [np.ndarray 处理后的帧]
+        # 处理单帧图像，去除水印；指定水印区域时只处理这些区域，提供掩码时跳过水印检测，提供缓存时复用未变化帧的结果
+        # 提供掩码缓存时只在镜头切换或到达刷新间隔时重新检测，其余帧复用缓存掩码并只修复掩码外接矩形
+        # 输入: [frame: np.ndarray 输入帧, watermark_areas: List[WatermarkArea] 水印区域列表,
+        #        mask: np.ndarray 预先计算的整帧掩码, region_cache: RegionCache 区域缓存,
+        #        mask_cache: MaskRefreshCache 自适应掩码缓存, temporal_fill: TemporalFill 时域填充器] | 输出: [np.ndarray 处理后的帧]
         """
+        if mask is None and mask_cache is not None:
+            if mask_cache.should_refresh(frame):
+                if watermark_areas:
+                    fresh_mask = self.create_area_mask(frame, watermark_areas)
+                else:
+                    # create_mask返回复用的缓冲区，缓存时需要保留副本
+                    fresh_mask = self.create_mask(frame)
+                    fresh_mask = None if fresh_mask is None else fresh_mask.copy()
+                mask_cache.update(fresh_mask)
+            if not mask_cache.areas:
+                FRAMES_SKIPPED.inc()
+                return frame
+            return self.remove_watermark_frame(frame, watermark_areas or mask_cache.areas, mask_cache.mask,
+                                               region_cache, temporal_fill)
+        
+        if watermark_areas:
+            return self.remove_watermark_frame(frame, watermark_areas, mask, region_cache, temporal_fill)
+        
+        if region_cache is not None:
+            return self._process_frame_cached(frame, mask, region_cache, temporal_fill)
+        
         try:
-            # 创建水印掩码
-            mask = self.create_mask(frame)
+            # 创建水印掩码（静态模式下直接复用预先估计的掩码）
+            if mask is None:
+                mask = self.create_mask(frame)
             if mask is None:
                 return frame
             
             # 检查掩码是否有效（是否检测到水印）
-            if np.sum(mask) < 100:  # 如果掩码区域太小，可能没有检测到水印
+            # cv2.sumElems与np.sum结果相同(缩小检测放大后的掩码含中间值)，720p整帧约15µs，np.sum约470µs
+            if cv2.sumElems(mask)[0] < 100:  # 如果掩码区域太小，可能没有检测到水印
+                FRAMES_SKIPPED.inc()
                 return frame
             
             # 修复水印区域
-            result = self.inpaint_frame(frame, mask)
+            result = self._fill_masked('frame', frame, mask, temporal_fill)
             return result if result is not None else frame
             
         except Exception as e:
             print(f"❌ 帧处理失败: {str(e)}")
             return frame
     
-    def remove_video_watermark(self, input_path: str, output_path: str) -> bool:
+    def _process_frame_cached(self, frame: np.ndarray, mask: Optional[np.ndarray], region_cache: RegionCache,
+                              temporal_fill: Optional[TemporalFill] = None) -> np.ndarray:
+        """
+        _process_frame_cached 功能说明:
+        # 整帧模式的区域缓存：只比较上次掩码外接矩形的扩展裁剪块(而不是整帧)，未变化时跳过检测，
+        # 把缓存的外接矩形修复结果贴回当前帧；未命中时整帧检测修复，并按新掩码的外接矩形更新缓存。
+        # 修复只改变掩码内的像素，扩展边距保证外接矩形内的检测结果只取决于裁剪块
+        # 输入: [frame: np.ndarray 输入帧, mask: np.ndarray 预先计算的整帧掩码, region_cache: RegionCache 区域缓存,
+        #        temporal_fill: TemporalFill 时域填充器] | 输出: [np.ndarray 处理后的帧]
+        """
+        # 尚无参考区域时按空裁剪块查找，计为未命中
+        (x1, y1, x2, y2), (cx1, cy1, cx2, cy2) = region_cache.get_box('frame') or ((0, 0, 0, 0), (0, 0, 0, 0))
+        cached = region_cache.lookup('frame', frame[cy1:cy2, cx1:cx2])
+        if cached is not None:
+            result = frame.copy()
+            self._paste_masked(result[y1:y2, x1:x2], cached, region_cache.get_mask('frame'))
+            return result
+        
+        if mask is None:
+            mask = self.create_mask(frame)
+        result = self.process_frame(frame, mask=mask, temporal_fill=temporal_fill)
+        if mask is None or result is frame:
+            return result
+        
+        x, y, w, h = cv2.boundingRect(mask)
+        height, width = frame.shape[:2]
+        boxes = self.get_area_boxes([(x, y, x + w, y + h)], width, height)
+        if boxes:
+            (x1, y1, x2, y2), (cx1, cy1, cx2, cy2) = boxes[0]
+            region_cache.store('frame', frame[cy1:cy2, cx1:cx2], result[y1:y2, x1:x2], boxes[0], mask[y1:y2, x1:x2])
+        return result
+    
+    def get_roi_padding(self) -> int:
+        """
+        get_roi_padding 功能说明:
+        # 计算区域裁剪块的扩展边距，保证形态学、膨胀和修复在裁剪块内与整帧处理结果一致
+        # 输入: [无] | 输出: [int 扩展边距像素数]
+        """
+        radius = self.kernel_size // 2
+        dilate_radius = (self.kernel_size + 2) // 2
+        if self.detection_scale < 1:
+            # 缩小检测时形态学半径按原分辨率折算，另加缩放插值影响的像素
+            scale_step = int(np.ceil(1 / self.detection_scale))
+            radius = (self.detection_kernel_size // 2) * scale_step + scale_step
+        # 闭运算和开运算各包含iterations次膨胀与腐蚀，掩码膨胀2次，修复半径3
+        return 4 * radius * self.iterations + 2 * dilate_radius + 3
+    
+    def get_area_boxes(self, watermark_areas: List[WatermarkArea], width: int,
+                       height: int) -> List[Tuple[WatermarkArea, WatermarkArea]]:
+        """
+        get_area_boxes 功能说明:
+        # 将水印区域限制在帧范围内，并计算每个区域的扩展裁剪块
+        # 输入: [watermark_areas: List[WatermarkArea] 水印区域列表, width: int 帧宽, height: int 帧高] | 输出: [List[Tuple] (区域坐标, 裁剪块坐标)列表]
+        """
+        padding = self.get_roi_padding()
+        boxes = []
+        
+        for area in watermark_areas:
+            x1, y1, x2, y2 = (int(v) for v in area)
+            x1, x2 = max(0, min(x1, x2)), min(width, max(x1, x2))
+            y1, y2 = max(0, min(y1, y2)), min(height, max(y1, y2))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            
+            # 扩展裁剪块，为形态学操作提供足够的上下文
+            crop_box = (max(0, x1 - padding), max(0, y1 - padding),
+                        min(width, x2 + padding), min(height, y2 + padding))
+            boxes.append(((x1, y1, x2, y2), crop_box))
+        
+        return boxes
+    
+    def create_area_mask(self, frame: np.ndarray, watermark_areas: List[WatermarkArea]) -> np.ndarray:
+        """
+        create_area_mask 功能说明:
+        # 仅在水印区域的扩展裁剪块上检测水印，生成区域外为0的整帧掩码
+        # 输入: [frame: np.ndarray 输入帧, watermark_areas: List[WatermarkArea] 水印区域列表] | 输出: [np.ndarray 整帧掩码]
+        """
+        height, width = frame.shape[:2]
+        full_mask = np.zeros((height, width), dtype=np.uint8)
+        
+        for (x1, y1, x2, y2), (cx1, cy1, cx2, cy2) in self.get_area_boxes(watermark_areas, width, height):
+            mask = self.create_mask(frame[cy1:cy2, cx1:cx2])
+            if mask is None:
+                continue
+            full_mask[y1:y2, x1:x2] = mask[y1 - cy1:y2 - cy1, x1 - cx1:x2 - cx1]
+        
+        return full_mask
+    
+    def remove_watermark_frame(self, frame: np.ndarray, watermark_areas: List[WatermarkArea],
+                               mask: Optional[np.ndarray] = None,
+                               region_cache: Optional[RegionCache] = None,
+                               temporal_fill: Optional[TemporalFill] = None) -> np.ndarray:
+        """
+        remove_watermark_frame 功能说明:
+        # 仅在原帧水印区域的扩展裁剪块上执行检测、膨胀和修复，再将区域内掩码覆盖的修复像素贴回输出帧
+        # 提供区域缓存时，扩展裁剪块与参考帧一致则直接复用上次的修复结果
+        # 输入: [frame: np.ndarray 输入帧, watermark_areas: List[WatermarkArea] 水印区域列表(x1, y1, x2, y2),
+        #        mask: np.ndarray 预先计算的整帧掩码(为空时逐区域检测), region_cache: RegionCache 区域缓存,
+        #        temporal_fill: TemporalFill 时域填充器] | 输出: [np.ndarray 处理后的帧]
+        """
+        try:
+            height, width = frame.shape[:2]
+            result = frame.copy()
+            
+            for index, ((x1, y1, x2, y2), (cx1, cy1, cx2, cy2)) in enumerate(
+                    self.get_area_boxes(watermark_areas, width, height)):
+                # 裁剪块取自原帧：扩展区域重叠时，后处理的区域不以先处理区域已修复的像素作为输入
+                crop = frame[cy1:cy2, cx1:cx2].copy()
+                rx1, ry1 = x1 - cx1, y1 - cy1
+                rx2, ry2 = x2 - cx1, y2 - cy1
+                
+                # 扩展区域未变化时复用修复结果
+                if region_cache is not None:
+                    cached = region_cache.lookup(index, crop)
+                    if cached is not None:
+                        self._paste_masked(result[y1:y2, x1:x2], cached, region_cache.get_mask(index))
+                        continue
+                
+                patch, patch_mask = self._inpaint_area(crop, mask, (cx1, cy1, cx2, cy2), (rx1, ry1, rx2, ry2),
+                                                       index, temporal_fill)
+                if region_cache is not None:
+                    region_cache.store(index, crop, patch, mask=patch_mask)
+                # 只贴回掩码内的像素，不覆盖其他区域已修复的像素
+                self._paste_masked(result[y1:y2, x1:x2], patch, patch_mask)
+            
+            return result
+            
+        except Exception as e:
+            print(f"❌ 区域帧处理失败: {str(e)}")
+            return frame
+    
+    def _inpaint_area(self, crop: np.ndarray, mask: Optional[np.ndarray], crop_box: WatermarkArea,
+                      area_box: WatermarkArea, key: object = None,
+                      temporal_fill: Optional[TemporalFill] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        _inpaint_area 功能说明:
+        # 在扩展裁剪块上检测(或截取预先计算的掩码)并修复，返回水印区域内的修复结果和被修复像素的掩码
+        # 输入: [crop: np.ndarray 扩展裁剪块, mask: np.ndarray 整帧掩码, crop_box: 裁剪块坐标,
+        #        area_box: 区域在裁剪块内的坐标, key: object 区域键(时域填充按区域保存样本),
+        #        temporal_fill: TemporalFill 时域填充器] | 输出: [Tuple 区域修复结果, 区域掩码(未修复时为None，缓冲区)]
+        """
+        cx1, cy1, cx2, cy2 = crop_box
+        rx1, ry1, rx2, ry2 = area_box
+        
+        crop_mask = self.create_mask(crop) if mask is None else mask[cy1:cy2, cx1:cx2]
+        if crop_mask is None:
+            return crop[ry1:ry2, rx1:rx2], None
+        
+        # 只保留用户选择区域内的掩码
+        area_mask = self._get_buffer('area_mask', crop_mask.shape)
+        area_mask.fill(0)
+        area_mask[ry1:ry2, rx1:rx2] = crop_mask[ry1:ry2, rx1:rx2]
+        
+        # 检查掩码是否有效（是否检测到水印）
+        if cv2.sumElems(area_mask)[0] < 100:
+            AREAS_SKIPPED.inc()
+            return crop[ry1:ry2, rx1:rx2], None
+        
+        # 区域修复结果由调用方立即贴回(缓存时复制)，输出可写入缓冲区
+        inpainted = self._fill_masked(key, crop, area_mask, temporal_fill,
+                                      dst=self._get_buffer('inpaint', crop.shape))
+        if inpainted is None:
+            return crop[ry1:ry2, rx1:rx2], None
+        return inpainted[ry1:ry2, rx1:rx2], area_mask[ry1:ry2, rx1:rx2]
+    
+    @staticmethod
+    def _paste_masked(dst: np.ndarray, patch: np.ndarray, mask: Optional[np.ndarray]) -> None:
+        """
+        _paste_masked 功能说明:
+        # 只将掩码非0处的修复像素写入dst，掩码为None(未修复)时不写入
+        # 输入: [dst: np.ndarray 输出帧中的区域, patch: np.ndarray 区域修复结果, mask: np.ndarray 区域掩码] | 输出: [无]
+        """
+        if mask is not None:
+            cv2.copyTo(patch, mask, dst)
+    
+    def estimate_static_mask(self, input_path: str,
+                             watermark_areas: Optional[List[WatermarkArea]] = None) -> Optional[np.ndarray]:
+        """
+        estimate_static_mask 功能说明:
+        # 在视频中均匀采样若干帧，用时间中值或逐帧掩码交集估计一个稳定的静态水印掩码
+        # 输入: [input_path: str 输入视频路径, watermark_areas: List[WatermarkArea] 水印区域列表] | 输出: [Optional[np.ndarray] 整帧掩码]
+        """
+        cap = cv2.VideoCapture(input_path)
+        try:
+            if not cap.isOpened():
+                print(f"❌ 无法打开视频文件: {input_path}")
+                return None
+            
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            sample_count = min(self.mask_samples, max(total_frames, 1))
+            indices = np.unique(np.linspace(0, max(total_frames - 1, 0), sample_count).astype(int))
+            
+            # 读取采样帧，有定位索引时从最近关键帧解码，相邻采样点在同一GOP内时直接向后解码
+            seek_index = self._load_seek_index(input_path)
+            samples = []
+            position = 0
+            for index in indices:
+                if seek_index is not None:
+                    ret, frame = seek_index.read(cap, int(index), position)
+                    position = int(index) + 1 if ret else None
+                else:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+                    ret, frame = cap.read()
+                if ret:
+                    samples.append(frame)
+            
+            if not samples:
+                print(f"❌ 静态掩码采样失败: {input_path}")
+                return None
+            
+            def build_mask(frame: np.ndarray) -> Optional[np.ndarray]:
+                if watermark_areas:
+                    return self.create_area_mask(frame, watermark_areas)
+                # create_mask返回复用的缓冲区，静态掩码需要保留副本
+                mask = self.create_mask(frame)
+                return None if mask is None else mask.copy()
+            
+            if self.mask_statistic == 'median':
+                # 时间中值帧去除运动内容，只保留静止的水印
+                median_frame = np.median(np.stack(samples), axis=0).astype(np.uint8)
+                mask = build_mask(median_frame)
+            else:
+                # 逐帧掩码取交集，只保留每个采样帧都检测到的像素
+                mask = None
+                for frame in samples:
+                    frame_mask = build_mask(frame)
+                    if frame_mask is None:
+                        continue
+                    mask = frame_mask if mask is None else cv2.bitwise_and(mask, frame_mask)
+            
+            if mask is not None:
+                print(f"🎯 静态水印掩码估计完成: 采样 {len(samples)} 帧, 掩码像素 {cv2.countNonZero(mask)}")
+            return mask
+            
+        except Exception as e:
+            print(f"❌ 静态掩码估计失败: {str(e)}")
+            return None
+        
+        finally:
+            cap.release()
+    
+    def process_segment(self, input_path: str, part_path: str, start_frame: int, end_frame: Optional[int],
+                        fps: float, frame_size: Tuple[int, int],
+                        watermark_areas: Optional[List[WatermarkArea]] = None,
+                        mask: Optional[np.ndarray] = None) -> Tuple[int, Dict[str, object]]:
+        """
+        process_segment 功能说明:
+        # 定位到起始帧，解码、处理并编码[start_frame, end_frame)区间的帧到分段文件，end_frame为空时处理到视频结尾
+        # 输入: [input_path: str 输入视频路径, part_path: str 分段文件路径, start_frame: int 起始帧, end_frame: int 结束帧,
+        #        fps: float 帧率, frame_size: Tuple[int, int] (宽, 高), watermark_areas: List[WatermarkArea] 水印区域列表,
+        #        mask: np.ndarray 静态掩码] | 输出: [Tuple[int, Dict] 写出的帧数, 区域缓存统计、分段计时器和计数器增量]
+        """
+        cap = cv2.VideoCapture(input_path)
+        try:
+            if not cap.isOpened():
+                raise IOError(f"无法打开视频文件: {input_path}")
+            
+            self.stage_timer.reset()
+            counters = snapshot_counters()
+            segment_reader = seek_reader(cap, start_frame, self._load_seek_index(input_path))
+            read_frame = self._limit_reader(self.stage_timer.wrap('decode', segment_reader),
+                                            None if end_frame is None else end_frame - start_frame)
+            
+            # 分段已在独立进程中并行，段内顺序处理，每段使用独立的区域缓存、掩码缓存和时域填充器
+            region_cache = RegionCache(self.region_cache_tolerance) if self.region_cache else None
+            mask_cache = self._create_mask_cache() if mask is None else None
+            temporal_fill = self._create_temporal_fill()
+            frame_count = self._write_part(read_frame, part_path, fps, frame_size, watermark_areas, mask,
+                                           'serial', region_cache, mask_cache, temporal_fill=temporal_fill)
+            return frame_count, {
+                'region_cache': region_cache.get_stats() if region_cache else {},
+                'mask_refresh': mask_cache.get_stats() if mask_cache else {},
+                'temporal_fill': temporal_fill.get_stats() if temporal_fill else {},
+                'stage_timer': self.stage_timer,
+                'counters': counter_deltas(counters)
+            }
+            
+        finally:
+            cap.release()
+            self.release_buffers()
+    
+    @staticmethod
+    def _limit_reader(read_func, frame_limit: Optional[int]):
+        """
+        _limit_reader 功能说明:
+        # 包装帧读取函数，最多读取frame_limit帧后返回失败，frame_limit为空时不限制
+        # 输入: [read_func: Callable 帧读取函数, frame_limit: int 最大帧数] | 输出: [Callable 帧读取函数]
+        """
+        if frame_limit is None:
+            return read_func
+        
+        remaining = [frame_limit]
+        
+        def read_limited():
+            if remaining[0] <= 0:
+                return False, None
+            remaining[0] -= 1
+            return read_func()
+        
+        return read_limited
+    
+    @staticmethod
+    def _cancellable_reader(read_func, cancel_event: Optional[threading.Event]):
+        """
+        _cancellable_reader 功能说明:
+        # 包装帧读取函数，收到取消信号后返回失败，流水线写完在途帧后正常结束；cancel_event为空时不包装
+        # 输入: [read_func: Callable 帧读取函数, cancel_event: threading.Event 取消信号] | 输出: [Callable 帧读取函数]
+        """
+        if cancel_event is None:
+            return read_func
+        
+        def read_cancellable():
+            if cancel_event.is_set():
+                return False, None
+            return read_func()
+        
+        return read_cancellable
+    
+    @staticmethod
+    def _progress_reporter(pbar, progress_callback: Optional[Callable[[int], None]]):
+        """
+        _progress_reporter 功能说明:
+        # 合并命令行进度条和外部进度回调(如GUI)，参数均为新增帧数；在主进程中调用，
+        # 各执行模式(含分段和断点续处理的工作进程)写出的帧都实时计入已处理帧数指标
+        # 输入: [pbar: tqdm 进度条, progress_callback: Callable 外部进度回调] | 输出: [Callable 进度回调]
+        """
+        def report(count: int) -> None:
+            FRAMES_PROCESSED.inc(count)
+            pbar.update(count)
+            if progress_callback is not None:
+                progress_callback(count)
+        
+        return report
+    
+    @staticmethod
+    def _wait_segments(futures, cancel_event: Optional[threading.Event]):
+        """
+        _wait_segments 功能说明:
+        # 按完成顺序逐个返回分段任务，期间定期检查取消信号；取消时撤销尚未开始的分段并抛出ProcessingCancelled，
+        # 正在工作进程中处理的分段在退出进程池时完成
+        # 输入: [futures: 分段任务集合, cancel_event: threading.Event 取消信号] | 输出: [Iterator[Future] 已完成的分段任务]
+        """
+        remaining = set(futures)
+        while remaining:
+            if cancel_event is not None and cancel_event.is_set():
+                for future in remaining:
+                    future.cancel()
+                raise ProcessingCancelled()
+            done, remaining = wait(remaining, timeout=0.2, return_when=FIRST_COMPLETED)
+            yield from done
+    
+    def _write_part(self, read_func, part_path: str, fps: float, frame_size: Tuple[int, int],
+                    watermark_areas: Optional[List[WatermarkArea]], mask: Optional[np.ndarray],
+                    execution_mode: str, region_cache: Optional[RegionCache] = None,
+                    mask_cache: Optional[MaskRefreshCache] = None, progress_callback=None,
+                    temporal_fill: Optional[TemporalFill] = None) -> int:
+        """
+        _write_part 功能说明:
+        # 从read_func读取帧，按指定执行模式处理后编码写入分段文件
+        # 输入: [read_func: Callable 帧读取函数, part_path: str 分段文件路径, fps: float 帧率, frame_size: Tuple (宽, 高),
+        #        watermark_areas: 水印区域列表, mask: 静态掩码, execution_mode: str 执行模式, region_cache: 区域缓存,
+        #        mask_cache: 自适应掩码缓存, progress_callback: Callable 进度回调,
+        #        temporal_fill: 时域填充器] | 输出: [int 写出的帧数]
+        """
+        out = cv2.VideoWriter(part_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame_size)
+        try:
+            if not out.isOpened():
+                raise IOError(f"无法创建分段文件: {part_path}")
+            
+            process_func = partial(self.process_frame, watermark_areas=watermark_areas, mask=mask,
+                                   region_cache=region_cache, mask_cache=mask_cache, temporal_fill=temporal_fill)
+            pipeline = FramePipeline(process_func, self.workers, execution_mode)
+            return pipeline.run(read_func, self.stage_timer.wrap('write', out.write), progress_callback)
+            
+        finally:
+            out.release()
+    
+    def remove_video_watermark_segmented(self, input_path: str, output_path: str, fps: float,
+                                         frame_size: Tuple[int, int], total_frames: int,
+                                         watermark_areas: Optional[List[WatermarkArea]] = None,
+                                         mask: Optional[np.ndarray] = None,
+                                         progress_callback: Optional[Callable[[int], None]] = None,
+                                         cancel_event: Optional[threading.Event] = None) -> int:
+        """
+        remove_video_watermark_segmented 功能说明:
+        # 将视频按帧区间分段，每个工作进程独立定位、解码、处理并编码自己的分段文件，最后按顺序拼接为输出视频
+        # 收到取消信号时不再启动新分段，抛出ProcessingCancelled
+        # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径, fps: float 帧率, frame_size: Tuple[int, int] (宽, 高),
+        #        total_frames: int 总帧数, watermark_areas: List[WatermarkArea] 水印区域列表, mask: np.ndarray 静态掩码,
+        #        progress_callback: Callable 进度回调(参数为新增帧数), cancel_event: threading.Event 取消信号] | 输出: [int 输出视频帧数]
+        """
+        segments = plan_segments(total_frames, self.segments)
+        segment_dir = create_segment_dir(self.temp_dir)
+        part_paths = [os.path.join(segment_dir, f"part_{i:03d}.mp4") for i in range(len(segments))]
+        max_workers = min(len(segments), self.workers if self.workers > 0 else (os.cpu_count() or 1))
+        
+        print(f"🧩 分段并行处理: {len(segments)} 段, {max_workers} 个工作进程")
+        
+        try:
+            processed_count = 0
+            totals: Dict[str, int] = {}
+            with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                    tqdm(total=total_frames, desc="处理进度", unit="帧") as pbar:
+                report = self._progress_reporter(pbar, progress_callback)
+                futures = []
+                for i, (start_frame, end_frame) in enumerate(segments):
+                    # 最后一段处理到视频结尾，避免元数据帧数偏小时丢帧
+                    segment_end = None if i == len(segments) - 1 else end_frame
+                    futures.append(executor.submit(
+                        self.process_segment, input_path, part_paths[i], start_frame, segment_end,
+                        fps, frame_size, watermark_areas, mask
+                    ))
+                
+                for future in self._wait_segments(futures, cancel_event):
+                    segment_count, segment_stats = future.result()
+                    processed_count += segment_count
+                    self._merge_segment_stats(totals, segment_stats)
+                    report(segment_count)
+            
+            self._log_segment_stats(totals)
+            
+            # 按顺序拼接分段文件
+            with self.stage_timer.stage('concat'):
+                frame_count = concat_video_segments(part_paths, output_path, fps, frame_size)
+            if frame_count != processed_count:
+                print(f"⚠️  拼接后帧数 {frame_count} 与处理帧数 {processed_count} 不一致")
+            
+            return frame_count
+            
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    def _merge_segment_stats(self, totals: Dict[str, int], segment_stats: Dict[str, object]) -> None:
+        """
+        _merge_segment_stats 功能说明:
+        # 累加工作进程返回的区域缓存、掩码刷新统计，合并分段计时器，并将跳过帧数和修复次数增量计入本进程指标
+        # 输入: [totals: Dict 累计统计(原地更新), segment_stats: Dict process_segment返回的统计] | 输出: [无]
+        """
+        for prefix, stats in (('cache_', segment_stats['region_cache']), ('refresh_', segment_stats['mask_refresh']),
+                              ('fill_', segment_stats['temporal_fill'])):
+            for key, value in stats.items():
+                if key.endswith('rate'):
+                    continue
+                totals[prefix + key] = totals.get(prefix + key, 0) + value
+        self.stage_timer.merge(segment_stats['stage_timer'])
+        merge_counters(segment_stats['counters'])
+    
+    def _log_segment_stats(self, totals: Dict[str, int]) -> None:
+        """
+        _log_segment_stats 功能说明:
+        # 输出各分段累计的区域缓存、掩码刷新和时域填充统计
+        # 输入: [totals: Dict 累计统计] | 输出: [无]
+        """
+        if self.region_cache:
+            self._log_region_cache_stats(totals.get('cache_hits', 0), totals.get('cache_misses', 0))
+        refresh_stats = {key[len('refresh_'):]: value for key, value in totals.items() if key.startswith('refresh_')}
+        if refresh_stats:
+            self._log_mask_refresh_stats(refresh_stats)
+        fill_stats = {key[len('fill_'):]: value for key, value in totals.items() if key.startswith('fill_')}
+        if fill_stats:
+            self._log_temporal_fill_stats(fill_stats)
+    
+    def get_processing_settings(self, watermark_areas: Optional[List[WatermarkArea]] = None) -> Dict[str, object]:
+        """
+        get_processing_settings 功能说明:
+        # 影响输出结果的全部处理参数，用于判断检查点和结果缓存能否复用
+        # 输入: [watermark_areas: List[WatermarkArea] 用户指定的水印区域] | 输出: [Dict 处理参数]
+        """
+        return {
+            'threshold': self.threshold,
+            'kernel_size': self.kernel_size,
+            'iterations': self.iterations,
+            'mask_mode': self.mask_mode,
+            'mask_samples': self.mask_samples,
+            'mask_statistic': self.mask_statistic,
+            'detection_scale': self.detection_scale,
+            'mask_refresh_interval': self.mask_refresh_interval,
+            'scene_cut_threshold': self.scene_cut_threshold,
+            'region_cache_tolerance': self.region_cache_tolerance if self.region_cache else None,
+            'fill_mode': self.fill_mode,
+            'temporal_window': self.temporal_window if self.fill_mode == 'temporal' else None,
+            'watermark_areas': [list(area) for area in watermark_areas] if watermark_areas else None
+        }
+    
+    def measure_mask_pixels(self, input_path: str, watermark_areas: Optional[List[WatermarkArea]] = None) -> int:
+        """
+        measure_mask_pixels 功能说明:
+        # 估计每帧需要修复的像素数：指定水印区域时为区域面积之和，否则为首帧检测掩码(膨胀后)的像素数，读取失败时为0
+        # 输入: [input_path: str 输入视频路径, watermark_areas: List[WatermarkArea] 水印区域列表] | 输出: [int 每帧修复像素数]
+        """
+        if watermark_areas:
+            return sum(max(0, x2 - x1) * max(0, y2 - y1) for x1, y1, x2, y2 in watermark_areas)
+        
+        cap = cv2.VideoCapture(input_path)
+        try:
+            ret, frame = cap.read()
+        finally:
+            cap.release()
+        if not ret:
+            return 0
+        mask = self.create_mask(frame)
+        return int(cv2.countNonZero(mask)) if mask is not None else 0
+    
+    def _checkpoint_settings(self, watermark_areas: Optional[List[WatermarkArea]]) -> Dict[str, object]:
+        """
+        _checkpoint_settings 功能说明:
+        # 检查点指纹使用的参数：处理参数加分段帧数，参数变化时不复用旧检查点
+        # 输入: [watermark_areas: List[WatermarkArea] 用户指定的水印区域] | 输出: [Dict 处理参数]
+        """
+        return {**self.get_processing_settings(watermark_areas), 'checkpoint_frames': self.checkpoint_frames}
+    
+    def get_checkpoint_info(self, input_path: str, output_path: str,
+                            watermark_areas: Optional[List[WatermarkArea]] = None) -> Optional[Dict[str, object]]:
+        """
+        get_checkpoint_info 功能说明:
+        # 查找当前参数下输入视频未完成的检查点，用于在处理前提示将从断点继续
+        # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径,
+        #        watermark_areas: List[WatermarkArea] 水印区域列表] | 输出: [Optional[Dict] 已完成帧数、总帧数、检查点目录]
+        """
+        if self.checkpoint_frames <= 0:
+            return None
+        
+        manifest = CheckpointManifest.find(self.temp_dir, input_path, output_path,
+                                           self._checkpoint_settings(watermark_areas))
+        if manifest is None:
+            return None
+        return {
+            'completed_frames': manifest.completed_frames(),
+            'total_frames': manifest.data['video']['total_frames'],
+            'checkpoint_dir': manifest.checkpoint_dir
+        }
+    
+    def remove_video_watermark_checkpointed(self, input_path: str, output_path: str, fps: float,
+                                            frame_size: Tuple[int, int], total_frames: int,
+                                            watermark_areas: Optional[List[WatermarkArea]] = None,
+                                            mask: Optional[np.ndarray] = None,
+                                            requested_areas: Optional[List[WatermarkArea]] = None,
+                                            progress_callback: Optional[Callable[[int], None]] = None,
+                                            cancel_event: Optional[threading.Event] = None) -> int:
+        """
+        remove_video_watermark_checkpointed 功能说明:
+        # 断点续处理：按checkpoint_frames帧分段写出到temp_dir下的检查点目录，每完成一段更新进度清单；
+        # 重新运行时跳过已完成的分段，只定位、解码和修复剩余分段，全部完成后拼接输出并删除检查点
+        # 配置分段数时剩余分段由多个工作进程并行处理，否则顺序解码并按执行模式处理；
+        # 收到取消信号时丢弃未写完的分段并抛出ProcessingCancelled，已完成的分段保留供下次继续
+        # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径, fps: float 帧率, frame_size: Tuple (宽, 高),
+        #        total_frames: int 总帧数, watermark_areas: 实际处理的水印区域, mask: 静态掩码,
+        #        requested_areas: 用户指定的水印区域(用于匹配检查点), progress_callback: Callable 进度回调,
+        #        cancel_event: threading.Event 取消信号] | 输出: [int 输出视频帧数]
+        """
+        segments = plan_fixed_segments(total_frames, self.checkpoint_frames)
+        manifest = CheckpointManifest.open(
+            self.temp_dir, input_path, output_path, self._checkpoint_settings(requested_areas),
+            {'fps': fps, 'frame_size': list(frame_size), 'total_frames': total_frames,
+             'segment_frames': self.checkpoint_frames}
+        )
+        pending = [i for i in range(len(segments)) if not manifest.is_complete(i)]
+        resumed_frames = manifest.completed_frames()
+        
+        if len(pending) < len(segments):
+            message = (f"♻️  发现检查点: 已完成 {len(segments) - len(pending)}/{len(segments)} 段 "
+                       f"({resumed_frames} 帧)，从第 {segments[pending[0]][0] if pending else total_frames} 帧继续")
+            print(message)
+            log_info(message)
+        else:
+            print(f"💾 断点续处理: {len(segments)} 段, 每段 {self.checkpoint_frames} 帧, 检查点目录 {manifest.checkpoint_dir}")
+        
+        if progress_callback is not None and resumed_frames:
+            progress_callback(resumed_frames)
+        with tqdm(total=total_frames, initial=resumed_frames, desc="处理进度", unit="帧") as pbar:
+            report = self._progress_reporter(pbar, progress_callback)
+            if self.segments > 1 and len(pending) > 1:
+                self._process_checkpoint_parallel(manifest, segments, pending, input_path, fps, frame_size,
+                                                  watermark_areas, mask, report, cancel_event)
+            else:
+                self._process_checkpoint_serial(manifest, segments, pending, input_path, fps, frame_size,
+                                                watermark_areas, mask, report, cancel_event)
+        
+        # 全部分段完成后按顺序拼接，成功后删除检查点
+        with self.stage_timer.stage('concat'):
+            frame_count = concat_video_segments([manifest.part_path(i) for i in range(len(segments))],
+                                                output_path, fps, frame_size)
+        manifest.remove()
+        return frame_count
+    
+    def _process_checkpoint_serial(self, manifest: CheckpointManifest, segments: List[Tuple[int, int]],
+                                   pending: List[int], input_path: str, fps: float, frame_size: Tuple[int, int],
+                                   watermark_areas: Optional[List[WatermarkArea]], mask: Optional[np.ndarray],
+                                   report: Callable[[int], None],
+                                   cancel_event: Optional[threading.Event] = None) -> None:
+        """
+        _process_checkpoint_serial 功能说明:
+        # 单个解码器顺序处理未完成的分段，只在跳过已完成分段时定位(启用定位索引时从最近关键帧解码)；每段写完后立即记录到进度清单，
+        # 取消时删除被截断的分段文件，不记录到进度清单
+        # 输入: [manifest: 进度清单, segments: 分段列表, pending: 未完成分段序号, input_path: 输入视频路径,
+        #        fps: 帧率, frame_size: (宽, 高), watermark_areas: 水印区域列表, mask: 静态掩码,
+        #        report: Callable 进度回调, cancel_event: threading.Event 取消信号] | 输出: [无]
+        """
+        cap = cv2.VideoCapture(input_path)
+        try:
+            if not cap.isOpened():
+                raise IOError(f"无法打开视频文件: {input_path}")
+            
+            # 区域缓存和自适应掩码缓存依赖帧顺序，只在顺序模式下启用
+            serial = self.execution_mode == 'serial'
+            region_cache = RegionCache(self.region_cache_tolerance) if self.region_cache and serial else None
+            mask_cache = self._create_mask_cache() if mask is None and serial else None
+            temporal_fill = self._create_temporal_fill() if serial else None
+            seek_index = self._load_seek_index(input_path)
+            
+            position = 0
+            for index in pending:
+                start_frame, end_frame = segments[index]
+                segment_reader = seek_reader(cap, start_frame, seek_index, position)
+                read_frame = self._cancellable_reader(self.stage_timer.wrap('decode', segment_reader), cancel_event)
+                position = start_frame
+                
+                # 最后一段处理到视频结尾，避免元数据帧数偏小时丢帧
+                frame_limit = None if index == len(segments) - 1 else end_frame - start_frame
+                frame_count = self._write_part(self._limit_reader(read_frame, frame_limit),
+                                               manifest.partial_path(index), fps, frame_size, watermark_areas,
+                                               mask, self.execution_mode, region_cache, mask_cache, report,
+                                               temporal_fill)
+                # 取消前已写完全部帧的分段照常记录，只丢弃被截断的分段
+                if cancel_event is not None and cancel_event.is_set() and frame_count != frame_limit:
+                    if os.path.exists(manifest.partial_path(index)):
+                        os.remove(manifest.partial_path(index))
+                    raise ProcessingCancelled()
+                manifest.mark_complete(index, start_frame, frame_count)
+                position += frame_count
+            
+            if region_cache is not None:
+                self._log_region_cache_stats(region_cache.hits, region_cache.misses)
+            if mask_cache is not None:
+                self._log_mask_refresh_stats(mask_cache.get_stats())
+            if temporal_fill is not None:
+                self._log_temporal_fill_stats(temporal_fill.get_stats())
+            
+        finally:
+            cap.release()
+    
+    def _process_checkpoint_parallel(self, manifest: CheckpointManifest, segments: List[Tuple[int, int]],
+                                     pending: List[int], input_path: str, fps: float, frame_size: Tuple[int, int],
+                                     watermark_areas: Optional[List[WatermarkArea]], mask: Optional[np.ndarray],
+                                     report: Callable[[int], None],
+                                     cancel_event: Optional[threading.Event] = None) -> None:
+        """
+        _process_checkpoint_parallel 功能说明:
+        # 多个工作进程并行处理未完成的分段，主进程在每段完成时记录到进度清单；取消时不再启动新分段
+        # 输入: [manifest: 进度清单, segments: 分段列表, pending: 未完成分段序号, input_path: 输入视频路径,
+        #        fps: 帧率, frame_size: (宽, 高), watermark_areas: 水印区域列表, mask: 静态掩码,
+        #        report: Callable 进度回调, cancel_event: threading.Event 取消信号] | 输出: [无]
+        """
+        max_workers = min(len(pending), self.segments, self.workers if self.workers > 0 else (os.cpu_count() or 1))
+        totals: Dict[str, int] = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for index in pending:
+                start_frame, end_frame = segments[index]
+                segment_end = None if index == len(segments) - 1 else end_frame
+                future = executor.submit(self.process_segment, input_path, manifest.partial_path(index),
+                                         start_frame, segment_end, fps, frame_size, watermark_areas, mask)
+                futures[future] = index
+            
+            for future in self._wait_segments(futures, cancel_event):
+                index = futures[future]
+                segment_count, segment_stats = future.result()
+                manifest.mark_complete(index, segments[index][0], segment_count)
+                self._merge_segment_stats(totals, segment_stats)
+                report(segment_count)
+        
+        self._log_segment_stats(totals)
+    
+    def remove_video_watermark(self, input_path: str, output_path: str,
+                               watermark_areas: Optional[List[WatermarkArea]] = None,
+                               progress_callback: Optional[Callable[[int], None]] = None,
+                               cancel_event: Optional[threading.Event] = None) -> bool:
         """
         remove_video_watermark 功能说明:
-        # 去除视频中的水印
-        # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径] | 输出: [bool 处理是否成功]
+        # 去除视频中的水印，指定水印区域时只处理区域裁剪块，配置分段数时分段并行处理，
+        # 配置检查点帧数且视频超过一段时分段写出检查点，中断后重新运行从最后完成的分段继续
+        # progress_callback在处理线程中调用，参数为新增帧数；cancel_event被设置后停止读取新帧，删除未完成的输出并返回False；
+        # 处理异常时同样删除未完成的输出，不留下截断的文件
+        # 输入: [input_path: str 输入视频路径, output_path: str 输出视频路径, watermark_areas: List[WatermarkArea] 水印区域列表,
+        #        progress_callback: Callable 进度回调, cancel_event: threading.Event 取消信号] | 输出: [bool 处理是否成功]
         """
+        cap = None
+        out = None
+        requested_areas = watermark_areas
+        status = 'failed'
+        self.stage_timer.reset()
+        VIDEOS_IN_PROGRESS.inc()
         try:
             # 打开输入视频
             cap = cv2.VideoCapture(input_path)
@@ -144,60 +1182,231 @@ class WatermarkRemover:
                 print(f"❌ 无法打开视频文件: {input_path}")
                 return False
             
-            # 获取视频属性
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
+            # 获取视频属性（帧率保留小数，避免29.97等帧率截断导致时长偏差）
+            fps = cap.get(cv2.CAP_PROP_FPS)
             width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
-            print(f"📹 视频信息: {width}x{height}, {fps}fps, {total_frames}帧")
+            print(f"📹 视频信息: {width}x{height}, {fps:g}fps, {total_frames}帧")
             
-            # 设置视频编码器
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            # 定位索引在主进程中建立一次，分段工作进程直接加载
+            if self.seek_index and (self.mask_mode == 'static' or self.segments > 1 or self.checkpoint_frames > 0):
+                with self.stage_timer.stage('seek_index'):
+                    self._load_seek_index(input_path)
             
-            if not out.isOpened():
-                print(f"❌ 无法创建输出视频文件: {output_path}")
-                cap.release()
-                return False
+            # 静态模式下每个视频只估计一次掩码
+            static_mask = None
+            if self.mask_mode == 'static':
+                with self.stage_timer.stage('mask_estimation'):
+                    static_mask = self.estimate_static_mask(input_path, watermark_areas)
+                if static_mask is None:
+                    print("⚠️  静态掩码估计失败，回退到逐帧检测")
+                elif not watermark_areas:
+                    # 整帧静态掩码只需修复掩码外接矩形的扩展裁剪块，结果与整帧修复一致
+                    x, y, w, h = cv2.boundingRect(static_mask)
+                    watermark_areas = [(x, y, x + w, y + h)]
             
-            # 处理每一帧
-            frame_count = 0
-            with tqdm(total=total_frames, desc="处理进度", unit="帧") as pbar:
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    # 处理当前帧
-                    processed_frame = self.process_frame(frame)
-                    
-                    # 写入输出视频
-                    out.write(processed_frame)
-                    
-                    frame_count += 1
-                    pbar.update(1)
-            
-            # 释放资源
-            cap.release()
-            out.release()
+            if cancel_event is not None and cancel_event.is_set():
+                raise ProcessingCancelled()
+            
+            if self.checkpoint_frames > 0 and total_frames > self.checkpoint_frames:
+                # 断点续处理：固定帧数分段写出检查点
+                cap.release()
+                frame_count = self.remove_video_watermark_checkpointed(
+                    input_path, output_path, fps, (width, height), total_frames, watermark_areas, static_mask,
+                    requested_areas, progress_callback, cancel_event
+                )
+                mode = f"断点续处理x{self.checkpoint_frames}帧" + (f", 并行{self.segments}进程" if self.segments > 1 else "")
+            elif self.segments > 1 and total_frames > 1:
+                # 分段并行处理：各工作进程独立解码和编码
+                cap.release()
+                frame_count = self.remove_video_watermark_segmented(
+                    input_path, output_path, fps, (width, height), total_frames, watermark_areas, static_mask,
+                    progress_callback, cancel_event
+                )
+                mode = f"分段x{self.segments}"
+            else:
+                # 设置视频编码器
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+                
+                if not out.isOpened():
+                    print(f"❌ 无法创建输出视频文件: {output_path}")
+                    return False
+                
+                # 区域缓存和自适应掩码缓存依赖帧顺序，只在顺序模式下启用
+                region_cache = None
+                if self.region_cache:
+                    if self.execution_mode == 'serial':
+                        region_cache = RegionCache(self.region_cache_tolerance)
+                    else:
+                        print("⚠️  区域缓存需要按帧顺序处理，并行模式下已禁用")
+                mask_cache = None
+                if self.mask_mode == 'adaptive':
+                    if self.execution_mode == 'serial':
+                        mask_cache = self._create_mask_cache()
+                    else:
+                        print("⚠️  自适应掩码需要按帧顺序处理，并行模式下回退到逐帧检测")
+                temporal_fill = None
+                if self.fill_mode == 'temporal':
+                    if self.execution_mode == 'serial':
+                        temporal_fill = self._create_temporal_fill()
+                    else:
+                        print("⚠️  时域填充需要按帧顺序处理，并行模式下回退到图像修复")
+                
+                # 处理每一帧（顺序或并行流水线，输出顺序与输入一致）
+                process_func = partial(self.process_frame, watermark_areas=watermark_areas, mask=static_mask,
+                                       region_cache=region_cache, mask_cache=mask_cache,
+                                       temporal_fill=temporal_fill)
+                pipeline = FramePipeline(process_func, self.workers, self.execution_mode)
+                read_frame = self._cancellable_reader(self.stage_timer.wrap('decode', cap.read), cancel_event)
+                write_frame = self.stage_timer.wrap('write', out.write)
+                with tqdm(total=total_frames, desc="处理进度", unit="帧") as pbar:
+                    frame_count = pipeline.run(read_frame, write_frame,
+                                               self._progress_reporter(pbar, progress_callback))
+                mode = self.execution_mode
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ProcessingCancelled()
+                
+                if region_cache is not None:
+                    self._log_region_cache_stats(region_cache.hits, region_cache.misses)
+                if mask_cache is not None:
+                    self._log_mask_refresh_stats(mask_cache.get_stats())
+                if temporal_fill is not None:
+                    self._log_temporal_fill_stats(temporal_fill.get_stats())
             
             print(f"✅ 视频处理完成: {output_path}")
-            print(f"📊 处理统计: 共处理 {frame_count} 帧")
+            print(f"📊 处理统计: 共处理 {frame_count} 帧 (执行模式: {mode})")
+            
+            stage_summary = self.stage_timer.format_summary()
+            if stage_summary:
+                if self.execution_mode == 'process' and self.segments <= 1:
+                    print("ℹ️  进程池模式下工作进程内的阶段耗时不计入统计")
+                print(f"⏱️  分阶段耗时:\n{stage_summary}")
             
+            status = 'completed'
             return True
             
+        except ProcessingCancelled:
+            # 先关闭输出文件再删除未完成的输出；分段和断点续处理模式在拼接前取消，不会写出输出文件
+            if out is not None:
+                out.release()
+                out = None
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+            print(f"⏹️  视频处理已取消: {input_path}")
+            log_info(f"⏹️ 视频处理已取消: {input_path}")
+            status = 'cancelled'
+            return False
+            
         except Exception as e:
+            # 与取消相同：先关闭再删除写了一半的输出，避免截断的文件被当作已有输出
+            if out is not None:
+                out.release()
+                out = None
+                if os.path.exists(output_path):
+                    os.remove(output_path)
             print(f"❌ 视频处理失败: {str(e)}")
             return False
         
         finally:
             # 确保资源被释放
-            try:
+            if cap is not None:
                 cap.release()
+            if out is not None:
                 out.release()
-            except:
-                pass
+            self.release_buffers()
+            VIDEOS_IN_PROGRESS.dec()
+            VIDEOS_PROCESSED.inc(status=status)
+    
+    def _load_seek_index(self, input_path: str) -> Optional[SeekIndex]:
+        """
+        _load_seek_index 功能说明:
+        # 启用定位索引时从temp_dir加载视频的定位索引，不存在或视频已变化时扫描建立；未启用或无法建立时返回None
+        # 输入: [input_path: str 输入视频路径] | 输出: [Optional[SeekIndex] 定位索引]
+        """
+        if not self.seek_index:
+            return None
+        return SeekIndex.load_or_build(input_path, self.temp_dir)
+    
+    def _log_region_cache_stats(self, hits: int, misses: int) -> None:
+        """
+        _log_region_cache_stats 功能说明:
+        # 将区域缓存命中和未命中次数写入日志
+        # 输入: [hits: int 命中次数, misses: int 未命中次数] | 输出: [无]
+        """
+        total = hits + misses
+        hit_rate = hits / total * 100 if total else 0.0
+        log_info(f"♻️ 区域缓存统计: 命中 {hits}, 未命中 {misses}, 命中率 {hit_rate:.1f}%")
+    
+    def _create_mask_cache(self) -> Optional[MaskRefreshCache]:
+        """
+        _create_mask_cache 功能说明:
+        # 自适应掩码模式下为每个视频(或分段)创建掩码缓存，其他模式返回None
+        # 输入: [无] | 输出: [Optional[MaskRefreshCache] 掩码缓存]
+        """
+        if self.mask_mode != 'adaptive':
+            return None
+        return MaskRefreshCache(self.scene_cut_threshold, self.mask_refresh_interval)
+    
+    def _log_mask_refresh_stats(self, stats: Dict[str, float]) -> None:
+        """
+        _log_mask_refresh_stats 功能说明:
+        # 打印并记录自适应掩码的刷新次数(镜头切换/定时)和刷新率，用于按片源调整阈值和间隔
+        # 输入: [stats: Dict 掩码刷新统计] | 输出: [无]
+        """
+        frames = stats.get('frames', 0)
+        refreshes = stats.get('refreshes', 0)
+        refresh_rate = refreshes / frames * 100 if frames else 0.0
+        message = (f"🎭 掩码刷新统计: 处理 {frames} 帧, 刷新 {refreshes} 次 "
+                   f"(镜头切换 {stats.get('scene_cuts', 0)}, 定时 {stats.get('interval_refreshes', 0)}), "
+                   f"刷新率 {refresh_rate:.1f}%")
+        print(message)
+        log_info(message)
+    
+    def _create_temporal_fill(self) -> Optional[TemporalFill]:
+        """
+        _create_temporal_fill 功能说明:
+        # 时域填充模式下为每个视频(或分段)创建时域填充器，其他模式返回None
+        # 输入: [无] | 输出: [Optional[TemporalFill] 时域填充器]
+        """
+        if self.fill_mode != 'temporal':
+            return None
+        return TemporalFill(self.temporal_window)
+    
+    def _log_temporal_fill_stats(self, stats: Dict[str, float]) -> None:
+        """
+        _log_temporal_fill_stats 功能说明:
+        # 打印并记录时域填充的像素数和回退图像修复的像素数，用于判断片源是否适合时域填充
+        # 输入: [stats: Dict 时域填充统计] | 输出: [无]
+        """
+        filled = stats.get('filled_pixels', 0)
+        fallback = stats.get('fallback_pixels', 0)
+        fill_rate = filled / (filled + fallback) * 100 if filled + fallback else 0.0
+        message = f"🎞️ 时域填充统计: 相邻帧填充 {filled} 像素, 回退图像修复 {fallback} 像素, 时域填充率 {fill_rate:.1f}%"
+        print(message)
+        log_info(message)
+    
+    def get_stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        get_stage_stats 功能说明:
+        # 获取最近一次视频处理的分阶段耗时统计，关闭计时时为空字典
+        # 输入: [无] | 输出: [Dict 阶段名称到次数、总耗时、p50、p95、最大值(毫秒)的字典]
+        """
+        return self.stage_timer.get_stats()
+    
+    def remove_watermark(self, video_path: str, output_path: str,
+                         watermark_areas: Optional[List[WatermarkArea]] = None,
+                         progress_callback: Optional[Callable[[int], None]] = None,
+                         cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        remove_watermark 功能说明:
+        # 去除视频水印的统一入口，供GUI和命令行工具调用
+        # 输入: [video_path: str 输入视频路径, output_path: str 输出视频路径, watermark_areas: List[WatermarkArea] 水印区域列表,
+        #        progress_callback: Callable 进度回调(参数为新增帧数), cancel_event: threading.Event 取消信号] | 输出: [bool 处理是否成功]
+        """
+        return self.remove_video_watermark(video_path, output_path, watermark_areas, progress_callback, cancel_event)
 
 
 if __name__ == "__main__":